@@ -0,0 +1,50 @@
+# arbitrex/cancellation.py
+"""
+Cooperative cancellation flags shared by the web process and Celery workers.
+
+Cancelling sets a flag in the cache (Redis); long-running tasks poll it between
+units of work (fetched pages, backtest bars) and stop cleanly, so the worker is
+freed without killing the process.
+"""
+
+import time
+
+from django.core.cache import cache
+
+FLAG_TIMEOUT = 24 * 60 * 60
+
+
+def _key(kind, object_id):
+    return f'cancel:{kind}:{object_id}'
+
+
+def request_cancel(kind, object_id):
+    cache.set(_key(kind, object_id), True, timeout=FLAG_TIMEOUT)
+
+
+def is_cancelled(kind, object_id):
+    return bool(cache.get(_key(kind, object_id)))
+
+
+def clear_cancel(kind, object_id):
+    cache.delete(_key(kind, object_id))
+
+
+def cancel_checker(kind, object_id, every=0.5):
+    """
+    A no-argument callable reporting whether the object was cancelled. The cache is
+    read at most once every `every` seconds, so it can be called on every bar.
+    """
+    next_check = 0.0
+    cancelled = False
+
+    def check():
+        nonlocal next_check, cancelled
+        if not cancelled:
+            now = time.monotonic()
+            if now >= next_check:
+                next_check = now + every
+                cancelled = is_cancelled(kind, object_id)
+        return cancelled
+
+    return check
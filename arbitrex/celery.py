@@ -9,4 +9,7 @@ app = Celery('arbitrex')
 
 app.config_from_object('django.conf:settings', namespace='CELERY')
 
-app.autodiscover_tasks()
\ No newline at end of file
+app.autodiscover_tasks()
+
+# Task duration, outcome and queue wait metrics (connects Celery signal handlers)
+from . import metrics  # noqa: E402,F401
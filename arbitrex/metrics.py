@@ -0,0 +1,264 @@
+# arbitrex/metrics.py
+"""
+Prometheus metrics kept in the cache (Redis), so the web process can export what
+every Celery worker process recorded without a separate monitoring service.
+
+Counters and histogram buckets are plain integer cache keys updated with incr.
+Every series is known up front (tasks, outcomes, assets, intervals), so the
+exporter reads them back with one get_many instead of scanning keys. Celery
+signal handlers at the bottom record task durations, outcomes and queue wait.
+"""
+
+import time
+
+from celery import signals
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseForbidden
+
+KEY_PREFIX = 'metrics'
+
+TASKS = (
+    'run_backtest', 'run_backtest_batch', 'run_backtest_comparison', 'run_analysis_job', 'fetch_and_save_ocl_data',
+    'fetch_import_chunk', 'finish_chunked_import', 'update_rolling_imports', 'tail_rolling_import',
+)
+TASK_OUTCOMES = ('success', 'failure', 'retry', 'revoked')
+# Mirrors the queues in settings and the status/asset/interval choices of the models,
+# which can't be imported here: this module loads with the Celery app, before Django
+QUEUES = ('backtests_short', 'backtests_long', 'imports', 'celery')
+BACKTEST_STATUSES = ('COMPLETED', 'FAILED', 'CANCELLED')
+IMPORT_STATUSES = ('completed', 'failed', 'cancelled')
+ASSETS = ('BTC', 'ETH', 'SOL')
+INTERVALS = ('5m', '15m', '30m', '1h', '4h')
+
+DURATION_BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 900, 1800, 3600)
+WAIT_BUCKETS = (0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 900, 3600)
+
+# name: (type, help, label names, label values per series, buckets)
+METRICS = {
+    'arbitrex_task_total': (
+        'counter', 'Celery task executions by outcome.', ('task', 'outcome'),
+        [(task, outcome) for task in TASKS for outcome in TASK_OUTCOMES], None,
+    ),
+    'arbitrex_task_duration_seconds': (
+        'histogram', 'Celery task run time.', ('task',), [(task,) for task in TASKS], DURATION_BUCKETS,
+    ),
+    'arbitrex_task_queue_wait_seconds': (
+        'histogram', 'Time between publishing a task and a worker starting it.', ('task',),
+        [(task,) for task in TASKS], WAIT_BUCKETS,
+    ),
+    'arbitrex_backtests_total': (
+        'counter', 'Finished single backtests by final status.', ('status',),
+        [(status,) for status in BACKTEST_STATUSES], None,
+    ),
+    'arbitrex_backtest_bars_total': (
+        'counter', 'Bars processed by completed single backtests, across all feeds.', (), [()], None,
+    ),
+    'arbitrex_imports_total': (
+        'counter', 'Finished OCL data imports by final status.', ('status',),
+        [(status,) for status in IMPORT_STATUSES], None,
+    ),
+    'arbitrex_candles_ingested_total': (
+        'counter', 'Candle rows saved by OCL data imports.', ('asset', 'interval'),
+        [(asset, interval) for asset in ASSETS for interval in INTERVALS], None,
+    ),
+}
+
+# Observations are summed in integer microseconds, as cache incr only takes integers
+_SUM_SCALE = 1_000_000
+
+
+def _key(name, label_values, suffix=''):
+    return ':'.join((KEY_PREFIX, name + suffix, *map(str, label_values)))
+
+
+def _incr(key, amount=1):
+    try:
+        cache.incr(key, amount)
+    except ValueError:
+        # First increment of this series; add() keeps a concurrent creator's value
+        cache.add(key, 0, timeout=None)
+        cache.incr(key, amount)
+
+
+def _label_values(name, labels):
+    return tuple(str(labels[label]) for label in METRICS[name][2])
+
+
+def increment(name, amount=1, **labels):
+    """Add to a counter. Unknown label values are dropped rather than creating unbounded series."""
+    values = _label_values(name, labels)
+    if values in METRICS[name][3] and amount:
+        _incr(_key(name, values), int(amount))
+
+
+def observe(name, value, **labels):
+    """Record one observation of a histogram."""
+    values = _label_values(name, labels)
+    if values not in METRICS[name][3]:
+        return
+    buckets = METRICS[name][4]
+    bucket = next((str(bound) for bound in buckets if value <= bound), '+Inf')
+    _incr(_key(name, values + (bucket,), '_bucket'))
+    _incr(_key(name, values, '_sum'), max(int(value * _SUM_SCALE), 0))
+    _incr(_key(name, values, '_count'))
+
+
+def _format_labels(names, values):
+    if not names:
+        return ''
+    pairs = ','.join(f'{name}="{value}"' for name, value in zip(names, values))
+    return '{' + pairs + '}'
+
+
+def _series_keys():
+    keys = []
+    for name, (kind, _, _, series, buckets) in METRICS.items():
+        for values in series:
+            if kind == 'counter':
+                keys.append(_key(name, values))
+            else:
+                keys.extend(_key(name, values + (str(bound),), '_bucket') for bound in (*buckets, '+Inf'))
+                keys.append(_key(name, values, '_sum'))
+                keys.append(_key(name, values, '_count'))
+    return keys
+
+
+def queue_depths():
+    """
+    Messages waiting in each Celery queue, read from the broker; empty if it is unreachable.
+    Each queue is read on its own so one failing read only drops its own gauge.
+    """
+    from arbitrex.celery import app
+
+    depths = {}
+    try:
+        with app.connection_for_read(connect_timeout=2) as connection:
+            channel = connection.default_channel
+            for queue in QUEUES:
+                # A passive queue_declare raises for queues the broker holds no key for,
+                # i.e. every empty queue on Redis; _size reads the list length and gives 0
+                try:
+                    depths[queue] = int(channel._size(queue))
+                except Exception:
+                    continue
+    except Exception:
+        return {}
+    return depths
+
+
+def cache_stats():
+    """Keyspace hits and misses of the Redis cache; empty for other cache backends."""
+    try:
+        from django_redis import get_redis_connection
+        info = get_redis_connection('default').info('stats')
+    except Exception:
+        return {}
+    return {'hits': info.get('keyspace_hits', 0), 'misses': info.get('keyspace_misses', 0)}
+
+
+def render_metrics():
+    """All metrics in the Prometheus text exposition format."""
+    stored = cache.get_many(_series_keys())
+    lines = []
+    for name, (kind, help_text, label_names, series, buckets) in METRICS.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for values in series:
+            labels = _format_labels(label_names, values)
+            if kind == 'counter':
+                lines.append(f'{name}{labels} {stored.get(_key(name, values), 0)}')
+                continue
+            cumulative = 0
+            for bound in (*buckets, '+Inf'):
+                cumulative += stored.get(_key(name, values + (str(bound),), '_bucket'), 0)
+                bucket_labels = _format_labels((*label_names, 'le'), (*values, bound))
+                lines.append(f'{name}_bucket{bucket_labels} {cumulative}')
+            total = stored.get(_key(name, values, '_sum'), 0) / _SUM_SCALE
+            lines.append(f'{name}_sum{labels} {total}')
+            lines.append(f'{name}_count{labels} {stored.get(_key(name, values, "_count"), 0)}')
+
+    depths = queue_depths()
+    if depths:
+        lines.append('# HELP arbitrex_queue_depth Messages waiting in a Celery queue.')
+        lines.append('# TYPE arbitrex_queue_depth gauge')
+        lines.extend(f'arbitrex_queue_depth{{queue="{queue}"}} {depth}' for queue, depth in depths.items())
+
+    stats = cache_stats()
+    if stats:
+        lines.append('# HELP arbitrex_cache_hits_total Redis keyspace hits.')
+        lines.append('# TYPE arbitrex_cache_hits_total counter')
+        lines.append(f'arbitrex_cache_hits_total {stats["hits"]}')
+        lines.append('# HELP arbitrex_cache_misses_total Redis keyspace misses.')
+        lines.append('# TYPE arbitrex_cache_misses_total counter')
+        lines.append(f'arbitrex_cache_misses_total {stats["misses"]}')
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint. With METRICS_TOKEN set, requires it as a bearer token."""
+    from django.conf import settings
+
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return HttpResponseForbidden()
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+# Celery signal handlers. Start times are kept per process by task id; prerun and
+# postrun run in the same worker process (and thread) for a given task.
+
+_started = {}
+
+
+def _task_label(name):
+    label = (name or '').rsplit('.', 1)[-1]
+    return label if label in TASKS else None
+
+
+@signals.before_task_publish.connect
+def _stamp_published(sender=None, headers=None, **kwargs):
+    if headers is not None and _task_label(sender):
+        headers.setdefault('published_at', time.time())
+
+
+@signals.task_prerun.connect
+def _task_started(task_id=None, task=None, **kwargs):
+    label = _task_label(task.name)
+    if label is None:
+        return
+    _started[task_id] = time.perf_counter()
+    published_at = getattr(task.request, 'published_at', None)
+    if published_at:
+        observe('arbitrex_task_queue_wait_seconds', max(time.time() - published_at, 0.0), task=label)
+
+
+@signals.task_postrun.connect
+def _task_finished(task_id=None, task=None, **kwargs):
+    started = _started.pop(task_id, None)
+    label = _task_label(task.name)
+    if label is not None and started is not None:
+        observe('arbitrex_task_duration_seconds', time.perf_counter() - started, task=label)
+
+
+@signals.task_success.connect
+def _task_succeeded(sender=None, **kwargs):
+    if _task_label(sender.name):
+        increment('arbitrex_task_total', task=_task_label(sender.name), outcome='success')
+
+
+@signals.task_failure.connect
+def _task_failed(sender=None, **kwargs):
+    if _task_label(sender.name):
+        increment('arbitrex_task_total', task=_task_label(sender.name), outcome='failure')
+
+
+@signals.task_retry.connect
+def _task_retried(sender=None, **kwargs):
+    if _task_label(sender.name):
+        increment('arbitrex_task_total', task=_task_label(sender.name), outcome='retry')
+
+
+@signals.task_revoked.connect
+def _task_revoked(sender=None, **kwargs):
+    if sender is not None and _task_label(sender.name):
+        increment('arbitrex_task_total', task=_task_label(sender.name), outcome='revoked')
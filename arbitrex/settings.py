@@ -176,6 +176,66 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'UTC'
 
+# Imports mostly wait on HTTP and go to the I/O queue, served by a thread pool worker.
+# Backtests are CPU-bound and go to prefork workers: single backtests are routed per job
+# by their predicted runtime (backtesting/scheduling.py), multi-run tasks to the long queue.
+# See docker-compose.yml for the workers consuming each queue.
+CELERY_TASK_ROUTES = {
+    'data.views.fetch_and_save_ocl_data': {'queue': 'imports'},
+    'data.views.fetch_import_chunk': {'queue': 'imports'},
+    'data.views.finish_chunked_import': {'queue': 'imports'},
+    'data.views.update_rolling_imports': {'queue': 'imports'},
+    'data.views.tail_rolling_import': {'queue': 'imports'},
+    'backtesting.tasks.run_backtest': {'queue': 'backtests_long'},
+    'backtesting.tasks.run_backtest_batch': {'queue': 'backtests_long'},
+    'backtesting.tasks.run_backtest_comparison': {'queue': 'backtests_long'},
+    'backtesting.tasks.run_analysis_job': {'queue': 'backtests_long'},
+}
+
+# Imports and analysis jobs are acknowledged only once they finish (acks_late), and the
+# Redis broker hands an unacknowledged message to another worker after visibility_timeout
+# seconds. It must exceed the longest import or analysis job, or a job still running is
+# started a second time and both runs overwrite the same checkpoint and results. A task
+# lost with its worker is likewise redelivered only after this long.
+BROKER_VISIBILITY_TIMEOUT = int(os.getenv("BROKER_VISIBILITY_TIMEOUT", str(24 * 60 * 60)))
+CELERY_BROKER_TRANSPORT_OPTIONS = {'visibility_timeout': BROKER_VISIBILITY_TIMEOUT}
+
+# Long tasks should not be prefetched by a busy process while another one is idle
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+# Prefork children are replaced after this many tasks or once their resident memory
+# passes this many KiB, so memory fragmented by large backtests is given back
+CELERY_WORKER_MAX_TASKS_PER_CHILD = int(os.getenv("CELERY_WORKER_MAX_TASKS_PER_CHILD", "50"))
+CELERY_WORKER_MAX_MEMORY_PER_CHILD = int(os.getenv("CELERY_WORKER_MAX_MEMORY_PER_CHILD", "1500000"))
+
+# Backtests predicted to finish within this many seconds use the short queue
+SHORT_BACKTEST_SECONDS = int(os.getenv("SHORT_BACKTEST_SECONDS", "60"))
+# Backtests one user may run at once on each queue; the rest wait their turn
+BACKTEST_USER_CONCURRENCY = int(os.getenv("BACKTEST_USER_CONCURRENCY", "2"))
+
+# Processes of the backtests_long worker (its --concurrency in docker-compose.yml)
+BACKTEST_WORKER_CONCURRENCY = int(os.getenv("BACKTEST_WORKER_CONCURRENCY", "4"))
+# Processes used by a single batch/optimization task. 0 shares the CPUs between the
+# long worker's processes (CPUs / BACKTEST_WORKER_CONCURRENCY), so concurrent
+# multi-run tasks don't oversubscribe the machine
+BACKTEST_POOL_PROCESSES = int(os.getenv("BACKTEST_POOL_PROCESSES", "0"))
+
+# Exchange the candle imports fetch from; point it at benchmarks/fake_binance.py to
+# run imports offline. Seconds slept between pages to stay under the rate limit.
+BINANCE_BASE_URL = os.getenv("BINANCE_BASE_URL", "https://api.binance.us")
+BINANCE_PAGE_DELAY = float(os.getenv("BINANCE_PAGE_DELAY", "0.5"))
+
+# Seconds between the beat job appending new candles to rolling imports
+ROLLING_UPDATE_SECONDS = int(os.getenv("ROLLING_UPDATE_SECONDS", "60"))
+CELERY_BEAT_SCHEDULE = {
+    'update-rolling-imports': {
+        'task': 'data.views.update_rolling_imports',
+        'schedule': ROLLING_UPDATE_SECONDS,
+    },
+}
+
+# Bearer token required by the Prometheus /metrics endpoint; empty leaves it open
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
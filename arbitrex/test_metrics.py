@@ -0,0 +1,120 @@
+import datetime
+import time
+from unittest.mock import patch
+
+import pandas as pd
+from celery import signals
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from arbitrex import metrics
+from backtesting.tasks import run_backtest
+from data.models import OCLDataImport
+from data.views import fetch_and_save_ocl_data
+
+
+def sample(text, line_prefix):
+    """Value of the exposition line starting with line_prefix."""
+    for line in text.splitlines():
+        if line.startswith(line_prefix + ' '):
+            return float(line.rsplit(' ', 1)[1])
+    raise AssertionError(f'{line_prefix} not exported')
+
+
+@patch('arbitrex.metrics.cache_stats', return_value={})
+@patch('arbitrex.metrics.queue_depths', return_value={})
+class MetricsTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_counters_and_histograms_render_as_prometheus_text(self, mock_depths, mock_stats):
+        metrics.increment('arbitrex_backtests_total', status='FAILED')
+        metrics.increment('arbitrex_backtests_total', status='FAILED')
+        metrics.increment('arbitrex_candles_ingested_total', 500, asset='BTC', interval='1h')
+        metrics.increment('arbitrex_candles_ingested_total', 5, asset='DOGE', interval='1h')
+        for seconds in (0.2, 3, 7200):
+            metrics.observe('arbitrex_task_duration_seconds', seconds, task='run_backtest')
+
+        text = metrics.render_metrics()
+        self.assertIn('# TYPE arbitrex_task_duration_seconds histogram', text)
+        self.assertEqual(sample(text, 'arbitrex_backtests_total{status="FAILED"}'), 2)
+        self.assertEqual(sample(text, 'arbitrex_backtests_total{status="COMPLETED"}'), 0)
+        self.assertEqual(sample(text, 'arbitrex_candles_ingested_total{asset="BTC",interval="1h"}'), 500)
+        self.assertNotIn('DOGE', text)
+
+        duration = 'arbitrex_task_duration_seconds'
+        self.assertEqual(sample(text, f'{duration}_bucket{{task="run_backtest",le="0.1"}}'), 0)
+        self.assertEqual(sample(text, f'{duration}_bucket{{task="run_backtest",le="0.5"}}'), 1)
+        self.assertEqual(sample(text, f'{duration}_bucket{{task="run_backtest",le="5"}}'), 2)
+        self.assertEqual(sample(text, f'{duration}_bucket{{task="run_backtest",le="3600"}}'), 2)
+        self.assertEqual(sample(text, f'{duration}_bucket{{task="run_backtest",le="+Inf"}}'), 3)
+        self.assertAlmostEqual(sample(text, f'{duration}_sum{{task="run_backtest"}}'), 7203.2)
+        self.assertEqual(sample(text, f'{duration}_count{{task="run_backtest"}}'), 3)
+
+    def test_signals_record_queue_wait_duration_and_outcome(self, mock_depths, mock_stats):
+        headers = {}
+        metrics._stamp_published(sender='backtesting.tasks.run_backtest', headers=headers)
+        self.assertIn('published_at', headers)
+
+        run_backtest.push_request(id='task-1', published_at=time.time() - 3)
+        try:
+            signals.task_prerun.send(sender=run_backtest, task_id='task-1', task=run_backtest)
+            signals.task_failure.send(sender=run_backtest, task_id='task-1', exception=ValueError())
+            signals.task_postrun.send(sender=run_backtest, task_id='task-1', task=run_backtest)
+        finally:
+            run_backtest.pop_request()
+
+        text = metrics.render_metrics()
+        self.assertEqual(sample(text, 'arbitrex_task_total{task="run_backtest",outcome="failure"}'), 1)
+        self.assertEqual(sample(text, 'arbitrex_task_duration_seconds_count{task="run_backtest"}'), 1)
+        self.assertEqual(sample(text, 'arbitrex_task_queue_wait_seconds_count{task="run_backtest"}'), 1)
+        self.assertGreaterEqual(sample(text, 'arbitrex_task_queue_wait_seconds_sum{task="run_backtest"}'), 3)
+
+    @patch('data.views.iter_historical_data')
+    def test_import_counts_ingested_candles(self, mock_get_historical_data, mock_depths, mock_stats):
+        data_import = OCLDataImport.objects.create(
+            asset='ETH', interval='15m', start_date=datetime.date(2024, 1, 1), end_date=datetime.date(2024, 1, 2)
+        )
+        now = timezone.now()
+        mock_get_historical_data.return_value = [pd.DataFrame({
+            'Date': [now - datetime.timedelta(minutes=15 * i) for i in range(3, 0, -1)],
+            'Open': [1.0] * 3, 'High': [1.0] * 3, 'Low': [1.0] * 3, 'Close': [1.0] * 3, 'Volume': [1.0] * 3,
+        })]
+
+        fetch_and_save_ocl_data(data_import.id)
+
+        text = metrics.render_metrics()
+        self.assertEqual(sample(text, 'arbitrex_candles_ingested_total{asset="ETH",interval="15m"}'), 3)
+        self.assertEqual(sample(text, 'arbitrex_imports_total{status="completed"}'), 1)
+
+    def test_endpoint(self, mock_depths, mock_stats):
+        mock_depths.return_value = {'backtests_long': 4}
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        self.assertEqual(sample(response.content.decode(), 'arbitrex_queue_depth{queue="backtests_long"}'), 4)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_endpoint_requires_token_when_configured(self, mock_depths, mock_stats):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+
+
+class QueueDepthsTestCase(TestCase):
+
+    def test_empty_queues_read_as_zero_next_to_busy_ones(self):
+        from kombu import Connection
+
+        from arbitrex.celery import app
+
+        with patch.object(app, 'connection_for_read', side_effect=lambda **kwargs: Connection('memory://')):
+            with Connection('memory://') as connection:
+                connection.SimpleQueue('imports').put({'task': 'fetch'})
+                depths = metrics.queue_depths()
+                connection.SimpleQueue('imports').clear()
+
+        self.assertEqual(depths, {'backtests_short': 0, 'backtests_long': 0, 'imports': 1, 'celery': 0})
@@ -5,6 +5,7 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from django.http import HttpResponse
+from arbitrex.metrics import metrics_view
 import os
 
 def debug_static(request):
@@ -29,6 +30,7 @@ urlpatterns = [
     path('data/', include('data.urls')),
     path("", include("dashboard.urls")),
     path('debug-static/', debug_static),
+    path('metrics', metrics_view, name='metrics'),
 ]
 
 if settings.DEBUG:
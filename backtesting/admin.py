@@ -1,10 +1,48 @@
 # backtesting/admin.py
 
 from django.contrib import admin
-from .models import BacktestResult
+from .models import BacktestResult, BacktestBatch, BacktestComparison, AnalysisJob
+from .instrumentation import aggregate_timings
 
 @admin.register(BacktestResult)
 class BacktestResultAdmin(admin.ModelAdmin):
+    list_display = ('id', 'strategy', 'user', 'status', 'algo_return', 'algo_max_drawdown', 'algo_sortino_ratio', 'wall_ms', 'bars_per_second', 'created_at', 'completed_at')
+    list_filter = ('status', 'strategy', 'user')
+    search_fields = ('strategy__name', 'user__username')
+    change_list_template = 'admin/backtesting/backtestresult/change_list.html'
+
+    # Phase timing statistics cover at most this many of the filtered backtests
+    TIMING_SAMPLE = 1000
+
+    @admin.display(description='Wall (ms)')
+    def wall_ms(self, obj):
+        return round(obj.timings['total_wall_ms']) if obj.timings else None
+
+    @admin.display(description='Bars/s')
+    def bars_per_second(self, obj):
+        return (obj.timings or {}).get('bars_per_second')
+
+    def changelist_view(self, request, extra_context=None):
+        response = super().changelist_view(request, extra_context)
+        changelist = getattr(response, 'context_data', {}).get('cl')
+        if changelist is not None:
+            timings = changelist.queryset.filter(timings__isnull=False).order_by('-id').values_list('timings', flat=True)
+            response.context_data['timing_stats'] = aggregate_timings(list(timings[:self.TIMING_SAMPLE]))
+        return response
+
+@admin.register(BacktestBatch)
+class BacktestBatchAdmin(admin.ModelAdmin):
     list_display = ('id', 'strategy', 'user', 'status', 'created_at', 'completed_at')
     list_filter = ('status', 'strategy', 'user')
+    search_fields = ('strategy__name', 'user__username')
+
+@admin.register(BacktestComparison)
+class BacktestComparisonAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'ocl_data_import', 'status', 'created_at', 'completed_at')
+    list_filter = ('status', 'user')
+
+@admin.register(AnalysisJob)
+class AnalysisJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'kind', 'strategy', 'user', 'status', 'created_at', 'completed_at')
+    list_filter = ('kind', 'status', 'user')
     search_fields = ('strategy__name', 'user__username')
\ No newline at end of file
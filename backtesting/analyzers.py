@@ -1,66 +1,188 @@
 # backtesting/analyzers.py
 
 import backtrader as bt
+import numpy as np
+
+from .metrics import format_epoch_seconds
+
+# Backtrader stores datetimes as float days since 0001-01-01 (proleptic ordinal)
+EPOCH_ORDINAL = 719163.0
+SECONDS_PER_DAY = 86400.0
+
+SIDE_LABELS = {1: 'buy', -1: 'sell'}
+
+
+def bt_num_to_epoch(nums):
+    """Vectorized conversion of backtrader float dates to epoch seconds."""
+    nums = np.asarray(nums, dtype=np.float64)
+    return np.rint((nums - EPOCH_ORDINAL) * SECONDS_PER_DAY).astype(np.int64)
+
+
+class ColumnBuffer:
+    """
+    Array-backed event store for analyzers.
+    Rows live in one preallocated NumPy record array that doubles when full,
+    so appends never allocate per row. Output is columnar.
+    """
+    def __init__(self, dtypes, capacity=1024):
+        self.dtype = np.dtype(list(dtypes.items()))
+        self.data = np.empty(capacity, dtype=self.dtype)
+        self.size = 0
+
+    @property
+    def capacity(self):
+        return len(self.data)
+
+    def _grow(self):
+        grown = np.empty(len(self.data) * 2, dtype=self.dtype)
+        grown[:self.size] = self.data[:self.size]
+        self.data = grown
+
+    def append(self, *values):
+        i = self.size
+        if i == len(self.data):
+            self._grow()
+        self.data[i] = values
+        self.size = i + 1
+
+    def as_columns(self):
+        rows = self.data[:self.size]
+        return {name: np.ascontiguousarray(rows[name]) for name in self.dtype.names}
+
+
+def columns_to_records(columns, time_key='time', side_key='side'):
+    """
+    Serialize columnar analyzer output into JSON-ready records.
+    Epoch times are formatted as strings and sides as 'buy'/'sell' only here.
+    """
+    if not columns or len(columns[time_key]) == 0:
+        return []
+
+    fields = {}
+    for name, column in columns.items():
+        if name == time_key:
+            fields['time'] = format_epoch_seconds(column)
+        elif name == side_key:
+            fields['type'] = [SIDE_LABELS[int(s)] for s in column]
+        else:
+            fields[name] = column.tolist()
+
+    keys = list(fields)
+    return [dict(zip(keys, row)) for row in zip(*fields.values())]
+
 
 class PortfolioValueAnalyzer(bt.Analyzer):
     """Tracks portfolio value over time."""
     def __init__(self):
-        self.values = []
+        self.buffer = ColumnBuffer({'time': np.float64, 'portfolio_value': np.float64}, capacity=4096)
 
     def next(self):
-        dt = self.datas[0].datetime.datetime(0)
-        value = self.strategy.broker.getvalue()
-        self.values.append({
-            'time': dt.strftime('%Y-%m-%d %H:%M:%S'),
-            'portfolio_value': value
-        })
+        # Keep the raw backtrader date number; conversion to epoch happens once, vectorized
+        self.buffer.append(self.datas[0].datetime[0], self.strategy.broker.getvalue())
 
     def get_analysis(self):
-        return self.values
+        columns = self.buffer.as_columns()
+        return {
+            'time': bt_num_to_epoch(columns['time']),
+            'portfolio_value': columns['portfolio_value']
+        }
+
+def feed_positions(strategy):
+    """Map each data feed (by identity, line objects overload ==) to its index in strategy.datas."""
+    return {id(data): i for i, data in enumerate(strategy.datas)}
+
 
 class TradeListAnalyzer(bt.Analyzer):
     """Captures detailed trade information."""
     def __init__(self):
-        self.trades = []
+        self.feeds = feed_positions(self.strategy)
+        self.buffer = ColumnBuffer({
+            'time': np.float64,
+            'feed': np.int16,
+            'side': np.int8,
+            'price': np.float64,
+            'size': np.float64,
+            'pnl': np.float64,
+            'bars': np.int64,
+            'portfolio_value': np.float64,
+        })
 
     def notify_trade(self, trade):
         if trade.isclosed:
-            trade_details = {
-                'datetime': self.strategy.datas[0].datetime.datetime(0),
-                'type': 'buy' if trade.size > 0 else 'sell',
-                'price': trade.price,
-                'size': trade.size,
-                'portfolio_value': self.strategy.broker.getvalue()
-            }
-            self.trades.append(trade_details)
+            self.buffer.append(
+                self.strategy.datas[0].datetime[0],
+                self.feeds[id(trade.data)],
+                1 if trade.size > 0 else -1,
+                trade.price,
+                trade.size,
+                trade.pnlcomm,
+                trade.barlen,
+                self.strategy.broker.getvalue()
+            )
 
     def get_analysis(self):
-        return {'trades': self.trades}
+        columns = self.buffer.as_columns()
+        columns['time'] = bt_num_to_epoch(columns['time'])
+        return columns
 
 class OrderListAnalyzer(bt.Analyzer):
     """Captures detailed order execution information."""
     def __init__(self):
-        self.orders = []
+        self.feeds = feed_positions(self.strategy)
+        self.buffer = ColumnBuffer({
+            'time': np.float64,
+            'feed': np.int16,
+            'side': np.int8,
+            'price': np.float64,
+            'size': np.float64,
+            'portfolio_value': np.float64,
+        })
 
     def notify_order(self, order):
-        if order.status in [order.Completed]:
-            try:
-                # Get the current datetime from the strategy
-                dt = self.strategy.datetime.datetime()
-                
-                order_details = {
-                    'datetime': dt,  # Using strategy's current datetime
-                    'type': 'buy' if order.isbuy() else 'sell',
-                    'price': order.executed.price,
-                    'size': order.executed.size,
-                    'portfolio_value': self.strategy.broker.getvalue()
-                }
-                self.orders.append(order_details)
-                print(f"Order Executed: {order_details}")  # Debug statement
-            except Exception as e:
-                print(f"Error in OrderListAnalyzer.notify_order: {str(e)}")
-                print(f"Order status: {order.status}")
-                print(f"Order info: {order}")
+        if order.status == order.Completed:
+            self.buffer.append(
+                self.strategy.datetime[0],
+                self.feeds[id(order.data)],
+                1 if order.isbuy() else -1,
+                order.executed.price,
+                order.executed.size,
+                self.strategy.broker.getvalue()
+            )
+
+    def get_analysis(self):
+        columns = self.buffer.as_columns()
+        columns['time'] = bt_num_to_epoch(columns['time'])
+        return columns
+
+class DrawdownStop(bt.Analyzer):
+    """Stops the whole run once the portfolio falls max_drawdown percent below its peak."""
+    params = (('max_drawdown', 100.0),)
+
+    def __init__(self):
+        self.peak = 0.0
+        self.stopped_at = None
+
+    def next(self):
+        value = self.strategy.broker.getvalue()
+        self.peak = max(self.peak, value)
+        if self.stopped_at is None and value < self.peak * (1 - self.p.max_drawdown / 100):
+            self.stopped_at = len(self.strategy)
+            self.strategy.env.runstop()
+
+    def get_analysis(self):
+        return {'stopped': self.stopped_at is not None, 'stopped_at': self.stopped_at}
+
+class CancelStop(bt.Analyzer):
+    """Stops the whole run once check() reports a cancellation, see arbitrex/cancellation.py."""
+    params = (('check', None),)
+
+    def __init__(self):
+        self.cancelled_at = None
+
+    def next(self):
+        if self.cancelled_at is None and self.p.check():
+            self.cancelled_at = len(self.strategy)
+            self.strategy.env.runstop()
 
     def get_analysis(self):
-        return {'orders': self.orders}
\ No newline at end of file
+        return {'cancelled': self.cancelled_at is not None, 'cancelled_at': self.cancelled_at}
@@ -0,0 +1,160 @@
+# backtesting/feeds.py
+
+import time
+
+import backtrader as bt
+import numpy as np
+
+from data.utils import TIMEFRAME_SECONDS
+from .analyzers import EPOCH_ORDINAL, SECONDS_PER_DAY
+
+PRICE_LINES = ('open', 'high', 'low', 'close', 'volume', 'openinterest')
+EXTRA_LINES = ('filled',)
+
+
+def datetime64_to_bt_num(dates):
+    """Vectorized equivalent of bt.date2num for naive UTC datetime64 arrays."""
+    micros = np.asarray(dates).astype('datetime64[us]').astype(np.int64)
+    return micros / (SECONDS_PER_DAY * 1e6) + EPOCH_ORDINAL
+
+
+def frame_to_arrays(df):
+    """
+    View the columns of a candle DataFrame (Date/Open/High/Low/Close/Volume) as NumPy arrays.
+    """
+    arrays = {
+        'datetime': df['Date'].to_numpy(),
+        'open': df['Open'].to_numpy(dtype=np.float64),
+        'high': df['High'].to_numpy(dtype=np.float64),
+        'low': df['Low'].to_numpy(dtype=np.float64),
+        'close': df['Close'].to_numpy(dtype=np.float64),
+        'volume': df['Volume'].to_numpy(dtype=np.float64),
+    }
+    if 'Filled' in df:
+        arrays['filled'] = df['Filled'].to_numpy(dtype=np.float64)
+    return arrays
+
+
+def shared_feed_arrays(arrays):
+    """
+    Convert feed arrays once for reuse across several Cerebro runs: dates become
+    backtrader date numbers and price columns contiguous float64, so each run's
+    start and preload are plain slicing and memcpy.
+    """
+    shared = {name: np.ascontiguousarray(column, dtype=np.float64) for name, column in arrays.items() if name != 'datetime'}
+    shared['datetime'] = np.ascontiguousarray(datetime64_to_bt_num(arrays['datetime']))
+    return shared
+
+
+def ocl_arrays_to_feed(arrays):
+    """
+    Rename data.loaders output ('date' column) to the NumpyData layout without copying.
+    """
+    feed = {name: column for name, column in arrays.items() if name != 'date'}
+    feed['datetime'] = arrays['date']
+    return feed
+
+
+def aggregate_arrays(arrays, seconds):
+    """
+    Aggregate candle arrays into UTC-aligned buckets of the given width, vectorized.
+
+    Each bucket is stamped with the datetime of its last constituent bar, so during a
+    run it only becomes visible once that bar has closed (no lookahead).
+    """
+    dates = np.asarray(arrays['datetime']).astype('datetime64[s]')
+    if not len(dates):
+        return {name: np.asarray(arrays[name])[:0] for name in ('datetime',) + PRICE_LINES[:5]}
+
+    buckets = dates.astype(np.int64) // seconds
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(dates)] - 1
+    return {
+        'datetime': np.asarray(arrays['datetime'])[ends],
+        'open': np.asarray(arrays['open'])[starts],
+        'high': np.maximum.reduceat(arrays['high'], starts),
+        'low': np.minimum.reduceat(arrays['low'], starts),
+        'close': np.asarray(arrays['close'])[ends],
+        'volume': np.add.reduceat(arrays['volume'], starts),
+    }
+
+
+def timeframe_params(seconds):
+    """Backtrader timeframe/compression for a bar width in seconds."""
+    if seconds % TIMEFRAME_SECONDS['1d'] == 0:
+        return {'timeframe': bt.TimeFrame.Days, 'compression': seconds // TIMEFRAME_SECONDS['1d']}
+    return {'timeframe': bt.TimeFrame.Minutes, 'compression': seconds // 60}
+
+
+class NumpyData(bt.feed.DataBase):
+    """
+    Data feed over contiguous NumPy arrays.
+
+    dataname is a mapping with a 'datetime' array (naive UTC datetime64, or
+    backtrader date numbers as produced by shared_feed_arrays) and
+    float arrays for 'open', 'high', 'low', 'close', 'volume' and optionally
+    'openinterest' and 'filled'. Arrays may be memory-mapped (np.load(..., mmap_mode='r')).
+
+    The extra 'filled' line is 1.0 on bars forward-filled during multi-feed alignment.
+
+    When preloading without filters the arrays are copied into backtrader's
+    line buffers in bulk, one memcpy per line, instead of bar by bar.
+    """
+    lines = EXTRA_LINES
+
+    def _start(self):
+        # fromdate/todate are only resolved once the base class has finished starting
+        super()._start()
+        arrays = self.p.dataname
+
+        dates = np.asarray(arrays['datetime'])
+        dtnums = dates if dates.dtype.kind == 'f' else datetime64_to_bt_num(dates)
+        # Honour fromdate/todate by slicing instead of discarding bars one at a time
+        first = np.searchsorted(dtnums, self.fromdate, side='left')
+        last = np.searchsorted(dtnums, self.todate, side='right')
+
+        self._columns = {'datetime': np.ascontiguousarray(dtnums[first:last])}
+        for name in PRICE_LINES + EXTRA_LINES:
+            if name in arrays:
+                column = np.asarray(arrays[name], dtype=np.float64)[first:last]
+            else:
+                column = np.full(last - first, np.nan if name in PRICE_LINES else 0.0)
+            self._columns[name] = np.ascontiguousarray(column)
+        self._idx = -1
+        self.preload_seconds = 0.0
+
+    def _can_bulk_load(self):
+        return (
+            not self._filters
+            and not self._ffilters
+            and self._tzinput is None
+            and self.lines.datetime.mode == bt.LineBuffer.UnBounded
+        )
+
+    def preload(self):
+        started = time.perf_counter()
+        if not self._can_bulk_load():
+            super().preload()
+        else:
+            for name, column in self._columns.items():
+                getattr(self.lines, name).array.frombytes(memoryview(column).cast('B'))
+            self._idx = len(self._columns['datetime']) - 1
+
+            self._last()
+            self.home()
+        self.preload_seconds = time.perf_counter() - started
+
+    def memory_bytes(self):
+        """Bytes held by the source columns plus backtrader's line buffers."""
+        columns = sum(column.nbytes for column in self._columns.values())
+        buffers = sum(len(line.array) * line.array.itemsize for line in self.lines)
+        return columns + buffers
+
+    def _load(self):
+        self._idx += 1
+        if self._idx >= len(self._columns['datetime']):
+            return False
+
+        for name, column in self._columns.items():
+            getattr(self.lines, name)[0] = column[self._idx]
+        return True
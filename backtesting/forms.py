@@ -4,6 +4,9 @@ from django import forms
 
 from strategies.models import Strategy
 from data.models import OCLDataImport
+from .feeds import TIMEFRAME_SECONDS
+from .models import BacktestResult, AnalysisJob
+from .optimization import clean_config, has_trade_pnl, LEGACY_TRADES_ERROR, TRADE_LIST_ANALYSES
 
 import json
 
@@ -38,6 +41,43 @@ class BacktestForm(forms.Form):
         widget=forms.Select(attrs={'class': 'mt-1 block w-full p-2 bg-gray-50 border border-gray-300 rounded-md shadow-sm focus:outline-none focus:ring-indigo-500 focus:border-indigo-500'})
     )
 
+    additional_data_imports = forms.ModelMultipleChoiceField(
+        queryset=OCLDataImport.objects.all().order_by('-created_at'),
+        required=False,
+        help_text="Extra feeds for multi-asset strategies, available as self.datas[1:].",
+        widget=forms.SelectMultiple(attrs={'class': 'mt-1 block w-full p-2 bg-gray-50 border border-gray-300 rounded-md shadow-sm focus:outline-none focus:ring-indigo-500 focus:border-indigo-500'})
+    )
+
+    extra_timeframes = forms.MultipleChoiceField(
+        choices=TIMEFRAME_CHOICES,
+        required=False,
+        help_text="Coarser timeframes derived from the data import, available by name (e.g. self.getdatabyname('4h')).",
+        widget=forms.CheckboxSelectMultiple(attrs={'class': 'h-4 w-4 text-indigo-600 border-gray-300 rounded focus:ring-indigo-500'})
+    )
+
+    start_date = forms.DateTimeField(
+        required=False,
+        widget=forms.DateTimeInput(attrs={
+            'type': 'datetime-local',
+            'class': 'p-2 mt-1 block w-full bg-gray-50 border border-gray-300 rounded-md shadow-sm focus:outline-none focus:ring-indigo-500 focus:border-indigo-500'
+        })
+    )
+
+    end_date = forms.DateTimeField(
+        required=False,
+        widget=forms.DateTimeInput(attrs={
+            'type': 'datetime-local',
+            'class': 'p-2 mt-1 block w-full bg-gray-50 border border-gray-300 rounded-md shadow-sm focus:outline-none focus:ring-indigo-500 focus:border-indigo-500'
+        })
+    )
+
+    warmup_bars = forms.IntegerField(
+        required=False,
+        initial=0,
+        min_value=0,
+        widget=forms.NumberInput(attrs={'class': 'p-2 mt-1 block w-full bg-gray-50 border border-gray-300 rounded-md shadow-sm focus:outline-none focus:ring-indigo-500 focus:border-indigo-500'})
+    )
+
     commission = forms.FloatField(
         required=False,
         initial=0.1,
@@ -56,6 +96,12 @@ class BacktestForm(forms.Form):
         widget=forms.NumberInput(attrs={'class': 'p-2 mt-1 block w-full bg-gray-50 border border-gray-300 rounded-md shadow-sm focus:outline-none focus:ring-indigo-500 focus:border-indigo-500'})
     )
 
+    profile = forms.BooleanField(
+        required=False,
+        help_text="Profile cerebro.run() with cProfile and show where the time went. Makes the run slower.",
+        widget=forms.CheckboxInput(attrs={'class': 'h-4 w-4 text-indigo-600 border-gray-300 rounded focus:ring-indigo-500'})
+    )
+
     def clean_parameters(self):
         data = self.cleaned_data.get('parameters')
         if data is None:
@@ -65,4 +111,135 @@ class BacktestForm(forms.Form):
                 return json.loads(data)
             except json.JSONDecodeError:
                 raise forms.ValidationError("Invalid JSON format.")
-        return data
\ No newline at end of file
+        return data
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start_date = cleaned_data.get('start_date')
+        end_date = cleaned_data.get('end_date')
+        if start_date and end_date and start_date >= end_date:
+            raise forms.ValidationError("Start date must be before end date.")
+        if cleaned_data.get('warmup_bars') and not start_date:
+            raise forms.ValidationError("Warmup bars require a start date.")
+
+        ocl_data_import = cleaned_data.get('ocl_data_import')
+        if ocl_data_import and cleaned_data.get('extra_timeframes'):
+            base = TIMEFRAME_SECONDS[ocl_data_import.interval]
+            for timeframe in cleaned_data['extra_timeframes']:
+                seconds = TIMEFRAME_SECONDS[timeframe]
+                if seconds <= base or seconds % base:
+                    raise forms.ValidationError(
+                        f"Timeframe {timeframe} must be a multiple of the import interval {ocl_data_import.interval}."
+                    )
+        return cleaned_data
+
+class BacktestBatchForm(forms.Form):
+    strategy = forms.ModelChoiceField(
+        queryset=Strategy.objects.all().order_by('-created_at'),
+        widget=forms.Select(attrs={
+            'class': 'mt-1 block w-full p-2 bg-gray-50 border border-gray-300 rounded-md shadow-sm focus:outline-none focus:ring-indigo-500 focus:border-indigo-500'
+        })
+    )
+
+    data_imports = forms.ModelMultipleChoiceField(
+        queryset=OCLDataImport.objects.filter(status='completed').order_by('asset', 'interval'),
+        widget=forms.SelectMultiple(attrs={
+            'class': 'mt-1 block w-full p-2 bg-gray-50 border border-gray-300 rounded-md shadow-sm focus:outline-none focus:ring-indigo-500 focus:border-indigo-500',
+            'size': 10
+        })
+    )
+
+    commission = forms.FloatField(
+        required=False,
+        initial=0.1,
+        widget=forms.NumberInput(attrs={'class': 'p-2 mt-1 block w-full bg-gray-50 border border-gray-300 rounded-md shadow-sm focus:outline-none focus:ring-indigo-500 focus:border-indigo-500'})
+    )
+
+
+class BacktestComparisonForm(forms.Form):
+    strategies = forms.ModelMultipleChoiceField(
+        queryset=Strategy.objects.all().order_by('-created_at'),
+        widget=forms.SelectMultiple(attrs={
+            'class': 'mt-1 block w-full p-2 bg-gray-50 border border-gray-300 rounded-md shadow-sm focus:outline-none focus:ring-indigo-500 focus:border-indigo-500',
+            'size': 8
+        })
+    )
+
+    ocl_data_import = forms.ModelChoiceField(
+        queryset=OCLDataImport.objects.all().order_by('-created_at'),
+        widget=forms.Select(attrs={'class': 'mt-1 block w-full p-2 bg-gray-50 border border-gray-300 rounded-md shadow-sm focus:outline-none focus:ring-indigo-500 focus:border-indigo-500'})
+    )
+
+    commission = forms.FloatField(
+        required=False,
+        initial=0.1,
+        widget=forms.NumberInput(attrs={'class': 'p-2 mt-1 block w-full bg-gray-50 border border-gray-300 rounded-md shadow-sm focus:outline-none focus:ring-indigo-500 focus:border-indigo-500'})
+    )
+
+
+class AnalysisJobForm(forms.Form):
+    kind = forms.ChoiceField(
+        choices=AnalysisJob.KIND_CHOICES,
+        widget=forms.Select(attrs={'class': 'mt-1 block w-full p-2 bg-gray-50 border border-gray-300 rounded-md shadow-sm focus:outline-none focus:ring-indigo-500 focus:border-indigo-500'})
+    )
+
+    strategy = forms.ModelChoiceField(
+        queryset=Strategy.objects.all().order_by('-created_at'),
+        required=False,
+        widget=forms.Select(attrs={
+            'class': 'mt-1 block w-full p-2 bg-gray-50 border border-gray-300 rounded-md shadow-sm focus:outline-none focus:ring-indigo-500 focus:border-indigo-500'
+        })
+    )
+
+    ocl_data_import = forms.ModelChoiceField(
+        queryset=OCLDataImport.objects.filter(status='completed').order_by('-created_at'),
+        required=False,
+        widget=forms.Select(attrs={'class': 'mt-1 block w-full p-2 bg-gray-50 border border-gray-300 rounded-md shadow-sm focus:outline-none focus:ring-indigo-500 focus:border-indigo-500'})
+    )
+
+    backtest_result = forms.ModelChoiceField(
+        queryset=BacktestResult.objects.filter(status='COMPLETED').order_by('-created_at'),
+        required=False,
+        help_text="Completed backtest whose trades are analyzed (Monte Carlo).",
+        widget=forms.Select(attrs={'class': 'mt-1 block w-full p-2 bg-gray-50 border border-gray-300 rounded-md shadow-sm focus:outline-none focus:ring-indigo-500 focus:border-indigo-500'})
+    )
+
+    commission = forms.FloatField(
+        required=False,
+        initial=0.1,
+        widget=forms.NumberInput(attrs={'class': 'p-2 mt-1 block w-full bg-gray-50 border border-gray-300 rounded-md shadow-sm focus:outline-none focus:ring-indigo-500 focus:border-indigo-500'})
+    )
+
+    config = forms.JSONField(
+        required=False,
+        widget=forms.Textarea(attrs={
+            'class': 'p-2 mt-1 block w-full font-mono text-sm bg-gray-50 border border-gray-300 rounded-md shadow-sm focus:outline-none focus:ring-indigo-500 focus:border-indigo-500',
+            'rows': 8,
+            'placeholder': '{"param_grid": {"fast": [5, 10], "slow": [30, 50]}, "train_bars": 2000, "test_bars": 500}'
+        })
+    )
+
+    def __init__(self, *args, user=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if user is not None:
+            self.fields['backtest_result'].queryset = self.fields['backtest_result'].queryset.filter(user=user)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        kind = cleaned_data.get('kind')
+        if kind in TRADE_LIST_ANALYSES:
+            backtest = cleaned_data.get('backtest_result')
+            if not backtest:
+                self.add_error('backtest_result', "Select the backtest to analyze.")
+            elif not has_trade_pnl(backtest.trade_data or []):
+                self.add_error('backtest_result', LEGACY_TRADES_ERROR)
+        elif kind:
+            for field in ('strategy', 'ocl_data_import'):
+                if not cleaned_data.get(field):
+                    self.add_error(field, "This field is required.")
+        if kind and 'config' not in self.errors:
+            try:
+                cleaned_data['config'] = clean_config(kind, cleaned_data.get('config') or {})
+            except ValueError as e:
+                self.add_error('config', str(e))
+        return cleaned_data
@@ -0,0 +1,187 @@
+# backtesting/instrumentation.py
+"""
+Per-phase timing of a backtest run: wall and CPU time of each phase, bar
+throughput of the Cerebro run and the worker's peak resident memory. Also the
+opt-in cProfile capture of a run and its summary by code category.
+"""
+
+import contextlib
+import cProfile
+import marshal
+import os
+import pstats
+import resource
+import sys
+import time
+
+import backtrader as bt
+import numpy as np
+
+from strategies.utils import STRATEGY_FILENAME
+
+# Phases of run_backtest, in execution order
+PHASES = ('load', 'compile', 'run', 'extract', 'plot', 'save')
+
+# Profile categories, in display order
+PROFILE_CATEGORIES = ('strategy', 'indicators', 'backtrader', 'other')
+PROFILE_TOP_FUNCTIONS = 30
+
+_BACKTRADER_DIR = os.path.dirname(bt.__file__)
+_INDICATOR_PATHS = (
+    os.path.join(_BACKTRADER_DIR, 'indicators') + os.sep,
+    os.path.join(_BACKTRADER_DIR, 'indicator.py'),
+    os.path.join(_BACKTRADER_DIR, 'talib.py'),
+)
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, in MiB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+class PhaseTimer:
+    """Accumulates wall and CPU milliseconds per named phase."""
+
+    def __init__(self):
+        self.phases = {}
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            entry = self.phases.setdefault(name, {'wall_ms': 0.0, 'cpu_ms': 0.0})
+            entry['wall_ms'] += (time.perf_counter() - wall) * 1000
+            entry['cpu_ms'] += (time.process_time() - cpu) * 1000
+
+    def summary(self, bars=None):
+        phases = [
+            {'phase': name, 'wall_ms': round(entry['wall_ms'], 3), 'cpu_ms': round(entry['cpu_ms'], 3)}
+            for name, entry in self.phases.items()
+        ]
+        total_wall = sum(entry['wall_ms'] for entry in phases)
+        for entry in phases:
+            entry['share'] = round(entry['wall_ms'] / total_wall * 100, 1) if total_wall else 0.0
+        run_ms = self.phases.get('run', {}).get('wall_ms')
+        return {
+            'phases': phases,
+            'total_wall_ms': round(total_wall, 3),
+            'total_cpu_ms': round(sum(entry['cpu_ms'] for entry in phases), 3),
+            'bars': bars,
+            'bars_per_second': round(bars / run_ms * 1000, 1) if bars and run_ms else None,
+            'peak_rss_mb': peak_rss_mb(),
+        }
+
+
+def aggregate_timings(timings_list):
+    """
+    Mean, median and 95th percentile of each phase's wall time across runs, plus
+    throughput and memory, for the admin overview. Runs without timings are skipped.
+    """
+    timings_list = [t for t in timings_list if t and t.get('phases')]
+    if not timings_list:
+        return None
+
+    def stats(values):
+        values = np.asarray(values, dtype=float)
+        return {
+            'mean': round(float(values.mean()), 1),
+            'p50': round(float(np.percentile(values, 50)), 1),
+            'p95': round(float(np.percentile(values, 95)), 1),
+        }
+
+    by_phase = {}
+    for timings in timings_list:
+        for entry in timings['phases']:
+            by_phase.setdefault(entry['phase'], []).append(entry)
+    order = [name for name in PHASES if name in by_phase] + [name for name in by_phase if name not in PHASES]
+    total_wall = sum(entry['wall_ms'] for entries in by_phase.values() for entry in entries)
+
+    throughput = [t['bars_per_second'] for t in timings_list if t.get('bars_per_second')]
+    return {
+        'runs': len(timings_list),
+        'phases': [
+            {
+                'phase': name,
+                'runs': len(by_phase[name]),
+                'wall_ms': stats([entry['wall_ms'] for entry in by_phase[name]]),
+                'cpu_ms_mean': round(float(np.mean([entry['cpu_ms'] for entry in by_phase[name]])), 1),
+                'share': round(sum(entry['wall_ms'] for entry in by_phase[name]) / total_wall * 100, 1) if total_wall else 0.0,
+            }
+            for name in order
+        ],
+        'total_wall_ms': stats([t['total_wall_ms'] for t in timings_list]),
+        'bars_per_second': stats(throughput) if throughput else None,
+        'peak_rss_mb_max': max(t.get('peak_rss_mb') or 0 for t in timings_list),
+    }
+
+
+def profile_call(func, *args, **kwargs):
+    """Call func under cProfile; returns (result, profiler)."""
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        result = func(*args, **kwargs)
+    finally:
+        profiler.disable()
+    return result, profiler
+
+
+def profile_category(filename):
+    """User strategy code, backtrader indicators, other backtrader internals, or everything else."""
+    if filename == STRATEGY_FILENAME:
+        return 'strategy'
+    if filename.startswith(_INDICATOR_PATHS):
+        return 'indicators'
+    if filename.startswith(_BACKTRADER_DIR + os.sep):
+        return 'backtrader'
+    return 'other'
+
+
+def _location(filename, lineno):
+    if filename.startswith(_BACKTRADER_DIR + os.sep):
+        filename = 'backtrader/' + os.path.relpath(filename, _BACKTRADER_DIR)
+    elif filename != '~' and os.sep in filename:
+        filename = os.path.basename(filename)
+    return f'{filename}:{lineno}' if lineno else filename
+
+
+def profile_artifact(profiler):
+    """The profile in the pstats file format (what Profile.dump_stats writes)."""
+    profiler.create_stats()
+    return marshal.dumps(profiler.stats)
+
+
+def summarize_profile(profiler, top=PROFILE_TOP_FUNCTIONS):
+    """
+    Self time per category and the functions with the most self time. Self time adds
+    up to the profiled total, so the category split accounts for every millisecond.
+    """
+    stats = pstats.Stats(profiler).stats
+    categories = dict.fromkeys(PROFILE_CATEGORIES, 0.0)
+    functions = []
+    for (filename, lineno, name), (_, calls, self_time, cumulative, _) in stats.items():
+        category = profile_category(filename)
+        categories[category] += self_time
+        functions.append({
+            'function': name,
+            'location': _location(filename, lineno),
+            'category': category,
+            'calls': calls,
+            'self_ms': round(self_time * 1000, 3),
+            'cumulative_ms': round(cumulative * 1000, 3),
+        })
+    total = sum(categories.values())
+    functions.sort(key=lambda entry: entry['self_ms'], reverse=True)
+    return {
+        'total_ms': round(total * 1000, 3),
+        'categories': [
+            {'category': name, 'self_ms': round(seconds * 1000, 3),
+             'share': round(seconds / total * 100, 1) if total else 0.0}
+            for name, seconds in categories.items()
+        ],
+        'functions': functions[:top],
+    }
@@ -0,0 +1,206 @@
+# backtesting/metrics.py
+
+import numpy as np
+
+SECONDS_PER_YEAR = 365 * 24 * 60 * 60
+ROLLING_SHARPE_MAX_POINTS = 1000
+
+
+def _to_epoch_seconds(times):
+    """
+    Convert a sequence of 'YYYY-mm-dd HH:MM:SS' strings or datetimes to epoch seconds.
+    """
+    times = np.asarray(times)
+    if times.size == 0:
+        return np.empty(0, dtype=np.int64)
+    if np.issubdtype(times.dtype, np.integer):
+        return times.astype(np.int64)
+    if np.issubdtype(times.dtype, np.floating):
+        return times.astype(np.int64)
+    return times.astype('datetime64[s]').astype(np.int64)
+
+
+def format_epoch_seconds(times):
+    """
+    Format epoch seconds as 'YYYY-mm-dd HH:MM:SS' strings in a single vectorized call.
+    """
+    stamps = np.datetime_as_string(np.asarray(times, dtype='datetime64[s]'), unit='s')
+    if stamps.size:
+        # ISO strings are fixed width; swap the 'T' separator for a space in place
+        stamps.view(np.uint32).reshape(stamps.size, -1)[:, 10] = ord(' ')
+    return stamps.tolist()
+
+
+def equity_curve_arrays(portfolio_values):
+    """
+    Split PortfolioValueAnalyzer records into (epoch seconds, values) NumPy arrays.
+    """
+    if not portfolio_values:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+
+    times = _to_epoch_seconds([v['time'] for v in portfolio_values])
+    values = np.fromiter(
+        (v['portfolio_value'] for v in portfolio_values),
+        dtype=np.float64,
+        count=len(portfolio_values)
+    )
+    return times, values
+
+
+def periods_per_year(times):
+    """
+    Infer how many bars make up a year from the median spacing of the timestamps.
+    Crypto trades around the clock, so a year is 365 full days.
+    """
+    if len(times) < 2:
+        return 0.0
+    step = np.median(np.diff(times))
+    if step <= 0:
+        return 0.0
+    return SECONDS_PER_YEAR / step
+
+
+def _annualized_sharpe(returns, ppy):
+    std = returns.std(ddof=1) if returns.size > 1 else 0.0
+    if std == 0 or not np.isfinite(std):
+        return None
+    return float(returns.mean() / std * np.sqrt(ppy))
+
+
+def _rolling_sharpe(times, returns, ppy, window):
+    """
+    Rolling annualized Sharpe ratio computed from cumulative sums in O(n).
+    """
+    if window < 2 or returns.size < window:
+        return []
+
+    csum = np.concatenate(([0.0], np.cumsum(returns)))
+    csum_sq = np.concatenate(([0.0], np.cumsum(returns * returns)))
+    window_sum = csum[window:] - csum[:-window]
+    window_sum_sq = csum_sq[window:] - csum_sq[:-window]
+
+    mean = window_sum / window
+    var = (window_sum_sq - window * mean * mean) / (window - 1)
+    std = np.sqrt(np.clip(var, 0.0, None))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = np.where(std > 0, mean / std * np.sqrt(ppy), 0.0)
+
+    # returns[i] belongs to the bar at times[i + 1]
+    window_times = times[window:]
+
+    # Keep the stored series small enough to chart
+    stride = max(1, int(np.ceil(sharpe.size / ROLLING_SHARPE_MAX_POINTS)))
+    window_times = window_times[::stride]
+    sharpe = sharpe[::stride]
+
+    labels = format_epoch_seconds(window_times)
+    return [
+        {'time': label, 'rolling_sharpe': float(value)}
+        for label, value in zip(labels, sharpe.tolist())
+    ]
+
+
+def compute_performance_metrics(times, values, trade_pnls=None, trade_bars=None, rolling_window=None):
+    """
+    Compute extended performance metrics from the equity curve and closed trades in one pass.
+
+    times: epoch seconds of each portfolio value sample
+    values: portfolio value at each sample
+    trade_pnls: net profit/loss of each closed trade
+    trade_bars: number of bars each closed trade was open
+    rolling_window: bars per rolling Sharpe window (defaults to roughly one month)
+
+    Percentages (max_drawdown, cagr, exposure) are returned in percent, like algo_return.
+    Ratios that are undefined for the input (e.g. no losing trades) are returned as None.
+    """
+    times = np.asarray(times, dtype=np.int64)
+    values = np.asarray(values, dtype=np.float64)
+    trade_pnls = np.asarray(trade_pnls if trade_pnls is not None else [], dtype=np.float64)
+    trade_bars = np.asarray(trade_bars if trade_bars is not None else [], dtype=np.float64)
+
+    metrics = {
+        'max_drawdown': None,
+        'max_drawdown_duration': None,
+        'sharpe_ratio': None,
+        'sortino_ratio': None,
+        'calmar_ratio': None,
+        'cagr': None,
+        'exposure': None,
+        'profit_factor': None,
+        'expectancy': None,
+        'rolling_sharpe': [],
+    }
+
+    n = values.size
+    if n >= 2 and np.all(values > 0):
+        ppy = periods_per_year(times)
+        returns = values[1:] / values[:-1] - 1.0
+
+        # Drawdown: depth from the running peak and the longest stretch below it
+        peaks = np.maximum.accumulate(values)
+        drawdowns = values / peaks - 1.0
+        metrics['max_drawdown'] = float(-drawdowns.min() * 100)
+
+        at_peak = np.flatnonzero(values >= peaks)
+        gaps = np.diff(np.append(at_peak, n)) - 1
+        metrics['max_drawdown_duration'] = int(gaps.max()) if gaps.size else 0
+
+        # Growth
+        years = (times[-1] - times[0]) / SECONDS_PER_YEAR
+        if years > 0:
+            cagr = (values[-1] / values[0]) ** (1.0 / years) - 1.0
+            metrics['cagr'] = float(cagr * 100)
+            if drawdowns.min() < 0:
+                metrics['calmar_ratio'] = float(cagr / -drawdowns.min())
+
+        # Risk-adjusted returns
+        if ppy > 0:
+            metrics['sharpe_ratio'] = _annualized_sharpe(returns, ppy)
+
+            downside = np.minimum(returns, 0.0)
+            downside_dev = np.sqrt(np.mean(downside * downside))
+            if downside_dev > 0:
+                metrics['sortino_ratio'] = float(returns.mean() / downside_dev * np.sqrt(ppy))
+
+            if rolling_window is None:
+                rolling_window = int(ppy / 12)
+            metrics['rolling_sharpe'] = _rolling_sharpe(times, returns, ppy, int(rolling_window))
+
+        if trade_bars.size:
+            metrics['exposure'] = float(min(trade_bars.sum() / n, 1.0) * 100)
+        else:
+            metrics['exposure'] = 0.0
+
+    if trade_pnls.size:
+        gross_profit = trade_pnls[trade_pnls > 0].sum()
+        gross_loss = -trade_pnls[trade_pnls < 0].sum()
+        if gross_loss > 0:
+            metrics['profit_factor'] = float(gross_profit / gross_loss)
+        metrics['expectancy'] = float(trade_pnls.mean())
+
+    return metrics
+
+
+def per_feed_trade_stats(trade_feeds, trade_pnls, order_feeds, feed_names):
+    """
+    Break trade and order counts, win rate and PnL down by data feed in one bincount pass.
+    """
+    n_feeds = len(feed_names)
+    trade_feeds = np.asarray(trade_feeds, dtype=np.int64)
+    trade_pnls = np.asarray(trade_pnls, dtype=np.float64)
+
+    trades = np.bincount(trade_feeds, minlength=n_feeds)
+    won = np.bincount(trade_feeds, weights=trade_pnls > 0, minlength=n_feeds)
+    pnl = np.bincount(trade_feeds, weights=trade_pnls, minlength=n_feeds)
+    orders = np.bincount(np.asarray(order_feeds, dtype=np.int64), minlength=n_feeds)
+
+    return [
+        {
+            'feed': name,
+            'trades': int(trades[i]),
+            'orders': int(orders[i]),
+            'win_rate': float(won[i] / trades[i] * 100) if trades[i] else 0.0,
+            'pnl': float(pnl[i]),
+        }
+        for i, name in enumerate(feed_names)
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.1.3 on 2026-10-19 00:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("backtesting", "0012_backtestresult_ocl_data"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="backtestresult",
+            name="algo_cagr",
+            field=models.FloatField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="backtestresult",
+            name="algo_calmar_ratio",
+            field=models.FloatField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="backtestresult",
+            name="algo_expectancy",
+            field=models.FloatField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="backtestresult",
+            name="algo_exposure",
+            field=models.FloatField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="backtestresult",
+            name="algo_max_drawdown",
+            field=models.FloatField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="backtestresult",
+            name="algo_max_drawdown_duration",
+            field=models.IntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="backtestresult",
+            name="algo_profit_factor",
+            field=models.FloatField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="backtestresult",
+            name="algo_rolling_sharpe",
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="backtestresult",
+            name="algo_sortino_ratio",
+            field=models.FloatField(blank=True, db_index=True, null=True),
+        ),
+    ]
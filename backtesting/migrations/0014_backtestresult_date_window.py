@@ -0,0 +1,28 @@
+# Generated by Django 5.1.3 on 2026-10-19 00:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("backtesting", "0013_backtestresult_extended_metrics"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="backtestresult",
+            name="end_date",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="backtestresult",
+            name="start_date",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="backtestresult",
+            name="warmup_bars",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.3 on 2026-10-19 00:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("backtesting", "0014_backtestresult_date_window"),
+        ("data", "0003_ocldataimport_name_alter_ocldataimport_created_at_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="backtestresult",
+            name="additional_data_imports",
+            field=models.ManyToManyField(
+                blank=True,
+                help_text="Additional OCL data imports, available to the strategy as self.datas[1:].",
+                related_name="+",
+                to="data.ocldataimport",
+            ),
+        ),
+        migrations.AddField(
+            model_name="backtestresult",
+            name="feed_results",
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
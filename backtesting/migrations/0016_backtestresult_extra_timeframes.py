@@ -0,0 +1,23 @@
+# Generated by Django 5.1.3 on 2026-10-19 00:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("backtesting", "0015_backtestresult_additional_data_imports"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="backtestresult",
+            name="extra_timeframes",
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name="backtestresult",
+            name="run_metadata",
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
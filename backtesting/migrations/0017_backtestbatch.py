@@ -0,0 +1,73 @@
+# Generated by Django 5.1.3 on 2026-10-19 00:26
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("backtesting", "0016_backtestresult_extra_timeframes"),
+        ("data", "0003_ocldataimport_name_alter_ocldataimport_created_at_and_more"),
+        ("strategies", "0003_remove_strategy_user_ratings_delete_rating"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BacktestBatch",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("PENDING", "Pending"),
+                            ("RUNNING", "Running"),
+                            ("COMPLETED", "Completed"),
+                            ("FAILED", "Failed"),
+                        ],
+                        default="PENDING",
+                        max_length=10,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("completed_at", models.DateTimeField(blank=True, null=True)),
+                ("log", models.TextField(blank=True, null=True)),
+                ("commission", models.FloatField(blank=True, null=True)),
+                ("strategy_name", models.CharField(max_length=100)),
+                ("strategy_code", models.TextField()),
+                ("results", models.JSONField(blank=True, null=True)),
+                ("run_metadata", models.JSONField(blank=True, null=True)),
+                (
+                    "data_imports",
+                    models.ManyToManyField(related_name="+", to="data.ocldataimport"),
+                ),
+                (
+                    "strategy",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="backtest_batches",
+                        to="strategies.strategy",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="backtest_batches",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.1.3 on 2026-10-19 00:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("backtesting", "0019_analysisjob"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="analysisjob",
+            name="kind",
+            field=models.CharField(
+                choices=[
+                    ("walk_forward", "Walk-Forward Optimization"),
+                    ("successive_halving", "Successive-Halving Search"),
+                ],
+                max_length=20,
+            ),
+        ),
+    ]
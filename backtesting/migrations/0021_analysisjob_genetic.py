@@ -0,0 +1,30 @@
+# Generated by Django 5.1.3 on 2026-10-19 00:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("backtesting", "0020_analysisjob_successive_halving"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="analysisjob",
+            name="checkpoint",
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name="analysisjob",
+            name="kind",
+            field=models.CharField(
+                choices=[
+                    ("walk_forward", "Walk-Forward Optimization"),
+                    ("successive_halving", "Successive-Halving Search"),
+                    ("genetic", "Genetic Optimizer"),
+                ],
+                max_length=20,
+            ),
+        ),
+    ]
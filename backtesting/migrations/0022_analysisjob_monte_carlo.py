@@ -0,0 +1,38 @@
+# Generated by Django 5.1.3 on 2026-10-19 00:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("backtesting", "0021_analysisjob_genetic"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="analysisjob",
+            name="backtest_result",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="analysis_jobs",
+                to="backtesting.backtestresult",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="analysisjob",
+            name="kind",
+            field=models.CharField(
+                choices=[
+                    ("walk_forward", "Walk-Forward Optimization"),
+                    ("successive_halving", "Successive-Halving Search"),
+                    ("genetic", "Genetic Optimizer"),
+                    ("monte_carlo", "Monte Carlo Trade Analysis"),
+                ],
+                max_length=20,
+            ),
+        ),
+    ]
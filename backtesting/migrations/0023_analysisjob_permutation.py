@@ -0,0 +1,27 @@
+# Generated by Django 5.1.3 on 2026-10-19 00:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("backtesting", "0022_analysisjob_monte_carlo"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="analysisjob",
+            name="kind",
+            field=models.CharField(
+                choices=[
+                    ("walk_forward", "Walk-Forward Optimization"),
+                    ("successive_halving", "Successive-Halving Search"),
+                    ("genetic", "Genetic Optimizer"),
+                    ("monte_carlo", "Monte Carlo Trade Analysis"),
+                    ("permutation", "Permutation Significance Test"),
+                ],
+                max_length=20,
+            ),
+        ),
+    ]
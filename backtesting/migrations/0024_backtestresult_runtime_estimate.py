@@ -0,0 +1,23 @@
+# Generated by Django 5.1.3 on 2026-10-19 00:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("backtesting", "0023_analysisjob_permutation"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="backtestresult",
+            name="estimated_seconds",
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="backtestresult",
+            name="queue",
+            field=models.CharField(blank=True, default="", max_length=32),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.3 on 2026-10-19 00:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("backtesting", "0025_backtestresult_cancellation"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="backtestresult",
+            name="timings",
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
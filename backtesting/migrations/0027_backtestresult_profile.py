@@ -0,0 +1,30 @@
+# Generated by Django 5.1.3 on 2026-10-19 01:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("backtesting", "0026_backtestresult_timings"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="backtestresult",
+            name="profile",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name="backtestresult",
+            name="profile_file",
+            field=models.FileField(
+                blank=True, null=True, upload_to="backtest_profiles/"
+            ),
+        ),
+        migrations.AddField(
+            model_name="backtestresult",
+            name="profile_summary",
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.3 on 2026-10-19 01:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("backtesting", "0027_backtestresult_profile"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="analysisjob",
+            name="task_id",
+            field=models.CharField(blank=True, default="", max_length=255),
+        ),
+        migrations.AddField(
+            model_name="backtestbatch",
+            name="task_id",
+            field=models.CharField(blank=True, default="", max_length=255),
+        ),
+        migrations.AddField(
+            model_name="backtestcomparison",
+            name="task_id",
+            field=models.CharField(blank=True, default="", max_length=255),
+        ),
+    ]
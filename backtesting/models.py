@@ -10,6 +10,7 @@ class BacktestResult(models.Model):
         ('RUNNING', 'Running'),
         ('COMPLETED', 'Completed'),
         ('FAILED', 'Failed'),
+        ('CANCELLED', 'Cancelled'),
     ]
 
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='backtests')
@@ -29,6 +30,22 @@ class BacktestResult(models.Model):
         help_text="OCL data import. Visit the Data page to import data."
     )
 
+    # Extra feeds for multi-asset / multi-interval backtests, loaded after ocl_data_import
+    additional_data_imports = models.ManyToManyField(
+        'data.OCLDataImport',
+        blank=True,
+        related_name='+',
+        help_text="Additional OCL data imports, available to the strategy as self.datas[1:]."
+    )
+
+    # Coarser timeframes derived from ocl_data_import, e.g. ["1h", "4h"], added after all imports
+    extra_timeframes = models.JSONField(default=list, blank=True)
+
+    # Optional window inside the import; warmup_bars candles before start_date prime indicators
+    start_date = models.DateTimeField(blank=True, null=True)
+    end_date = models.DateTimeField(blank=True, null=True)
+    warmup_bars = models.PositiveIntegerField(default=0)
+
     commission = models.FloatField(blank=True, null=True)
     slippage = models.FloatField(blank=True, null=True)
     leverage = models.FloatField(blank=True, null=True)
@@ -37,6 +54,17 @@ class BacktestResult(models.Model):
     algo_win_rate = models.FloatField(blank=True, null=True)
     algo_sharpe_ratio = models.FloatField(blank=True, null=True)
 
+    # Extended metrics computed from the equity curve (see backtesting/metrics.py)
+    algo_max_drawdown = models.FloatField(blank=True, null=True, db_index=True)
+    algo_max_drawdown_duration = models.IntegerField(blank=True, null=True, db_index=True)
+    algo_sortino_ratio = models.FloatField(blank=True, null=True, db_index=True)
+    algo_calmar_ratio = models.FloatField(blank=True, null=True, db_index=True)
+    algo_cagr = models.FloatField(blank=True, null=True, db_index=True)
+    algo_exposure = models.FloatField(blank=True, null=True, db_index=True)
+    algo_profit_factor = models.FloatField(blank=True, null=True, db_index=True)
+    algo_expectancy = models.FloatField(blank=True, null=True, db_index=True)
+    algo_rolling_sharpe = models.JSONField(blank=True, null=True)
+
     # Snapshot fields
     strategy_name = models.CharField(max_length=100)
     strategy_description = models.TextField(blank=True, null=True)
@@ -47,6 +75,30 @@ class BacktestResult(models.Model):
     order_data = models.JSONField(blank=True, null=True)
     portfolio_values = models.JSONField(blank=True, null=True)
     ocl_data = models.JSONField(blank=True, null=True)
+    feed_results = models.JSONField(blank=True, null=True)
+    run_metadata = models.JSONField(blank=True, null=True)
+    # Wall/CPU time per phase of run_backtest, bar throughput and peak RSS, see backtesting/instrumentation.py
+    timings = models.JSONField(blank=True, null=True)
+
+    # Opt-in cProfile capture of cerebro.run(): the pstats file and its summary by code category
+    profile = models.BooleanField(default=False)
+    profile_file = models.FileField(upload_to='backtest_profiles/', blank=True, null=True)
+    profile_summary = models.JSONField(blank=True, null=True)
+
+    # Runtime prediction made at submission and the queue it chose, see backtesting/scheduling.py
+    estimated_seconds = models.FloatField(blank=True, null=True)
+    queue = models.CharField(max_length=32, blank=True, default='')
+    # Celery task running the backtest, used to revoke it while queued
+    task_id = models.CharField(max_length=255, blank=True, default='')
+
+    # Set when the backtest was run as part of a multi-strategy comparison
+    comparison = models.ForeignKey(
+        'BacktestComparison',
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='results'
+    )
 
     def __str__(self):
         return f"Backtest {self.id} - {self.strategy_name} - {self.status}"
@@ -57,4 +109,122 @@ class BacktestResult(models.Model):
             self.strategy_description = self.strategy.description
             self.strategy_code = self.strategy.code
                 
-        super().save(*args, **kwargs)
\ No newline at end of file
+        super().save(*args, **kwargs)
+
+class BacktestBatch(models.Model):
+    """One strategy run against several OCL data imports in a single task."""
+    STATUS_CHOICES = BacktestResult.STATUS_CHOICES
+
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='backtest_batches')
+    strategy = models.ForeignKey(Strategy, on_delete=models.CASCADE, related_name='backtest_batches')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(blank=True, null=True)
+    log = models.TextField(blank=True, null=True)
+
+    data_imports = models.ManyToManyField('data.OCLDataImport', related_name='+')
+    commission = models.FloatField(blank=True, null=True)
+
+    # Snapshot fields
+    strategy_name = models.CharField(max_length=100)
+    strategy_code = models.TextField()
+
+    # Asset x interval matrix of headline metrics, see tasks.build_batch_matrix
+    results = models.JSONField(blank=True, null=True)
+    run_metadata = models.JSONField(blank=True, null=True)
+    # Celery task running it, used to revoke it while queued
+    task_id = models.CharField(max_length=255, blank=True, default='')
+
+    def __str__(self):
+        return f"Batch {self.id} - {self.strategy_name} - {self.status}"
+
+    def save(self, *args, **kwargs):
+        if not self.strategy_name or not self.strategy_code:
+            self.strategy_name = self.strategy.name
+            self.strategy_code = self.strategy.code
+
+        super().save(*args, **kwargs)
+
+
+class BacktestComparison(models.Model):
+    """Several strategies run on the same import, sharing one loaded data feed."""
+    STATUS_CHOICES = BacktestResult.STATUS_CHOICES
+
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='backtest_comparisons')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(blank=True, null=True)
+    log = models.TextField(blank=True, null=True)
+
+    ocl_data_import = models.ForeignKey(
+        'data.OCLDataImport',
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True
+    )
+    commission = models.FloatField(blank=True, null=True)
+    run_metadata = models.JSONField(blank=True, null=True)
+    # Celery task running it, used to revoke it while queued
+    task_id = models.CharField(max_length=255, blank=True, default='')
+
+    def __str__(self):
+        return f"Comparison {self.id} - {self.status}"
+
+
+class AnalysisJob(models.Model):
+    """Parameter optimization or robustness analysis of a strategy on one import."""
+    STATUS_CHOICES = BacktestResult.STATUS_CHOICES
+    KIND_CHOICES = [
+        ('walk_forward', 'Walk-Forward Optimization'),
+        ('successive_halving', 'Successive-Halving Search'),
+        ('genetic', 'Genetic Optimizer'),
+        ('monte_carlo', 'Monte Carlo Trade Analysis'),
+        ('permutation', 'Permutation Significance Test'),
+    ]
+
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='analysis_jobs')
+    strategy = models.ForeignKey(Strategy, on_delete=models.CASCADE, related_name='analysis_jobs')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(blank=True, null=True)
+    log = models.TextField(blank=True, null=True)
+
+    ocl_data_import = models.ForeignKey(
+        'data.OCLDataImport',
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True
+    )
+    # Source of the trade list for analyses of a finished backtest
+    backtest_result = models.ForeignKey(
+        BacktestResult,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='analysis_jobs'
+    )
+    commission = models.FloatField(blank=True, null=True)
+    # Kind-specific settings, normalized by optimization.clean_config
+    config = models.JSONField(default=dict)
+
+    # Snapshot fields
+    strategy_name = models.CharField(max_length=100)
+    strategy_code = models.TextField()
+
+    results = models.JSONField(blank=True, null=True)
+    run_metadata = models.JSONField(blank=True, null=True)
+    # Progress of resumable analyses, cleared once the job completes
+    checkpoint = models.JSONField(blank=True, null=True)
+    # Celery task running it, used to revoke it while queued
+    task_id = models.CharField(max_length=255, blank=True, default='')
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.id} - {self.strategy_name} - {self.status}"
+
+    def save(self, *args, **kwargs):
+        if not self.strategy_name or not self.strategy_code:
+            self.strategy_name = self.strategy.name
+            self.strategy_code = self.strategy.code
+
+        super().save(*args, **kwargs)
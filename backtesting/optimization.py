@@ -0,0 +1,852 @@
+# backtesting/optimization.py
+
+import datetime
+import itertools
+import math
+import time
+
+import numpy as np
+
+from .feeds import shared_feed_arrays, ocl_arrays_to_feed
+from .metrics import compute_performance_metrics, format_epoch_seconds
+from .parallel import run_in_pool, shared_state, pool_size
+
+# Summary keys a parameter search can maximize, see tasks.summarize_run
+OBJECTIVES = ('return', 'sharpe_ratio', 'sortino_ratio', 'profit_factor')
+EQUITY_MAX_POINTS = 2000
+
+MONTE_CARLO_METHODS = ('bootstrap', 'shuffle')
+MONTE_CARLO_QUANTILES = (1, 5, 25, 50, 75, 95, 99)
+MONTE_CARLO_BATCH = 2000
+
+# Upper bound on bars x paths generated at once by one permutation worker
+PERMUTATION_BATCH_BARS = 4_000_000
+PERMUTATION_HISTOGRAM_BINS = 20
+
+
+def parameter_grid(space):
+    """Expand {'name': [values, ...]} into the list of every parameter combination."""
+    if not isinstance(space, dict) or not space:
+        raise ValueError("The parameter grid must map parameter names to lists of values.")
+    for name, values in space.items():
+        if not isinstance(values, list) or not values:
+            raise ValueError(f"Parameter '{name}' needs a non-empty list of values.")
+
+    names = list(space)
+    return [dict(zip(names, combo)) for combo in itertools.product(*(space[name] for name in names))]
+
+
+def objective_score(summary, objective):
+    """Value of the objective in a run summary; failed runs and undefined ratios rank last."""
+    value = summary.get(objective)
+    if value is None or not np.isfinite(value):
+        return -np.inf
+    return float(value)
+
+
+def _positive_int(config, key, default=None):
+    value = config.get(key, default)
+    if isinstance(value, bool) or not isinstance(value, int) or value <= 0:
+        raise ValueError(f"'{key}' must be a positive integer.")
+    return value
+
+
+def _objective(config):
+    objective = config.get('objective', 'sharpe_ratio')
+    if objective not in OBJECTIVES:
+        raise ValueError(f"'objective' must be one of {', '.join(OBJECTIVES)}.")
+    return objective
+
+
+def clean_walk_forward_config(config):
+    """Validate a walk-forward config and fill in defaults."""
+    parameter_grid(config.get('param_grid'))
+    train_bars = _positive_int(config, 'train_bars')
+    warmup_bars = config.get('warmup_bars', train_bars)
+    if isinstance(warmup_bars, bool) or not isinstance(warmup_bars, int) or warmup_bars < 0:
+        raise ValueError("'warmup_bars' must be a non-negative integer.")
+    return {
+        'param_grid': config['param_grid'],
+        'train_bars': train_bars,
+        'test_bars': _positive_int(config, 'test_bars'),
+        'anchored': bool(config.get('anchored', False)),
+        'warmup_bars': warmup_bars,
+        'objective': _objective(config),
+    }
+
+
+def walk_forward_windows(n_bars, train_bars, test_bars, anchored=False):
+    """
+    Split n_bars into consecutive (train, test) bar ranges. Rolling windows keep the
+    train length fixed; anchored windows always train from the first bar. The last
+    test window may be shorter than test_bars.
+    """
+    windows = []
+    test_start = train_bars
+    while test_start < n_bars:
+        train_start = 0 if anchored else test_start - train_bars
+        windows.append(((train_start, test_start), (test_start, min(test_start + test_bars, n_bars))))
+        test_start += test_bars
+    if not windows:
+        raise ValueError(f"The import has {n_bars} bars, not enough for a {train_bars}-bar train window.")
+    return windows
+
+
+def slice_feed(feed, start, stop):
+    """Bar range of shared feed arrays as views, without copying."""
+    return {name: column[start:stop] for name, column in feed.items()}
+
+
+def _bar_datetime(dates, index):
+    return dates[index].astype('datetime64[us]').astype(datetime.datetime)
+
+
+def _evaluate(task):
+    """
+    Run one parameter set on a bar range of the shared feed inside a pool worker.
+    task is (params, start, stop, trade_from, with_equity): bars before trade_from only
+    warm up indicators, and with_equity returns the equity curve from trade_from on.
+    The worker's CPU time is reported so callers can account for a compute budget.
+    """
+    from .tasks import run_cerebro_with_data_and_strategy, summarize_run, trim_columns, to_epoch_seconds
+
+    params, start, stop, trade_from, with_equity = task
+    state = shared_state()
+    trade_start = _bar_datetime(state['dates'], trade_from) if trade_from is not None else None
+    max_drawdown_stop = state.get('max_drawdown_stop')
+    cpu_started = time.process_time()
+    try:
+        cerebro, results, initial_cash = run_cerebro_with_data_and_strategy(
+            [slice_feed(state['feed'], start, stop)],
+            state['strategy'],
+            commission=state['commission'],
+            trade_start=trade_start,
+            strategy_params=params,
+            max_drawdown_stop=max_drawdown_stop
+        )
+        summary = summarize_run(cerebro, results, initial_cash, trade_start=trade_start)
+        summary['cpu_seconds'] = time.process_time() - cpu_started
+        if max_drawdown_stop is not None:
+            summary['pruned'] = results[0].analyzers.drawdown_stop.get_analysis()['stopped']
+        if with_equity:
+            portfolio = results[0].analyzers.portfolio_value.get_analysis()
+            if trade_start is not None:
+                portfolio = trim_columns(portfolio, to_epoch_seconds(trade_start))
+            summary['equity'] = (portfolio['time'], portfolio['portfolio_value'])
+        return summary
+    except Exception as e:
+        return {'error': str(e), 'cpu_seconds': time.process_time() - cpu_started}
+
+
+def stitch_equity(curves, initial_cash):
+    """
+    Chain out-of-sample equity curves: each segment is rescaled to start where the
+    previous one ended, so the result compounds like one continuous account.
+    """
+    times, values, scale = [], [], initial_cash
+    for segment_times, segment_values in curves:
+        if not len(segment_values) or segment_values[0] <= 0:
+            continue
+        segment = scale * np.asarray(segment_values) / segment_values[0]
+        times.append(np.asarray(segment_times, dtype=np.int64))
+        values.append(segment)
+        scale = segment[-1]
+    if not values:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+    return np.concatenate(times), np.concatenate(values)
+
+
+def equity_records(times, values, max_points=EQUITY_MAX_POINTS):
+    """Downsample an equity curve for storage, always keeping the final point."""
+    stride = max(1, int(np.ceil(len(values) / max_points)))
+    keep = np.arange(0, len(values), stride)
+    if len(values) and keep[-1] != len(values) - 1:
+        keep = np.append(keep, len(values) - 1)
+    labels = format_epoch_seconds(np.asarray(times)[keep])
+    return [{'time': label, 'portfolio_value': float(value)} for label, value in zip(labels, np.asarray(values)[keep])]
+
+
+def _window_label(dates, start, stop):
+    first, last = format_epoch_seconds(dates[[start, stop - 1]].astype('datetime64[s]').astype(np.int64))
+    return first, last
+
+
+def walk_forward(UserStrategy, arrays, config, commission=0.0, processes=None, initial_cash=10_000):
+    """
+    Walk-forward optimization over one import's candle arrays (data.loaders layout).
+
+    Every train window's parameter grid runs in one process pool; each window's best
+    parameters then run on the following test window, warmed up on the bars before it.
+    The candle arrays are converted once and every run sees a slice of them.
+    """
+    config = clean_walk_forward_config(config)
+    grid = parameter_grid(config['param_grid'])
+    dates = arrays['date']
+    windows = walk_forward_windows(len(dates), config['train_bars'], config['test_bars'], config['anchored'])
+    shared = {
+        'strategy': UserStrategy,
+        'feed': shared_feed_arrays(ocl_arrays_to_feed(arrays)),
+        'dates': dates,
+        'commission': commission,
+    }
+
+    train_tasks = [(params, train[0], train[1], None, False) for train, _ in windows for params in grid]
+    train_results = run_in_pool(_evaluate, train_tasks, shared=shared, processes=processes)
+
+    winners = []
+    for i in range(len(windows)):
+        scores = [objective_score(r, config['objective']) for r in train_results[i * len(grid):(i + 1) * len(grid)]]
+        best = int(np.argmax(scores))
+        winners.append((grid[best], scores[best]))
+
+    test_tasks = [
+        (params, max(0, test[0] - config['warmup_bars']), test[1], test[0], True)
+        for (_, test), (params, _) in zip(windows, winners)
+    ]
+    test_results = run_in_pool(_evaluate, test_tasks, shared=shared, processes=processes)
+
+    curves, rows = [], []
+    for (train, test), (params, score), result in zip(windows, winners, test_results):
+        curves.append(result.pop('equity', ((), ())))
+        train_start, train_end = _window_label(dates, *train)
+        test_start, test_end = _window_label(dates, *test)
+        rows.append({
+            'train_start': train_start,
+            'train_end': train_end,
+            'test_start': test_start,
+            'test_end': test_end,
+            'best_params': params,
+            'train_score': score if np.isfinite(score) else None,
+            'test': result,
+        })
+
+    times, values = stitch_equity(curves, initial_cash)
+    metrics = compute_performance_metrics(times, values, rolling_window=0)
+    return {
+        'objective': config['objective'],
+        'candidates': len(grid),
+        'windows': rows,
+        'out_of_sample': {
+            'return': float((values[-1] / initial_cash - 1) * 100) if len(values) else 0.0,
+            'sharpe_ratio': metrics['sharpe_ratio'],
+            'sortino_ratio': metrics['sortino_ratio'],
+            'max_drawdown': metrics['max_drawdown'],
+            'trades': sum(r['test'].get('trades', 0) for r in rows),
+            'bars': len(values),
+        },
+        'equity': equity_records(times, values),
+        'runs': len(train_tasks) + len(test_tasks),
+        'processes': pool_size(len(train_tasks), processes),
+    }
+
+
+def clean_successive_halving_config(config):
+    """Validate a successive-halving config and fill in defaults."""
+    parameter_grid(config.get('param_grid'))
+    eta = _positive_int(config, 'eta', 3)
+    if eta < 2:
+        raise ValueError("'eta' must be at least 2.")
+    cleaned = {
+        'param_grid': config['param_grid'],
+        'eta': eta,
+        'min_bars': config.get('min_bars'),
+        'max_drawdown': config.get('max_drawdown'),
+        'budget_cpu_seconds': config.get('budget_cpu_seconds'),
+        'objective': _objective(config),
+    }
+    if cleaned['min_bars'] is not None:
+        _positive_int(cleaned, 'min_bars')
+    for key in ('max_drawdown', 'budget_cpu_seconds'):
+        value = cleaned[key]
+        if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0):
+            raise ValueError(f"'{key}' must be a positive number.")
+    return cleaned
+
+
+def halving_rungs(n_bars, n_candidates, eta, min_bars=None):
+    """
+    Prefix lengths for each rung: every rung keeps the best 1/eta of the candidates
+    and multiplies the bars by eta, so the last rung runs the survivors on all bars.
+    """
+    rounds = max(1, math.ceil(math.log(max(n_candidates, 1), eta)))
+    if min_bars is None:
+        min_bars = max(1, n_bars // eta ** rounds)
+    rungs = []
+    bars = min_bars
+    while bars < n_bars and len(rungs) < rounds:
+        rungs.append(bars)
+        bars *= eta
+    return rungs + [n_bars]
+
+
+def successive_halving(UserStrategy, arrays, config, commission=0.0, processes=None):
+    """
+    Successive-halving parameter search over one import's candle arrays.
+
+    All candidates run on a short prefix of the bars; the best 1/eta are promoted to
+    a prefix eta times longer until the survivors run on all bars. With max_drawdown
+    set, a run is stopped as soon as its drawdown crosses the threshold and the
+    candidate is pruned. Rungs are skipped once the CPU budget would be exceeded.
+    """
+    config = clean_successive_halving_config(config)
+    grid = parameter_grid(config['param_grid'])
+    objective, eta, budget = config['objective'], config['eta'], config['budget_cpu_seconds']
+    n_bars = len(arrays['date'])
+    shared = {
+        'strategy': UserStrategy,
+        'feed': shared_feed_arrays(ocl_arrays_to_feed(arrays)),
+        'dates': arrays['date'],
+        'commission': commission,
+        'max_drawdown_stop': config['max_drawdown'],
+    }
+
+    survivors = list(range(len(grid)))
+    rungs, leaderboard = [], []
+    cpu_seconds, bars_run = 0.0, 0
+    budget_exhausted = False
+    for bars in halving_rungs(n_bars, len(grid), eta, config['min_bars']):
+        # Estimate the rung from the CPU time per bar measured so far
+        if budget is not None and bars_run:
+            estimate = cpu_seconds / bars_run * bars * len(survivors)
+            if cpu_seconds + estimate > budget:
+                budget_exhausted = True
+                break
+
+        results = run_in_pool(
+            _evaluate, [(grid[i], 0, bars, None, False) for i in survivors], shared=shared, processes=processes
+        )
+        cpu_seconds += sum(r.get('cpu_seconds', 0.0) for r in results)
+        bars_run += sum(r.get('bars', 0) for r in results)
+
+        ranked = sorted(
+            (
+                (objective_score(r, objective), i, r) for i, r in zip(survivors, results)
+                if 'error' not in r and not r.get('pruned')
+            ),
+            key=lambda entry: entry[0],
+            reverse=True
+        )
+        promoted = ranked[:max(1, math.ceil(len(survivors) / eta))]
+        rungs.append({
+            'bars': bars,
+            'evaluated': len(survivors),
+            'pruned': sum(1 for r in results if r.get('pruned')),
+            'failed': sum(1 for r in results if 'error' in r),
+            'promoted': len(promoted) if bars < n_bars else 0,
+            'cpu_seconds': round(sum(r.get('cpu_seconds', 0.0) for r in results), 3),
+        })
+        leaderboard = [
+            {'params': grid[i], 'score': score if np.isfinite(score) else None, **result}
+            for score, i, result in ranked
+        ]
+        survivors = [i for _, i, _ in promoted]
+        if not survivors:
+            break
+
+    # Cost of the full grid on all bars, at the CPU time per bar measured above
+    full_grid_bars = len(grid) * n_bars
+    full_grid_cpu_seconds = cpu_seconds / bars_run * full_grid_bars if bars_run else 0.0
+    return {
+        'objective': objective,
+        'candidates': len(grid),
+        'rungs': rungs,
+        'best_params': leaderboard[0]['params'] if leaderboard else None,
+        'leaderboard': leaderboard[:20],
+        'budget_exhausted': budget_exhausted,
+        'compute': {
+            'cpu_seconds': round(cpu_seconds, 3),
+            'bars_run': bars_run,
+            'full_grid_bars': full_grid_bars,
+            'full_grid_cpu_seconds': round(full_grid_cpu_seconds, 3),
+            'saved_percent': round((1 - bars_run / full_grid_bars) * 100, 2) if full_grid_bars else 0.0,
+        },
+        'runs': sum(rung['evaluated'] for rung in rungs),
+        'processes': pool_size(len(grid), processes),
+    }
+
+
+def clean_genetic_config(config):
+    """Validate a genetic optimizer config and fill in defaults."""
+    cleaned = {
+        'population': _positive_int(config, 'population', 20),
+        'generations': _positive_int(config, 'generations', 10),
+        'elite': config.get('elite', 2),
+        'tournament': _positive_int(config, 'tournament', 3),
+        'crossover_rate': config.get('crossover_rate', 0.9),
+        'mutation_rate': config.get('mutation_rate', 0.2),
+        'bounds': config.get('bounds', {}),
+        'seed': config.get('seed'),
+        'objective': _objective(config),
+    }
+    if isinstance(cleaned['elite'], bool) or not isinstance(cleaned['elite'], int) or not 0 <= cleaned['elite'] < cleaned['population']:
+        raise ValueError("'elite' must be a non-negative integer smaller than the population.")
+    for key in ('crossover_rate', 'mutation_rate'):
+        value = cleaned[key]
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not 0 <= value <= 1:
+            raise ValueError(f"'{key}' must be between 0 and 1.")
+    if not isinstance(cleaned['bounds'], dict) or not all(
+        isinstance(b, list) and len(b) == 2 and all(isinstance(v, (int, float)) for v in b) and b[0] < b[1]
+        for b in cleaned['bounds'].values()
+    ):
+        raise ValueError("'bounds' must map parameter names to [low, high] pairs.")
+    if cleaned['seed'] is not None and (isinstance(cleaned['seed'], bool) or not isinstance(cleaned['seed'], int)):
+        raise ValueError("'seed' must be an integer.")
+    return cleaned
+
+
+def infer_parameter_space(UserStrategy, bounds=None):
+    """
+    Search space from the strategy's params defaults: numeric params range from a
+    quarter to four times their default (ints stay ints, and positive ints stay >= 1).
+    Booleans and non-numeric params are left at their defaults. bounds overrides the
+    range of individual params, {'name': [low, high]}.
+    """
+    bounds = bounds or {}
+    space = {}
+    for name, default in UserStrategy.params._getitems():
+        if isinstance(default, bool) or not isinstance(default, (int, float)):
+            continue
+        kind = 'int' if isinstance(default, int) else 'float'
+        if name in bounds:
+            low, high = bounds[name]
+        elif default == 0:
+            low, high = 0, 10 if kind == 'int' else 1.0
+        else:
+            low, high = sorted((default / 4, default * 4))
+            if kind == 'int':
+                low, high = int(np.floor(low)), int(np.ceil(high))
+                if default > 0:
+                    low = max(1, low)
+        space[name] = {'type': kind, 'low': low, 'high': high}
+    unknown = set(bounds) - set(space)
+    if unknown:
+        raise ValueError(f"No numeric strategy params named {', '.join(sorted(unknown))}.")
+    if not space:
+        raise ValueError("The strategy has no numeric params to optimize.")
+    return space
+
+
+def _clip_individual(genes, space):
+    """Clip genes to their bounds and round integer params; returns plain Python values."""
+    individual = {}
+    for value, (name, spec) in zip(genes, space.items()):
+        value = min(max(value, spec['low']), spec['high'])
+        individual[name] = int(round(value)) if spec['type'] == 'int' else float(value)
+    return individual
+
+
+def _random_individual(rng, space):
+    return _clip_individual([rng.uniform(spec['low'], spec['high']) for spec in space.values()], space)
+
+
+def _individual_key(individual, space):
+    return tuple(individual[name] for name in space)
+
+
+def _tournament(rng, population, scores, size):
+    picks = rng.integers(len(population), size=size)
+    return population[max(picks, key=lambda i: scores[i])]
+
+
+def _offspring(rng, first, second, space, config):
+    """Uniform crossover followed by Gaussian mutation of each gene."""
+    crossover = rng.random() < config['crossover_rate']
+    genes = []
+    for name, spec in space.items():
+        value = second[name] if crossover and rng.random() < 0.5 else first[name]
+        if rng.random() < config['mutation_rate']:
+            value += rng.normal(0, (spec['high'] - spec['low']) * 0.1)
+        genes.append(value)
+    return _clip_individual(genes, space)
+
+
+def _cached_score(entry):
+    return entry['score'] if entry['score'] is not None else -np.inf
+
+
+def _next_generation(rng, population, cache, space, config):
+    """Keep the elite unchanged and fill the rest with tournament-selected offspring."""
+    scores = [_cached_score(cache[_individual_key(individual, space)]) for individual in population]
+    order = np.argsort(scores)[::-1]
+    children = [population[i] for i in order[:config['elite']]]
+    while len(children) < config['population']:
+        first = _tournament(rng, population, scores, config['tournament'])
+        second = _tournament(rng, population, scores, config['tournament'])
+        children.append(_offspring(rng, first, second, space, config))
+    return children
+
+
+def genetic(UserStrategy, arrays, config, commission=0.0, processes=None, checkpoint=None, on_checkpoint=None):
+    """
+    Evolutionary parameter search over one import's candle arrays.
+
+    Each generation's new parameter sets run in one process pool; results are cached by
+    parameter tuple so repeated individuals cost nothing. After every generation the
+    population, fitness cache and random state are passed to on_checkpoint as JSON-ready
+    data; passing that back as checkpoint resumes from the next generation.
+    """
+    config = clean_genetic_config(config)
+    objective = config['objective']
+    space = infer_parameter_space(UserStrategy, config['bounds'])
+    shared = {
+        'strategy': UserStrategy,
+        'feed': shared_feed_arrays(ocl_arrays_to_feed(arrays)),
+        'dates': arrays['date'],
+        'commission': commission,
+    }
+
+    rng = np.random.default_rng(config['seed'])
+    if checkpoint:
+        rng.bit_generator.state = checkpoint['rng']
+        population = checkpoint['population']
+        cache = {tuple(key): entry for key, entry in checkpoint['cache']}
+        history = checkpoint['history']
+        first_generation = checkpoint['generation'] + 1
+    else:
+        population = [_random_individual(rng, space) for _ in range(config['population'])]
+        cache, history, first_generation = {}, [], 0
+
+    for generation in range(first_generation, config['generations']):
+        if history:
+            population = _next_generation(rng, population, cache, space, config)
+
+        keys = [_individual_key(individual, space) for individual in population]
+        pending = list(dict.fromkeys(key for key in keys if key not in cache))
+        results = run_in_pool(
+            _evaluate, [(dict(zip(space, key)), 0, len(arrays['date']), None, False) for key in pending],
+            shared=shared, processes=processes
+        )
+        for key, result in zip(pending, results):
+            score = objective_score(result, objective)
+            cache[key] = {
+                'score': score if np.isfinite(score) else None,
+                'return': result.get('return'),
+                'sharpe_ratio': result.get('sharpe_ratio'),
+                'max_drawdown': result.get('max_drawdown'),
+                'trades': result.get('trades'),
+                'error': result.get('error'),
+            }
+
+        scores = [_cached_score(cache[key]) for key in keys]
+        finite = [score for score in scores if np.isfinite(score)]
+        history.append({
+            'generation': generation,
+            'best': max(finite) if finite else None,
+            'mean': float(np.mean(finite)) if finite else None,
+            'evaluated': len(pending),
+            'cached': len(keys) - len(pending),
+        })
+
+        if on_checkpoint is not None:
+            on_checkpoint({
+                'generation': generation,
+                'population': population,
+                'cache': [[list(key), entry] for key, entry in cache.items()],
+                'rng': rng.bit_generator.state,
+                'history': history,
+            })
+
+    ranked = sorted(cache.items(), key=lambda item: _cached_score(item[1]), reverse=True)
+    top = [{'params': dict(zip(space, key)), **entry} for key, entry in ranked[:10]]
+    return {
+        'objective': objective,
+        'space': space,
+        'best_params': top[0]['params'] if top and top[0]['score'] is not None else None,
+        'top': top,
+        'history': history,
+        'evaluations': len(cache),
+        'cache_hits': sum(entry['cached'] for entry in history),
+        'resumed_from': checkpoint['generation'] + 1 if checkpoint else None,
+        'processes': pool_size(config['population'], processes),
+    }
+
+
+def clean_monte_carlo_config(config):
+    """Validate a Monte Carlo config and fill in defaults."""
+    cleaned = {
+        'simulations': _positive_int(config, 'simulations', 10_000),
+        'method': config.get('method', 'bootstrap'),
+        'ruin_drawdown': config.get('ruin_drawdown', 50.0),
+        'batch_size': _positive_int(config, 'batch_size', MONTE_CARLO_BATCH),
+        'seed': config.get('seed'),
+    }
+    if cleaned['method'] not in MONTE_CARLO_METHODS:
+        raise ValueError(f"'method' must be one of {', '.join(MONTE_CARLO_METHODS)}.")
+    ruin = cleaned['ruin_drawdown']
+    if isinstance(ruin, bool) or not isinstance(ruin, (int, float)) or not 0 < ruin <= 100:
+        raise ValueError("'ruin_drawdown' must be a percentage between 0 and 100.")
+    if cleaned['seed'] is not None and (isinstance(cleaned['seed'], bool) or not isinstance(cleaned['seed'], int)):
+        raise ValueError("'seed' must be an integer.")
+    return cleaned
+
+
+# Backtests run before the trade analyzer recorded each trade's PnL can't be analyzed
+LEGACY_TRADES_ERROR = "This backtest ran before per-trade PnL was recorded. Rerun it to analyze its trades."
+
+
+def has_trade_pnl(trade_data):
+    """Whether every trade record carries the PnL and portfolio value trade_returns needs."""
+    return all('pnl' in t and 'portfolio_value' in t for t in trade_data)
+
+
+def trade_returns(trade_data):
+    """
+    Fractional return of each closed trade on the account: its PnL over the portfolio
+    value before it closed. trade_data are BacktestResult.trade_data records.
+    """
+    if not has_trade_pnl(trade_data):
+        raise ValueError(LEGACY_TRADES_ERROR)
+    pnl = np.fromiter((t['pnl'] for t in trade_data), dtype=np.float64, count=len(trade_data))
+    value = np.fromiter((t['portfolio_value'] for t in trade_data), dtype=np.float64, count=len(trade_data))
+    before = value - pnl
+    return pnl[before > 0] / before[before > 0]
+
+
+def equity_path_stats(returns):
+    """
+    Final return and maximum drawdown (both fractions) of every row of a matrix of
+    trade returns, compounded from a starting equity of 1.
+    """
+    paths = np.cumprod(1.0 + returns, axis=1)
+    peaks = np.maximum(np.maximum.accumulate(paths, axis=1), 1.0)
+    drawdowns = 1.0 - paths / peaks
+    return paths[:, -1] - 1.0, drawdowns.max(axis=1)
+
+
+def _simulate_trades(task):
+    """Simulate one batch of resampled or reshuffled trade sequences inside a pool worker."""
+    seed, size = task
+    state = shared_state()
+    returns = state['returns']
+    rng = np.random.default_rng(seed)
+    if state['method'] == 'bootstrap':
+        order = rng.integers(len(returns), size=(size, len(returns)))
+    else:
+        order = rng.permuted(np.broadcast_to(np.arange(len(returns)), (size, len(returns))), axis=1)
+    return equity_path_stats(returns[order])
+
+
+def monte_carlo(trade_data, config, processes=None):
+    """
+    Monte Carlo robustness analysis of a finished backtest's trade list.
+
+    'bootstrap' resamples trades with replacement; 'shuffle' reorders them, which keeps
+    the final return and varies only the path. Simulations run in batches of
+    batch_size across a process pool, one (batch x trades) matrix per batch. Only
+    quantiles of the final return and maximum drawdown are kept.
+    """
+    config = clean_monte_carlo_config(config)
+    returns = trade_returns(trade_data)
+    if len(returns) < 2:
+        raise ValueError("Monte Carlo analysis needs a backtest with at least two closed trades.")
+
+    simulations, batch_size = config['simulations'], config['batch_size']
+    sizes = [batch_size] * (simulations // batch_size)
+    if simulations % batch_size:
+        sizes.append(simulations % batch_size)
+    seeds = np.random.SeedSequence(config['seed']).spawn(len(sizes))
+
+    batches = run_in_pool(
+        _simulate_trades, list(zip(seeds, sizes)),
+        shared={'returns': returns, 'method': config['method']}, processes=processes
+    )
+    final_returns = np.concatenate([batch[0] for batch in batches]) * 100
+    max_drawdowns = np.concatenate([batch[1] for batch in batches]) * 100
+
+    original_return, original_drawdown = equity_path_stats(returns[np.newaxis, :])
+    return_quantiles = np.percentile(final_returns, MONTE_CARLO_QUANTILES)
+    drawdown_quantiles = np.percentile(max_drawdowns, MONTE_CARLO_QUANTILES)
+    return {
+        'method': config['method'],
+        'simulations': simulations,
+        'trades': len(returns),
+        'quantiles': [
+            {'quantile': q, 'return': float(r), 'max_drawdown': float(d)}
+            for q, r, d in zip(MONTE_CARLO_QUANTILES, return_quantiles, drawdown_quantiles)
+        ],
+        'mean_return': float(final_returns.mean()),
+        'probability_of_loss': float((final_returns < 0).mean() * 100),
+        'ruin_drawdown': config['ruin_drawdown'],
+        'risk_of_ruin': float((max_drawdowns >= config['ruin_drawdown']).mean() * 100),
+        'original': {'return': float(original_return[0] * 100), 'max_drawdown': float(original_drawdown[0] * 100)},
+        'processes': pool_size(len(sizes), processes),
+    }
+
+
+def clean_permutation_config(config):
+    """Validate a permutation test config and fill in defaults."""
+    cleaned = {
+        'permutations': _positive_int(config, 'permutations', 200),
+        'objective': _objective(config),
+        'seed': config.get('seed'),
+    }
+    if cleaned['seed'] is not None and (isinstance(cleaned['seed'], bool) or not isinstance(cleaned['seed'], int)):
+        raise ValueError("'seed' must be an integer.")
+    return cleaned
+
+
+def bar_components(arrays):
+    """
+    Split candles into per-bar pieces that can be shuffled together: the log return of
+    each close over the previous one, and open/high/low as log offsets from the close.
+    """
+    close = np.asarray(arrays['close'], dtype=np.float64)
+    log_close = np.log(close)
+    return {
+        'first_close': close[0],
+        'returns': np.diff(log_close),
+        'open': np.log(arrays['open'][1:]) - log_close[1:],
+        'high': np.log(arrays['high'][1:]) - log_close[1:],
+        'low': np.log(arrays['low'][1:]) - log_close[1:],
+        'volume': np.asarray(arrays['volume'][1:], dtype=np.float64),
+        'head': {name: float(arrays[name][0]) for name in ('open', 'high', 'low', 'close', 'volume')},
+    }
+
+
+def permuted_paths(components, rng, count):
+    """
+    Generate count synthetic price paths at once, as (count x bars) arrays. Every path
+    shuffles the bars after the first one, keeping each bar's shape; the first bar and
+    therefore the first price are unchanged.
+    """
+    n = len(components['returns'])
+    order = rng.permuted(np.broadcast_to(np.arange(n), (count, n)), axis=1)
+    log_close = np.log(components['first_close']) + np.cumsum(components['returns'][order], axis=1)
+    paths = {}
+    for name in ('open', 'high', 'low', 'close', 'volume'):
+        column = np.empty((count, n + 1))
+        column[:, 0] = components['head'][name]
+        if name == 'close':
+            column[:, 1:] = np.exp(log_close)
+        elif name == 'volume':
+            column[:, 1:] = components['volume'][order]
+        else:
+            column[:, 1:] = np.exp(log_close + components[name][order])
+        paths[name] = column
+    return paths
+
+
+def _run_permutations(task):
+    """
+    Generate one batch of permuted paths and score the strategy on each, in a pool
+    worker. Runs that raise score NaN so the caller can count them apart from paths
+    where the objective is undefined (-inf).
+    """
+    from .tasks import run_cerebro_with_data_and_strategy, summarize_run
+
+    seed, count = task
+    state = shared_state()
+    paths = permuted_paths(state['components'], np.random.default_rng(seed), count)
+    scores = []
+    for i in range(count):
+        feed = {name: column[i] for name, column in paths.items()}
+        feed['datetime'] = state['datetime']
+        try:
+            cerebro, results, initial_cash = run_cerebro_with_data_and_strategy(
+                [feed], state['strategy'], commission=state['commission']
+            )
+            scores.append(objective_score(summarize_run(cerebro, results, initial_cash), state['objective']))
+        except Exception:
+            scores.append(np.nan)
+    return scores
+
+
+def permutation_test(UserStrategy, arrays, config, commission=0.0, processes=None):
+    """
+    Permutation significance test of a strategy on one import.
+
+    The strategy's objective on the real candles is compared with its objective on
+    synthetic paths made by shuffling the import's bars. The paths are generated in
+    bulk from the loaded arrays inside the pool workers, in batches sized to keep
+    memory bounded. The p-value is the share of paths (counting the real one)
+    scoring at least as well as the real data, over the paths the strategy ran on
+    without raising; the test fails if most runs raised.
+    """
+    from .tasks import run_cerebro_with_data_and_strategy, summarize_run
+
+    config = clean_permutation_config(config)
+    objective = config['objective']
+    n_bars = len(arrays['date'])
+    if n_bars < 3:
+        raise ValueError("The import needs at least three bars for a permutation test.")
+    feed = shared_feed_arrays(ocl_arrays_to_feed(arrays))
+
+    cerebro, results, initial_cash = run_cerebro_with_data_and_strategy([feed], UserStrategy, commission=commission)
+    real = summarize_run(cerebro, results, initial_cash)
+    real_score = objective_score(real, objective)
+    if not np.isfinite(real_score):
+        raise ValueError(f"The strategy has no {objective} on the real data, so there is nothing to test.")
+
+    batch = max(1, min(64, PERMUTATION_BATCH_BARS // n_bars))
+    permutations = config['permutations']
+    sizes = [batch] * (permutations // batch)
+    if permutations % batch:
+        sizes.append(permutations % batch)
+    seeds = np.random.SeedSequence(config['seed']).spawn(len(sizes))
+
+    batches = run_in_pool(
+        _run_permutations, list(zip(seeds, sizes)),
+        shared={
+            'strategy': UserStrategy,
+            'components': bar_components(arrays),
+            'datetime': feed['datetime'],
+            'commission': commission,
+            'objective': objective,
+        },
+        processes=processes
+    )
+    scores = np.concatenate([np.asarray(b, dtype=np.float64) for b in batches])
+    failed = int(np.isnan(scores).sum())
+    if failed * 2 > permutations:
+        raise ValueError(f"The strategy raised an error on {failed} of {permutations} permuted paths.")
+    scores = scores[~np.isnan(scores)]
+    at_least_as_good = int((scores >= real_score).sum())
+
+    finite = scores[np.isfinite(scores)]
+    counts, edges = np.histogram(finite, bins=PERMUTATION_HISTOGRAM_BINS) if finite.size else ([], [])
+    return {
+        'objective': objective,
+        'real': real,
+        'real_score': real_score,
+        'permutations': permutations,
+        'at_least_as_good': at_least_as_good,
+        'scored': int(scores.size),
+        'failed': failed,
+        'p_value': (at_least_as_good + 1) / (scores.size + 1),
+        'undefined': int(scores.size - finite.size),
+        'quantiles': [
+            {'quantile': q, 'score': float(v)}
+            for q, v in zip(MONTE_CARLO_QUANTILES, np.percentile(finite, MONTE_CARLO_QUANTILES) if finite.size else [])
+        ],
+        'histogram': [
+            {'low': float(low), 'high': float(high), 'count': int(count)}
+            for low, high, count in zip(edges[:-1], edges[1:], counts)
+        ],
+        'processes': pool_size(len(sizes), processes),
+    }
+
+
+# Analyses that take checkpoint/on_checkpoint and can resume after a crash
+RESUMABLE_ANALYSES = {'genetic'}
+
+# Analyses of a finished backtest's trade list rather than of a strategy on candles;
+# they are called as analysis(trade_data, config)
+TRADE_LIST_ANALYSES = {'monte_carlo'}
+
+# kind -> (config cleaner, analysis), see AnalysisJob.KIND_CHOICES
+ANALYSES = {
+    'walk_forward': (clean_walk_forward_config, walk_forward),
+    'successive_halving': (clean_successive_halving_config, successive_halving),
+    'genetic': (clean_genetic_config, genetic),
+    'monte_carlo': (clean_monte_carlo_config, monte_carlo),
+    'permutation': (clean_permutation_config, permutation_test),
+}
+
+
+def clean_config(kind, config):
+    """Validate the config of an analysis kind; raises ValueError with a readable message."""
+    if kind not in ANALYSES:
+        raise ValueError(f"Unknown analysis '{kind}'.")
+    if not isinstance(config, dict):
+        raise ValueError("The configuration must be a JSON object.")
+    return ANALYSES[kind][0](config)
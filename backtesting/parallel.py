@@ -0,0 +1,103 @@
+# backtesting/parallel.py
+
+import contextlib
+import ctypes
+import multiprocessing
+import os
+import signal
+
+from django.conf import settings
+from django.db import connections
+
+# State handed to forked workers. It is set before the pool starts so children inherit
+# it through fork: exec-compiled strategy classes cannot be pickled, and large candle
+# arrays should not be copied through a pipe.
+_shared_state = {}
+
+# prctl option delivering a signal to a process when its parent exits (linux/prctl.h)
+PR_SET_PDEATHSIG = 1
+
+
+def shared_state():
+    """State passed to run_in_pool, as seen from inside a worker."""
+    return _shared_state
+
+
+def default_pool_processes():
+    """
+    Pool size when none is configured. Multi-run tasks run inside a prefork worker with
+    BACKTEST_WORKER_CONCURRENCY processes, each of which may fork its own pool, so each
+    pool gets an equal share of the CPUs instead of one process per CPU.
+    """
+    concurrency = max(1, getattr(settings, 'BACKTEST_WORKER_CONCURRENCY', 1))
+    return max(1, (os.cpu_count() or 1) // concurrency)
+
+
+def pool_size(tasks, processes=None):
+    processes = processes or getattr(settings, 'BACKTEST_POOL_PROCESSES', 0) or default_pool_processes()
+    return max(1, min(tasks, processes))
+
+
+@contextlib.contextmanager
+def _allow_children():
+    """
+    Celery prefork workers are daemonic, and multiprocessing refuses to start children
+    from a daemonic process: Process.start() asserts on the private
+    current_process()._config['daemon'] flag. The rule exists because a daemonic process
+    is terminated without joining its children. We lift the flag only while our own pool
+    runs, and it keeps that contract itself: the pool is joined before we return, and its
+    workers are killed with the worker process if that dies first (_die_with_parent).
+
+    This relies on a CPython implementation detail; test_parallel runs a pool from a
+    daemonic parent so a Python upgrade that changes it fails the tests.
+    """
+    process = multiprocessing.current_process()
+    daemon = process._config.get('daemon')
+    process._config['daemon'] = False
+    try:
+        yield
+    finally:
+        if daemon is None:
+            process._config.pop('daemon', None)
+        else:
+            process._config['daemon'] = daemon
+
+
+def _die_with_parent(parent_pid):
+    """
+    Pool initializer: have the kernel kill this pool worker when the process that
+    started the pool dies, e.g. a Celery child killed for its memory or by a worker
+    restart, instead of leaving it running as an orphan. Linux only.
+    """
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        libc.prctl(PR_SET_PDEATHSIG, signal.SIGKILL)
+    except (OSError, AttributeError):
+        return
+    # The parent may have died before the signal was armed
+    if os.getppid() != parent_pid:
+        os._exit(1)
+
+
+def run_in_pool(func, items, shared=None, processes=None):
+    """
+    Call func(item) for every item in a pool of forked processes and return the results in order.
+    func must be a module-level function; it reads shared objects through shared_state().
+    Runs in-process when only one worker would be used.
+    """
+    items = list(items)
+    _shared_state.clear()
+    _shared_state.update(shared or {})
+    try:
+        workers = pool_size(len(items), processes)
+        if workers == 1:
+            return [func(item) for item in items]
+
+        # Children must not reuse the parent's database sockets
+        connections.close_all()
+        with _allow_children():
+            context = multiprocessing.get_context('fork')
+            with context.Pool(workers, initializer=_die_with_parent, initargs=(os.getpid(),)) as pool:
+                return pool.map(func, items, chunksize=1)
+    finally:
+        _shared_state.clear()
@@ -0,0 +1,214 @@
+# backtesting/scheduling.py
+"""
+Runtime prediction and queue routing for single backtests.
+
+A backtest's runtime is mostly bars x per-bar cost, and the per-bar cost grows
+with the number of indicators the strategy builds. The estimate uses the
+strategy's own recent runs when there are any, and otherwise scales the
+throughput of other strategies by indicator count. Short jobs go to their own
+queue so they never wait behind long ones, and a per-user slot limit keeps one
+user's sweep from occupying every worker of a queue.
+"""
+
+import ast
+import time
+from contextlib import contextmanager
+from datetime import datetime, time as dt_time, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .feeds import TIMEFRAME_SECONDS
+
+SHORT_QUEUE = 'backtests_short'
+LONG_QUEUE = 'backtests_long'
+
+# Fallback when no completed run has timing data, and the slowdown per indicator
+DEFAULT_BARS_PER_SECOND = 15000.0
+INDICATOR_COST = 0.3
+# Loading candles, extracting results and plotting around the cerebro run
+OVERHEAD_SECONDS = 2.0
+HISTORY_RUNS = 10
+
+# Seconds a task's slot is held if it is never released, e.g. when its process is killed
+SLOT_TIMEOUT = 6 * 60 * 60
+SLOT_LOCK_SECONDS = 5
+RETRY_SECONDS = 10
+
+INDICATOR_MODULES = ('bt.ind', 'bt.indicators', 'bt.talib', 'btind')
+
+
+def _dotted_name(node):
+    parts = []
+    while isinstance(node, ast.Attribute):
+        parts.append(node.attr)
+        node = node.value
+    if isinstance(node, ast.Name):
+        parts.append(node.id)
+        return '.'.join(reversed(parts))
+    return None
+
+
+def count_indicators(code):
+    """Number of backtrader indicator constructions (bt.ind.X(...) and friends) in strategy code."""
+    try:
+        tree = ast.parse(code or '')
+    except SyntaxError:
+        return 0
+    count = 0
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Call):
+            name = _dotted_name(node.func)
+            if name and any(name.startswith(module + '.') for module in INDICATOR_MODULES):
+                count += 1
+    return count
+
+
+def _as_datetime(value, end=False):
+    if isinstance(value, datetime):
+        return value if value.tzinfo else value.replace(tzinfo=dt_timezone.utc)
+    moment = datetime.combine(value, dt_time.min, tzinfo=dt_timezone.utc)
+    # Import end dates are inclusive days
+    return moment + timedelta(days=1) if end else moment
+
+
+def import_bars(data_import, start=None, end=None):
+    """Bars of an import inside the [start, end) window, from its date range and interval."""
+    first = max(_as_datetime(data_import.start_date), _as_datetime(start)) if start else _as_datetime(data_import.start_date)
+    last = min(_as_datetime(data_import.end_date, end=True), _as_datetime(end)) if end else _as_datetime(data_import.end_date, end=True)
+    seconds = TIMEFRAME_SECONDS.get(data_import.interval, TIMEFRAME_SECONDS['1h'])
+    return max(int((last - first).total_seconds() // seconds), 0)
+
+
+def estimate_bars(backtest):
+    """Bars across every feed of a backtest: the imports plus derived coarser timeframes."""
+    if not backtest.ocl_data_import:
+        return 0
+    primary = backtest.ocl_data_import
+    bars = import_bars(primary, backtest.start_date, backtest.end_date) + backtest.warmup_bars
+    total = bars
+    if backtest.pk:
+        for data_import in backtest.additional_data_imports.exclude(id=primary.id):
+            total += import_bars(data_import, backtest.start_date, backtest.end_date) + backtest.warmup_bars
+    base = TIMEFRAME_SECONDS.get(primary.interval, TIMEFRAME_SECONDS['1h'])
+    for timeframe in backtest.extra_timeframes or []:
+        if timeframe in TIMEFRAME_SECONDS:
+            total += bars * base // TIMEFRAME_SECONDS[timeframe]
+    return total
+
+
+def run_throughput(run_metadata):
+    """Bars per second of a finished run, or None without timing data."""
+    run_metadata = run_metadata or {}
+    seconds = run_metadata.get('run_seconds')
+    bars = sum(feed.get('bars', 0) for feed in run_metadata.get('feeds') or [])
+    if not seconds or not bars:
+        return None
+    return bars / seconds
+
+
+def _completed_runs(queryset):
+    return (
+        queryset.filter(status='COMPLETED', run_metadata__isnull=False)
+        .order_by('-completed_at', '-id')
+        .values_list('strategy_code', 'run_metadata')[:HISTORY_RUNS]
+    )
+
+
+def estimate_throughput(backtest):
+    """
+    Bars per second expected for this backtest. The strategy's own runs are used
+    as they are; other strategies' runs are normalized by indicator count first.
+    """
+    from .models import BacktestResult
+
+    indicators = count_indicators(backtest.strategy_code)
+    own = [run_throughput(metadata) for _, metadata in _completed_runs(
+        BacktestResult.objects.filter(strategy_id=backtest.strategy_id)
+    )]
+    own = [rate for rate in own if rate]
+    if own:
+        return sum(own) / len(own)
+
+    base_rates = [
+        rate * (1 + INDICATOR_COST * count_indicators(code))
+        for code, metadata in _completed_runs(BacktestResult.objects.all())
+        if (rate := run_throughput(metadata))
+    ]
+    base = sum(base_rates) / len(base_rates) if base_rates else DEFAULT_BARS_PER_SECOND
+    return base / (1 + INDICATOR_COST * indicators)
+
+
+def estimate_runtime(backtest):
+    """Predicted wall seconds of a backtest, with the inputs the prediction used."""
+    bars = estimate_bars(backtest)
+    throughput = estimate_throughput(backtest)
+    return {
+        'bars': bars,
+        'indicators': count_indicators(backtest.strategy_code),
+        'bars_per_second': round(throughput, 1),
+        'seconds': round(OVERHEAD_SECONDS + bars / throughput, 1),
+    }
+
+
+def choose_queue(seconds):
+    return SHORT_QUEUE if seconds <= settings.SHORT_BACKTEST_SECONDS else LONG_QUEUE
+
+
+def _slot_key(user_id, queue):
+    return f'backtest-slots:{queue}:{user_id}'
+
+
+@contextmanager
+def _slot_lock(key):
+    """Serialize updates of one user's slots; a lock left by a killed process expires."""
+    lock = f'{key}:lock'
+    deadline = time.monotonic() + SLOT_LOCK_SECONDS
+    while not cache.add(lock, 1, timeout=SLOT_LOCK_SECONDS) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    try:
+        yield
+    finally:
+        cache.delete(lock)
+
+
+def _live_slots(key):
+    now = time.time()
+    return {task_id: expires for task_id, expires in (cache.get(key) or {}).items() if expires > now}
+
+
+def acquire_user_slot(user_id, queue, task_id):
+    """
+    Claim one of the user's BACKTEST_USER_CONCURRENCY running slots on a queue for a task.
+    Returns False when they are all taken; the caller should requeue the task.
+
+    Slots are held per task id, each with its own expiry, so a task whose process is
+    killed before releasing its slot only holds it until SLOT_TIMEOUT, and a redelivered
+    or retried task reclaims its own slot instead of taking a second one.
+    """
+    key = _slot_key(user_id, queue)
+    with _slot_lock(key):
+        slots = _live_slots(key)
+        if task_id not in slots and len(slots) >= settings.BACKTEST_USER_CONCURRENCY:
+            return False
+        slots[task_id] = time.time() + SLOT_TIMEOUT
+        cache.set(key, slots, timeout=SLOT_TIMEOUT)
+    return True
+
+
+def release_user_slot(user_id, queue, task_id):
+    """Give back a task's slot; releasing it again does nothing."""
+    key = _slot_key(user_id, queue)
+    with _slot_lock(key):
+        slots = _live_slots(key)
+        if slots.pop(task_id, None) is not None:
+            cache.set(key, slots, timeout=SLOT_TIMEOUT)
+
+
+def format_duration(seconds):
+    seconds = int(round(seconds or 0))
+    if seconds < 60:
+        return f'{seconds}s'
+    if seconds < 3600:
+        return f'{seconds // 60}m {seconds % 60:02d}s'
+    return f'{seconds // 3600}h {seconds % 3600 // 60:02d}m'
@@ -6,57 +6,167 @@ matplotlib.use('Agg')
 from celery import shared_task
 from django.core.files.base import ContentFile
 
-from .models import BacktestResult
+from .models import BacktestResult, BacktestBatch, BacktestComparison, AnalysisJob
 from dashboard.models import BestPerformingAlgo, MostWinningAlgo, BestReturnAlgo
-from .analyzers import PortfolioValueAnalyzer, TradeListAnalyzer, OrderListAnalyzer
+from .analyzers import PortfolioValueAnalyzer, TradeListAnalyzer, OrderListAnalyzer, DrawdownStop, CancelStop, columns_to_records
+from .metrics import compute_performance_metrics, per_feed_trade_stats
+from .feeds import (
+    NumpyData, TIMEFRAME_SECONDS, frame_to_arrays, datetime64_to_bt_num, aggregate_arrays, timeframe_params,
+    ocl_arrays_to_feed, shared_feed_arrays
+)
+from .parallel import run_in_pool, shared_state, pool_size
+from .instrumentation import PhaseTimer, profile_call, profile_artifact, summarize_profile
+from .scheduling import acquire_user_slot, release_user_slot, LONG_QUEUE, RETRY_SECONDS
+from arbitrex.cancellation import is_cancelled, clear_cancel, cancel_checker
+from arbitrex import metrics as task_metrics
 from strategies.utils import load_strategies_and_inject_log
 
 import backtrader as bt
 import matplotlib.pyplot as plt
 from io import BytesIO
+import numpy as np
 import pandas as pd
 import datetime
 import json
+import time
 import traceback
 
 
-def get_ocl_historical_data(data_import_id):
+# Order methods suppressed while the strategy is still in its warmup bars
+ORDER_METHODS = (
+    'buy', 'sell', 'close', 'buy_bracket', 'sell_bracket',
+    'order_target_size', 'order_target_value', 'order_target_percent',
+)
+
+
+def get_ocl_historical_data(data_import_id, start=None, end=None, warmup_bars=0):
     """
     Fetch historical data from OCLDataImport and format it to match expected output.
+    Candles are streamed from the database straight into NumPy arrays, restricted to
+    the optional start/end window plus warmup_bars candles before start.
     """
-    from data.models import OCLDataImport, OCLPrice
-
-    data_import = OCLDataImport.objects.get(id=data_import_id)
-    prices = OCLPrice.objects.filter(data_import=data_import).order_by('date').values(
-        'date', 'open', 'high', 'low', 'close', 'volume'
-    )
+    from data.loaders import load_ocl_arrays, ocl_arrays_to_frame
 
-    if not prices:
+    arrays = load_ocl_arrays(data_import_id, start=start, end=end, warmup_bars=warmup_bars)
+    if not len(arrays['date']):
         raise ValueError(f"No price data found for import {data_import_id}")
 
-    df = pd.DataFrame(list(prices))
-    df = df.rename(columns={
-        'date': 'Date',
-        'open': 'Open',
-        'high': 'High',
-        'low': 'Low',
-        'close': 'Close',
-        'volume': 'Volume'
-    })
-    df['Adj_Close'] = df['Close']
-    df = df[['Date', 'Open', 'High', 'Low', 'Close', 'Volume', 'Adj_Close']]
-    if pd.api.types.is_datetime64_any_dtype(df['Date']):
-        df['Date'] = pd.to_datetime(df['Date']).dt.tz_localize(None)
-
-    return df
-
-def run_cerebro_with_data_and_strategy(dataframes, UserStrategy, commission=0.0):
+    return ocl_arrays_to_frame(arrays)
+
+
+def get_aligned_ocl_data(data_imports, start=None, end=None, warmup_bars=0):
+    """
+    Load several OCLDataImports with one batched query and return one DataFrame each.
+    Imports sharing an interval are aligned on the union of their timestamps, with
+    gaps forward-filled and flagged in the 'Filled' column.
+    """
+    from data.loaders import load_ocl_arrays_batch, align_ocl_arrays, ocl_arrays_to_frame
+
+    arrays = load_ocl_arrays_batch([i.id for i in data_imports], start=start, end=end, warmup_bars=warmup_bars)
+    for data_import in data_imports:
+        if not len(arrays[data_import.id]['date']):
+            raise ValueError(f"No price data found for import {data_import.id}")
+
+    # Different intervals are left to backtrader's own clock synchronisation
+    by_interval = {}
+    for data_import in data_imports:
+        by_interval.setdefault(data_import.interval, []).append(data_import.id)
+    for ids in by_interval.values():
+        if len(ids) > 1:
+            arrays.update(zip(ids, align_ocl_arrays([arrays[i] for i in ids])))
+
+    return [ocl_arrays_to_frame(arrays[i.id]) for i in data_imports]
+
+
+def derive_timeframes(df, timeframes):
+    """
+    Pre-aggregate the primary feed into each requested coarser timeframe.
+    Returns the candle arrays, the feed params and per-timeframe metadata.
+    """
+    base = frame_to_arrays(df)
+    feeds, params, metadata = [], [], []
+    for timeframe in timeframes:
+        started = time.perf_counter()
+        feeds.append(aggregate_arrays(base, TIMEFRAME_SECONDS[timeframe]))
+        params.append(timeframe_params(TIMEFRAME_SECONDS[timeframe]))
+        metadata.append({
+            'timeframe': timeframe,
+            'aggregate_ms': round((time.perf_counter() - started) * 1000, 3)
+        })
+    return feeds, params, metadata
+
+
+def feed_metadata(datas, feed_names, timeframe_metadata):
+    """
+    Bars, memory and preload time of every feed in a finished run. Derived
+    timeframe feeds are last and also carry their aggregation time.
+    """
+    extra = [{}] * (len(feed_names) - len(timeframe_metadata)) + timeframe_metadata
+    return [
+        {
+            'feed': name,
+            'bars': len(data.lines.datetime.array),
+            'memory_bytes': data.memory_bytes(),
+            'preload_ms': round(data.preload_seconds * 1000, 3),
+            **meta,
+        }
+        for data, name, meta in zip(datas, feed_names, extra)
+    ]
+
+
+def ocl_data_records(df, start_date=None):
+    """Candles as chart records, dropping warmup candles before start_date."""
+    ocl_data = df.copy()
+    if start_date is not None:
+        window_start = np.datetime64(to_epoch_seconds(start_date), 's')
+        ocl_data = ocl_data[ocl_data['Date'].to_numpy() >= window_start].copy()
+    ocl_data['Date'] = ocl_data['Date'].dt.strftime('%Y-%m-%d %H:%M:%S')
+    return ocl_data.to_dict(orient='records')
+
+
+def to_epoch_seconds(dt):
+    """Epoch seconds of a datetime; naive values are taken as UTC."""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=datetime.timezone.utc)
+    return int(dt.timestamp())
+
+
+def block_orders_before(UserStrategy, trade_start):
+    """
+    Subclass the user strategy so orders placed before trade_start are ignored.
+    Indicators still see the warmup bars; only trading is held back.
+    """
+    # Same conversion as the feed, so a bar exactly at trade_start compares equal
+    start_num = float(datetime64_to_bt_num(np.datetime64(to_epoch_seconds(trade_start), 's')))
+
+    def guard(method):
+        def guarded(self, *args, **kwargs):
+            if self.datetime[0] < start_num:
+                return None
+            return method(self, *args, **kwargs)
+        return guarded
+
+    overrides = {name: guard(getattr(UserStrategy, name)) for name in ORDER_METHODS}
+    return type(UserStrategy.__name__, (UserStrategy,), overrides)
+
+
+def run_cerebro_with_data_and_strategy(dataframes, UserStrategy, commission=0.0, trade_start=None, names=None,
+                                       feed_params=None, strategy_params=None, max_drawdown_stop=None,
+                                       cancel_check=None):
     """
     Configure and run Cerebro with given dataframes and the user strategy.
-    Supports multiple data feeds if dataframes is a list of DataFrames.
+    Supports multiple data feeds if dataframes is a list of DataFrames (or candle
+    array dicts); names makes them reachable through getdatabyname and feed_params
+    sets per-feed options such as timeframe/compression.
+    Bars before trade_start only warm up indicators; no orders are placed on them.
+    strategy_params override the strategy's params defaults, and max_drawdown_stop
+    (percent) ends the run early once the portfolio draws down that far.
+    cancel_check, a no-argument callable, ends it once it returns True.
     """
     cerebro = bt.Cerebro()
-    cerebro.addstrategy(UserStrategy)
+    if trade_start is not None:
+        UserStrategy = block_orders_before(UserStrategy, trade_start)
+    cerebro.addstrategy(UserStrategy, **(strategy_params or {}))
 
     # Set commission as a percentage
     cerebro.broker.setcommission(
@@ -68,19 +178,13 @@ def run_cerebro_with_data_and_strategy(dataframes, UserStrategy, commission=0.0)
     cerebro.broker.set_cash(initial_cash)
     cerebro.addsizer(bt.sizers.PercentSizer, percents=95)
 
-    # Add one or multiple data feeds
-    for df in dataframes:
-        data_feed = bt.feeds.PandasData(
-            dataname=df,
-            datetime='Date',
-            open='Open',
-            high='High',
-            low='Low',
-            close='Close',
-            volume='Volume',
-            openinterest=-1
-        )
-        cerebro.adddata(data_feed)
+    # Add one or multiple data feeds, bulk loaded from their NumPy columns
+    names = names or [None] * len(dataframes)
+    feed_params = feed_params or [{}] * len(dataframes)
+    for df, name, params in zip(dataframes, names, feed_params):
+        arrays = df if isinstance(df, dict) else frame_to_arrays(df)
+        data_feed = NumpyData(dataname=arrays, **params)
+        cerebro.adddata(data_feed, name=name)
 
     # Add analyzers
     cerebro.addanalyzer(bt.analyzers.SharpeRatio, _name='sharpe_ratio')
@@ -88,20 +192,63 @@ def run_cerebro_with_data_and_strategy(dataframes, UserStrategy, commission=0.0)
     cerebro.addanalyzer(PortfolioValueAnalyzer, _name='portfolio_value')
     cerebro.addanalyzer(TradeListAnalyzer, _name='trade_list')
     cerebro.addanalyzer(OrderListAnalyzer, _name='order_list')
+    if max_drawdown_stop is not None:
+        cerebro.addanalyzer(DrawdownStop, _name='drawdown_stop', max_drawdown=max_drawdown_stop)
+    if cancel_check is not None:
+        cerebro.addanalyzer(CancelStop, _name='cancel_stop', check=cancel_check)
 
     results = cerebro.run()
     return cerebro, results, initial_cash
 
 
-def extract_results_and_save(backtest, cerebro, results, strategy_logs):
+def _format_metric(value):
+    return f"{value:.2f}" if value is not None else "N/A"
+
+
+def trim_columns(columns, start_epoch):
+    """Drop analyzer rows recorded before start_epoch (the warmup bars)."""
+    keep = columns['time'] >= start_epoch
+    return {name: column[keep] for name, column in columns.items()}
+
+
+def extract_results_and_save(backtest, cerebro, results, strategy_logs, trade_start=None, feed_names=None,
+                             timer=None):
     """
     Extract analyzer results, trades, orders, plots, and save everything to BacktestResult.
+    With trade_start set, the equity curve and metrics cover only the trading window.
+    A PhaseTimer passed as timer records the extract, plot and save phases.
     """
+    timer = timer or PhaseTimer()
+    with timer.phase('extract'):
+        _extract_results(backtest, results, strategy_logs, cerebro.broker.getvalue(), trade_start, feed_names)
+
+    # Generate plot
+    with timer.phase('plot'):
+        figs = cerebro.plot(style='candlestick', iplot=False)
+        if figs and len(figs) > 0 and len(figs[0]) > 0:
+            fig = figs[0][0]
+            buf = BytesIO()
+            fig.savefig(buf, format='png', bbox_inches='tight', dpi=300)
+            plt.close(fig)
+            buf.seek(0)
+            image_file = ContentFile(buf.getvalue(), f'backtest_{backtest.id}.png')
+            backtest.result_file.save(f'backtest_{backtest.id}.png', image_file, save=False)
+            buf.close()
+
+    with timer.phase('save'):
+        backtest.save()
+
+        # Update leaderboards
+        update_best_algos(backtest)
+
+    return backtest
+
+
+def _extract_results(backtest, results, strategy_logs, final_value, trade_start, feed_names):
     first_strategy = results[0]
-    final_value = cerebro.broker.getvalue()
 
-    # Extract Sharpe ratio
-    sharpe_ratio = first_strategy.analyzers.sharpe_ratio.get_analysis().get('sharperatio', 0.0)
+    # Extract Sharpe ratio (None when the run spans too few periods)
+    sharpe_ratio = first_strategy.analyzers.sharpe_ratio.get_analysis().get('sharperatio') or 0.0
 
     # Trade Analyzer
     trade_analyzer = first_strategy.analyzers.trade_analyzer.get_analysis()
@@ -109,25 +256,22 @@ def extract_results_and_save(backtest, cerebro, results, strategy_logs):
     won_trades = trade_analyzer.get('won', {}).get('total', 0)
     win_rate = (won_trades / total_trades) * 100 if total_trades > 0 else 0.0
 
-    # Trades
-    trade_list = first_strategy.analyzers.trade_list.get_analysis().get('trades', [])
-    trade_data = [{
-        "time": t['datetime'].strftime('%Y-%m-%d %H:%M:%S'),
-        "type": t['type'],
-        "price": t['price'],
-        "size": t['size'],
-        "portfolio_value": t['portfolio_value']
-    } for t in trade_list]
-
-    # Orders
-    order_list = first_strategy.analyzers.order_list.get_analysis().get('orders', [])
-    order_data = [{
-        "time": o['datetime'].strftime('%Y-%m-%d %H:%M:%S'),
-        "type": o['type'],
-        "price": o['price'],
-        "size": o['size'],
-        "portfolio_value": o['portfolio_value']
-    } for o in order_list]
+    # Analyzers record columnar arrays; strings are only produced when serializing
+    portfolio = first_strategy.analyzers.portfolio_value.get_analysis()
+    trades = first_strategy.analyzers.trade_list.get_analysis()
+    orders = first_strategy.analyzers.order_list.get_analysis()
+    if trade_start is not None:
+        portfolio = trim_columns(portfolio, to_epoch_seconds(trade_start))
+    trade_data = columns_to_records(trades)
+    order_data = columns_to_records(orders)
+
+    # Extended metrics, computed in one vectorized pass instead of extra per-bar analyzers
+    metrics = compute_performance_metrics(
+        portfolio['time'],
+        portfolio['portfolio_value'],
+        trade_pnls=trades['pnl'],
+        trade_bars=trades['bars']
+    )
 
     initial_cash = 10_000
     if total_trades == 0:
@@ -144,30 +288,24 @@ def extract_results_and_save(backtest, cerebro, results, strategy_logs):
             f"Return:                  {((final_value - initial_cash) / initial_cash) * 100:.2f}%\n"
             f"Sharpe Ratio:            {sharpe_ratio:.2f}\n"
             f"Win Rate:                {win_rate:.2f}%\n"
+            f"Max Drawdown:            {metrics['max_drawdown'] or 0.0:.2f}%\n"
+            f"Sortino Ratio:           {_format_metric(metrics['sortino_ratio'])}\n"
+            f"Profit Factor:           {_format_metric(metrics['profit_factor'])}\n"
             f"Number of Trades:        {total_trades}"
         )
 
     # Save trades and orders
     backtest.trade_data = trade_data
     backtest.order_data = order_data
+    backtest.feed_results = per_feed_trade_stats(
+        trades['feed'], trades['pnl'], orders['feed'], feed_names or [data._name for data in first_strategy.datas]
+    )
 
     # Portfolio values
-    backtest.portfolio_values = first_strategy.analyzers.portfolio_value.get_analysis()
+    backtest.portfolio_values = columns_to_records(portfolio)
     backtest.portfolio_values_json = json.dumps(backtest.portfolio_values)
     backtest.trade_data_json = json.dumps(trade_data)
 
-    # Generate plot
-    figs = cerebro.plot(style='candlestick', iplot=False)
-    if figs and len(figs) > 0 and len(figs[0]) > 0:
-        fig = figs[0][0]
-        buf = BytesIO()
-        fig.savefig(buf, format='png', bbox_inches='tight', dpi=300)
-        plt.close(fig)
-        buf.seek(0)
-        image_file = ContentFile(buf.getvalue(), f'backtest_{backtest.id}.png')
-        backtest.result_file.save(f'backtest_{backtest.id}.png', image_file, save=False)
-        buf.close()
-
     backtest.status = 'COMPLETED'
     backtest.completed_at = datetime.datetime.utcnow()
     backtest.parameters = json.dumps(backtest.parameters) if isinstance(backtest.parameters, dict) else backtest.parameters
@@ -182,12 +320,15 @@ def extract_results_and_save(backtest, cerebro, results, strategy_logs):
     backtest.algo_return = ((final_value - initial_cash) / initial_cash) * 100 if total_trades > 0 else 0.0
     backtest.algo_sharpe_ratio = sharpe_ratio
     backtest.algo_win_rate = win_rate
-    backtest.save()
-
-    # Update leaderboards
-    update_best_algos(backtest)
-
-    return backtest
+    backtest.algo_max_drawdown = metrics['max_drawdown']
+    backtest.algo_max_drawdown_duration = metrics['max_drawdown_duration']
+    backtest.algo_sortino_ratio = metrics['sortino_ratio']
+    backtest.algo_calmar_ratio = metrics['calmar_ratio']
+    backtest.algo_cagr = metrics['cagr']
+    backtest.algo_exposure = metrics['exposure']
+    backtest.algo_profit_factor = metrics['profit_factor']
+    backtest.algo_expectancy = metrics['expectancy']
+    backtest.algo_rolling_sharpe = metrics['rolling_sharpe']
 
 
 def update_best_algos(backtest):
@@ -228,10 +369,12 @@ def update_best_algos(backtest):
         )
 
 
-@shared_task
-def run_backtest(backtest_id):
+@shared_task(bind=True, max_retries=None)
+def run_backtest(self, backtest_id):
     """
     Executes the backtest asynchronously and updates the BacktestResult accordingly.
+    When the user already has their share of running backtests on this queue, the
+    task is requeued behind other users' work instead of taking another worker.
     """
     # Logging storage
     strategy_logs = []
@@ -242,40 +385,416 @@ def run_backtest(backtest_id):
         strategy_logs.append(log_entry)
 
     backtest = BacktestResult.objects.get(id=backtest_id)
+    if is_cancelled('backtest', backtest.id):
+        _mark_cancelled(backtest)
+        return
+    if backtest.queue:
+        if not acquire_user_slot(backtest.user_id, backtest.queue, self.request.id):
+            raise self.retry(countdown=RETRY_SECONDS, queue=backtest.queue)
+        try:
+            return _run_backtest(backtest, strategy_logs, capture_log)
+        finally:
+            release_user_slot(backtest.user_id, backtest.queue, self.request.id)
+    return _run_backtest(backtest, strategy_logs, capture_log)
+
+
+class BacktestCancelled(Exception):
+    pass
+
+
+def _with_user_slot(task, user_id, run):
+    """
+    Call run() holding one of the user's slots on the long queue. Multi-run tasks are
+    the heaviest work there, so they share the per-user limit of single long backtests
+    and are requeued behind other users' work while the user's slots are taken.
+    """
+    if not acquire_user_slot(user_id, LONG_QUEUE, task.request.id):
+        raise task.retry(countdown=RETRY_SECONDS, queue=LONG_QUEUE)
+    try:
+        return run()
+    finally:
+        release_user_slot(user_id, LONG_QUEUE, task.request.id)
+
+
+def _mark_cancelled(backtest, bars=None):
+    backtest.status = 'CANCELLED'
+    backtest.log = 'Cancelled by user.' if bars is None else f'Cancelled by user after {bars} bars.'
+    backtest.save()
+    clear_cancel('backtest', backtest.id)
+    task_metrics.increment('arbitrex_backtests_total', status='CANCELLED')
+
+
+def _run_backtest(backtest, strategy_logs, capture_log):
     backtest.status = 'RUNNING'
     backtest.save()
+    cancel_check = cancel_checker('backtest', backtest.id)
+    timer = PhaseTimer()
 
     try:
         # Load data
-        if not backtest.ocl_data_import:
-            raise ValueError("No OCL data import ID found for this backtest.")
-        data_df = get_ocl_historical_data(backtest.ocl_data_import.id)
+        with timer.phase('load'):
+            if not backtest.ocl_data_import:
+                raise ValueError("No OCL data import ID found for this backtest.")
+            data_imports = [
+                backtest.ocl_data_import,
+                *backtest.additional_data_imports.exclude(id=backtest.ocl_data_import.id).order_by('id')
+            ]
+            if len(data_imports) > 1:
+                dataframes = get_aligned_ocl_data(
+                    data_imports,
+                    start=backtest.start_date,
+                    end=backtest.end_date,
+                    warmup_bars=backtest.warmup_bars
+                )
+            else:
+                dataframes = [get_ocl_historical_data(
+                    backtest.ocl_data_import.id,
+                    start=backtest.start_date,
+                    end=backtest.end_date,
+                    warmup_bars=backtest.warmup_bars
+                )]
+            data_df = dataframes[0]
+            feed_names = [str(data_import) for data_import in data_imports]
+            feed_params = [{}] * len(dataframes)
+
+            # Coarser timeframes come from the primary import, not extra downloads
+            extra_timeframes = list(backtest.extra_timeframes or [])
+            timeframe_feeds, timeframe_params_list, timeframe_metadata = derive_timeframes(data_df, extra_timeframes)
+            dataframes = dataframes + timeframe_feeds
+            feed_names = feed_names + extra_timeframes
+            feed_params = feed_params + timeframe_params_list
 
         # Load user strategy if it hasn't been loaded yet
-        if not backtest.strategy_code:
-            backtest.strategy_code = backtest.strategy.code
-            backtest.save()
-        UserStrategy = load_strategies_and_inject_log(backtest.strategy_code, capture_log)
-
-        # Run Cerebro
-        cerebro, results, initial_cash = run_cerebro_with_data_and_strategy(
-            dataframes=[data_df],
+        with timer.phase('compile'):
+            if not backtest.strategy_code:
+                backtest.strategy_code = backtest.strategy.code
+                backtest.save()
+            UserStrategy = load_strategies_and_inject_log(backtest.strategy_code, capture_log)
+        if cancel_check():
+            raise BacktestCancelled()
+
+        # Run Cerebro; CancelStop polls the cancel flag between bars
+        run_started = time.perf_counter()
+        run_kwargs = dict(
+            dataframes=dataframes,
             UserStrategy=UserStrategy,
-            commission=backtest.commission
+            commission=backtest.commission,
+            trade_start=backtest.start_date,
+            names=feed_names,
+            feed_params=feed_params,
+            cancel_check=cancel_check
         )
+        profiler = None
+        with timer.phase('run'):
+            if backtest.profile:
+                (cerebro, results, initial_cash), profiler = profile_call(run_cerebro_with_data_and_strategy, **run_kwargs)
+            else:
+                cerebro, results, initial_cash = run_cerebro_with_data_and_strategy(**run_kwargs)
+        if cancel_check():
+            raise BacktestCancelled(len(results[0]))
+        backtest.run_metadata = {
+            'run_seconds': round(time.perf_counter() - run_started, 3),
+            'feeds': feed_metadata(cerebro.datas, feed_names, timeframe_metadata),
+        }
+
+        # Also store OCL data for reference, without the warmup candles
+        with timer.phase('extract'):
+            backtest.ocl_data = ocl_data_records(data_df, backtest.start_date)
+            if profiler is not None:
+                backtest.profile_summary = summarize_profile(profiler)
+                backtest.profile_file.save(
+                    f'backtest_{backtest.id}.prof', ContentFile(profile_artifact(profiler)), save=False
+                )
 
         # Extract results and save
-        backtest = extract_results_and_save(backtest, cerebro, results, strategy_logs)
-
-        # Also store OCL data for reference
-        ocl_data = data_df.copy()
-        ocl_data['Date'] = ocl_data['Date'].dt.strftime('%Y-%m-%d %H:%M:%S')
-        backtest.ocl_data = ocl_data.to_dict(orient='records')
-        backtest.save()
-
+        backtest = extract_results_and_save(
+            backtest, cerebro, results, strategy_logs,
+            trade_start=backtest.start_date, feed_names=feed_names, timer=timer
+        )
+        backtest.timings = timer.summary(bars=sum(feed['bars'] for feed in backtest.run_metadata['feeds']))
+        backtest.save(update_fields=['timings'])
+        task_metrics.increment('arbitrex_backtests_total', status='COMPLETED')
+        task_metrics.increment('arbitrex_backtest_bars_total', backtest.timings['bars'])
+
+    except BacktestCancelled as e:
+        backtest.timings = timer.summary()
+        _mark_cancelled(backtest, *e.args)
     except Exception as e:
         backtest.status = 'FAILED'
         backtest.log = f"{str(e)}\n{traceback.format_exc()}"
+        backtest.timings = timer.summary()
         backtest.save()
+        task_metrics.increment('arbitrex_backtests_total', status='FAILED')
     finally:
         plt.close('all')
+
+
+def summarize_run(cerebro, results, initial_cash, trade_start=None):
+    """
+    Headline metrics of a finished run, without serializing trades or plotting.
+    Used where many runs are compared (batches, comparisons, optimizations).
+    With trade_start set, warmup bars are left out of the equity curve.
+    """
+    strategy = results[0]
+    portfolio = strategy.analyzers.portfolio_value.get_analysis()
+    if trade_start is not None:
+        portfolio = trim_columns(portfolio, to_epoch_seconds(trade_start))
+    trades = strategy.analyzers.trade_list.get_analysis()
+    metrics = compute_performance_metrics(
+        portfolio['time'],
+        portfolio['portfolio_value'],
+        trade_pnls=trades['pnl'],
+        trade_bars=trades['bars']
+    )
+    final_value = cerebro.broker.getvalue()
+    total_trades = len(trades['pnl'])
+    return {
+        'return': (final_value - initial_cash) / initial_cash * 100,
+        'sharpe_ratio': metrics['sharpe_ratio'],
+        'sortino_ratio': metrics['sortino_ratio'],
+        'max_drawdown': metrics['max_drawdown'],
+        'profit_factor': metrics['profit_factor'],
+        'win_rate': float((trades['pnl'] > 0).mean() * 100) if total_trades else 0.0,
+        'trades': total_trades,
+        'bars': len(portfolio['time']),
+    }
+
+
+def _batch_worker(data_import_id):
+    """Run the shared strategy on one preloaded import inside a pool worker."""
+    state = shared_state()
+    try:
+        cerebro, results, initial_cash = run_cerebro_with_data_and_strategy(
+            [state['arrays'][data_import_id]],
+            state['strategy'],
+            commission=state['commission']
+        )
+        return summarize_run(cerebro, results, initial_cash)
+    except Exception as e:
+        return {'error': str(e)}
+
+
+def build_batch_matrix(data_imports, summaries):
+    """
+    Arrange per-import summaries as an asset x interval matrix. When several imports share
+    a cell (different date ranges), the one with the most bars is shown; all are listed.
+    """
+    intervals = [code for code, _ in data_imports[0].INTERVAL_CHOICES if any(i.interval == code for i in data_imports)]
+    assets = sorted({i.asset for i in data_imports})
+
+    imports, cells = [], {}
+    for data_import, summary in zip(data_imports, summaries):
+        entry = {'import_id': data_import.id, 'name': str(data_import), 'asset': data_import.asset,
+                 'interval': data_import.interval, **summary}
+        imports.append(entry)
+        key = (data_import.asset, data_import.interval)
+        if key not in cells or entry.get('bars', 0) > cells[key].get('bars', 0):
+            cells[key] = entry
+
+    return {
+        'intervals': intervals,
+        'rows': [{'asset': asset, 'cells': [cells.get((asset, interval)) for interval in intervals]} for asset in assets],
+        'imports': imports,
+    }
+
+
+@shared_task(bind=True, max_retries=None)
+def run_backtest_batch(self, batch_id):
+    """
+    Run one strategy against every import of a BacktestBatch. The strategy is compiled
+    once and all imports are loaded with one query before a forked process pool
+    inherits both, so workers start running bars immediately.
+    """
+    batch = BacktestBatch.objects.get(id=batch_id)
+    return _with_user_slot(self, batch.user_id, lambda: _run_backtest_batch(batch))
+
+
+def _run_backtest_batch(batch):
+    from data.loaders import load_ocl_arrays_batch
+
+    batch.status = 'RUNNING'
+    batch.save()
+
+    try:
+        data_imports = list(batch.data_imports.order_by('asset', 'interval', 'id'))
+        if not data_imports:
+            raise ValueError("No data imports selected for this batch.")
+
+        started = time.perf_counter()
+        UserStrategy = load_strategies_and_inject_log(batch.strategy_code, lambda strategy, txt, dt=None: None)
+        arrays = load_ocl_arrays_batch([i.id for i in data_imports])
+        loaded = time.perf_counter()
+
+        summaries = run_in_pool(
+            _batch_worker,
+            [i.id for i in data_imports],
+            shared={
+                'strategy': UserStrategy,
+                'arrays': {i: ocl_arrays_to_feed(a) for i, a in arrays.items()},
+                'commission': batch.commission or 0.0,
+            }
+        )
+
+        batch.results = build_batch_matrix(data_imports, summaries)
+        batch.run_metadata = {
+            'imports': len(data_imports),
+            'processes': pool_size(len(data_imports)),
+            'load_seconds': round(loaded - started, 3),
+            'run_seconds': round(time.perf_counter() - loaded, 3),
+        }
+        batch.status = 'COMPLETED'
+        batch.completed_at = datetime.datetime.utcnow()
+        batch.save()
+
+    except Exception as e:
+        batch.status = 'FAILED'
+        batch.log = f"{str(e)}\n{traceback.format_exc()}"
+        batch.save()
+
+
+@shared_task(bind=True, max_retries=None)
+def run_backtest_comparison(self, comparison_id):
+    """
+    Run every strategy of a BacktestComparison on the same import. Backtrader shares one
+    broker between strategies in a single run, so each strategy gets its own sequential
+    run instead; candle loading, date conversion and chart data are done once for all.
+    The comparison holds one user slot for all of its runs. Each run can be cancelled
+    on its own like a single backtest: it is skipped, or stopped at its next bar.
+    """
+    comparison = BacktestComparison.objects.get(id=comparison_id)
+    return _with_user_slot(self, comparison.user_id, lambda: _run_backtest_comparison(comparison))
+
+
+def _run_backtest_comparison(comparison):
+    comparison.status = 'RUNNING'
+    comparison.save()
+
+    try:
+        if not comparison.ocl_data_import:
+            raise ValueError("No OCL data import ID found for this comparison.")
+
+        started = time.perf_counter()
+        data_df = get_ocl_historical_data(comparison.ocl_data_import.id)
+        feed = shared_feed_arrays(frame_to_arrays(data_df))
+        ocl_data = ocl_data_records(data_df)
+        feed_names = [str(comparison.ocl_data_import)]
+        loaded = time.perf_counter()
+
+        run_seconds = {}
+        for backtest in comparison.results.order_by('id'):
+            if is_cancelled('backtest', backtest.id):
+                _mark_cancelled(backtest)
+                continue
+            backtest.status = 'RUNNING'
+            backtest.save()
+            cancel_check = cancel_checker('backtest', backtest.id)
+            strategy_logs = []
+
+            def capture_log(strategy, txt, dt=None):
+                dt = dt or strategy.datas[0].datetime.date(0)
+                strategy_logs.append(f'{dt.isoformat()} {txt}')
+
+            run_started = time.perf_counter()
+            try:
+                UserStrategy = load_strategies_and_inject_log(backtest.strategy_code, capture_log)
+                cerebro, results, initial_cash = run_cerebro_with_data_and_strategy(
+                    dataframes=[feed],
+                    UserStrategy=UserStrategy,
+                    commission=backtest.commission,
+                    names=feed_names,
+                    cancel_check=cancel_check
+                )
+                if cancel_check():
+                    raise BacktestCancelled(len(results[0]))
+                backtest.ocl_data = ocl_data
+                extract_results_and_save(backtest, cerebro, results, strategy_logs, feed_names=feed_names)
+            except BacktestCancelled as e:
+                _mark_cancelled(backtest, *e.args)
+            except Exception as e:
+                backtest.status = 'FAILED'
+                backtest.log = f"{str(e)}\n{traceback.format_exc()}"
+                backtest.save()
+            finally:
+                plt.close('all')
+            run_seconds[backtest.strategy_name] = round(time.perf_counter() - run_started, 3)
+
+        comparison.run_metadata = {
+            'load_seconds': round(loaded - started, 3),
+            'run_seconds': run_seconds,
+        }
+        comparison.status = 'COMPLETED'
+        comparison.completed_at = datetime.datetime.utcnow()
+        comparison.save()
+
+    except Exception as e:
+        comparison.status = 'FAILED'
+        comparison.log = f"{str(e)}\n{traceback.format_exc()}"
+        comparison.save()
+        comparison.results.filter(status__in=['PENDING', 'RUNNING']).update(status='FAILED')
+
+
+@shared_task(bind=True, acks_late=True, reject_on_worker_lost=True, max_retries=None)
+def run_analysis_job(self, job_id):
+    """
+    Run an AnalysisJob (see optimization.ANALYSES). The strategy is compiled and the
+    import's candles are loaded once; the analysis runs every backtest on that data.
+    Trade-list analyses only read the trades of the job's finished backtest.
+    Resumable analyses save a checkpoint as they go; the task is acknowledged late so
+    a job whose worker died is redelivered and continues from its last checkpoint.
+    """
+    job = AnalysisJob.objects.get(id=job_id)
+    return _with_user_slot(self, job.user_id, lambda: _run_analysis_job(job))
+
+
+def _run_analysis_job(job):
+    from data.loaders import load_ocl_arrays
+    from .optimization import ANALYSES, RESUMABLE_ANALYSES, TRADE_LIST_ANALYSES
+
+    job.status = 'RUNNING'
+    job.save()
+
+    try:
+        _, analysis = ANALYSES[job.kind]
+        started = time.perf_counter()
+
+        if job.kind in TRADE_LIST_ANALYSES:
+            if not job.backtest_result:
+                raise ValueError("No backtest found for this analysis.")
+            job.results = analysis(job.backtest_result.trade_data or [], job.config)
+            job.run_metadata = {
+                'trades': len(job.backtest_result.trade_data or []),
+                'run_seconds': round(time.perf_counter() - started, 3),
+            }
+        else:
+            if not job.ocl_data_import:
+                raise ValueError("No OCL data import ID found for this analysis.")
+
+            UserStrategy = load_strategies_and_inject_log(job.strategy_code, lambda strategy, txt, dt=None: None)
+            arrays = load_ocl_arrays(job.ocl_data_import.id)
+            if not len(arrays['date']):
+                raise ValueError(f"No price data found for import {job.ocl_data_import.id}")
+            loaded = time.perf_counter()
+
+            options = {}
+            if job.kind in RESUMABLE_ANALYSES:
+                def save_checkpoint(checkpoint):
+                    job.checkpoint = checkpoint
+                    job.save(update_fields=['checkpoint'])
+
+                options = {'checkpoint': job.checkpoint, 'on_checkpoint': save_checkpoint}
+
+            job.results = analysis(UserStrategy, arrays, job.config, commission=job.commission or 0.0, **options)
+            job.checkpoint = None
+            job.run_metadata = {
+                'bars': len(arrays['date']),
+                'load_seconds': round(loaded - started, 3),
+                'run_seconds': round(time.perf_counter() - loaded, 3),
+            }
+        job.status = 'COMPLETED'
+        job.completed_at = datetime.datetime.utcnow()
+        job.save()
+
+    except Exception as e:
+        job.status = 'FAILED'
+        job.log = f"{str(e)}\n{traceback.format_exc()}"
+        job.save()
@@ -0,0 +1,158 @@
+import unittest
+import datetime
+import numpy as np
+import pandas as pd
+import backtrader as bt
+
+from backtesting.analyzers import (
+    ColumnBuffer,
+    bt_num_to_epoch,
+    columns_to_records,
+    PortfolioValueAnalyzer,
+    TradeListAnalyzer,
+    OrderListAnalyzer,
+    DrawdownStop,
+    CancelStop
+)
+
+
+class TestColumnBuffer(unittest.TestCase):
+
+    def test_grows_geometrically_and_keeps_rows(self):
+        buffer = ColumnBuffer({'a': np.int64, 'b': np.float64}, capacity=2)
+        for i in range(5):
+            buffer.append(i, i * 0.5)
+        self.assertEqual(buffer.capacity, 8)
+        columns = buffer.as_columns()
+        self.assertEqual(columns['a'].tolist(), [0, 1, 2, 3, 4])
+        self.assertEqual(columns['b'].tolist(), [0.0, 0.5, 1.0, 1.5, 2.0])
+
+    def test_bt_num_to_epoch(self):
+        dt = datetime.datetime(2023, 10, 1, 12, 35)
+        expected = int(dt.replace(tzinfo=datetime.timezone.utc).timestamp())
+        self.assertEqual(bt_num_to_epoch([bt.date2num(dt)]).tolist(), [expected])
+
+    def test_columns_to_records(self):
+        columns = {
+            'time': np.array([1577836800, 1577840400]),
+            'side': np.array([1, -1], dtype=np.int8),
+            'price': np.array([1.5, 2.0]),
+        }
+        self.assertEqual(columns_to_records(columns), [
+            {'time': '2020-01-01 00:00:00', 'type': 'buy', 'price': 1.5},
+            {'time': '2020-01-01 01:00:00', 'type': 'sell', 'price': 2.0},
+        ])
+        self.assertEqual(columns_to_records({'time': np.array([])}), [])
+
+
+class TestAnalyzersInCerebro(unittest.TestCase):
+
+    def test_columnar_output(self):
+        class BuyAndClose(bt.Strategy):
+            def next(self):
+                if len(self) == 2:
+                    self.buy(size=1)
+                elif len(self) == 5:
+                    self.close()
+
+        close = np.linspace(100, 110, 10)
+        df = pd.DataFrame({
+            'Date': pd.date_range('2023-01-01', periods=10, freq='h'),
+            'Open': close, 'High': close + 1, 'Low': close - 1, 'Close': close, 'Volume': 1.0
+        })
+
+        cerebro = bt.Cerebro()
+        cerebro.addstrategy(BuyAndClose)
+        cerebro.adddata(bt.feeds.PandasData(dataname=df, datetime='Date', openinterest=-1))
+        cerebro.addanalyzer(PortfolioValueAnalyzer, _name='portfolio_value')
+        cerebro.addanalyzer(TradeListAnalyzer, _name='trade_list')
+        cerebro.addanalyzer(OrderListAnalyzer, _name='order_list')
+        strategy = cerebro.run()[0]
+
+        portfolio = strategy.analyzers.portfolio_value.get_analysis()
+        self.assertEqual(len(portfolio['time']), 10)
+        self.assertEqual(
+            columns_to_records(portfolio)[0]['time'], '2023-01-01 00:00:00'
+        )
+
+        trades = strategy.analyzers.trade_list.get_analysis()
+        self.assertEqual(len(trades['pnl']), 1)
+        self.assertGreater(trades['pnl'][0], 0)
+
+        orders = strategy.analyzers.order_list.get_analysis()
+        self.assertEqual(orders['side'].tolist(), [1, -1])
+
+    def test_trades_and_orders_record_their_feed(self):
+        class TradeSecondFeed(bt.Strategy):
+            def next(self):
+                if len(self) == 2:
+                    self.buy(data=self.datas[1], size=1)
+                elif len(self) == 5:
+                    self.close(data=self.datas[1])
+
+        cerebro = bt.Cerebro()
+        cerebro.addstrategy(TradeSecondFeed)
+        for offset in (0, 50):
+            close = np.linspace(100, 110, 10) + offset
+            df = pd.DataFrame({
+                'Date': pd.date_range('2023-01-01', periods=10, freq='h'),
+                'Open': close, 'High': close + 1, 'Low': close - 1, 'Close': close, 'Volume': 1.0
+            })
+            cerebro.adddata(bt.feeds.PandasData(dataname=df, datetime='Date', openinterest=-1))
+        cerebro.addanalyzer(TradeListAnalyzer, _name='trade_list')
+        cerebro.addanalyzer(OrderListAnalyzer, _name='order_list')
+        strategy = cerebro.run()[0]
+
+        self.assertEqual(strategy.analyzers.trade_list.get_analysis()['feed'].tolist(), [1])
+        self.assertEqual(strategy.analyzers.order_list.get_analysis()['feed'].tolist(), [1, 1])
+
+    def test_drawdown_stop_ends_the_run(self):
+        class BuyAndHold(bt.Strategy):
+            def next(self):
+                if not self.position:
+                    self.buy(size=90)
+
+        # Rises for 10 bars, then falls 2% a bar
+        close = np.r_[np.linspace(100, 110, 10), 110 * 0.98 ** np.arange(1, 31)]
+        df = pd.DataFrame({
+            'Date': pd.date_range('2023-01-01', periods=len(close), freq='h'),
+            'Open': close, 'High': close, 'Low': close, 'Close': close, 'Volume': 1.0
+        })
+
+        cerebro = bt.Cerebro()
+        cerebro.addstrategy(BuyAndHold)
+        cerebro.adddata(bt.feeds.PandasData(dataname=df, datetime='Date', openinterest=-1))
+        cerebro.addanalyzer(PortfolioValueAnalyzer, _name='portfolio_value')
+        cerebro.addanalyzer(DrawdownStop, _name='drawdown_stop', max_drawdown=5.0)
+        strategy = cerebro.run()[0]
+
+        analysis = strategy.analyzers.drawdown_stop.get_analysis()
+        self.assertTrue(analysis['stopped'])
+        self.assertLess(analysis['stopped_at'], len(close))
+        values = strategy.analyzers.portfolio_value.get_analysis()['portfolio_value']
+        self.assertEqual(len(values), analysis['stopped_at'])
+        self.assertLess(values[-1], values.max() * 0.95)
+
+    def test_cancel_stop_ends_run_when_check_fires(self):
+        dates = pd.date_range('2023-01-01', periods=100, freq='h')
+        df = pd.DataFrame({'Date': dates, 'Open': 1.0, 'High': 1.0, 'Low': 1.0, 'Close': 1.0, 'Volume': 1.0})
+        calls = []
+
+        def check():
+            calls.append(1)
+            return len(calls) >= 30
+
+        cerebro = bt.Cerebro()
+        cerebro.addstrategy(bt.Strategy)
+        cerebro.adddata(bt.feeds.PandasData(dataname=df, datetime='Date', openinterest=-1))
+        cerebro.addanalyzer(PortfolioValueAnalyzer, _name='portfolio_value')
+        cerebro.addanalyzer(CancelStop, _name='cancel_stop', check=check)
+        strategy = cerebro.run()[0]
+
+        analysis = strategy.analyzers.cancel_stop.get_analysis()
+        self.assertEqual(analysis, {'cancelled': True, 'cancelled_at': 30})
+        self.assertEqual(len(strategy.analyzers.portfolio_value.get_analysis()['portfolio_value']), 30)
+
+
+if __name__ == '__main__':
+    unittest.main()
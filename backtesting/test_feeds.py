@@ -0,0 +1,140 @@
+import unittest
+import datetime
+import numpy as np
+import pandas as pd
+import backtrader as bt
+
+from backtesting.feeds import (
+    NumpyData, frame_to_arrays, datetime64_to_bt_num, aggregate_arrays, timeframe_params, shared_feed_arrays
+)
+
+
+class CrossStrategy(bt.Strategy):
+    def __init__(self):
+        self.cross = bt.ind.CrossOver(bt.ind.SMA(period=5), bt.ind.SMA(period=15))
+
+    def next(self):
+        if self.cross > 0 and not self.position:
+            self.buy()
+        elif self.cross < 0 and self.position:
+            self.close()
+
+
+def make_frame(bars=500):
+    rng = np.random.default_rng(3)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, bars)))
+    return pd.DataFrame({
+        'Date': pd.date_range('2022-01-01', periods=bars, freq='h'),
+        'Open': close, 'High': close * 1.01, 'Low': close * 0.99, 'Close': close, 'Volume': 1.0
+    })
+
+
+def run(feed, **kwargs):
+    cerebro = bt.Cerebro(**kwargs)
+    cerebro.addstrategy(CrossStrategy)
+    cerebro.adddata(feed)
+    strategy = cerebro.run()[0]
+    return cerebro.broker.getvalue(), len(strategy.data), strategy.data.datetime.datetime(0)
+
+
+class TestNumpyData(unittest.TestCase):
+
+    def test_datetime64_to_bt_num(self):
+        dt = datetime.datetime(2023, 10, 1, 12, 35, 17)
+        nums = datetime64_to_bt_num(np.array([dt], dtype='datetime64[us]'))
+        self.assertAlmostEqual(nums[0], bt.date2num(dt), places=9)
+
+    def test_matches_pandas_feed(self):
+        df = make_frame()
+        expected = run(bt.feeds.PandasData(dataname=df, datetime='Date', openinterest=-1))
+        self.assertEqual(run(NumpyData(dataname=frame_to_arrays(df))), expected)
+
+    def test_matches_pandas_feed_without_bulk_preload(self):
+        df = make_frame()
+        expected = run(bt.feeds.PandasData(dataname=df, datetime='Date', openinterest=-1))
+        self.assertEqual(run(NumpyData(dataname=frame_to_arrays(df)), preload=False), expected)
+        self.assertEqual(run(NumpyData(dataname=frame_to_arrays(df)), exactbars=1), expected)
+
+    def test_fromdate_todate(self):
+        df = make_frame()
+        feed = NumpyData(
+            dataname=frame_to_arrays(df),
+            fromdate=datetime.datetime(2022, 1, 3),
+            todate=datetime.datetime(2022, 1, 10)
+        )
+        _, bars, last = run(feed)
+        self.assertEqual(bars, 7 * 24 + 1)
+        self.assertEqual(last, datetime.datetime(2022, 1, 10))
+
+    def test_missing_openinterest_is_nan(self):
+        cerebro = bt.Cerebro()
+        cerebro.addstrategy(bt.Strategy)
+        cerebro.adddata(NumpyData(dataname=frame_to_arrays(make_frame(20))))
+        strategy = cerebro.run()[0]
+        self.assertTrue(np.isnan(strategy.data.openinterest[0]))
+        self.assertEqual(strategy.data.close.array[0], make_frame(20)['Close'].iloc[0])
+
+    def test_shared_arrays_match_datetime64_input(self):
+        arrays = frame_to_arrays(make_frame())
+        shared = shared_feed_arrays(arrays)
+        self.assertEqual(shared['datetime'].dtype, np.float64)
+        self.assertEqual(run(NumpyData(dataname=shared)), run(NumpyData(dataname=arrays)))
+        # The shared arrays survive a run unchanged and can be reused
+        self.assertEqual(run(NumpyData(dataname=shared)), run(NumpyData(dataname=arrays)))
+
+    def test_filled_line(self):
+        df = make_frame(20)
+        cerebro = bt.Cerebro()
+        cerebro.addstrategy(bt.Strategy)
+        cerebro.adddata(NumpyData(dataname=frame_to_arrays(df)))
+        df['Filled'] = (np.arange(20) % 2).astype(float)
+        cerebro.adddata(NumpyData(dataname=frame_to_arrays(df)))
+        strategy = cerebro.run()[0]
+        self.assertEqual(sum(strategy.datas[0].filled.array), 0.0)
+        self.assertEqual(list(strategy.datas[1].filled.array[:4]), [0.0, 1.0, 0.0, 1.0])
+
+
+class TestAggregateArrays(unittest.TestCase):
+
+    def test_buckets_are_stamped_with_their_last_bar(self):
+        df = make_frame(10)
+        df['Date'] = pd.date_range('2022-01-01 02:00', periods=10, freq='h')
+        arrays = frame_to_arrays(df)
+        four_hours = aggregate_arrays(arrays, 4 * 60 * 60)
+
+        # 02:00-03:00 | 04:00-07:00 | 08:00-11:00
+        self.assertEqual(
+            four_hours['datetime'].astype('datetime64[h]').astype(str).tolist(),
+            ['2022-01-01T03', '2022-01-01T07', '2022-01-01T11']
+        )
+        self.assertEqual(four_hours['open'][1], arrays['open'][2])
+        self.assertEqual(four_hours['close'][1], arrays['close'][5])
+        self.assertEqual(four_hours['high'][1], arrays['high'][2:6].max())
+        self.assertEqual(four_hours['low'][1], arrays['low'][2:6].min())
+        self.assertEqual(four_hours['volume'].tolist(), [2.0, 4.0, 4.0])
+
+    def test_timeframe_params(self):
+        self.assertEqual(timeframe_params(4 * 60 * 60), {'timeframe': bt.TimeFrame.Minutes, 'compression': 240})
+        self.assertEqual(timeframe_params(24 * 60 * 60), {'timeframe': bt.TimeFrame.Days, 'compression': 1})
+
+    def test_coarse_feed_never_runs_ahead_of_the_base_feed(self):
+        df = make_frame(48)
+        seen = []
+
+        class Recorder(bt.Strategy):
+            def next(self):
+                seen.append((self.datas[0].datetime.datetime(0), self.datas[1].datetime.datetime(0)))
+
+        cerebro = bt.Cerebro()
+        cerebro.addstrategy(Recorder)
+        arrays = frame_to_arrays(df)
+        cerebro.adddata(NumpyData(dataname=arrays))
+        cerebro.adddata(NumpyData(dataname=aggregate_arrays(arrays, 4 * 60 * 60), **timeframe_params(4 * 60 * 60)))
+        cerebro.run()
+
+        self.assertEqual(len(seen), 45)
+        self.assertTrue(all(coarse <= base for base, coarse in seen))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,206 @@
+import datetime
+import os
+import pstats
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+import backtrader as bt
+import numpy as np
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from accounts.models import CustomUser
+from strategies.models import Strategy
+from data.models import OCLDataImport, OCLPrice
+from backtesting.models import BacktestResult
+from backtesting.feeds import ocl_arrays_to_feed
+from backtesting.instrumentation import (
+    PHASES, PhaseTimer, aggregate_timings, profile_call, profile_category, summarize_profile
+)
+from backtesting.tasks import run_backtest, run_cerebro_with_data_and_strategy
+from strategies.utils import load_strategies_and_inject_log, STRATEGY_FILENAME
+
+
+class TestPhaseTimer(unittest.TestCase):
+
+    def test_phases_accumulate_wall_and_cpu(self):
+        timer = PhaseTimer()
+        with timer.phase('load'):
+            time.sleep(0.02)
+        with timer.phase('run'):
+            sum(i * i for i in range(200_000))
+        with timer.phase('load'):
+            time.sleep(0.01)
+
+        summary = timer.summary(bars=1000)
+        phases = {entry['phase']: entry for entry in summary['phases']}
+        self.assertEqual(list(phases), ['load', 'run'])
+        self.assertGreaterEqual(phases['load']['wall_ms'], 30)
+        self.assertLess(phases['load']['cpu_ms'], phases['load']['wall_ms'])
+        self.assertGreater(phases['run']['cpu_ms'], 0)
+        self.assertAlmostEqual(sum(entry['share'] for entry in summary['phases']), 100, delta=0.2)
+        expected = 1000 / phases['run']['wall_ms'] * 1000
+        self.assertAlmostEqual(summary['bars_per_second'], expected, delta=expected * 0.001)
+        self.assertGreater(summary['peak_rss_mb'], 0)
+
+    def test_failed_phase_is_still_recorded(self):
+        timer = PhaseTimer()
+        with self.assertRaises(ValueError):
+            with timer.phase('load'):
+                raise ValueError
+        summary = timer.summary()
+        self.assertEqual(summary['phases'][0]['phase'], 'load')
+        self.assertIsNone(summary['bars_per_second'])
+
+    def test_aggregate_timings(self):
+        def run(load, run_ms, bars_per_second):
+            return {
+                'phases': [{'phase': 'run', 'wall_ms': run_ms, 'cpu_ms': run_ms},
+                           {'phase': 'load', 'wall_ms': load, 'cpu_ms': 1.0}],
+                'total_wall_ms': load + run_ms, 'bars_per_second': bars_per_second, 'peak_rss_mb': run_ms,
+            }
+
+        stats = aggregate_timings([run(10, 30, 100.0), run(20, 50, 200.0), None, {}])
+        self.assertEqual(stats['runs'], 2)
+        self.assertEqual([p['phase'] for p in stats['phases']], ['load', 'run'])
+        load = stats['phases'][0]
+        self.assertEqual(load['wall_ms']['mean'], 15.0)
+        self.assertEqual(load['share'], 27.3)
+        self.assertEqual(stats['total_wall_ms']['p50'], 55.0)
+        self.assertEqual(stats['bars_per_second']['mean'], 150.0)
+        self.assertEqual(stats['peak_rss_mb_max'], 50)
+        self.assertIsNone(aggregate_timings([None]))
+
+
+class TestProfiling(unittest.TestCase):
+
+    def test_profile_category(self):
+        bt_dir = os.path.dirname(bt.__file__)
+        self.assertEqual(profile_category(STRATEGY_FILENAME), 'strategy')
+        self.assertEqual(profile_category(os.path.join(bt_dir, 'indicators', 'sma.py')), 'indicators')
+        self.assertEqual(profile_category(os.path.join(bt_dir, 'talib.py')), 'indicators')
+        self.assertEqual(profile_category(os.path.join(bt_dir, 'cerebro.py')), 'backtrader')
+        self.assertEqual(profile_category(np.__file__), 'other')
+        self.assertEqual(profile_category('~'), 'other')
+
+    def test_summary_splits_strategy_indicators_and_internals(self):
+        code = """
+class Busy(bt.Strategy):
+    def __init__(self):
+        self.sma = bt.ind.SMA(period=10)
+
+    def next(self):
+        self.work()
+
+    def work(self):
+        return sum(i * i for i in range(300))
+"""
+        UserStrategy = load_strategies_and_inject_log(code, lambda *args: None)
+        close = 100 + np.cumsum(np.random.default_rng(4).normal(0, 1, 300))
+        arrays = {
+            'date': np.arange(300).astype('timedelta64[h]') + np.datetime64('2023-01-01T00:00', 'us'),
+            'open': close, 'high': close, 'low': close, 'close': close, 'volume': np.ones(300),
+        }
+        _, profiler = profile_call(run_cerebro_with_data_and_strategy, [ocl_arrays_to_feed(arrays)], UserStrategy)
+
+        summary = summarize_profile(profiler, top=10)
+        shares = {entry['category']: entry['share'] for entry in summary['categories']}
+        self.assertEqual(list(shares), ['strategy', 'indicators', 'backtrader', 'other'])
+        self.assertAlmostEqual(sum(shares.values()), 100, delta=0.5)
+        self.assertGreater(shares['strategy'], 0)
+        self.assertGreater(shares['indicators'], 0)
+        self.assertGreater(shares['backtrader'], 0)
+        self.assertEqual(len(summary['functions']), 10)
+        work = [f for f in summary['functions'] if f['function'] in ('work', '<genexpr>') and f['category'] == 'strategy']
+        self.assertTrue(work)
+        self.assertTrue(work[0]['location'].startswith(STRATEGY_FILENAME))
+
+
+class TestBacktestTimings(TestCase):
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(email='timing@example.com', password='pass')
+        data_import = OCLDataImport.objects.create(
+            asset='BTC', interval='1h', start_date=datetime.date(2023, 1, 1),
+            end_date=datetime.date(2023, 1, 10), status='completed'
+        )
+        close = 100 * np.exp(np.cumsum(np.random.default_rng(3).normal(0, 0.01, 200)))
+        first = datetime.datetime(2023, 1, 1, tzinfo=datetime.timezone.utc)
+        OCLPrice.objects.bulk_create([
+            OCLPrice(data_import=data_import, date=first + datetime.timedelta(hours=i),
+                     open=c, high=c * 1.01, low=c * 0.99, close=c, volume=1.0)
+            for i, c in enumerate(close)
+        ])
+        code = """
+class Cross(bt.Strategy):
+    def __init__(self):
+        self.cross = bt.ind.CrossOver(bt.ind.SMA(period=5), bt.ind.SMA(period=20))
+
+    def next(self):
+        if self.cross > 0:
+            self.buy()
+        elif self.cross < 0:
+            self.close()
+"""
+        strategy = Strategy.objects.create(user=self.user, name='Cross', code=code)
+        self.backtest = BacktestResult.objects.create(
+            user=self.user, strategy=strategy, parameters={}, commission=0.1, ocl_data_import=data_import
+        )
+
+    @patch('backtesting.tasks.bt.Cerebro.plot', return_value=[])
+    def test_run_backtest_records_every_phase(self, mock_plot):
+        run_backtest(self.backtest.id)
+
+        self.backtest.refresh_from_db()
+        self.assertEqual(self.backtest.status, 'COMPLETED')
+        timings = self.backtest.timings
+        self.assertEqual([entry['phase'] for entry in timings['phases']], list(PHASES))
+        self.assertEqual(timings['bars'], 200)
+        self.assertGreater(timings['bars_per_second'], 0)
+
+        admin = CustomUser.objects.create_superuser(email='admin@example.com', password='pass')
+        self.client.force_login(admin)
+        response = self.client.get(reverse('admin:backtesting_backtestresult_changelist'))
+        self.assertEqual(response.context['timing_stats']['runs'], 1)
+        self.assertContains(response, 'Phase timings')
+
+    @patch('backtesting.tasks.profile_call')
+    @patch('backtesting.tasks.bt.Cerebro.plot', return_value=[])
+    def test_profiling_is_off_by_default(self, mock_plot, mock_profile_call):
+        run_backtest(self.backtest.id)
+
+        self.backtest.refresh_from_db()
+        self.assertEqual(self.backtest.status, 'COMPLETED')
+        mock_profile_call.assert_not_called()
+        self.assertIsNone(self.backtest.profile_summary)
+        self.assertFalse(self.backtest.profile_file)
+
+    @patch('backtesting.tasks.bt.Cerebro.plot', return_value=[])
+    def test_profiled_run_stores_pstats_and_summary(self, mock_plot):
+        self.backtest.profile = True
+        self.backtest.save()
+        with tempfile.TemporaryDirectory() as media, override_settings(MEDIA_ROOT=media):
+            run_backtest(self.backtest.id)
+
+            self.backtest.refresh_from_db()
+            self.assertEqual(self.backtest.status, 'COMPLETED')
+            stats = pstats.Stats(self.backtest.profile_file.path)
+            self.assertTrue(any(filename == STRATEGY_FILENAME for filename, _, _ in stats.stats))
+        categories = [entry['category'] for entry in self.backtest.profile_summary['categories']]
+        self.assertEqual(categories, ['strategy', 'indicators', 'backtrader', 'other'])
+        self.assertTrue(self.backtest.profile_summary['functions'])
+
+    def test_failed_backtest_keeps_partial_timings(self):
+        self.backtest.strategy_code = 'x = 1'
+        self.backtest.save()
+        run_backtest(self.backtest.id)
+
+        self.backtest.refresh_from_db()
+        self.assertEqual(self.backtest.status, 'FAILED')
+        self.assertEqual([entry['phase'] for entry in self.backtest.timings['phases']], ['load', 'compile'])
+
+
+if __name__ == '__main__':
+    unittest.main()
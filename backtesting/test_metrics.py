@@ -0,0 +1,105 @@
+import unittest
+import datetime
+import numpy as np
+
+from backtesting.metrics import (
+    equity_curve_arrays,
+    periods_per_year,
+    compute_performance_metrics,
+    per_feed_trade_stats
+)
+
+DAY = 24 * 60 * 60
+
+
+class TestMetrics(unittest.TestCase):
+
+    def test_equity_curve_arrays(self):
+        records = [
+            {'time': '2020-01-01 00:00:00', 'portfolio_value': 10000},
+            {'time': '2020-01-01 01:00:00', 'portfolio_value': 10100.5},
+        ]
+        times, values = equity_curve_arrays(records)
+        expected_start = int(datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc).timestamp())
+        self.assertEqual(times.tolist(), [expected_start, expected_start + 3600])
+        self.assertEqual(values.tolist(), [10000.0, 10100.5])
+
+    def test_equity_curve_arrays_empty(self):
+        times, values = equity_curve_arrays([])
+        self.assertEqual(times.size, 0)
+        self.assertEqual(values.size, 0)
+
+    def test_periods_per_year(self):
+        times = np.arange(0, 10 * 3600, 3600)
+        self.assertAlmostEqual(periods_per_year(times), 365 * 24)
+        self.assertEqual(periods_per_year(np.array([0])), 0.0)
+
+    def test_drawdown_and_duration(self):
+        times = np.arange(6) * DAY
+        values = [100, 120, 90, 60, 130, 117]
+        metrics = compute_performance_metrics(times, values)
+        self.assertAlmostEqual(metrics['max_drawdown'], 50.0)
+        # Bars 2 and 3 sit below the peak of 120 before the recovery
+        self.assertEqual(metrics['max_drawdown_duration'], 2)
+        self.assertIsNotNone(metrics['sortino_ratio'])
+
+    def test_cagr_and_calmar(self):
+        times = np.array([0, 365 * DAY // 2, 365 * DAY])
+        values = [100, 90, 121]
+        metrics = compute_performance_metrics(times, values)
+        self.assertAlmostEqual(metrics['cagr'], 21.0)
+        self.assertAlmostEqual(metrics['calmar_ratio'], 0.21 / 0.10)
+
+    def test_trade_metrics(self):
+        times = np.arange(10) * DAY
+        values = np.linspace(100, 110, 10)
+        metrics = compute_performance_metrics(
+            times, values, trade_pnls=[30, -10, 20, -10], trade_bars=[2, 1, 1, 1]
+        )
+        self.assertAlmostEqual(metrics['profit_factor'], 2.5)
+        self.assertAlmostEqual(metrics['expectancy'], 7.5)
+        self.assertAlmostEqual(metrics['exposure'], 50.0)
+        # A monotonic equity curve never draws down
+        self.assertEqual(metrics['max_drawdown'], 0.0)
+        self.assertIsNone(metrics['calmar_ratio'])
+
+    def test_no_losing_trades_profit_factor_undefined(self):
+        metrics = compute_performance_metrics([], [], trade_pnls=[5, 10])
+        self.assertIsNone(metrics['profit_factor'])
+        self.assertAlmostEqual(metrics['expectancy'], 7.5)
+
+    def test_rolling_sharpe_matches_window_statistics(self):
+        rng = np.random.default_rng(7)
+        times = np.arange(200) * DAY
+        values = 100 * np.cumprod(1 + rng.normal(0.001, 0.01, 200))
+        metrics = compute_performance_metrics(times, values, rolling_window=20)
+        rolling = metrics['rolling_sharpe']
+        self.assertEqual(len(rolling), 199 - 20 + 1)
+
+        returns = values[1:] / values[:-1] - 1
+        window = returns[:20]
+        expected = window.mean() / window.std(ddof=1) * np.sqrt(365)
+        self.assertAlmostEqual(rolling[0]['rolling_sharpe'], expected, places=6)
+        self.assertEqual(rolling[0]['time'], '1970-01-21 00:00:00')
+
+    def test_empty_equity_curve(self):
+        metrics = compute_performance_metrics([], [])
+        self.assertIsNone(metrics['max_drawdown'])
+        self.assertEqual(metrics['rolling_sharpe'], [])
+
+    def test_per_feed_trade_stats(self):
+        stats = per_feed_trade_stats(
+            trade_feeds=[0, 1, 1, 1],
+            trade_pnls=[5.0, 10.0, -4.0, 2.0],
+            order_feeds=[0, 0, 1, 1, 1, 1, 1, 1],
+            feed_names=['BTC', 'ETH', 'SOL']
+        )
+        self.assertEqual(stats[0], {'feed': 'BTC', 'trades': 1, 'orders': 2, 'win_rate': 100.0, 'pnl': 5.0})
+        self.assertEqual(stats[1]['trades'], 3)
+        self.assertAlmostEqual(stats[1]['win_rate'], 200 / 3)
+        self.assertEqual(stats[1]['pnl'], 8.0)
+        self.assertEqual(stats[2], {'feed': 'SOL', 'trades': 0, 'orders': 0, 'win_rate': 0.0, 'pnl': 0.0})
+
+
+if __name__ == '__main__':
+    unittest.main()
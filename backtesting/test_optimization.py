@@ -0,0 +1,486 @@
+import json
+import unittest
+from unittest.mock import patch, MagicMock
+import numpy as np
+import backtrader as bt
+from django.test import TestCase
+
+from accounts.models import CustomUser
+from strategies.models import Strategy
+
+from backtesting.optimization import (
+    parameter_grid,
+    objective_score,
+    clean_config,
+    walk_forward_windows,
+    stitch_equity,
+    equity_records,
+    walk_forward,
+    halving_rungs,
+    successive_halving,
+    infer_parameter_space,
+    genetic,
+    has_trade_pnl,
+    trade_returns,
+    equity_path_stats,
+    monte_carlo,
+    bar_components,
+    permuted_paths,
+    permutation_test
+)
+from backtesting.feeds import shared_feed_arrays, ocl_arrays_to_feed
+from backtesting.forms import AnalysisJobForm
+from backtesting.models import BacktestResult
+from backtesting.tasks import run_analysis_job, run_cerebro_with_data_and_strategy, summarize_run
+
+
+class CrossStrategy(bt.Strategy):
+    params = (('fast', 5), ('slow', 20))
+
+    def __init__(self):
+        self.cross = bt.ind.CrossOver(bt.ind.SMA(period=self.p.fast), bt.ind.SMA(period=self.p.slow))
+
+    def next(self):
+        if self.cross > 0 and not self.position:
+            self.buy()
+        elif self.cross < 0 and self.position:
+            self.close()
+
+
+def make_arrays(bars=600, seed=0):
+    close = 100 * np.exp(np.cumsum(np.random.default_rng(seed).normal(0, 0.01, bars)))
+    dates = (np.datetime64('2023-01-01T00:00') + np.arange(bars) * np.timedelta64(1, 'h')).astype('datetime64[us]')
+    return {
+        'date': dates, 'open': close, 'high': close * 1.01, 'low': close * 0.99,
+        'close': close, 'volume': np.ones(bars)
+    }
+
+
+class TestParameterGrid(unittest.TestCase):
+
+    def test_cartesian_product(self):
+        grid = parameter_grid({'fast': [5, 10], 'slow': [20, 30, 40]})
+        self.assertEqual(len(grid), 6)
+        self.assertEqual(grid[0], {'fast': 5, 'slow': 20})
+        self.assertEqual(grid[-1], {'fast': 10, 'slow': 40})
+
+    def test_rejects_empty_values(self):
+        with self.assertRaises(ValueError):
+            parameter_grid({'fast': []})
+        with self.assertRaises(ValueError):
+            parameter_grid({})
+
+    def test_objective_score_ranks_missing_values_last(self):
+        self.assertEqual(objective_score({'sharpe_ratio': 1.5}, 'sharpe_ratio'), 1.5)
+        self.assertEqual(objective_score({'sharpe_ratio': None}, 'sharpe_ratio'), -np.inf)
+        self.assertEqual(objective_score({'error': 'boom'}, 'sharpe_ratio'), -np.inf)
+
+
+class TestWalkForward(unittest.TestCase):
+
+    def test_rolling_windows(self):
+        windows = walk_forward_windows(100, train_bars=40, test_bars=25)
+        self.assertEqual(windows, [((0, 40), (40, 65)), ((25, 65), (65, 90)), ((50, 90), (90, 100))])
+
+    def test_anchored_windows_train_from_the_first_bar(self):
+        windows = walk_forward_windows(100, train_bars=40, test_bars=30, anchored=True)
+        self.assertEqual([train for train, _ in windows], [(0, 40), (0, 70)])
+
+    def test_too_few_bars(self):
+        with self.assertRaises(ValueError):
+            walk_forward_windows(30, train_bars=40, test_bars=10)
+
+    def test_clean_config_defaults(self):
+        config = clean_config('walk_forward', {'param_grid': {'fast': [5]}, 'train_bars': 100, 'test_bars': 50})
+        self.assertEqual(config['warmup_bars'], 100)
+        self.assertEqual(config['objective'], 'sharpe_ratio')
+        self.assertFalse(config['anchored'])
+        with self.assertRaises(ValueError):
+            clean_config('walk_forward', {'param_grid': {'fast': [5]}, 'train_bars': 0, 'test_bars': 50})
+        with self.assertRaises(ValueError):
+            clean_config('walk_forward', {'param_grid': {'fast': [5]}, 'train_bars': 10, 'test_bars': 5, 'objective': 'luck'})
+
+    def test_stitch_equity_compounds_segments(self):
+        times, values = stitch_equity([([1, 2], [100.0, 110.0]), ([3, 4], [50.0, 45.0])], 1000.0)
+        self.assertEqual(times.tolist(), [1, 2, 3, 4])
+        np.testing.assert_allclose(values, [1000.0, 1100.0, 1100.0, 990.0])
+
+    def test_equity_records_keep_the_last_point(self):
+        records = equity_records(np.arange(10) * 3600, np.arange(10, dtype=float), max_points=4)
+        self.assertEqual([r['portfolio_value'] for r in records], [0.0, 3.0, 6.0, 9.0])
+        self.assertEqual(records[1]['time'], '1970-01-01 03:00:00')
+
+    def test_walk_forward(self):
+        config = {'param_grid': {'fast': [5, 10], 'slow': [20, 40]}, 'train_bars': 300, 'test_bars': 100}
+        results = walk_forward(CrossStrategy, make_arrays(), config, processes=2)
+
+        self.assertEqual(results['candidates'], 4)
+        self.assertEqual(len(results['windows']), 3)
+        self.assertEqual(results['runs'], 3 * 4 + 3)
+        self.assertEqual(results['windows'][0]['test_start'], '2023-01-13 12:00:00')
+        for window in results['windows']:
+            self.assertNotIn('error', window['test'])
+            self.assertIn(window['best_params']['fast'], (5, 10))
+            self.assertEqual(window['test']['bars'], 100)
+        self.assertEqual(results['out_of_sample']['bars'], 300)
+        self.assertEqual(results['equity'][0]['portfolio_value'], 10_000)
+
+        # The stitched return compounds the per-window test returns
+        growth = np.prod([1 + w['test']['return'] / 100 for w in results['windows']])
+        self.assertAlmostEqual(results['out_of_sample']['return'], (growth - 1) * 100, places=6)
+
+    def test_winner_is_the_best_train_run(self):
+        config = {'param_grid': {'fast': [5, 10], 'slow': [20, 40]}, 'train_bars': 300, 'test_bars': 300,
+                  'objective': 'return'}
+        arrays = make_arrays()
+        window = walk_forward(CrossStrategy, arrays, config, processes=1)['windows'][0]
+
+        train = shared_feed_arrays(ocl_arrays_to_feed({k: v[:300] for k, v in arrays.items()}))
+        returns = {}
+        for params in parameter_grid(config['param_grid']):
+            cerebro, results, cash = run_cerebro_with_data_and_strategy([train], CrossStrategy, strategy_params=params)
+            returns[(params['fast'], params['slow'])] = summarize_run(cerebro, results, cash)['return']
+
+        best = max(returns, key=returns.get)
+        self.assertEqual((window['best_params']['fast'], window['best_params']['slow']), best)
+        self.assertAlmostEqual(window['train_score'], returns[best])
+
+
+class TestSuccessiveHalving(unittest.TestCase):
+
+    def test_rungs_grow_by_eta_and_end_on_all_bars(self):
+        self.assertEqual(halving_rungs(900, 9, 3), [100, 300, 900])
+        self.assertEqual(halving_rungs(1000, 27, 3, min_bars=50), [50, 150, 450, 1000])
+        self.assertEqual(halving_rungs(100, 1, 3), [33, 100])
+
+    def test_promotes_the_top_fraction(self):
+        config = {'param_grid': {'fast': [3, 5, 8], 'slow': [15, 20, 30]}, 'eta': 3, 'objective': 'return'}
+        results = successive_halving(CrossStrategy, make_arrays(900), config, processes=2)
+
+        self.assertEqual([rung['bars'] for rung in results['rungs']], [100, 300, 900])
+        self.assertEqual([rung['evaluated'] for rung in results['rungs']], [9, 3, 1])
+        self.assertEqual(results['runs'], 13)
+        self.assertEqual(results['best_params'], results['leaderboard'][0]['params'])
+        self.assertEqual(results['leaderboard'][0]['bars'], 900)
+
+        compute = results['compute']
+        self.assertEqual(compute['bars_run'], 9 * 100 + 3 * 300 + 900)
+        self.assertEqual(compute['full_grid_bars'], 9 * 900)
+        self.assertAlmostEqual(compute['saved_percent'], (1 - 2700 / 8100) * 100, places=2)
+        self.assertGreater(compute['full_grid_cpu_seconds'], compute['cpu_seconds'])
+
+    def test_drawdown_pruning(self):
+        config = {'param_grid': {'fast': [3, 5], 'slow': [15, 20]}, 'eta': 2, 'max_drawdown': 0.5}
+        results = successive_halving(CrossStrategy, make_arrays(400), config, processes=1)
+
+        first = results['rungs'][0]
+        self.assertEqual(first['pruned'], 4)
+        self.assertEqual(first['promoted'], 0)
+        self.assertIsNone(results['best_params'])
+        self.assertLess(results['compute']['bars_run'], 4 * first['bars'])
+
+    def test_budget_stops_before_the_next_rung(self):
+        config = {'param_grid': {'fast': [3, 5, 8], 'slow': [15, 20, 30]}, 'eta': 3, 'budget_cpu_seconds': 1e-6}
+        results = successive_halving(CrossStrategy, make_arrays(900), config, processes=1)
+
+        self.assertTrue(results['budget_exhausted'])
+        self.assertEqual(len(results['rungs']), 1)
+        self.assertIsNotNone(results['best_params'])
+
+
+class TestGenetic(unittest.TestCase):
+
+    def test_infer_parameter_space_from_defaults(self):
+        class Params(bt.Strategy):
+            params = (('period', 20), ('threshold', 0.5), ('offset', 0), ('printlog', False), ('mode', 'long'))
+
+        space = infer_parameter_space(Params)
+        self.assertEqual(list(space), ['period', 'threshold', 'offset'])
+        self.assertEqual(space['period'], {'type': 'int', 'low': 5, 'high': 80})
+        self.assertEqual(space['threshold'], {'type': 'float', 'low': 0.125, 'high': 2.0})
+        self.assertEqual(space['offset'], {'type': 'int', 'low': 0, 'high': 10})
+
+        space = infer_parameter_space(Params, bounds={'period': [10, 30]})
+        self.assertEqual((space['period']['low'], space['period']['high']), (10, 30))
+        with self.assertRaises(ValueError):
+            infer_parameter_space(Params, bounds={'printlog': [0, 1]})
+
+    def test_evolves_and_caches_duplicates(self):
+        config = {'population': 6, 'generations': 3, 'seed': 1, 'objective': 'return',
+                  'bounds': {'fast': [3, 6], 'slow': [15, 18]}}
+        results = genetic(CrossStrategy, make_arrays(300), config, processes=2)
+
+        self.assertEqual(len(results['history']), 3)
+        self.assertEqual(sum(g['evaluated'] + g['cached'] for g in results['history']), 18)
+        # 16 possible parameter sets, so later generations hit the cache
+        self.assertLessEqual(results['evaluations'], 16)
+        self.assertGreater(results['cache_hits'], 0)
+        self.assertEqual(results['evaluations'] + results['cache_hits'], 18)
+
+        best = results['top'][0]
+        self.assertEqual(results['best_params'], best['params'])
+        self.assertTrue(all(3 <= e['params']['fast'] <= 6 and isinstance(e['params']['fast'], int) for e in results['top']))
+        # Elitism: the best score never gets worse from one generation to the next
+        bests = [g['best'] for g in results['history']]
+        self.assertEqual(bests, sorted(bests))
+
+    def test_resume_from_checkpoint_matches_an_uninterrupted_run(self):
+        config = {'population': 6, 'generations': 4, 'seed': 7}
+        arrays = make_arrays(300)
+        full = genetic(CrossStrategy, arrays, config, processes=1)
+
+        checkpoints = []
+        genetic(CrossStrategy, arrays, {**config, 'generations': 2}, processes=1, on_checkpoint=checkpoints.append)
+        self.assertEqual([c['generation'] for c in checkpoints], [0, 1])
+        checkpoint = json.loads(json.dumps(checkpoints[-1]))
+
+        resumed = genetic(CrossStrategy, arrays, config, processes=1, checkpoint=checkpoint)
+        self.assertEqual(resumed['resumed_from'], 2)
+        self.assertEqual(resumed['history'], full['history'])
+        self.assertEqual(resumed['top'], full['top'])
+
+
+def make_trade_data(returns, initial_cash=10_000.0):
+    trades, value = [], initial_cash
+    for r in returns:
+        pnl = value * r
+        value += pnl
+        trades.append({'time': '2023-01-01 00:00:00', 'pnl': pnl, 'portfolio_value': value})
+    return trades
+
+
+class TestMonteCarlo(unittest.TestCase):
+
+    def test_trade_returns_are_relative_to_the_account_before_the_trade(self):
+        np.testing.assert_allclose(trade_returns(make_trade_data([0.1, -0.05, 0.02])), [0.1, -0.05, 0.02])
+
+    def test_equity_path_stats(self):
+        final, drawdown = equity_path_stats(np.array([[0.1, -0.5, 0.2], [-0.1, -0.1, 0.0]]))
+        np.testing.assert_allclose(final, [1.1 * 0.5 * 1.2 - 1, 0.9 * 0.9 - 1])
+        np.testing.assert_allclose(drawdown, [0.5, 0.19])
+
+    def test_shuffle_keeps_the_final_return(self):
+        trades = make_trade_data(np.random.default_rng(0).normal(0.005, 0.03, 200))
+        results = monte_carlo(trades, {'simulations': 3000, 'method': 'shuffle', 'batch_size': 1000, 'seed': 1},
+                              processes=2)
+
+        self.assertEqual(results['trades'], 200)
+        returns = [row['return'] for row in results['quantiles']]
+        np.testing.assert_allclose(returns, results['original']['return'])
+        drawdowns = [row['max_drawdown'] for row in results['quantiles']]
+        self.assertEqual(drawdowns, sorted(drawdowns))
+        self.assertLessEqual(drawdowns[0], results['original']['max_drawdown'])
+        self.assertGreaterEqual(drawdowns[-1], results['original']['max_drawdown'])
+
+    def test_bootstrap_distribution_and_risk_of_ruin(self):
+        trades = make_trade_data([0.2, -0.25, 0.1, -0.15, 0.05] * 10)
+        config = {'simulations': 10_000, 'ruin_drawdown': 30, 'seed': 2}
+        results = monte_carlo(trades, config, processes=2)
+
+        returns = [row['return'] for row in results['quantiles']]
+        self.assertLess(returns[0], returns[-1])
+        self.assertGreater(results['risk_of_ruin'], 0)
+        self.assertLess(results['risk_of_ruin'], 100)
+        self.assertEqual(results['quantiles'][3]['quantile'], 50)
+        # Seeded runs are reproducible regardless of the pool size
+        self.assertEqual(monte_carlo(trades, config, processes=1), {**results, 'processes': 1})
+
+    def test_needs_trades(self):
+        with self.assertRaises(ValueError):
+            monte_carlo(make_trade_data([0.1]), {})
+
+    def test_legacy_trade_records_are_rejected_with_the_cause(self):
+        # Records saved before the trade analyzer recorded PnL
+        legacy = [{'time': '2023-01-01T00:00:00', 'portfolio_value': 10500.0},
+                  {'time': '2023-01-02T00:00:00', 'portfolio_value': 10200.0}]
+        self.assertFalse(has_trade_pnl(legacy))
+        self.assertTrue(has_trade_pnl(make_trade_data([0.1, -0.05])))
+        with self.assertRaisesRegex(ValueError, 'before per-trade PnL was recorded'):
+            monte_carlo(legacy, {})
+
+
+class TestPermutationTest(unittest.TestCase):
+
+    def test_permuted_paths_keep_the_first_bar_and_the_bar_shapes(self):
+        arrays = make_arrays(50)
+        components = bar_components(arrays)
+        paths = permuted_paths(components, np.random.default_rng(0), 4)
+
+        self.assertEqual(paths['close'].shape, (4, 50))
+        for name in ('open', 'high', 'low', 'close', 'volume'):
+            np.testing.assert_allclose(paths[name][:, 0], arrays[name][0])
+        # Same close-to-close returns in another order, and each bar keeps its range
+        for row in range(4):
+            returns = np.diff(np.log(paths['close'][row]))
+            np.testing.assert_allclose(np.sort(returns), np.sort(components['returns']))
+            self.assertFalse(np.allclose(returns, components['returns']))
+        np.testing.assert_allclose(paths['high'] / paths['close'], 1.01)
+        np.testing.assert_allclose(paths['low'] / paths['close'], 0.99)
+
+    def test_p_value(self):
+        config = {'permutations': 12, 'objective': 'return', 'seed': 3}
+        results = permutation_test(CrossStrategy, make_arrays(300), config, processes=2)
+
+        self.assertEqual(results['permutations'], 12)
+        self.assertAlmostEqual(results['p_value'], (results['at_least_as_good'] + 1) / 13)
+        self.assertEqual(results['failed'], 0)
+        self.assertEqual(sum(b['count'] for b in results['histogram']), 12 - results['undefined'])
+        self.assertEqual(results['real_score'], results['real']['return'])
+        # Seeded paths do not depend on the pool size
+        self.assertEqual(permutation_test(CrossStrategy, make_arrays(300), config, processes=1)['p_value'],
+                         results['p_value'])
+
+    def test_failed_runs_are_counted_and_left_out_of_the_p_value(self):
+        arrays = make_arrays(300)
+        middle = arrays['close'][150]
+
+        class Flaky(CrossStrategy):
+            def stop(self):
+                # Raises on the paths that pass well above the real middle price
+                if self.data.close[-149] > middle * 1.05:
+                    raise RuntimeError('bad path')
+
+        results = permutation_test(Flaky, arrays, {'permutations': 12, 'objective': 'return', 'seed': 3},
+                                   processes=1)
+        self.assertEqual(results['failed'], 1)
+        self.assertEqual(results['scored'], 11)
+        self.assertAlmostEqual(results['p_value'], (results['at_least_as_good'] + 1) / 12)
+        self.assertEqual(sum(b['count'] for b in results['histogram']), 11 - results['undefined'])
+
+    def test_fails_when_most_runs_raise(self):
+        arrays = make_arrays(300)
+        real_close = arrays['close']
+
+        class RealDataOnly(CrossStrategy):
+            def next(self):
+                if self.data.close[0] != real_close[len(self) - 1]:
+                    raise RuntimeError('unexpected candle')
+                super().next()
+
+        with self.assertRaisesRegex(ValueError, 'raised an error on 9 of 9'):
+            permutation_test(RealDataOnly, arrays, {'permutations': 9, 'objective': 'return'}, processes=1)
+
+    def test_strategy_fitted_to_the_real_bars_has_a_small_p_value(self):
+        arrays = make_arrays(200)
+        # Orders fill at the next open (== close here), so hold through bars whose next move is up
+        close = arrays['close']
+        rising = {i for i in range(len(close) - 2) if close[i + 2] > close[i + 1]}
+
+        class Fitted(bt.Strategy):
+            def next(self):
+                if len(self) - 1 in rising:
+                    if not self.position:
+                        self.buy()
+                elif self.position:
+                    self.close()
+
+        results = permutation_test(Fitted, arrays, {'permutations': 9, 'objective': 'return'}, processes=1)
+        self.assertEqual(results['at_least_as_good'], 0)
+        self.assertEqual(results['p_value'], 0.1)
+
+
+class TestRunAnalysisJob(unittest.TestCase):
+
+    @patch('data.loaders.load_ocl_arrays')
+    @patch('backtesting.tasks.AnalysisJob')
+    def test_run_walk_forward_job(self, mock_job_model, mock_load):
+        job = MagicMock()
+        job.user_id = 1
+        job.kind = 'walk_forward'
+        job.commission = 0.0
+        job.config = {'param_grid': {'fast': [5, 10]}, 'train_bars': 300, 'test_bars': 150}
+        job.strategy_code = """
+class Cross(bt.Strategy):
+    params = (('fast', 5),)
+
+    def __init__(self):
+        self.cross = bt.ind.CrossOver(bt.ind.SMA(period=self.p.fast), bt.ind.SMA(period=20))
+
+    def next(self):
+        if self.cross > 0:
+            self.buy()
+        elif self.cross < 0:
+            self.close()
+"""
+        mock_job_model.objects.get.return_value = job
+        mock_load.return_value = make_arrays()
+
+        run_analysis_job(3)
+
+        self.assertEqual(job.status, 'COMPLETED', job.log)
+        mock_load.assert_called_once_with(job.ocl_data_import.id)
+        self.assertEqual(len(job.results['windows']), 2)
+        self.assertEqual(job.run_metadata['bars'], 600)
+
+    @patch('data.loaders.load_ocl_arrays')
+    @patch('backtesting.tasks.AnalysisJob')
+    def test_genetic_job_checkpoints_every_generation(self, mock_job_model, mock_load):
+        job = MagicMock()
+        job.user_id = 1
+        job.kind = 'genetic'
+        job.commission = 0.0
+        job.checkpoint = None
+        job.config = {'population': 4, 'generations': 2, 'seed': 3}
+        job.strategy_code = """
+class Cross(bt.Strategy):
+    params = (('fast', 5), ('slow', 20))
+
+    def __init__(self):
+        self.cross = bt.ind.CrossOver(bt.ind.SMA(period=self.p.fast), bt.ind.SMA(period=self.p.slow))
+
+    def next(self):
+        if self.cross > 0:
+            self.buy()
+        elif self.cross < 0:
+            self.close()
+"""
+        mock_job_model.objects.get.return_value = job
+        mock_load.return_value = make_arrays(300)
+
+        run_analysis_job(4)
+
+        self.assertEqual(job.status, 'COMPLETED', job.log)
+        checkpoint_saves = [c for c in job.save.call_args_list if c.kwargs.get('update_fields') == ['checkpoint']]
+        self.assertEqual(len(checkpoint_saves), 2)
+        self.assertIsNone(job.checkpoint)
+        self.assertEqual(len(job.results['history']), 2)
+
+    @patch('data.loaders.load_ocl_arrays')
+    @patch('backtesting.tasks.AnalysisJob')
+    def test_monte_carlo_job_reads_the_backtest_trades(self, mock_job_model, mock_load):
+        job = MagicMock()
+        job.user_id = 1
+        job.kind = 'monte_carlo'
+        job.config = {'simulations': 500, 'seed': 1}
+        job.backtest_result.trade_data = make_trade_data([0.05, -0.02, 0.03, -0.01])
+        mock_job_model.objects.get.return_value = job
+
+        run_analysis_job(5)
+
+        self.assertEqual(job.status, 'COMPLETED', job.log)
+        mock_load.assert_not_called()
+        self.assertEqual(job.results['simulations'], 500)
+        self.assertEqual(job.run_metadata['trades'], 4)
+
+
+class TestAnalysisJobForm(TestCase):
+
+    def test_backtest_without_trade_pnl_is_rejected(self):
+        user = CustomUser.objects.create_user(email='analysis@example.com', password='pass')
+        strategy = Strategy.objects.create(user=user, name='Cross', code='')
+        legacy = BacktestResult.objects.create(
+            user=user, strategy=strategy, status='COMPLETED',
+            trade_data=[{'time': '2023-01-01T00:00:00', 'portfolio_value': 10500.0}]
+        )
+        form = AnalysisJobForm({'kind': 'monte_carlo', 'backtest_result': legacy.id}, user=user)
+        self.assertFalse(form.is_valid())
+        self.assertIn('before per-trade PnL was recorded', form.errors['backtest_result'][0])
+
+        legacy.trade_data = make_trade_data([0.1, -0.05])
+        legacy.save()
+        form = AnalysisJobForm({'kind': 'monte_carlo', 'backtest_result': legacy.id}, user=user)
+        self.assertTrue(form.is_valid(), form.errors)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import unittest
+import multiprocessing
+import os
+import signal
+import sys
+import time
+from unittest.mock import patch
+
+import billiard
+from django.test import override_settings
+
+from backtesting.parallel import run_in_pool, shared_state, pool_size
+
+
+def _scaled(item):
+    state = shared_state()
+    return state['scale'](item), os.getpid()
+
+
+def _report_pid(item):
+    shared_state()['pids'].put(os.getpid())
+    time.sleep(60)
+
+
+def _pool_in_daemon(results):
+    results.put(sorted(value for value, _ in run_in_pool(_scaled, range(4), shared={'scale': abs}, processes=2)))
+
+
+def _alive(pid):
+    try:
+        with open(f'/proc/{pid}/stat') as stat:
+            # Field 3 is the state; an exited child not yet reaped is a zombie (Z)
+            return stat.read().rsplit(')', 1)[1].split()[0] != 'Z'
+    except FileNotFoundError:
+        return False
+
+
+class TestRunInPool(unittest.TestCase):
+
+    def test_workers_inherit_unpicklable_shared_state(self):
+        results = run_in_pool(_scaled, range(6), shared={'scale': lambda x: x * 10}, processes=3)
+        self.assertEqual([value for value, _ in results], [0, 10, 20, 30, 40, 50])
+        self.assertNotIn(os.getpid(), {pid for _, pid in results})
+        self.assertEqual(shared_state(), {})
+
+    def test_single_process_runs_inline(self):
+        results = run_in_pool(_scaled, [1, 2], shared={'scale': lambda x: -x}, processes=1)
+        self.assertEqual(results, [(-1, os.getpid()), (-2, os.getpid())])
+
+    def test_daemon_flag_is_restored(self):
+        process = multiprocessing.current_process()
+        process._config['daemon'] = True
+        try:
+            run_in_pool(_scaled, range(2), shared={'scale': abs}, processes=2)
+            self.assertTrue(process._config['daemon'])
+        finally:
+            process._config.pop('daemon')
+
+    def test_pool_runs_inside_daemonic_worker_processes(self):
+        # Celery's prefork children are daemonic billiard processes
+        for context in (multiprocessing.get_context('fork'), billiard.get_context('fork')):
+            results = context.Queue()
+            parent = context.Process(target=_pool_in_daemon, args=(results,), daemon=True)
+            parent.start()
+            self.assertEqual(results.get(timeout=30), [0, 1, 2, 3])
+            parent.join(30)
+            self.assertEqual(parent.exitcode, 0)
+
+    @unittest.skipUnless(sys.platform.startswith('linux'), 'parent death signal is Linux only')
+    def test_pool_workers_die_with_a_killed_parent(self):
+        pids = multiprocessing.get_context('fork').Queue()
+        parent = multiprocessing.get_context('fork').Process(
+            target=run_in_pool, args=(_report_pid, range(2)), kwargs={'shared': {'pids': pids}, 'processes': 2},
+            daemon=True
+        )
+        parent.start()
+        workers = [pids.get(timeout=30), pids.get(timeout=30)]
+        os.kill(parent.pid, signal.SIGKILL)
+        parent.join(30)
+
+        deadline = time.monotonic() + 10
+        while any(_alive(pid) for pid in workers) and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.assertFalse(any(_alive(pid) for pid in workers))
+
+    def test_pool_size_is_capped_by_tasks(self):
+        self.assertEqual(pool_size(2, processes=8), 2)
+        self.assertEqual(pool_size(0, processes=8), 1)
+
+    @override_settings(BACKTEST_POOL_PROCESSES=0, BACKTEST_WORKER_CONCURRENCY=4)
+    def test_default_pool_shares_cpus_between_worker_processes(self):
+        with patch('backtesting.parallel.os.cpu_count', return_value=16):
+            self.assertEqual(pool_size(100), 4)
+        with patch('backtesting.parallel.os.cpu_count', return_value=2):
+            self.assertEqual(pool_size(100), 1)
+        with override_settings(BACKTEST_POOL_PROCESSES=6), patch('backtesting.parallel.os.cpu_count', return_value=16):
+            self.assertEqual(pool_size(100), 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
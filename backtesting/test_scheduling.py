@@ -0,0 +1,214 @@
+import datetime
+import time
+from unittest.mock import patch, MagicMock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from accounts.models import CustomUser
+from strategies.models import Strategy
+from data.models import OCLDataImport
+from backtesting.models import AnalysisJob, BacktestBatch, BacktestComparison, BacktestResult
+from backtesting.scheduling import (
+    SHORT_QUEUE, LONG_QUEUE, DEFAULT_BARS_PER_SECOND, INDICATOR_COST, SLOT_TIMEOUT,
+    count_indicators, import_bars, estimate_bars, estimate_throughput, estimate_runtime,
+    choose_queue, acquire_user_slot, release_user_slot, format_duration
+)
+from backtesting.tasks import run_analysis_job, run_backtest, run_backtest_batch, run_backtest_comparison
+from arbitrex.celery import app
+
+SMA_CODE = """
+import backtrader as bt
+
+class Cross(bt.Strategy):
+    def __init__(self):
+        fast = bt.ind.SMA(period=5)
+        slow = bt.indicators.SimpleMovingAverage(period=20)
+        self.cross = bt.ind.CrossOver(fast, slow)
+        self.rsi = bt.talib.RSI(self.data.close)
+"""
+
+PLAIN_CODE = """
+import backtrader as bt
+
+class Plain(bt.Strategy):
+    def next(self):
+        pass
+"""
+
+
+def completed_run(user, strategy, bars, seconds, code=None):
+    return BacktestResult.objects.create(
+        user=user, strategy=strategy, status='COMPLETED', strategy_code=code or strategy.code,
+        completed_at=datetime.datetime.now(datetime.timezone.utc),
+        run_metadata={'run_seconds': seconds, 'feeds': [{'feed': 'BTC', 'bars': bars}]}
+    )
+
+
+class TestScheduling(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(email='sched@example.com', password='pass')
+        self.strategy = Strategy.objects.create(user=self.user, name='Cross', code=SMA_CODE)
+        self.plain = Strategy.objects.create(user=self.user, name='Plain', code=PLAIN_CODE)
+        self.data_import = OCLDataImport.objects.create(
+            asset='BTC', interval='1h', start_date=datetime.date(2023, 1, 1),
+            end_date=datetime.date(2023, 1, 10), status='completed'
+        )
+
+    def test_count_indicators(self):
+        self.assertEqual(count_indicators(SMA_CODE), 4)
+        self.assertEqual(count_indicators(PLAIN_CODE), 0)
+        self.assertEqual(count_indicators('def broken(:'), 0)
+
+    def test_import_bars_uses_window_and_interval(self):
+        self.assertEqual(import_bars(self.data_import), 240)
+        start = datetime.datetime(2023, 1, 5, tzinfo=datetime.timezone.utc)
+        self.assertEqual(import_bars(self.data_import, start=start), 144)
+
+    def test_estimate_bars_counts_warmup_and_timeframes(self):
+        backtest = BacktestResult(
+            user=self.user, strategy=self.strategy, ocl_data_import=self.data_import,
+            warmup_bars=10, extra_timeframes=['4h']
+        )
+        self.assertEqual(estimate_bars(backtest), 250 + 62)
+
+    def test_throughput_defaults_by_indicator_count(self):
+        backtest = BacktestResult(user=self.user, strategy=self.strategy, strategy_code=SMA_CODE)
+        self.assertAlmostEqual(estimate_throughput(backtest), DEFAULT_BARS_PER_SECOND / (1 + 4 * INDICATOR_COST))
+
+    def test_throughput_prefers_strategy_history(self):
+        completed_run(self.user, self.strategy, 1000, 0.5)
+        completed_run(self.user, self.plain, 1000, 0.01)
+        backtest = BacktestResult(user=self.user, strategy=self.strategy, strategy_code=SMA_CODE)
+        self.assertAlmostEqual(estimate_throughput(backtest), 2000)
+
+    def test_throughput_scales_other_strategies_by_indicators(self):
+        completed_run(self.user, self.plain, 1000, 0.1)
+        backtest = BacktestResult(user=self.user, strategy=self.strategy, strategy_code=SMA_CODE)
+        self.assertAlmostEqual(estimate_throughput(backtest), 10000 / (1 + 4 * INDICATOR_COST))
+
+    @override_settings(SHORT_BACKTEST_SECONDS=60)
+    def test_estimate_runtime_and_queue(self):
+        completed_run(self.user, self.strategy, 1000, 1.0)
+        backtest = BacktestResult(
+            user=self.user, strategy=self.strategy, strategy_code=SMA_CODE, ocl_data_import=self.data_import
+        )
+        estimate = estimate_runtime(backtest)
+        self.assertEqual(estimate['bars'], 240)
+        self.assertEqual(estimate['indicators'], 4)
+        self.assertAlmostEqual(estimate['seconds'], 2.2)
+        self.assertEqual(choose_queue(estimate['seconds']), SHORT_QUEUE)
+        self.assertEqual(choose_queue(61), LONG_QUEUE)
+
+    @override_settings(BACKTEST_USER_CONCURRENCY=2)
+    def test_user_slots(self):
+        self.assertTrue(acquire_user_slot(1, LONG_QUEUE, 'a'))
+        self.assertTrue(acquire_user_slot(1, LONG_QUEUE, 'b'))
+        self.assertFalse(acquire_user_slot(1, LONG_QUEUE, 'c'))
+        # A retried or redelivered task gets its own slot back
+        self.assertTrue(acquire_user_slot(1, LONG_QUEUE, 'a'))
+        # Other users and the other queue are unaffected
+        self.assertTrue(acquire_user_slot(2, LONG_QUEUE, 'd'))
+        self.assertTrue(acquire_user_slot(1, SHORT_QUEUE, 'e'))
+        release_user_slot(1, LONG_QUEUE, 'a')
+        self.assertTrue(acquire_user_slot(1, LONG_QUEUE, 'c'))
+
+    @override_settings(BACKTEST_USER_CONCURRENCY=2)
+    def test_release_is_idempotent(self):
+        acquire_user_slot(1, LONG_QUEUE, 'a')
+        acquire_user_slot(1, LONG_QUEUE, 'b')
+        release_user_slot(1, LONG_QUEUE, 'a')
+        release_user_slot(1, LONG_QUEUE, 'a')
+        release_user_slot(1, LONG_QUEUE, 'never-acquired')
+        self.assertTrue(acquire_user_slot(1, LONG_QUEUE, 'c'))
+        self.assertFalse(acquire_user_slot(1, LONG_QUEUE, 'd'))
+
+    @override_settings(BACKTEST_USER_CONCURRENCY=1)
+    def test_slot_of_a_killed_task_expires(self):
+        acquire_user_slot(1, LONG_QUEUE, 'killed')
+        self.assertFalse(acquire_user_slot(1, LONG_QUEUE, 'next'))
+        # Later acquires don't extend the slot the killed task never released
+        with patch('backtesting.scheduling.time.time', return_value=time.time() + SLOT_TIMEOUT + 1):
+            self.assertTrue(acquire_user_slot(1, LONG_QUEUE, 'next'))
+
+    @override_settings(BACKTEST_USER_CONCURRENCY=1)
+    @patch('backtesting.tasks._run_backtest')
+    def test_run_backtest_requeues_when_user_slots_taken(self, mock_run):
+        backtest = BacktestResult.objects.create(
+            user=self.user, strategy=self.strategy, ocl_data_import=self.data_import, queue=LONG_QUEUE
+        )
+        acquire_user_slot(self.user.id, LONG_QUEUE, 'other')
+        with patch.object(run_backtest, 'retry', side_effect=RuntimeError('retry')) as mock_retry:
+            run_backtest.apply(args=(backtest.id,), task_id='run-1')
+        mock_retry.assert_called_once()
+        self.assertEqual(mock_retry.call_args.kwargs['queue'], LONG_QUEUE)
+        mock_run.assert_not_called()
+
+        release_user_slot(self.user.id, LONG_QUEUE, 'other')
+        run_backtest.apply(args=(backtest.id,), task_id='run-1')
+        mock_run.assert_called_once()
+        # The slot is released once the backtest finishes
+        self.assertTrue(acquire_user_slot(self.user.id, LONG_QUEUE, 'other'))
+
+    @override_settings(BACKTEST_USER_CONCURRENCY=1)
+    @patch('backtesting.tasks._run_analysis_job')
+    @patch('backtesting.tasks._run_backtest_comparison')
+    @patch('backtesting.tasks._run_backtest_batch')
+    def test_multi_run_tasks_share_the_user_slots(self, mock_batch, mock_comparison, mock_analysis):
+        batch = BacktestBatch.objects.create(user=self.user, strategy=self.strategy)
+        comparison = BacktestComparison.objects.create(user=self.user, ocl_data_import=self.data_import)
+        job = AnalysisJob.objects.create(user=self.user, strategy=self.strategy, kind='monte_carlo')
+        runs = [(run_backtest_batch, batch.id, mock_batch), (run_backtest_comparison, comparison.id, mock_comparison),
+                (run_analysis_job, job.id, mock_analysis)]
+
+        acquire_user_slot(self.user.id, LONG_QUEUE, 'other')
+        for task, object_id, mock_run in runs:
+            with patch.object(task, 'retry', side_effect=RuntimeError('retry')) as mock_retry:
+                task.apply(args=(object_id,), task_id=f'{task.name}-1')
+            self.assertEqual(mock_retry.call_args.kwargs['queue'], LONG_QUEUE)
+            mock_run.assert_not_called()
+
+        release_user_slot(self.user.id, LONG_QUEUE, 'other')
+        for task, object_id, mock_run in runs:
+            task.apply(args=(object_id,), task_id=f'{task.name}-1')
+            mock_run.assert_called_once()
+        self.assertTrue(acquire_user_slot(self.user.id, LONG_QUEUE, 'other'))
+
+    @patch('backtesting.views.run_backtest_batch')
+    def test_batch_is_queued_with_a_known_task_id(self, mock_task):
+        self.client.force_login(self.user)
+        self.client.post(reverse('backtesting:batch_dashboard'), {
+            'strategy': self.strategy.id, 'data_imports': [self.data_import.id],
+        })
+        batch = BacktestBatch.objects.get(user=self.user)
+        self.assertTrue(batch.task_id)
+        mock_task.apply_async.assert_called_once_with((batch.id,), task_id=batch.task_id)
+
+    def test_format_duration(self):
+        self.assertEqual(format_duration(4.6), '5s')
+        self.assertEqual(format_duration(125), '2m 05s')
+        self.assertEqual(format_duration(7260), '2h 01m')
+
+    @patch('backtesting.views.run_backtest')
+    def test_dashboard_routes_and_reports_eta(self, mock_task):
+        self.client.force_login(self.user)
+        response = self.client.post(reverse('backtesting:dashboard'), {
+            'strategy': self.strategy.id, 'ocl_data_import': self.data_import.id, 'parameters': '{}',
+            'commission': 0.1,
+        }, follow=True)
+        backtest = BacktestResult.objects.get(user=self.user)
+        self.assertIsNotNone(backtest.estimated_seconds)
+        self.assertEqual(backtest.queue, SHORT_QUEUE)
+        mock_task.apply_async.assert_called_once_with((backtest.id,), queue=SHORT_QUEUE, task_id=backtest.task_id)
+        self.assertContains(response, 'predicted runtime')
+
+    def test_task_routes_separate_io_and_cpu_work(self):
+        def queue(name):
+            return app.amqp.router.route({}, name)['queue'].name
+
+        self.assertEqual(queue('data.views.fetch_and_save_ocl_data'), 'imports')
+        for name in ('run_backtest', 'run_backtest_batch', 'run_backtest_comparison', 'run_analysis_job'):
+            self.assertEqual(queue(f'backtesting.tasks.{name}'), LONG_QUEUE)
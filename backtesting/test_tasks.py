@@ -1,41 +1,59 @@
 import unittest
 from unittest.mock import patch, MagicMock
 import datetime
+import numpy as np
 import pandas as pd
 import backtrader as bt
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from accounts.models import CustomUser
+from strategies.models import Strategy
+from data.models import OCLDataImport, OCLPrice
+from backtesting.models import BacktestResult, BacktestComparison
+from arbitrex.cancellation import request_cancel, is_cancelled
 from backtesting.tasks import (
     get_ocl_historical_data,
     load_strategies_and_inject_log,
     run_cerebro_with_data_and_strategy,
+    block_orders_before,
+    trim_columns,
+    derive_timeframes,
+    feed_metadata,
     extract_results_and_save,
     update_best_algos,
-    run_backtest
+    run_backtest,
+    build_batch_matrix,
+    run_backtest_batch,
+    run_backtest_comparison
 )
 
 class TestTasks(unittest.TestCase):
 
-    @patch('data.models.OCLPrice')
-    @patch('data.models.OCLDataImport')
-    def test_get_ocl_historical_data_success(self, mock_data_import, mock_price):
-        mock_data_import_obj = MagicMock()
-        mock_data_import.objects.get.return_value = mock_data_import_obj
-        
-        mock_price.objects.filter.return_value.order_by.return_value.values.return_value = [
-            {'date': datetime.datetime(2020,1,1), 'open':1, 'high':2, 'low':0.5, 'close':1.5, 'volume':1000}
-        ]
+    @patch('data.loaders.load_ocl_arrays')
+    def test_get_ocl_historical_data_success(self, mock_load_arrays):
+        mock_load_arrays.return_value = {
+            'date': np.array(['2020-01-01T00:00:00'], dtype='datetime64[us]'),
+            'open': np.array([1.0]), 'high': np.array([2.0]), 'low': np.array([0.5]),
+            'close': np.array([1.5]), 'volume': np.array([1000.0])
+        }
 
         df = get_ocl_historical_data(123)
+        mock_load_arrays.assert_called_once_with(123, start=None, end=None, warmup_bars=0)
         self.assertIsNotNone(df)
         self.assertIn('Date', df.columns)
         self.assertIn('Open', df.columns)
         self.assertEqual(df.iloc[0]['Open'], 1)
-
-    @patch('data.models.OCLPrice')
-    @patch('data.models.OCLDataImport')
-    def test_get_ocl_historical_data_no_data(self, mock_data_import, mock_price):
-        mock_data_import_obj = MagicMock()
-        mock_data_import.objects.get.return_value = mock_data_import_obj
-        mock_price.objects.filter.return_value.order_by.return_value.values.return_value = []
+        self.assertEqual(df.iloc[0]['Date'], pd.Timestamp(2020, 1, 1))
+        self.assertEqual(df.iloc[0]['Adj_Close'], 1.5)
+
+    @patch('data.loaders.load_ocl_arrays')
+    def test_get_ocl_historical_data_no_data(self, mock_load_arrays):
+        mock_load_arrays.return_value = {
+            'date': np.array([], dtype='datetime64[us]'),
+            'open': np.array([]), 'high': np.array([]), 'low': np.array([]),
+            'close': np.array([]), 'volume': np.array([])
+        }
 
         with self.assertRaises(ValueError) as context:
             get_ocl_historical_data(123)
@@ -81,6 +99,51 @@ class MyTestStrategy(bt.Strategy):
         mock_cerebro.run.assert_called_once()
         self.assertEqual(initial_cash, 10000)
 
+    def test_block_orders_before_trade_start(self):
+        class BuyEveryBar(bt.Strategy):
+            def next(self):
+                if not self.position:
+                    self.buy(size=1)
+
+        df = pd.DataFrame({
+            'Date': pd.date_range('2023-01-01', periods=10, freq='h'),
+            'Open': 100.0, 'High': 101.0, 'Low': 99.0, 'Close': 100.0, 'Volume': 1.0, 'Adj_Close': 100.0
+        })
+        trade_start = datetime.datetime(2023, 1, 1, 5, tzinfo=datetime.timezone.utc)
+
+        cerebro, results, _ = run_cerebro_with_data_and_strategy([df], BuyEveryBar, trade_start=trade_start)
+        orders = results[0].analyzers.order_list.get_analysis()
+        # The first order is placed on the 05:00 bar and fills at the next open
+        self.assertEqual(len(orders['time']), 1)
+        self.assertEqual(orders['time'][0], int(datetime.datetime(2023, 1, 1, 6, tzinfo=datetime.timezone.utc).timestamp()))
+        self.assertEqual(block_orders_before(BuyEveryBar, trade_start).__name__, 'BuyEveryBar')
+
+    def test_derived_timeframes_run_alongside_primary_feed(self):
+        df = pd.DataFrame({
+            'Date': pd.date_range('2023-01-01', periods=48, freq='5min'),
+            'Open': 100.0, 'High': 101.0, 'Low': 99.0, 'Close': 100.0, 'Volume': 1.0, 'Adj_Close': 100.0
+        })
+        feeds, params, metadata = derive_timeframes(df, ['1h'])
+        self.assertEqual(len(feeds[0]['close']), 4)
+        self.assertEqual(params[0]['compression'], 60)
+
+        cerebro, results, _ = run_cerebro_with_data_and_strategy(
+            [df] + feeds, bt.Strategy, names=['BTC 5m', '1h'], feed_params=[{}] + params
+        )
+        self.assertIs(results[0].getdatabyname('1h'), cerebro.datas[1])
+
+        feeds_meta = feed_metadata(cerebro.datas, ['BTC 5m', '1h'], metadata)
+        self.assertEqual([f['bars'] for f in feeds_meta], [48, 4])
+        self.assertNotIn('aggregate_ms', feeds_meta[0])
+        self.assertIn('aggregate_ms', feeds_meta[1])
+        self.assertGreater(feeds_meta[0]['memory_bytes'], feeds_meta[1]['memory_bytes'])
+
+    def test_trim_columns(self):
+        columns = {'time': np.array([10, 20, 30]), 'portfolio_value': np.array([1.0, 2.0, 3.0])}
+        trimmed = trim_columns(columns, 20)
+        self.assertEqual(trimmed['time'].tolist(), [20, 30])
+        self.assertEqual(trimmed['portfolio_value'].tolist(), [2.0, 3.0])
+
     @patch('backtesting.tasks.BestPerformingAlgo')
     @patch('backtesting.tasks.BestReturnAlgo')
     @patch('backtesting.tasks.MostWinningAlgo')
@@ -106,9 +169,9 @@ class MyTestStrategy(bt.Strategy):
 
         mock_strategy.analyzers.sharpe_ratio.get_analysis.return_value = {}
         mock_strategy.analyzers.trade_analyzer.get_analysis.return_value = {'total': {'total': 0}, 'won': {'total': 0}}
-        mock_strategy.analyzers.trade_list.get_analysis.return_value = {'trades': []}
-        mock_strategy.analyzers.order_list.get_analysis.return_value = {'orders': []}
-        mock_strategy.analyzers.portfolio_value.get_analysis.return_value = {'portfolio': []}
+        mock_strategy.analyzers.trade_list.get_analysis.return_value = {'time': np.array([], dtype=np.int64), 'feed': np.array([], dtype=np.int16), 'side': np.array([], dtype=np.int8), 'price': np.array([]), 'size': np.array([]), 'pnl': np.array([]), 'bars': np.array([], dtype=np.int64), 'portfolio_value': np.array([])}
+        mock_strategy.analyzers.order_list.get_analysis.return_value = {'time': np.array([], dtype=np.int64), 'feed': np.array([], dtype=np.int16), 'side': np.array([], dtype=np.int8), 'price': np.array([]), 'size': np.array([]), 'portfolio_value': np.array([])}
+        mock_strategy.analyzers.portfolio_value.get_analysis.return_value = {'time': np.array([], dtype=np.int64), 'portfolio_value': np.array([])}
 
         strategy_logs = ["2020-01-01 Something happened"]
         backtest = extract_results_and_save(backtest, mock_cerebro, mock_results, strategy_logs)
@@ -145,12 +208,17 @@ class MyTestStrategy(bt.Strategy):
         mock_strategy.analyzers.sharpe_ratio.get_analysis.return_value = {'sharperatio': 1.5}
         mock_strategy.analyzers.trade_analyzer.get_analysis.return_value = {'total': {'total': 2}, 'won': {'total': 1}}
         mock_strategy.analyzers.trade_list.get_analysis.return_value = {
-            'trades': [{'datetime': datetime.datetime(2020,1,1), 'type':'BUY', 'price':1.5, 'size':10, 'portfolio_value':10000}]
+            'time': np.array([1577836800]), 'feed': np.array([0], dtype=np.int16), 'side': np.array([1], dtype=np.int8), 'price': np.array([1.5]), 'size': np.array([10.0]),
+            'pnl': np.array([1000.0]), 'bars': np.array([2]), 'portfolio_value': np.array([10000.0])
         }
         mock_strategy.analyzers.order_list.get_analysis.return_value = {
-            'orders': [{'datetime': datetime.datetime(2020,1,1), 'type':'BUY', 'price':1.5, 'size':10, 'portfolio_value':10000}]
+            'time': np.array([1577836800]), 'feed': np.array([0], dtype=np.int16), 'side': np.array([1], dtype=np.int8), 'price': np.array([1.5]), 'size': np.array([10.0]),
+            'portfolio_value': np.array([10000.0])
+        }
+        mock_strategy.analyzers.portfolio_value.get_analysis.return_value = {
+            'time': np.array([1577836800, 1577923200, 1578009600]),
+            'portfolio_value': np.array([10000.0, 9500.0, 11000.0])
         }
-        mock_strategy.analyzers.portfolio_value.get_analysis.return_value = {'portfolio': [10000, 11000]}
 
         strategy_logs = ["2020-01-01 Buy executed"]
         backtest = extract_results_and_save(backtest, mock_cerebro, mock_results, strategy_logs)
@@ -160,6 +228,9 @@ class MyTestStrategy(bt.Strategy):
         self.assertNotEqual(backtest.algo_return, 0.0)
         self.assertEqual(backtest.algo_sharpe_ratio, 1.5)
         self.assertEqual(backtest.algo_win_rate, 50.0)
+        self.assertEqual(backtest.trade_data[0]['time'], '2020-01-01 00:00:00')
+        self.assertEqual(backtest.trade_data[0]['type'], 'buy')
+        self.assertEqual(backtest.portfolio_values[-1], {'time': '2020-01-03 00:00:00', 'portfolio_value': 11000.0})
 
         # Ensure create is called since previous bests were None
         mock_best_perf.objects.create.assert_called_once()
@@ -182,9 +253,13 @@ class MyTestStrategy(bt.Strategy):
 
         backtest_instance = MagicMock()
         backtest_instance.id = 1
+        backtest_instance.queue = ''
         mock_ocl_import = MagicMock()
         mock_ocl_import.id = 123
         backtest_instance.ocl_data_import = mock_ocl_import
+        backtest_instance.start_date = None
+        backtest_instance.end_date = None
+        backtest_instance.warmup_bars = 0
 
         # Valid Strategy instance
         strategy_model = MagicMock()
@@ -211,12 +286,17 @@ class MyTestStrategy(bt.Strategy):
         mock_strategy_instance.analyzers.sharpe_ratio.get_analysis.return_value = {'sharperatio': 1.2}
         mock_strategy_instance.analyzers.trade_analyzer.get_analysis.return_value = {'total': {'total': 1}, 'won': {'total': 1}}
         mock_strategy_instance.analyzers.trade_list.get_analysis.return_value = {
-            'trades': [{'datetime': datetime.datetime(2020,1,1), 'type':'BUY', 'price':1.5, 'size':10, 'portfolio_value':10000}]
+            'time': np.array([1577836800]), 'feed': np.array([0], dtype=np.int16), 'side': np.array([1], dtype=np.int8), 'price': np.array([1.5]), 'size': np.array([10.0]),
+            'pnl': np.array([1000.0]), 'bars': np.array([2]), 'portfolio_value': np.array([10000.0])
         }
         mock_strategy_instance.analyzers.order_list.get_analysis.return_value = {
-            'orders': [{'datetime': datetime.datetime(2020,1,1), 'type':'BUY', 'price':1.5, 'size':10, 'portfolio_value':10000}]
+            'time': np.array([1577836800]), 'feed': np.array([0], dtype=np.int16), 'side': np.array([1], dtype=np.int8), 'price': np.array([1.5]), 'size': np.array([10.0]),
+            'portfolio_value': np.array([10000.0])
+        }
+        mock_strategy_instance.analyzers.portfolio_value.get_analysis.return_value = {
+            'time': np.array([1577836800, 1577923200]),
+            'portfolio_value': np.array([10000.0, 11200.0])
         }
-        mock_strategy_instance.analyzers.portfolio_value.get_analysis.return_value = {'portfolio': [10000, 11200]}
         mock_cerebro.broker.getvalue.return_value = 11200
         mock_run_cerebro.return_value = (mock_cerebro, [mock_strategy_instance], 10000)
 
@@ -231,6 +311,7 @@ class MyTestStrategy(bt.Strategy):
     def test_run_backtest_failure(self, mock_backtest_result):
         backtest_instance = MagicMock()
         backtest_instance.id = 1
+        backtest_instance.queue = ''
         backtest_instance.ocl_data_import = None
         strategy_model = MagicMock()
         strategy_model.pk = 1
@@ -245,5 +326,219 @@ class MyTestStrategy(bt.Strategy):
         self.assertIn("No OCL data import ID found for this backtest", backtest_instance.log)
 
 
+
+def make_import(id, asset, interval):
+    data_import = MagicMock()
+    data_import.id = id
+    data_import.asset = asset
+    data_import.interval = interval
+    data_import.INTERVAL_CHOICES = [('5m', '5 minutes'), ('1h', '1 hour'), ('4h', '4 hours')]
+    data_import.__str__.return_value = f"{asset} {interval}"
+    return data_import
+
+
+class TestBatchTasks(unittest.TestCase):
+
+    def test_build_batch_matrix(self):
+        imports = [make_import(1, 'BTC', '1h'), make_import(2, 'ETH', '5m'), make_import(3, 'BTC', '1h')]
+        summaries = [{'return': 1.0, 'bars': 10}, {'error': 'boom'}, {'return': 2.0, 'bars': 20}]
+        matrix = build_batch_matrix(imports, summaries)
+
+        self.assertEqual(matrix['intervals'], ['5m', '1h'])
+        self.assertEqual([row['asset'] for row in matrix['rows']], ['BTC', 'ETH'])
+        btc_5m, btc_1h = matrix['rows'][0]['cells']
+        self.assertIsNone(btc_5m)
+        self.assertEqual(btc_1h['import_id'], 3)
+        self.assertEqual(matrix['rows'][1]['cells'][0]['error'], 'boom')
+        self.assertEqual(len(matrix['imports']), 3)
+
+    @patch('data.loaders.load_ocl_arrays_batch')
+    @patch('backtesting.tasks.BacktestBatch')
+    def test_run_backtest_batch(self, mock_batch_model, mock_load_batch):
+        batch = MagicMock()
+        batch.user_id = 1
+        batch.commission = 0.1
+        batch.strategy_code = """
+class Cross(bt.Strategy):
+    def __init__(self):
+        self.cross = bt.ind.CrossOver(bt.ind.SMA(period=5), bt.ind.SMA(period=20))
+
+    def next(self):
+        if self.cross > 0:
+            self.buy()
+        elif self.cross < 0:
+            self.close()
+"""
+        imports = [make_import(1, 'BTC', '1h'), make_import(2, 'ETH', '1h')]
+        batch.data_imports.order_by.return_value = imports
+        mock_batch_model.objects.get.return_value = batch
+
+        rng = np.random.default_rng(0)
+        dates = np.arange('2023-01-01T00', '2023-01-11T00', dtype='datetime64[h]').astype('datetime64[us]')
+        arrays = {}
+        for data_import in imports:
+            close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, len(dates))))
+            arrays[data_import.id] = {
+                'date': dates, 'open': close, 'high': close * 1.01, 'low': close * 0.99,
+                'close': close, 'volume': np.ones(len(dates))
+            }
+        mock_load_batch.return_value = arrays
+
+        run_backtest_batch(5)
+
+        self.assertEqual(batch.status, 'COMPLETED')
+        mock_load_batch.assert_called_once_with([1, 2])
+        results = batch.results['imports']
+        self.assertEqual([r['import_id'] for r in results], [1, 2])
+        self.assertTrue(all('error' not in r and r['bars'] == len(dates) for r in results))
+        self.assertEqual(batch.run_metadata['imports'], 2)
+
+
+
+class TestComparisonTask(TestCase):
+
+    def setUp(self):
+        user = CustomUser.objects.create_user(email='compare@example.com', password='pass')
+        self.data_import = OCLDataImport.objects.create(
+            asset='BTC', interval='1h', start_date=datetime.date(2023, 1, 1),
+            end_date=datetime.date(2023, 1, 10), status='completed'
+        )
+        close = 100 * np.exp(np.cumsum(np.random.default_rng(1).normal(0, 0.01, 200)))
+        first = datetime.datetime(2023, 1, 1, tzinfo=datetime.timezone.utc)
+        OCLPrice.objects.bulk_create([
+            OCLPrice(data_import=self.data_import, date=first + datetime.timedelta(hours=i),
+                     open=c, high=c * 1.01, low=c * 0.99, close=c, volume=1.0)
+            for i, c in enumerate(close)
+        ])
+        code = """
+class Cross(bt.Strategy):
+    params = (('fast', {fast}),)
+
+    def __init__(self):
+        self.cross = bt.ind.CrossOver(bt.ind.SMA(period=self.p.fast), bt.ind.SMA(period=30))
+
+    def next(self):
+        if self.cross > 0:
+            self.buy()
+        elif self.cross < 0:
+            self.close()
+"""
+        self.comparison = BacktestComparison.objects.create(user=user, ocl_data_import=self.data_import, commission=0.1)
+        for fast in (5, 10):
+            strategy = Strategy.objects.create(user=user, name=f'Cross {fast}', code=code.format(fast=fast))
+            BacktestResult.objects.create(
+                user=user, strategy=strategy, parameters={}, commission=0.1,
+                ocl_data_import=self.data_import, comparison=self.comparison
+            )
+        broken = Strategy.objects.create(user=user, name='Broken', code='x = 1')
+        BacktestResult.objects.create(
+            user=user, strategy=broken, parameters={}, ocl_data_import=self.data_import, comparison=self.comparison
+        )
+
+    @patch('backtesting.tasks.bt.Cerebro.plot', return_value=[])
+    def test_each_strategy_gets_its_own_result(self, mock_plot):
+        run_backtest_comparison(self.comparison.id)
+
+        self.comparison.refresh_from_db()
+        self.assertEqual(self.comparison.status, 'COMPLETED')
+        results = list(self.comparison.results.order_by('id'))
+        self.assertEqual([r.status for r in results], ['COMPLETED', 'COMPLETED', 'FAILED'])
+        self.assertEqual(len(results[0].ocl_data), 200)
+        self.assertEqual(len(results[0].portfolio_values), 200)
+        self.assertNotEqual(results[0].algo_return, results[1].algo_return)
+        self.assertEqual(set(self.comparison.run_metadata['run_seconds']), {'Cross 5', 'Cross 10', 'Broken'})
+
+    @patch('backtesting.tasks.bt.Cerebro.plot', return_value=[])
+    def test_cancelled_strategy_is_skipped(self, mock_plot):
+        cache.clear()
+        first = self.comparison.results.order_by('id').first()
+        request_cancel('backtest', first.id)
+
+        run_backtest_comparison(self.comparison.id)
+
+        self.comparison.refresh_from_db()
+        self.assertEqual(self.comparison.status, 'COMPLETED')
+        self.assertEqual([r.status for r in self.comparison.results.order_by('id')], ['CANCELLED', 'COMPLETED', 'FAILED'])
+        self.assertFalse(is_cancelled('backtest', first.id))
+
+
+class TestBacktestCancellation(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(email='cancel@example.com', password='pass')
+        data_import = OCLDataImport.objects.create(
+            asset='BTC', interval='1h', start_date=datetime.date(2023, 1, 1),
+            end_date=datetime.date(2023, 1, 10), status='completed'
+        )
+        close = 100 * np.exp(np.cumsum(np.random.default_rng(2).normal(0, 0.01, 200)))
+        first = datetime.datetime(2023, 1, 1, tzinfo=datetime.timezone.utc)
+        OCLPrice.objects.bulk_create([
+            OCLPrice(data_import=data_import, date=first + datetime.timedelta(hours=i),
+                     open=c, high=c * 1.01, low=c * 0.99, close=c, volume=1.0)
+            for i, c in enumerate(close)
+        ])
+        strategy = Strategy.objects.create(user=self.user, name='Idle', code="class Idle(bt.Strategy):\n    pass\n")
+        self.backtest = BacktestResult.objects.create(
+            user=self.user, strategy=strategy, parameters={}, commission=0.1,
+            ocl_data_import=data_import, task_id='task-1'
+        )
+
+    @patch('backtesting.tasks.load_strategies_and_inject_log')
+    def test_cancelled_before_start(self, mock_load):
+        request_cancel('backtest', self.backtest.id)
+        run_backtest(self.backtest.id)
+
+        self.backtest.refresh_from_db()
+        self.assertEqual(self.backtest.status, 'CANCELLED')
+        mock_load.assert_not_called()
+        self.assertFalse(is_cancelled('backtest', self.backtest.id))
+
+    def test_cancelled_mid_run_stops_at_a_bar(self):
+        calls = []
+
+        def checker(kind, object_id):
+            def check():
+                calls.append(1)
+                return len(calls) > 50
+            return check
+
+        with patch('backtesting.tasks.cancel_checker', checker):
+            run_backtest(self.backtest.id)
+
+        self.backtest.refresh_from_db()
+        self.assertEqual(self.backtest.status, 'CANCELLED')
+        self.assertEqual(self.backtest.log, 'Cancelled by user after 50 bars.')
+        self.assertIsNone(self.backtest.portfolio_values)
+
+    @patch('backtesting.views.celery_app')
+    def test_cancel_view_revokes_pending_backtest(self, mock_app):
+        self.client.force_login(self.user)
+        self.client.post(reverse('backtesting:backtest_cancel', args=[self.backtest.id]))
+
+        self.backtest.refresh_from_db()
+        self.assertEqual(self.backtest.status, 'CANCELLED')
+        mock_app.control.revoke.assert_called_once_with('task-1', terminate=False)
+
+    @patch('backtesting.views.celery_app')
+    def test_cancel_view_signals_running_backtest_then_terminates(self, mock_app):
+        self.backtest.status = 'RUNNING'
+        self.backtest.save()
+        self.client.force_login(self.user)
+        url = reverse('backtesting:backtest_cancel', args=[self.backtest.id])
+
+        self.client.post(url)
+        self.backtest.refresh_from_db()
+        self.assertEqual(self.backtest.status, 'RUNNING')
+        self.assertTrue(is_cancelled('backtest', self.backtest.id))
+        mock_app.control.revoke.assert_called_with('task-1', terminate=False)
+
+        # A second cancel of a backtest that has not stopped kills the worker process
+        self.client.post(url)
+        self.backtest.refresh_from_db()
+        self.assertEqual(self.backtest.status, 'CANCELLED')
+        mock_app.control.revoke.assert_called_with('task-1', terminate=True)
+
+
 if __name__ == '__main__':
     unittest.main()
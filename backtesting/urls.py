@@ -10,5 +10,13 @@ urlpatterns = [
     path('results/<int:backtest_id>/', views.backtest_result, name='backtest_result'),
     path('chart-data/<int:backtest_id>/', views.backtest_chart_data, name='backtest_chart_data'),
     path('status/<int:backtest_id>/', views.backtest_status, name='backtest_status'),
+    path('results/<int:backtest_id>/cancel/', views.backtest_cancel, name='backtest_cancel'),
     path('parameters/<int:strategy_id>/', views.strategy_parameters, name='strategy_parameters'),
+    path('batch/', views.batch_dashboard, name='batch_dashboard'),
+    path('batch/<int:batch_id>/', views.batch_result, name='batch_result'),
+    path('compare/', views.comparison_dashboard, name='comparison_dashboard'),
+    path('compare/<int:comparison_id>/', views.comparison_result, name='comparison_result'),
+    path('analysis/', views.analysis_dashboard, name='analysis_dashboard'),
+    path('analysis/<int:job_id>/', views.analysis_result, name='analysis_result'),
+    path('analysis/<int:job_id>/resume/', views.analysis_resume, name='analysis_resume'),
 ]
\ No newline at end of file
@@ -4,10 +4,15 @@ from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import JsonResponse
+from celery.utils import uuid
 
-from .models import BacktestResult
-from .tasks import run_backtest
-from .forms import BacktestForm
+from .models import BacktestResult, BacktestBatch, BacktestComparison, AnalysisJob
+from .tasks import run_backtest, run_backtest_batch, run_backtest_comparison, run_analysis_job
+from .forms import BacktestForm, BacktestBatchForm, BacktestComparisonForm, AnalysisJobForm
+from .optimization import TRADE_LIST_ANALYSES
+from .scheduling import estimate_runtime, choose_queue, format_duration, release_user_slot, SHORT_QUEUE
+from arbitrex.celery import app as celery_app
+from arbitrex.cancellation import request_cancel, is_cancelled
 from .utils import update_strategy_params_in_code
 from strategies.models import Strategy
 from strategies.utils import load_strategies_and_inject_log
@@ -27,7 +32,12 @@ def dashboard(request):
                 parameters=parameters,
                 commission=form.cleaned_data.get('commission'),
                 slippage=form.cleaned_data.get('slippage'),
-                ocl_data_import=form.cleaned_data.get('ocl_data_import')
+                ocl_data_import=form.cleaned_data.get('ocl_data_import'),
+                start_date=form.cleaned_data.get('start_date'),
+                end_date=form.cleaned_data.get('end_date'),
+                warmup_bars=form.cleaned_data.get('warmup_bars') or 0,
+                extra_timeframes=form.cleaned_data.get('extra_timeframes') or [],
+                profile=form.cleaned_data.get('profile') or False
             )
 
             original_code = strategy.code
@@ -35,8 +45,20 @@ def dashboard(request):
 
             backtest.strategy_code = updated_code
             backtest.save()
+            backtest.additional_data_imports.set(form.cleaned_data.get('additional_data_imports') or [])
 
-            run_backtest.delay(backtest.id)
+            estimate = estimate_runtime(backtest)
+            backtest.estimated_seconds = estimate['seconds']
+            backtest.queue = choose_queue(estimate['seconds'])
+            backtest.task_id = uuid()
+            backtest.save(update_fields=['estimated_seconds', 'queue', 'task_id'])
+
+            run_backtest.apply_async((backtest.id,), queue=backtest.queue, task_id=backtest.task_id)
+            messages.info(
+                request,
+                f"Backtest queued: about {estimate['bars']:,} bars, predicted runtime "
+                f"{format_duration(estimate['seconds'])} ({'short' if backtest.queue == SHORT_QUEUE else 'long'} queue)."
+            )
             return redirect('backtesting:backtest_result', backtest_id=backtest.id)
         else:
             messages.error(request, f"Form is not valid: {form.errors}")
@@ -78,11 +100,161 @@ def backtest_chart_data(request, backtest_id):
 @login_required
 def backtest_result(request, backtest_id):
     backtest = get_object_or_404(BacktestResult, id=backtest_id, user=request.user)
-    return render(request, 'backtesting/backtest_result.html', {'backtest': backtest})
+    estimated_runtime = format_duration(backtest.estimated_seconds) if backtest.estimated_seconds is not None else None
+    return render(request, 'backtesting/backtest_result.html', {
+        'backtest': backtest,
+        'estimated_runtime': estimated_runtime,
+    })
 
 @login_required
 def backtest_status(request, backtest_id):
     backtest = get_object_or_404(BacktestResult, id=backtest_id, user=request.user)
     return JsonResponse({
         "status": backtest.status,
-    })
\ No newline at end of file
+        "estimated_seconds": backtest.estimated_seconds,
+    })
+
+@login_required
+def backtest_cancel(request, backtest_id):
+    """
+    Cancel a queued or running backtest. Queued tasks are revoked; a running one stops
+    at its next bar and marks itself CANCELLED. Cancelling again while it still runs,
+    e.g. a strategy stuck inside next(), terminates the worker process.
+    """
+    backtest = get_object_or_404(BacktestResult, id=backtest_id, user=request.user)
+    if request.method == 'POST' and backtest.status in ('PENDING', 'RUNNING'):
+        terminate = backtest.status == 'RUNNING' and is_cancelled('backtest', backtest.id)
+        request_cancel('backtest', backtest.id)
+        if backtest.task_id:
+            celery_app.control.revoke(backtest.task_id, terminate=terminate)
+        if backtest.status == 'PENDING' or terminate:
+            if terminate and backtest.queue:
+                release_user_slot(backtest.user_id, backtest.queue, backtest.task_id)
+            backtest.status = 'CANCELLED'
+            backtest.log = 'Cancelled by user.'
+            backtest.save(update_fields=['status', 'log'])
+        messages.info(request, "Backtest cancelled." if backtest.status == 'CANCELLED' else "Cancelling backtest...")
+    return redirect('backtesting:backtest_result', backtest_id=backtest.id)
+
+@login_required
+def batch_dashboard(request):
+    if request.method == 'POST':
+        form = BacktestBatchForm(request.POST)
+        if form.is_valid():
+            batch = BacktestBatch.objects.create(
+                user=request.user,
+                strategy=form.cleaned_data['strategy'],
+                status='PENDING',
+                commission=form.cleaned_data.get('commission')
+            )
+            batch.data_imports.set(form.cleaned_data['data_imports'])
+
+            batch.task_id = uuid()
+            batch.save(update_fields=['task_id'])
+            run_backtest_batch.apply_async((batch.id,), task_id=batch.task_id)
+            return redirect('backtesting:batch_result', batch_id=batch.id)
+        else:
+            messages.error(request, f"Form is not valid: {form.errors}")
+    else:
+        form = BacktestBatchForm()
+    return render(request, 'backtesting/batch_index.html', {'form': form})
+
+@login_required
+def batch_result(request, batch_id):
+    batch = get_object_or_404(BacktestBatch, id=batch_id, user=request.user)
+    return render(request, 'backtesting/batch_result.html', {'batch': batch})
+
+@login_required
+def comparison_dashboard(request):
+    if request.method == 'POST':
+        form = BacktestComparisonForm(request.POST)
+        if form.is_valid():
+            comparison = BacktestComparison.objects.create(
+                user=request.user,
+                status='PENDING',
+                ocl_data_import=form.cleaned_data['ocl_data_import'],
+                commission=form.cleaned_data.get('commission')
+            )
+            # One BacktestResult per strategy, filled in by the comparison task
+            for strategy in form.cleaned_data['strategies']:
+                BacktestResult.objects.create(
+                    user=request.user,
+                    strategy=strategy,
+                    status='PENDING',
+                    parameters={},
+                    commission=comparison.commission,
+                    ocl_data_import=comparison.ocl_data_import,
+                    comparison=comparison
+                )
+
+            comparison.task_id = uuid()
+            comparison.save(update_fields=['task_id'])
+            run_backtest_comparison.apply_async((comparison.id,), task_id=comparison.task_id)
+            return redirect('backtesting:comparison_result', comparison_id=comparison.id)
+        else:
+            messages.error(request, f"Form is not valid: {form.errors}")
+    else:
+        form = BacktestComparisonForm()
+    return render(request, 'backtesting/comparison_index.html', {'form': form})
+
+@login_required
+def comparison_result(request, comparison_id):
+    comparison = get_object_or_404(BacktestComparison, id=comparison_id, user=request.user)
+    return render(request, 'backtesting/comparison_result.html', {
+        'comparison': comparison,
+        'results': comparison.results.order_by('id'),
+    })
+
+@login_required
+def analysis_dashboard(request):
+    if request.method == 'POST':
+        form = AnalysisJobForm(request.POST, user=request.user)
+        if form.is_valid():
+            backtest = None
+            if form.cleaned_data['kind'] in TRADE_LIST_ANALYSES:
+                # Trade-list analyses describe the backtest's own strategy and import
+                backtest = form.cleaned_data['backtest_result']
+                strategy, ocl_data_import, commission = backtest.strategy, backtest.ocl_data_import, backtest.commission
+            else:
+                strategy = form.cleaned_data['strategy']
+                ocl_data_import = form.cleaned_data['ocl_data_import']
+                commission = form.cleaned_data.get('commission')
+            job = AnalysisJob.objects.create(
+                user=request.user,
+                strategy=strategy,
+                kind=form.cleaned_data['kind'],
+                status='PENDING',
+                ocl_data_import=ocl_data_import,
+                backtest_result=backtest,
+                commission=commission,
+                config=form.cleaned_data['config']
+            )
+
+            job.task_id = uuid()
+            job.save(update_fields=['task_id'])
+            run_analysis_job.apply_async((job.id,), task_id=job.task_id)
+            return redirect('backtesting:analysis_result', job_id=job.id)
+        else:
+            messages.error(request, f"Form is not valid: {form.errors}")
+    else:
+        form = AnalysisJobForm(user=request.user)
+    return render(request, 'backtesting/analysis_index.html', {
+        'form': form,
+        'jobs': AnalysisJob.objects.filter(user=request.user).order_by('-created_at')[:20],
+    })
+
+@login_required
+def analysis_result(request, job_id):
+    job = get_object_or_404(AnalysisJob, id=job_id, user=request.user)
+    return render(request, 'backtesting/analysis_result.html', {'job': job})
+
+@login_required
+def analysis_resume(request, job_id):
+    job = get_object_or_404(AnalysisJob, id=job_id, user=request.user)
+    if request.method == 'POST' and job.status == 'FAILED' and job.checkpoint:
+        job.status = 'PENDING'
+        job.log = None
+        job.task_id = uuid()
+        job.save()
+        run_analysis_job.apply_async((job.id,), task_id=job.task_id)
+    return redirect('backtesting:analysis_result', job_id=job.id)
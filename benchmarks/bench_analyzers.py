@@ -0,0 +1,202 @@
+# benchmarks/bench_analyzers.py
+"""
+Micro-benchmark of per-bar analyzer overhead.
+
+Runs the same strategy over a synthetic feed with the previous dict-per-bar
+analyzers and with the columnar analyzers in backtesting/analyzers.py. Each
+analyzer hook (next/notify_trade/notify_order) is wrapped with a timer, so the
+reported overhead isolates analyzer work from data loading and the broker. The
+cost of the timer itself is measured with a no-op analyzer and subtracted.
+Serialization to the JSON records stored on BacktestResult is timed separately.
+
+Usage:
+    python -m benchmarks.bench_analyzers --bars 200000
+"""
+
+import argparse
+import time
+
+import backtrader as bt
+import numpy as np
+import pandas as pd
+
+from backtesting.analyzers import (
+    PortfolioValueAnalyzer,
+    TradeListAnalyzer,
+    OrderListAnalyzer,
+    columns_to_records
+)
+
+
+class LegacyPortfolioValueAnalyzer(bt.Analyzer):
+    """The pre-columnar implementation: strftime and a dict on every bar."""
+    def __init__(self):
+        self.values = []
+
+    def next(self):
+        dt = self.datas[0].datetime.datetime(0)
+        value = self.strategy.broker.getvalue()
+        self.values.append({
+            'time': dt.strftime('%Y-%m-%d %H:%M:%S'),
+            'portfolio_value': value
+        })
+
+    def get_analysis(self):
+        return self.values
+
+
+class LegacyTradeListAnalyzer(bt.Analyzer):
+    def __init__(self):
+        self.trades = []
+
+    def notify_trade(self, trade):
+        if trade.isclosed:
+            self.trades.append({
+                'datetime': self.strategy.datas[0].datetime.datetime(0),
+                'type': 'buy' if trade.size > 0 else 'sell',
+                'price': trade.price,
+                'size': trade.size,
+                'portfolio_value': self.strategy.broker.getvalue()
+            })
+
+    def get_analysis(self):
+        return {'trades': self.trades}
+
+
+class LegacyOrderListAnalyzer(bt.Analyzer):
+    def __init__(self):
+        self.orders = []
+
+    def notify_order(self, order):
+        if order.status in [order.Completed]:
+            self.orders.append({
+                'datetime': self.strategy.datetime.datetime(),
+                'type': 'buy' if order.isbuy() else 'sell',
+                'price': order.executed.price,
+                'size': order.executed.size,
+                'portfolio_value': self.strategy.broker.getvalue()
+            })
+
+    def get_analysis(self):
+        return {'orders': self.orders}
+
+
+class FlipStrategy(bt.Strategy):
+    """Trades every few bars so the trade/order analyzers see realistic traffic."""
+    params = (('every', 50),)
+
+    def next(self):
+        if len(self) % self.p.every == 0:
+            if self.position:
+                self.close()
+            else:
+                self.buy(size=1)
+
+
+def make_frame(bars, seed=42):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.002, bars)))
+    return pd.DataFrame({
+        'Date': pd.date_range('2020-01-01', periods=bars, freq='5min'),
+        'Open': close,
+        'High': close * 1.001,
+        'Low': close * 0.999,
+        'Close': close,
+        'Volume': 1.0,
+    })
+
+
+class NoopAnalyzer(bt.Analyzer):
+    def next(self):
+        pass
+
+    def notify_trade(self, trade):
+        pass
+
+    def notify_order(self, order):
+        pass
+
+
+def timed(analyzer_cls, clock):
+    """Subclass an analyzer so every hook call is added to clock['seconds']."""
+    def wrap(name):
+        hook = getattr(analyzer_cls, name)
+
+        def wrapper(self, *args):
+            start = time.perf_counter()
+            hook(self, *args)
+            clock['seconds'] += time.perf_counter() - start
+        return wrapper
+
+    hooks = {name: wrap(name) for name in ('next', 'notify_trade', 'notify_order')
+             if name in analyzer_cls.__dict__}
+    return type(f'Timed{analyzer_cls.__name__}', (analyzer_cls,), hooks)
+
+
+def run(df, analyzers):
+    """Run Cerebro with the given analyzers; return (hook seconds, serialize seconds)."""
+    clock = {'seconds': 0.0}
+    cerebro = bt.Cerebro(stdstats=False)
+    cerebro.addstrategy(FlipStrategy)
+    cerebro.adddata(bt.feeds.PandasData(dataname=df, datetime='Date', openinterest=-1))
+    for name, analyzer in analyzers.items():
+        cerebro.addanalyzer(timed(analyzer, clock), _name=name)
+    strategy = cerebro.run()[0]
+
+    # Serialization cost is part of the end-to-end price of each implementation
+    start = time.perf_counter()
+    if 'portfolio_value' in analyzers:
+        portfolio = strategy.analyzers.portfolio_value.get_analysis()
+        trades = strategy.analyzers.trade_list.get_analysis()
+        orders = strategy.analyzers.order_list.get_analysis()
+        if isinstance(portfolio, dict):
+            columns_to_records(portfolio)
+            columns_to_records(trades)
+            columns_to_records(orders)
+        else:
+            [dict(t, datetime=t['datetime'].strftime('%Y-%m-%d %H:%M:%S')) for t in trades['trades']]
+            [dict(o, datetime=o['datetime'].strftime('%Y-%m-%d %H:%M:%S')) for o in orders['orders']]
+    serialize_seconds = time.perf_counter() - start
+    return clock['seconds'], serialize_seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--bars', type=int, default=200_000)
+    parser.add_argument('--repeat', type=int, default=1)
+    args = parser.parse_args()
+
+    df = make_frame(args.bars)
+    configs = {
+        'noop': {
+            'portfolio_value': NoopAnalyzer,
+            'trade_list': NoopAnalyzer,
+            'order_list': NoopAnalyzer,
+        },
+        'legacy': {
+            'portfolio_value': LegacyPortfolioValueAnalyzer,
+            'trade_list': LegacyTradeListAnalyzer,
+            'order_list': LegacyOrderListAnalyzer,
+        },
+        'columnar': {
+            'portfolio_value': PortfolioValueAnalyzer,
+            'trade_list': TradeListAnalyzer,
+            'order_list': OrderListAnalyzer,
+        },
+    }
+
+    best = {}
+    for name, analyzers in configs.items():
+        timings = [run(df, analyzers) for _ in range(args.repeat)]
+        best[name] = min(timings, key=sum)
+
+    timer_cost = best.pop('noop')[0]
+    print(f"{args.bars} bars, timer cost {timer_cost / args.bars * 1e6:.2f} us/bar subtracted")
+    print(f"{'config':<10} {'hooks (s)':>10} {'serialize (s)':>14} {'overhead/bar (us)':>18}")
+    for name, (hook_seconds, serialize_seconds) in best.items():
+        overhead = (hook_seconds - timer_cost + serialize_seconds) / args.bars * 1e6
+        print(f"{name:<10} {hook_seconds - timer_cost:>10.3f} {serialize_seconds:>14.3f} {overhead:>18.2f}")
+
+
+if __name__ == '__main__':
+    main()
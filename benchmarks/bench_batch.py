@@ -0,0 +1,111 @@
+# benchmarks/bench_batch.py
+"""
+Benchmark a batch backtest against the same work done as independent backtests.
+
+"independent" repeats, per import, what each run_backtest task does before its
+plot: compile the strategy, build the DataFrame, run Cerebro and serialize the
+trade/equity records. "batch" is what run_backtest_batch does: compile once,
+share the preloaded arrays with a forked pool and keep only headline metrics.
+Plotting, which every run_backtest also pays, is left out of the baseline.
+
+Usage:
+    python -m benchmarks.bench_batch --imports 12 --bars 20000 --processes 4
+"""
+
+import argparse
+import os
+import time
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'arbitrex.settings')
+django.setup()
+
+import numpy as np
+
+from backtesting.analyzers import columns_to_records
+from backtesting.feeds import ocl_arrays_to_feed
+from backtesting.parallel import run_in_pool
+from backtesting.tasks import run_cerebro_with_data_and_strategy, summarize_run, _batch_worker
+from data.loaders import ocl_arrays_to_frame
+from strategies.utils import load_strategies_and_inject_log
+
+STRATEGY_CODE = """
+class SmaCross(bt.Strategy):
+    params = (('fast', 10), ('slow', 30))
+
+    def __init__(self):
+        self.cross = bt.ind.CrossOver(bt.ind.SMA(period=self.p.fast), bt.ind.SMA(period=self.p.slow))
+
+    def next(self):
+        if self.cross > 0:
+            self.buy()
+        elif self.cross < 0:
+            self.close()
+"""
+
+
+def make_imports(count, bars, seed=7):
+    rng = np.random.default_rng(seed)
+    dates = np.arange(bars).astype('timedelta64[m]') * 5 + np.datetime64('2022-01-01T00:00', 'us')
+    imports = {}
+    for i in range(count):
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.002, bars)))
+        imports[i] = {
+            'date': dates, 'open': close, 'high': close * 1.001, 'low': close * 0.999,
+            'close': close, 'volume': np.ones(bars)
+        }
+    return imports
+
+
+def noop_log(strategy, txt, dt=None):
+    pass
+
+
+def run_independent(imports):
+    for arrays in imports.values():
+        UserStrategy = load_strategies_and_inject_log(STRATEGY_CODE, noop_log)
+        df = ocl_arrays_to_frame(arrays)
+        cerebro, results, initial_cash = run_cerebro_with_data_and_strategy([df], UserStrategy, commission=0.1)
+        summarize_run(cerebro, results, initial_cash)
+        analyzers = results[0].analyzers
+        columns_to_records(analyzers.portfolio_value.get_analysis())
+        columns_to_records(analyzers.trade_list.get_analysis())
+        columns_to_records(analyzers.order_list.get_analysis())
+
+
+def run_batch(imports, processes):
+    UserStrategy = load_strategies_and_inject_log(STRATEGY_CODE, noop_log)
+    shared = {
+        'strategy': UserStrategy,
+        'arrays': {i: ocl_arrays_to_feed(a) for i, a in imports.items()},
+        'commission': 0.1,
+    }
+    return run_in_pool(_batch_worker, list(imports), shared=shared, processes=processes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--imports', type=int, default=12)
+    parser.add_argument('--bars', type=int, default=20_000)
+    parser.add_argument('--processes', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    imports = make_imports(args.imports, args.bars)
+
+    start = time.perf_counter()
+    run_independent(imports)
+    independent = time.perf_counter() - start
+
+    start = time.perf_counter()
+    summaries = run_batch(imports, args.processes)
+    batch = time.perf_counter() - start
+    assert not any('error' in s for s in summaries), summaries
+
+    print(f"{args.imports} imports x {args.bars} bars, {args.processes} processes")
+    print(f"{'independent':<12} {independent:>8.2f}s")
+    print(f"{'batch':<12} {batch:>8.2f}s {independent / batch:>6.1f}x")
+
+
+if __name__ == '__main__':
+    main()
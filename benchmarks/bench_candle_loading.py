@@ -0,0 +1,108 @@
+# benchmarks/bench_candle_loading.py
+"""
+Benchmark candle loading: Django ORM dicts versus the direct NumPy loader.
+
+Seeds a throwaway OCLDataImport with synthetic 5m candles for each requested
+size, then times the previous ORM-based get_ocl_historical_data path against
+data.loaders (binary COPY on PostgreSQL, chunked cursor elsewhere), both
+returning the DataFrame the Cerebro feed expects. The import is deleted at the end.
+
+Usage (against the configured database):
+    python -m benchmarks.bench_candle_loading --rows 100000,1000000
+"""
+
+import argparse
+import datetime
+import os
+import time
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'arbitrex.settings')
+django.setup()
+
+import numpy as np
+import pandas as pd
+
+from data.models import OCLDataImport, OCLPrice
+from data.loaders import load_ocl_arrays, ocl_arrays_to_frame
+
+
+def orm_frame(data_import_id):
+    """The ORM path get_ocl_historical_data used before the NumPy loader."""
+    data_import = OCLDataImport.objects.get(id=data_import_id)
+    prices = OCLPrice.objects.filter(data_import=data_import).order_by('date').values(
+        'date', 'open', 'high', 'low', 'close', 'volume'
+    )
+    df = pd.DataFrame(list(prices))
+    df = df.rename(columns={
+        'date': 'Date', 'open': 'Open', 'high': 'High',
+        'low': 'Low', 'close': 'Close', 'volume': 'Volume'
+    })
+    df['Adj_Close'] = df['Close']
+    df = df[['Date', 'Open', 'High', 'Low', 'Close', 'Volume', 'Adj_Close']]
+    if pd.api.types.is_datetime64_any_dtype(df['Date']):
+        df['Date'] = pd.to_datetime(df['Date']).dt.tz_localize(None)
+    return df
+
+
+def numpy_frame(data_import_id):
+    return ocl_arrays_to_frame(load_ocl_arrays(data_import_id))
+
+
+def seed_import(rows, seed=0):
+    start = datetime.datetime(2015, 1, 1, tzinfo=datetime.timezone.utc)
+    data_import = OCLDataImport.objects.create(
+        name=f'benchmark {rows} rows',
+        asset='BTC',
+        interval='5m',
+        start_date=start.date(),
+        end_date=(start + datetime.timedelta(minutes=5 * rows)).date(),
+        status='completed'
+    )
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.002, rows)))
+    batch = 10_000
+    for offset in range(0, rows, batch):
+        OCLPrice.objects.bulk_create([
+            OCLPrice(
+                data_import=data_import,
+                date=start + datetime.timedelta(minutes=5 * i),
+                open=close[i], high=close[i] * 1.001, low=close[i] * 0.999, close=close[i], volume=1.0
+            )
+            for i in range(offset, min(offset + batch, rows))
+        ])
+    return data_import
+
+
+def best_of(func, data_import_id, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        df = func(data_import_id)
+        timings.append(time.perf_counter() - start)
+    return min(timings), df
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', default='100000,1000000', help='Comma separated row counts')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    from django.db import connection
+    print(f"database vendor: {connection.vendor}")
+    print(f"{'rows':>10} {'orm (s)':>10} {'numpy (s)':>10} {'speedup':>8}")
+    for rows in [int(r) for r in args.rows.split(',')]:
+        data_import = seed_import(rows)
+        try:
+            orm_seconds, orm_df = best_of(orm_frame, data_import.id, args.repeat)
+            numpy_seconds, numpy_df = best_of(numpy_frame, data_import.id, args.repeat)
+            pd.testing.assert_frame_equal(orm_df, numpy_df, check_dtype=False)
+            print(f"{rows:>10} {orm_seconds:>10.3f} {numpy_seconds:>10.3f} {orm_seconds / numpy_seconds:>7.1f}x")
+        finally:
+            data_import.delete()
+
+
+if __name__ == '__main__':
+    main()
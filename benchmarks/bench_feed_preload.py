@@ -0,0 +1,89 @@
+# benchmarks/bench_feed_preload.py
+"""
+Benchmark data feed preload: bt.feeds.PandasData versus backtesting.feeds.NumpyData.
+
+Preload is what Cerebro does before the first bar when preload=True (the
+default): every bar of every feed is copied into backtrader's line buffers.
+PandasData does this row by row with iloc lookups and a datetime conversion per
+bar; NumpyData converts the dates once, vectorized, and copies each line in bulk.
+With --mmap the NumpyData arrays are read from memory-mapped .npy files.
+
+Usage:
+    python -m benchmarks.bench_feed_preload --bars 500000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import backtrader as bt
+import numpy as np
+import pandas as pd
+
+from backtesting.feeds import NumpyData, frame_to_arrays
+
+
+def make_frame(bars, seed=42):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.002, bars)))
+    return pd.DataFrame({
+        'Date': pd.date_range('2020-01-01', periods=bars, freq='5min'),
+        'Open': close,
+        'High': close * 1.001,
+        'Low': close * 0.999,
+        'Close': close,
+        'Volume': 1.0,
+    })
+
+
+def time_preload(make_feed, repeat):
+    """Start and preload a feed the way Cerebro.runstrategies does."""
+    timings = []
+    for _ in range(repeat):
+        feed = make_feed()
+        bt.Cerebro().adddata(feed)  # attaches the environment the feed reads on start
+        start = time.perf_counter()
+        feed._start()
+        feed.preload()
+        timings.append(time.perf_counter() - start)
+        bars = feed.buflen()
+    return min(timings), bars
+
+
+def memmap_arrays(arrays, directory):
+    mapped = {}
+    for name, column in arrays.items():
+        path = os.path.join(directory, f'{name}.npy')
+        np.save(path, column)
+        mapped[name] = np.load(path, mmap_mode='r')
+    return mapped
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--bars', type=int, default=500_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--mmap', action='store_true', help='Also time NumpyData over memory-mapped arrays')
+    args = parser.parse_args()
+
+    df = make_frame(args.bars)
+    results = {}
+    results['PandasData'] = time_preload(
+        lambda: bt.feeds.PandasData(dataname=df, datetime='Date', openinterest=-1), args.repeat
+    )
+    results['NumpyData'] = time_preload(lambda: NumpyData(dataname=frame_to_arrays(df)), args.repeat)
+
+    if args.mmap:
+        with tempfile.TemporaryDirectory() as directory:
+            mapped = memmap_arrays(frame_to_arrays(df), directory)
+            results['NumpyData (mmap)'] = time_preload(lambda: NumpyData(dataname=mapped), args.repeat)
+
+    baseline = results['PandasData'][0]
+    print(f"{'feed':<18} {'bars':>8} {'preload (s)':>12} {'speedup':>8}")
+    for name, (seconds, bars) in results.items():
+        print(f"{name:<18} {bars:>8} {seconds:>12.3f} {baseline / seconds:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+# benchmarks/bench_mixed_workload.py
+"""
+Load test of the worker layout under a mixed import + backtest workload.
+
+Imports are modelled like fetch_and_save_ocl_data: a number of Binance pages, each
+spending most of its time waiting (request latency plus the 0.5s rate-limit sleep).
+Backtests are real Cerebro runs on synthetic candles, like run_backtest without the plot.
+All imports are submitted first, the worst case for a shared queue.
+
+"shared" is the old layout: one prefork pool sized to cores takes both kinds of task.
+"split" is the routed layout: imports go to a thread pool, backtests to the prefork pool.
+
+Usage:
+    python -m benchmarks.bench_mixed_workload --imports 8 --pages 6 --backtests 16 --bars 20000
+"""
+
+import argparse
+import multiprocessing
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'arbitrex.settings')
+django.setup()
+
+import numpy as np
+
+from backtesting.tasks import run_cerebro_with_data_and_strategy, summarize_run
+from benchmarks.bench_batch import STRATEGY_CODE, make_imports, noop_log
+from data.loaders import ocl_arrays_to_frame
+from strategies.utils import load_strategies_and_inject_log
+
+_candles = {}
+
+
+def import_task(args):
+    """Fetch pages of an import; returns the completion time."""
+    pages, page_seconds = args
+    for _ in range(pages):
+        time.sleep(page_seconds)
+    return time.perf_counter()
+
+
+def backtest_task(index):
+    """One backtest on the candles inherited through fork; returns the completion time."""
+    UserStrategy = load_strategies_and_inject_log(STRATEGY_CODE, noop_log)
+    df = ocl_arrays_to_frame(_candles[index % len(_candles)])
+    cerebro, results, initial_cash = run_cerebro_with_data_and_strategy([df], UserStrategy, commission=0.1)
+    summarize_run(cerebro, results, initial_cash)
+    return time.perf_counter()
+
+
+def run_shared(args, processes):
+    with multiprocessing.get_context('fork').Pool(processes) as pool:
+        started = time.perf_counter()
+        imports = [pool.apply_async(import_task, ((args.pages, args.page_seconds),)) for _ in range(args.imports)]
+        backtests = [pool.apply_async(backtest_task, (i,)) for i in range(args.backtests)]
+        return started, [r.get() for r in imports], [r.get() for r in backtests]
+
+
+def run_split(args, processes):
+    with multiprocessing.get_context('fork').Pool(processes) as pool, ThreadPoolExecutor(args.io_threads) as threads:
+        started = time.perf_counter()
+        imports = [threads.submit(import_task, (args.pages, args.page_seconds)) for _ in range(args.imports)]
+        backtests = [pool.apply_async(backtest_task, (i,)) for i in range(args.backtests)]
+        return started, [f.result() for f in imports], [r.get() for r in backtests]
+
+
+def report(name, started, imports, backtests):
+    imports = np.array(imports) - started
+    backtests = np.array(backtests) - started
+    makespan = max(imports.max(), backtests.max())
+    print(
+        f"{name:<8} makespan {makespan:>7.2f}s  "
+        f"imports done {imports.max():>7.2f}s  "
+        f"backtests mean {backtests.mean():>7.2f}s p95 {np.percentile(backtests, 95):>7.2f}s  "
+        f"{len(backtests) / backtests.max():>6.2f} backtests/s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--imports', type=int, default=8)
+    parser.add_argument('--pages', type=int, default=6)
+    parser.add_argument('--page-seconds', type=float, default=0.6)
+    parser.add_argument('--backtests', type=int, default=16)
+    parser.add_argument('--bars', type=int, default=20_000)
+    parser.add_argument('--processes', type=int, default=os.cpu_count())
+    parser.add_argument('--io-threads', type=int, default=32)
+    args = parser.parse_args()
+
+    _candles.update(make_imports(4, args.bars))
+
+    print(
+        f"{args.imports} imports x {args.pages} pages, {args.backtests} backtests x {args.bars} bars, "
+        f"{args.processes} processes, {args.io_threads} I/O threads"
+    )
+    report('shared', *run_shared(args, args.processes))
+    report('split', *run_split(args, args.processes))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+# benchmarks/bench_monte_carlo.py
+"""
+Benchmark the Monte Carlo trade analysis: resampled/reshuffled trade sequences are
+simulated as (batch x trades) matrices across a process pool.
+
+Usage:
+    python -m benchmarks.bench_monte_carlo --simulations 10000 --trades 1000 --processes 4
+"""
+
+import argparse
+import os
+import time
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'arbitrex.settings')
+django.setup()
+
+import numpy as np
+
+from backtesting.optimization import monte_carlo
+
+
+def make_trade_data(count, seed=7):
+    rng = np.random.default_rng(seed)
+    trades, value = [], 10_000.0
+    for r in rng.normal(0.002, 0.02, count):
+        pnl = value * r
+        value += pnl
+        trades.append({'pnl': pnl, 'portfolio_value': value})
+    return trades
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--simulations', type=int, default=10_000)
+    parser.add_argument('--trades', type=int, default=1000)
+    parser.add_argument('--processes', type=int, default=None)
+    args = parser.parse_args()
+
+    trades = make_trade_data(args.trades)
+    for method in ('bootstrap', 'shuffle'):
+        started = time.perf_counter()
+        results = monte_carlo(trades, {'simulations': args.simulations, 'method': method, 'seed': 1},
+                              processes=args.processes)
+        elapsed = time.perf_counter() - started
+        median = results['quantiles'][3]
+        print(
+            f"{method:<10} {args.simulations} x {args.trades} trades on {results['processes']} processes: "
+            f"{elapsed:.2f}s (median return {median['return']:.1f}%, median drawdown {median['max_drawdown']:.1f}%)"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,261 @@
+# benchmarks/fake_binance.py
+"""
+Local stand-in for the Binance klines API, for offline imports, benchmarks and load tests.
+
+Serves GET /api/v3/klines with Binance's semantics: candles with open time from
+startTime to endTime (or the latest ones when startTime is missing), `limit`
+defaulting to 500 and capped at 1000, rows in Binance's 12-field format, and 400
+errors with Binance error codes for unknown symbols and intervals. Every response
+carries the X-MBX-USED-WEIGHT-1M header. Once a minute's request weight passes
+--weight-limit, the server answers 429 with Retry-After until the next minute.
+--throttle-rate also injects 429s at random, and --latency-ms / --jitter-ms delay
+every response.
+
+Candles come from benchmarks.synthetic, generated in fixed blocks from 2017-01-01
+per symbol and interval. The same --seed always serves the same candles, whenever
+the server was started; only candles opened before the current time are returned.
+
+Usage:
+    python -m benchmarks.fake_binance --port 8900 --latency-ms 80 --jitter-ms 40
+    BINANCE_BASE_URL=http://localhost:8900 BINANCE_PAGE_DELAY=0 python manage.py runserver
+"""
+
+import argparse
+import contextlib
+import json
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from benchmarks.synthetic import INTERVAL_MINUTES, generate_ohlcv
+
+GENESIS = np.datetime64('2017-01-01T00:00', 'ms')
+GENESIS_MS = int(GENESIS.astype(np.int64))
+BLOCK_BARS = 100_000
+QUOTE_ASSET = 'USDT'
+START_PRICES = {'BTC': 1_000.0, 'ETH': 8.0, 'SOL': 1.0}
+
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 1000
+WEIGHT_LIMIT = 1200
+
+
+def klines_weight(limit):
+    """Request weight of a klines call, which grows with the page size."""
+    if limit < 100:
+        return 1
+    if limit < 500:
+        return 2
+    if limit <= 1000:
+        return 5
+    return 10
+
+
+class KlineStore:
+    """Deterministic synthetic candles per (symbol, interval), generated block by block on demand."""
+
+    def __init__(self, seed=0):
+        self.seed = seed
+        self._blocks = {}
+        self._lock = threading.Lock()
+
+    def _block(self, symbol, interval, index):
+        with self._lock:
+            blocks = self._blocks.setdefault((symbol, interval), [])
+            while len(blocks) <= index:
+                number = len(blocks)
+                minutes = INTERVAL_MINUTES[interval]
+                arrays = generate_ohlcv(
+                    BLOCK_BARS, interval,
+                    seed=zlib.crc32(f'{self.seed}:{symbol}:{interval}:{number}'.encode()),
+                    start=GENESIS + np.timedelta64(number * BLOCK_BARS * minutes, 'm'),
+                    # Each block continues from the previous block's last close
+                    start_price=blocks[-1]['close'][-1] if blocks else START_PRICES.get(symbol[:-len(QUOTE_ASSET)], 100.0),
+                )
+                arrays['open_ms'] = arrays.pop('date').astype('datetime64[ms]').astype(np.int64)
+                blocks.append(arrays)
+            return blocks[index]
+
+    def klines(self, symbol, interval, start_ms=None, end_ms=None, limit=DEFAULT_LIMIT, now_ms=None):
+        """Binance kline rows opened within [start_ms, end_ms] and before now_ms, at most limit of them."""
+        step_ms = INTERVAL_MINUTES[interval] * 60_000
+        now_ms = int(time.time() * 1000) if now_ms is None else now_ms
+        end_ms = now_ms if end_ms is None else min(end_ms, now_ms)
+        if end_ms < GENESIS_MS:
+            return []
+        last = (end_ms - GENESIS_MS) // step_ms
+        if start_ms is None:
+            first = max(0, last - limit + 1)
+        else:
+            first = max(0, -(-(start_ms - GENESIS_MS) // step_ms))
+        count = min(limit, last - first + 1)
+
+        rows = []
+        index = first
+        while index < first + count:
+            block = self._block(symbol, interval, index // BLOCK_BARS)
+            offset = index % BLOCK_BARS
+            stop = min(BLOCK_BARS, offset + first + count - index)
+            rows.extend(_kline_rows(block, offset, stop, step_ms))
+            index += stop - offset
+        return rows
+
+
+def _kline_rows(block, start, stop, step_ms):
+    rows = []
+    for i in range(start, stop):
+        open_ms = int(block['open_ms'][i])
+        close, volume = block['close'][i], block['volume'][i]
+        rows.append([
+            open_ms,
+            f"{block['open'][i]:.8f}", f"{block['high'][i]:.8f}", f"{block['low'][i]:.8f}", f"{close:.8f}",
+            f"{volume:.8f}",
+            open_ms + step_ms - 1,
+            f"{volume * close:.8f}",
+            int(volume) + 1,
+            f"{volume / 2:.8f}", f"{volume * close / 2:.8f}",
+            "0",
+        ])
+    return rows
+
+
+class FakeBinanceServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address=('127.0.0.1', 0), latency_ms=0, jitter_ms=0, weight_limit=WEIGHT_LIMIT,
+                 throttle_rate=0.0, seed=0, verbose=False):
+        super().__init__(address, KlinesHandler)
+        self.store = KlineStore(seed)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.weight_limit = weight_limit
+        self.throttle_rate = throttle_rate
+        self.verbose = verbose
+        self.requests = 0
+        self._random = random.Random(seed)
+        self._weight_lock = threading.Lock()
+        self._minute = None
+        self._used_weight = 0
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def take_weight(self, weight):
+        """Charge a request's weight to the current minute; returns (allowed, used weight, retry after seconds)."""
+        now = time.time()
+        with self._weight_lock:
+            self.requests += 1
+            minute = int(now // 60)
+            if minute != self._minute:
+                self._minute, self._used_weight = minute, 0
+            retry_after = 60 - int(now % 60)
+            if self._random.random() < self.throttle_rate:
+                return False, self._used_weight, 1
+            if self._used_weight + weight > self.weight_limit:
+                return False, self._used_weight, retry_after
+            self._used_weight += weight
+            return True, self._used_weight, 0
+
+    def delay(self):
+        seconds = (self.latency_ms + self._random.uniform(0, self.jitter_ms)) / 1000
+        if seconds > 0:
+            time.sleep(seconds)
+
+
+class KlinesHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == '/api/v3/ping':
+            return self._json(200, {})
+        if url.path == '/api/v3/time':
+            return self._json(200, {'serverTime': int(time.time() * 1000)})
+        if url.path != '/api/v3/klines':
+            return self._json(404, {'code': -1000, 'msg': 'Unknown endpoint.'})
+
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        symbol = query.get('symbol', '')
+        interval = query.get('interval', '')
+        if not symbol.endswith(QUOTE_ASSET) or len(symbol) <= len(QUOTE_ASSET):
+            return self._json(400, {'code': -1121, 'msg': 'Invalid symbol.'})
+        if interval not in INTERVAL_MINUTES:
+            return self._json(400, {'code': -1120, 'msg': 'Invalid interval.'})
+        try:
+            limit = min(int(query.get('limit', DEFAULT_LIMIT)), MAX_LIMIT)
+            start_ms = int(query['startTime']) if 'startTime' in query else None
+            end_ms = int(query['endTime']) if 'endTime' in query else None
+        except ValueError:
+            return self._json(400, {'code': -1100, 'msg': 'Illegal characters found in a parameter.'})
+
+        self.server.delay()
+        allowed, used, retry_after = self.server.take_weight(klines_weight(limit))
+        headers = {'X-MBX-USED-WEIGHT-1M': str(used)}
+        if not allowed:
+            headers['Retry-After'] = str(retry_after)
+            return self._json(429, {'code': -1003, 'msg': 'Too many requests; current limit is exceeded.'}, headers)
+        rows = self.server.store.klines(symbol, interval, start_ms, end_ms, limit)
+        return self._json(200, rows, headers)
+
+    def _json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json;charset=UTF-8')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+@contextlib.contextmanager
+def serve_in_thread(**kwargs):
+    """Run a FakeBinanceServer on a free local port for the duration of the block."""
+    server = FakeBinanceServer(**kwargs)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8900)
+    parser.add_argument('--latency-ms', type=float, default=0)
+    parser.add_argument('--jitter-ms', type=float, default=0)
+    parser.add_argument('--weight-limit', type=int, default=WEIGHT_LIMIT, help='Request weight allowed per minute')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='Share of requests answered 429 at random')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--verbose', action='store_true', help='Log every request')
+    args = parser.parse_args()
+
+    server = FakeBinanceServer(
+        (args.host, args.port), latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+        weight_limit=args.weight_limit, throttle_rate=args.throttle_rate, seed=args.seed, verbose=args.verbose
+    )
+    print(f"Serving synthetic klines on {server.url} (set BINANCE_BASE_URL to this)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
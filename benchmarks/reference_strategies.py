@@ -0,0 +1,137 @@
+# benchmarks/reference_strategies.py
+"""
+Reference strategies for benchmarks, written the way users write them: source code
+loaded with load_strategies_and_inject_log. Each defines one of the custom indicators
+from the backtrader docs we ship to the strategy assistant (strategies/backtrader_docks.py)
+and trades on it, so they cover both Python-level indicator code (ASH, Streak) and
+line-arithmetic indicators composed from built-ins.
+"""
+
+ASH = """
+class ASH(bt.Indicator):
+    alias = ('AbsoluteStrengthOscilator',)
+    lines = ('ash', 'bulls', 'bears',)
+    params = dict(period=9, smoothing=2, rsifactor=0.5, movav=bt.ind.WMA)
+
+    def __init__(self):
+        p0p1 = self.data - self.data(-1)
+        half_abs_p0p1 = self.p.rsifactor * abs(p0p1)
+        bulls = half_abs_p0p1 + p0p1
+        bears = half_abs_p0p1 - p0p1
+
+        avbulls = self.p.movav(bulls, period=self.p.period)
+        avbears = self.p.movav(bears, period=self.p.period)
+        self.l.bulls = smoothbulls = self.p.movav(avbulls, period=self.p.smoothing)
+        self.l.bears = smoothbears = self.p.movav(avbears, period=self.p.smoothing)
+        self.l.ash = smoothbulls - smoothbears
+
+
+class AshCross(bt.Strategy):
+    def __init__(self):
+        self.cross = bt.ind.CrossOver(ASH(self.data).ash, 0.0)
+
+    def next(self):
+        if not self.position and self.cross > 0:
+            self.buy()
+        elif self.position and self.cross < 0:
+            self.close()
+"""
+
+CONNORS_RSI = """
+class Streak(bt.ind.PeriodN):
+    lines = ('streak',)
+    params = dict(period=2)
+
+    curstreak = 0
+
+    def next(self):
+        d0, d1 = self.data[0], self.data[-1]
+        if d0 > d1:
+            self.l.streak[0] = self.curstreak = max(1, self.curstreak + 1)
+        elif d0 < d1:
+            self.l.streak[0] = self.curstreak = min(-1, self.curstreak - 1)
+        else:
+            self.l.streak[0] = self.curstreak = 0
+
+
+class ConnorsRSI(bt.Indicator):
+    lines = ('crsi',)
+    params = dict(prsi=3, pstreak=2, prank=100)
+
+    def __init__(self):
+        rsi = bt.ind.RSI(self.data, period=self.p.prsi, safediv=True)
+        rsi_streak = bt.ind.RSI(Streak(self.data), period=self.p.pstreak, safediv=True)
+        # PercentRank is a 0-1 fraction; scale it to the RSI range
+        prank = bt.ind.PercentRank(self.data, period=self.p.prank) * 100.0
+        self.l.crsi = (rsi + rsi_streak + prank) / 3.0
+
+
+class ConnorsReversion(bt.Strategy):
+    params = (('low', 10), ('high', 90))
+
+    def __init__(self):
+        self.crsi = ConnorsRSI(self.data)
+
+    def next(self):
+        if not self.position and self.crsi < self.p.low:
+            self.buy()
+        elif self.position and self.crsi > self.p.high:
+            self.close()
+"""
+
+DONCHIAN = """
+class DonchianChannels(bt.Indicator):
+    alias = ('DCH', 'DonchianChannel',)
+    lines = ('dcm', 'dch', 'dcl',)
+    params = dict(period=20, lookback=-1)
+
+    def __init__(self):
+        hi, lo = self.data.high, self.data.low
+        if self.p.lookback:
+            hi, lo = hi(self.p.lookback), lo(self.p.lookback)
+        self.l.dch = bt.ind.Highest(hi, period=self.p.period)
+        self.l.dcl = bt.ind.Lowest(lo, period=self.p.period)
+        self.l.dcm = (self.l.dch + self.l.dcl) / 2.0
+
+
+class DonchianBreakout(bt.Strategy):
+    def __init__(self):
+        self.channel = DonchianChannels(self.data)
+
+    def next(self):
+        if not self.position and self.data.close[0] > self.channel.dch[0]:
+            self.buy()
+        elif self.position and self.data.close[0] < self.channel.dcl[0]:
+            self.close()
+"""
+
+STOCH_RSI = """
+class StochRSI(bt.Indicator):
+    lines = ('stochrsi',)
+    params = dict(period=14, pperiod=None)
+
+    def __init__(self):
+        rsi = bt.ind.RSI(self.data, period=self.p.period, safediv=True)
+        pperiod = self.p.pperiod or self.p.period
+        maxrsi = bt.ind.Highest(rsi, period=pperiod)
+        minrsi = bt.ind.Lowest(rsi, period=pperiod)
+        self.l.stochrsi = bt.DivByZero(rsi - minrsi, maxrsi - minrsi, zero=0.5)
+
+
+class StochRsiSwing(bt.Strategy):
+    def __init__(self):
+        self.stochrsi = StochRSI(self.data)
+
+    def next(self):
+        if not self.position and self.stochrsi < 0.2:
+            self.buy()
+        elif self.position and self.stochrsi > 0.8:
+            self.close()
+"""
+
+REFERENCE_STRATEGIES = {
+    'ash': ASH,
+    'connors_rsi': CONNORS_RSI,
+    'donchian': DONCHIAN,
+    'stoch_rsi': STOCH_RSI,
+}
@@ -0,0 +1,303 @@
+# benchmarks/suite.py
+"""
+Repeatable benchmark suite on seeded synthetic candles, compared against a baseline.
+
+Benchmarks, each timed as the best of --repeat runs:
+    ingestion         fetch_and_save_ocl_data storing --ingest-bars candles; the Binance
+                      fetch returns synthetic candles, so only parsing and inserts are timed
+    import_pipeline   the same import end to end over HTTP against the local fake exchange
+                      (benchmarks/fake_binance.py), with --exchange-latency-ms per page
+    candle_loading    load_ocl_arrays of a --bars candle import
+    cerebro.<name>    run_cerebro_with_data_and_strategy with each reference strategy
+                      (benchmarks/reference_strategies.py) on --bars candles
+    extraction        result extraction of the first reference run (analyzers, metrics,
+                      records and the stored candles)
+    chart_data        the backtest_chart_data endpoint for that backtest
+
+Results are written as JSON. Given a baseline file from an earlier run with the same
+--bars, --ingest-bars, --seed and --exchange-latency-ms, benchmarks slower than the baseline by more than
+--tolerance are flagged and the exit status is 1. Rows created in the configured
+database are deleted at the end.
+
+Usage:
+    python -m benchmarks.suite --bars 50000 --output results.json
+    python -m benchmarks.suite --bars 50000 --update-baseline benchmarks/baseline.json
+    python -m benchmarks.suite --bars 50000 --baseline benchmarks/baseline.json --only cerebro
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+import time
+from unittest.mock import patch
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'arbitrex.settings')
+django.setup()
+
+from django.test import RequestFactory, override_settings
+
+from accounts.models import CustomUser
+from backtesting.models import BacktestResult
+from backtesting.tasks import _extract_results, ocl_data_records, run_cerebro_with_data_and_strategy
+from backtesting.views import backtest_chart_data
+from benchmarks.fake_binance import serve_in_thread
+from benchmarks.reference_strategies import REFERENCE_STRATEGIES
+from benchmarks.synthetic import generate_ohlcv
+from data.loaders import load_ocl_arrays, ocl_arrays_to_frame
+from data.models import OCLDataImport, OCLPrice
+from data.views import fetch_and_save_ocl_data
+from strategies.models import Strategy
+from strategies.utils import load_strategies_and_inject_log
+
+SUITE_EMAIL = 'benchmark-suite@example.com'
+# Imports are unique per asset, interval and date range; no real import starts this early
+SUITE_START = '2001-01-01'
+# Start of the import fetched from the fake exchange, whose candles begin in 2017; no SOL
+# market existed then, so a real import can't hold this range
+PIPELINE_ASSET, PIPELINE_START = 'SOL', datetime.date(2017, 1, 1)
+INSERT_BATCH = 10_000
+
+
+def noop_log(strategy, txt, dt=None):
+    pass
+
+
+def timed(func, repeat, setup=None):
+    """Best and mean seconds of func over repeat runs; setup() runs untimed before each."""
+    seconds = []
+    result = None
+    for _ in range(repeat):
+        args = setup() if setup else ()
+        start = time.perf_counter()
+        result = func(*args)
+        seconds.append(time.perf_counter() - start)
+    return {'seconds': min(seconds), 'mean_seconds': sum(seconds) / len(seconds), 'repeat': repeat}, result
+
+
+def create_import(arrays, interval='5m', name='benchmark suite'):
+    """An OCLDataImport holding the arrays, written with bulk inserts."""
+    dates = arrays['date'].astype(datetime.datetime)
+    data_import = OCLDataImport.objects.create(
+        name=name, asset='BTC', interval=interval, status='completed',
+        start_date=dates[0].date(), end_date=dates[-1].date()
+    )
+    for offset in range(0, len(dates), INSERT_BATCH):
+        OCLPrice.objects.bulk_create([
+            OCLPrice(
+                data_import=data_import, date=dates[i].replace(tzinfo=datetime.timezone.utc),
+                open=arrays['open'][i], high=arrays['high'][i], low=arrays['low'][i],
+                close=arrays['close'][i], volume=arrays['volume'][i]
+            )
+            for i in range(offset, min(offset + INSERT_BATCH, len(dates)))
+        ])
+    return data_import
+
+
+def bench_ingestion(arrays, repeat):
+    frame = ocl_arrays_to_frame(arrays)
+    dates = arrays['date'].astype(datetime.datetime)
+    imports = []
+
+    def setup():
+        # Each run ingests into a fresh import; the previous one is dropped untimed
+        for data_import in imports:
+            data_import.delete()
+        imports.clear()
+        data_import = OCLDataImport.objects.create(
+            name='benchmark suite ingestion', asset='BTC', interval='5m',
+            start_date=dates[0].date(), end_date=dates[-1].date()
+        )
+        imports.append(data_import)
+        return (data_import.id,)
+
+    try:
+        with patch('data.views.iter_historical_data', return_value=[frame]):
+            return timed(fetch_and_save_ocl_data, repeat, setup)[0]
+    finally:
+        for data_import in imports:
+            data_import.delete()
+
+
+def bench_import_pipeline(ingest_bars, repeat, latency_ms):
+    """fetch_and_save_ocl_data paging whole days of 5m candles from the fake exchange; returns (timing, candles)."""
+    end_date = PIPELINE_START + datetime.timedelta(days=max(1, -(-ingest_bars // 288)) - 1)
+    imports = []
+
+    def setup():
+        for data_import in imports:
+            data_import.delete()
+        imports.clear()
+        imports.append(OCLDataImport.objects.create(
+            name='benchmark suite pipeline', asset=PIPELINE_ASSET, interval='5m',
+            start_date=PIPELINE_START, end_date=end_date
+        ))
+        return (imports[0].id,)
+
+    try:
+        with serve_in_thread(latency_ms=latency_ms) as server, \
+                override_settings(BINANCE_BASE_URL=server.url, BINANCE_PAGE_DELAY=0):
+            timing = timed(fetch_and_save_ocl_data, repeat, setup)[0]
+        data_import = imports[0]
+        data_import.refresh_from_db()
+        assert data_import.status == 'completed', data_import.status
+        return timing, OCLPrice.objects.filter(data_import=data_import).count()
+    finally:
+        for data_import in imports:
+            data_import.delete()
+
+
+def run_suite(bars, ingest_bars, seed, repeat, only=None, exchange_latency_ms=0):
+    """Run the selected benchmarks; returns {name: timing} in suite order."""
+    def selected(name):
+        return not only or any(name.startswith(prefix) for prefix in only)
+
+    results = {}
+
+    def record(name, timing, bar_count):
+        timing['bars'] = bar_count
+        timing['bars_per_second'] = round(bar_count / timing['seconds'], 1) if timing['seconds'] else None
+        results[name] = timing
+        print(f"{name:<24} {timing['seconds']:>9.3f}s {timing['bars_per_second'] or 0:>14,.0f} bars/s", flush=True)
+
+    if selected('ingestion'):
+        record('ingestion', bench_ingestion(generate_ohlcv(ingest_bars, seed=seed + 1, start=SUITE_START), repeat), ingest_bars)
+    if selected('import_pipeline'):
+        record('import_pipeline', *bench_import_pipeline(ingest_bars, repeat, exchange_latency_ms))
+
+    arrays = generate_ohlcv(bars, seed=seed, start=SUITE_START)
+    frame = ocl_arrays_to_frame(arrays)
+    data_import = create_import(arrays) if selected('candle_loading') or selected('chart_data') else None
+    user = None
+    try:
+        if selected('candle_loading'):
+            timing, _ = timed(load_ocl_arrays, repeat, lambda: (data_import.id,))
+            record('candle_loading', timing, bars)
+
+        first_run = None
+        for name, code in REFERENCE_STRATEGIES.items():
+            if not (selected(f'cerebro.{name}') or (first_run is None and (selected('extraction') or selected('chart_data')))):
+                continue
+            UserStrategy = load_strategies_and_inject_log(code, noop_log)
+            timing, run = timed(
+                lambda: run_cerebro_with_data_and_strategy([frame], UserStrategy, commission=0.1), repeat
+            )
+            if selected(f'cerebro.{name}'):
+                record(f'cerebro.{name}', timing, bars)
+            if first_run is None:
+                first_run = (name, code, run)
+
+        if first_run is None:
+            return results
+        name, code, (cerebro, strategy_results, _) = first_run
+        user = CustomUser.objects.filter(email=SUITE_EMAIL).first() or CustomUser.objects.create_user(
+            email=SUITE_EMAIL, password=None
+        )
+        backtest = BacktestResult(
+            user=user, strategy=Strategy(user=user, name=name, code=code),
+            parameters={}, commission=0.1, ocl_data_import=data_import
+        )
+
+        def extract():
+            backtest.ocl_data = ocl_data_records(frame)
+            _extract_results(backtest, strategy_results, [], cerebro.broker.getvalue(), None, [name])
+
+        if selected('extraction'):
+            record('extraction', timed(extract, repeat)[0], bars)
+
+        if selected('chart_data'):
+            extract()
+            backtest.strategy.save()
+            backtest.save()
+            request = RequestFactory().get(f'/backtesting/chart-data/{backtest.id}/')
+            request.user = user
+            record('chart_data', timed(backtest_chart_data, repeat, lambda: (request, backtest.id))[0], bars)
+    finally:
+        if user is not None:
+            user.delete()
+        if data_import is not None:
+            data_import.delete()
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """
+    Rows of (name, seconds, baseline seconds, ratio, verdict) for every benchmark,
+    where verdict is 'regression', 'faster', 'ok' or 'new'.
+    """
+    rows = []
+    for name, timing in results.items():
+        base = baseline.get('results', {}).get(name)
+        if not base:
+            rows.append((name, timing['seconds'], None, None, 'new'))
+            continue
+        ratio = timing['seconds'] / base['seconds']
+        if ratio > 1 + tolerance:
+            verdict = 'regression'
+        elif ratio < 1 - tolerance:
+            verdict = 'faster'
+        else:
+            verdict = 'ok'
+        rows.append((name, timing['seconds'], base['seconds'], ratio, verdict))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--bars', type=int, default=50_000)
+    parser.add_argument('--ingest-bars', type=int, default=5_000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--exchange-latency-ms', type=float, default=0, help='Fake exchange latency per page')
+    parser.add_argument('--only', default='', help='Comma separated benchmark name prefixes')
+    parser.add_argument('--output', help='Write the results JSON here')
+    parser.add_argument('--baseline', help='Compare against this results JSON')
+    parser.add_argument('--update-baseline', metavar='PATH', help='Write the results JSON as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed slowdown before flagging, as a fraction')
+    args = parser.parse_args()
+
+    meta = {
+        'bars': args.bars, 'ingest_bars': args.ingest_bars, 'seed': args.seed, 'repeat': args.repeat,
+        'exchange_latency_ms': args.exchange_latency_ms,
+        'python': platform.python_version(), 'machine': platform.machine(), 'cpus': os.cpu_count(),
+        'created_at': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+    }
+    from django.db import connection
+    meta['database'] = connection.vendor
+    only = [prefix for prefix in args.only.split(',') if prefix]
+    report = {'meta': meta, 'results': run_suite(
+        args.bars, args.ingest_bars, args.seed, args.repeat, only, args.exchange_latency_ms
+    )}
+
+    for path in (args.output, args.update_baseline):
+        if path:
+            with open(path, 'w') as f:
+                json.dump(report, f, indent=2)
+                f.write('\n')
+
+    if not args.baseline:
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    mismatched = [
+        key for key in ('bars', 'ingest_bars', 'seed', 'exchange_latency_ms') if baseline['meta'].get(key, 0) != meta[key]
+    ]
+    if mismatched:
+        sys.exit(f"Baseline was recorded with different {', '.join(mismatched)}; rerun with the same settings")
+
+    rows = compare(report['results'], baseline, args.tolerance)
+    print(f"\n{'benchmark':<24} {'now (s)':>9} {'base (s)':>9} {'ratio':>7}")
+    for name, seconds, base, ratio, verdict in rows:
+        base_text = f'{base:>9.3f}' if base is not None else f"{'-':>9}"
+        ratio_text = f'{ratio:>6.2f}x' if ratio is not None else f"{'-':>7}"
+        print(f"{name:<24} {seconds:>9.3f} {base_text} {ratio_text} {verdict}")
+    if any(verdict == 'regression' for *_, verdict in rows):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
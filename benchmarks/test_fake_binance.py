@@ -0,0 +1,62 @@
+import datetime
+
+import numpy as np
+import requests
+from django.test import SimpleTestCase
+
+from benchmarks.fake_binance import BLOCK_BARS, GENESIS_MS, KlineStore, serve_in_thread
+from data.utils import get_historical_data
+
+
+class TestKlineStore(SimpleTestCase):
+
+    def test_paging_semantics(self):
+        store = KlineStore(seed=1)
+        hour = 3_600_000
+        start = GENESIS_MS + 10 * hour + 1
+        rows = store.klines('BTCUSDT', '1h', start_ms=start, end_ms=start + 2000 * hour, limit=1000)
+        self.assertEqual(len(rows), 1000)
+        self.assertEqual(rows[0][0], GENESIS_MS + 11 * hour)
+        self.assertTrue((np.diff([row[0] for row in rows]) == hour).all())
+        self.assertEqual(rows[0][6], rows[0][0] + hour - 1)
+
+        latest = store.klines('BTCUSDT', '1h', end_ms=GENESIS_MS + 99 * hour, limit=5)
+        self.assertEqual([row[0] for row in latest], [GENESIS_MS + h * hour for h in range(95, 100)])
+        self.assertEqual(store.klines('BTCUSDT', '1h', start_ms=GENESIS_MS, now_ms=GENESIS_MS - 1), [])
+
+    def test_candles_are_deterministic_and_continuous_across_blocks(self):
+        step = 5 * 60_000
+        boundary = GENESIS_MS + BLOCK_BARS * step
+        rows = KlineStore(seed=2).klines('ETHUSDT', '5m', start_ms=boundary - 3 * step, end_ms=boundary + 2 * step)
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[3][1], rows[2][4])  # first open of the new block is the last close
+        again = KlineStore(seed=2).klines('ETHUSDT', '5m', start_ms=boundary - 3 * step, end_ms=boundary + 2 * step)
+        self.assertEqual(rows, again)
+
+
+class TestFakeBinanceServer(SimpleTestCase):
+
+    def test_import_pages_through_the_fake_exchange(self):
+        with serve_in_thread() as server, self.settings(BINANCE_BASE_URL=server.url, BINANCE_PAGE_DELAY=0):
+            df = get_historical_data('1h', 'BTC', datetime.date(2020, 1, 1), datetime.date(2020, 3, 1))
+            self.assertEqual(server.requests, 3)  # two full pages, then an empty one
+
+        self.assertEqual(len(df), 61 * 24)
+        self.assertEqual(df['Date'].iloc[0], datetime.datetime(2020, 1, 1))
+        self.assertTrue((df['Date'].diff().iloc[1:] == datetime.timedelta(hours=1)).all())
+        self.assertTrue((df['High'] >= df[['Open', 'Close']].max(axis=1)).all())
+
+    def test_weight_limit_and_errors(self):
+        with serve_in_thread(weight_limit=5) as server:
+            url = f'{server.url}/api/v3/klines'
+            first = requests.get(url, params={'symbol': 'BTCUSDT', 'interval': '1h', 'limit': 1000})
+            second = requests.get(url, params={'symbol': 'BTCUSDT', 'interval': '1h', 'limit': 1000})
+            invalid = requests.get(url, params={'symbol': 'BTC', 'interval': '1h'})
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(len(first.json()), 1000)
+        self.assertEqual(first.headers['X-MBX-USED-WEIGHT-1M'], '5')
+        self.assertEqual(second.status_code, 429)
+        self.assertGreater(int(second.headers['Retry-After']), 0)
+        self.assertEqual(invalid.status_code, 400)
+        self.assertEqual(invalid.json()['code'], -1121)
@@ -0,0 +1,50 @@
+import unittest
+
+import numpy as np
+
+from benchmarks.synthetic import DEFAULT_REGIMES, generate_ohlcv, regime_path
+from benchmarks.suite import compare
+
+
+class TestSyntheticCandles(unittest.TestCase):
+
+    def test_same_seed_same_candles(self):
+        first, second = generate_ohlcv(1000, seed=5), generate_ohlcv(1000, seed=5)
+        for name in first:
+            np.testing.assert_array_equal(first[name], second[name])
+        self.assertFalse(np.array_equal(first['close'], generate_ohlcv(1000, seed=6)['close']))
+
+    def test_candles_are_consistent(self):
+        arrays = generate_ohlcv(5000, interval='1h', start='2021-03-01')
+        self.assertEqual(arrays['date'][0], np.datetime64('2021-03-01T00:00', 'us'))
+        self.assertTrue((np.diff(arrays['date']) == np.timedelta64(1, 'h')).all())
+        self.assertTrue((arrays['high'] >= np.maximum(arrays['open'], arrays['close'])).all())
+        self.assertTrue((arrays['low'] <= np.minimum(arrays['open'], arrays['close'])).all())
+        self.assertTrue((arrays['low'] > 0).all() and (arrays['volume'] > 0).all())
+        np.testing.assert_array_equal(arrays['open'][1:], arrays['close'][:-1])
+
+    def test_volatility_follows_regimes(self):
+        bars = 200_000
+        states = regime_path(bars, np.random.default_rng(0))
+        self.assertEqual(len(states), bars)
+        self.assertEqual(set(np.unique(states)), set(range(len(DEFAULT_REGIMES))))
+        # Regimes persist for spans, not single bars
+        self.assertLess(np.count_nonzero(np.diff(states)), bars / 500)
+
+        arrays = generate_ohlcv(bars, seed=0)
+        returns = np.diff(np.log(arrays['close']))
+        calm, turbulent = returns[states[1:] == 0].std(), returns[states[1:] == 2].std()
+        self.assertAlmostEqual(turbulent / calm, DEFAULT_REGIMES[2][0] / DEFAULT_REGIMES[0][0], delta=0.3)
+
+
+class TestBaselineComparison(unittest.TestCase):
+
+    def test_compare_flags_slowdowns_beyond_tolerance(self):
+        baseline = {'results': {'a': {'seconds': 1.0}, 'b': {'seconds': 1.0}, 'c': {'seconds': 1.0}}}
+        results = {'a': {'seconds': 1.3}, 'b': {'seconds': 1.1}, 'c': {'seconds': 0.5}, 'd': {'seconds': 2.0}}
+        verdicts = {name: verdict for name, *_, verdict in compare(results, baseline, tolerance=0.2)}
+        self.assertEqual(verdicts, {'a': 'regression', 'b': 'ok', 'c': 'faster', 'd': 'new'})
+
+
+if __name__ == '__main__':
+    unittest.main()
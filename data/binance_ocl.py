@@ -3,7 +3,23 @@ import pandas as pd
 from datetime import datetime, timedelta
 import time
 
-def get_binance_ohlc_history(asset='BTC', interval='1h', start_date=None, end_date=None):
+from django.conf import settings
+
+KLINES_PATH = '/api/v3/klines'
+# Binance answers 429 (rate limited) or 418 (IP banned after ignoring 429s) with a Retry-After header
+RATE_LIMIT_STATUSES = (418, 429)
+# Seconds to wait for the exchange to answer a page request
+REQUEST_TIMEOUT = 30
+# Attempts at a page failing with a server or network error before giving up
+MAX_PAGE_ATTEMPTS = 5
+RETRY_DELAY = 5
+
+
+class FetchCancelled(Exception):
+    """Raised when should_stop asks a running fetch to stop."""
+
+
+def get_binance_ohlc_history(asset='BTC', interval='1h', start_date=None, end_date=None, should_stop=None):
     """
     Fetch historical BTC/USD OHLC data from Binance US
     
@@ -15,10 +31,33 @@ def get_binance_ohlc_history(asset='BTC', interval='1h', start_date=None, end_da
         '1w', '1M'  # weeks, months
     start_date: datetime object for start of data (optional)
     end_date: datetime object for end of data (optional)
+    should_stop: callable checked before every page; FetchCancelled is raised once it returns True (optional)
+
+    The exchange is settings.BINANCE_BASE_URL, so imports can run against a local
+    stand-in (benchmarks/fake_binance.py) offline.
     """
-    
-    endpoint = "https://api.binance.us/api/v3/klines"
     all_data = []
+    for page in iter_binance_ohlc_pages(asset, interval, start_date, end_date, should_stop):
+        all_data.extend(page)
+    
+    if not all_data:
+        return None
+    return klines_to_frame(all_data)
+
+
+def iter_binance_ohlc_pages(asset='BTC', interval='1h', start_date=None, end_date=None, should_stop=None):
+    """
+    Yield the raw kline rows of each page fetched from Binance, oldest first, so callers
+    can store a page before the next one is requested. Arguments as get_binance_ohlc_history.
+
+    Rate-limited pages are retried after Retry-After. Server and network errors are
+    retried up to MAX_PAGE_ATTEMPTS times in a row; other client errors (an unknown
+    symbol or interval) will not succeed on retry. Both raise the requests exception.
+    """
+    endpoint = settings.BINANCE_BASE_URL.rstrip('/') + KLINES_PATH
+    page_delay = settings.BINANCE_PAGE_DELAY
+    fetched = 0
+    attempts = 0
 
     if end_date is None:
         end_date = datetime.now()
@@ -31,6 +70,9 @@ def get_binance_ohlc_history(asset='BTC', interval='1h', start_date=None, end_da
     current_start = start_ts
     
     while current_start < end_ts:
+        if should_stop is not None and should_stop():
+            raise FetchCancelled(f"Fetch cancelled after {fetched} candles")
+
         params = {
             'symbol': f'{asset}USDT',
             'interval': interval,
@@ -40,37 +82,40 @@ def get_binance_ohlc_history(asset='BTC', interval='1h', start_date=None, end_da
         }
         
         try:
-            response = requests.get(endpoint, params=params)
+            response = requests.get(endpoint, params=params, timeout=REQUEST_TIMEOUT)
+            if response.status_code in RATE_LIMIT_STATUSES:
+                # Back off for as long as the exchange asks before retrying the page
+                time.sleep(int(response.headers.get('Retry-After', 5)))
+                continue
             response.raise_for_status()
             data = response.json()
-            
-            if not data:
-                break
-                
-            # Process timestamps for logging
-            batch_start = datetime.fromtimestamp(data[0][0] / 1000)
-            batch_end = datetime.fromtimestamp(data[-1][0] / 1000)
-            # print(f"Fetched from {batch_start} to {batch_end}")
-            
-            all_data.extend(data)
-            
-            # Update start time for next batch
-            # Add 1 to avoid duplicate candle
-            current_start = int(data[-1][0]) + 1
-            
-            # Respect rate limits
-            time.sleep(0.5)
-            
         except requests.exceptions.RequestException as e:
-            # print(f"Error fetching data: {e}")
-            time.sleep(5)  # Wait longer on error
+            if e.response is not None and e.response.status_code < 500:
+                raise
+            attempts += 1
+            if attempts >= MAX_PAGE_ATTEMPTS:
+                raise
+            time.sleep(RETRY_DELAY)
             continue
-    
-    if not all_data:
-        return None
-        
-    # Convert to DataFrame
-    df = pd.DataFrame(all_data, columns=[
+        attempts = 0
+
+        if not data:
+            break
+
+        fetched += len(data)
+        yield data
+
+        # Update start time for next batch
+        # Add 1 to avoid duplicate candle
+        current_start = int(data[-1][0]) + 1
+
+        # Respect rate limits
+        time.sleep(page_delay)
+
+
+def klines_to_frame(rows):
+    """Binance kline rows as a DataFrame with a naive UTC 'time' column and float prices."""
+    df = pd.DataFrame(rows, columns=[
         'timestamp', 'open', 'high', 'low', 'close',
         'volume', 'close_time', 'quote_volume', 'trades',
         'taker_buy_volume', 'taker_buy_quote_volume', 'ignore'
@@ -88,9 +133,4 @@ def get_binance_ohlc_history(asset='BTC', interval='1h', start_date=None, end_da
     df = df.drop(['close_time', 'ignore'], axis=1)
     df = df.rename(columns={'timestamp': 'time'})
     
-    # print(f"\nFinal dataset:")
-    # print(f"Start: {df['time'].min()}")
-    # print(f"End: {df['time'].max()}")
-    # print(f"Total periods: {len(df)}")
-    
-    return df
\ No newline at end of file
+    return df
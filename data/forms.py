@@ -34,9 +34,22 @@ class OCLDownloadForm(forms.ModelForm):
         widget=forms.Select(attrs={'class': 'mt-1 block w-full p-2 bg-gray-50 border border-gray-300 rounded-md shadow-sm focus:outline-none focus:ring-indigo-500 focus:border-indigo-500'})
     )
 
+    rolling = forms.BooleanField(
+        required=False,
+        help_text="Keep appending new candles after the import completes.",
+        widget=forms.CheckboxInput(attrs={'class': 'h-4 w-4 rounded border-gray-300 text-indigo-600 focus:ring-indigo-500'})
+    )
+
+    rolling_window_days = forms.IntegerField(
+        required=False,
+        min_value=1,
+        help_text="Drop candles older than this many days (leave empty to keep them all).",
+        widget=forms.NumberInput(attrs={'class': 'p-2 mt-1 block w-full bg-gray-50 border border-gray-300 rounded-md shadow-sm focus:outline-none focus:ring-indigo-500 focus:border-indigo-500'})
+    )
+
     class Meta:
         model = OCLDataImport
-        fields = ['name', 'asset', 'interval', 'start_date', 'end_date']
+        fields = ['name', 'asset', 'interval', 'start_date', 'end_date', 'rolling', 'rolling_window_days']
 
     def clean(self):
         cleaned_data = super().clean()
@@ -44,4 +57,6 @@ class OCLDownloadForm(forms.ModelForm):
         end_date = cleaned_data.get('end_date')
         if start_date and end_date and start_date > end_date:
             raise forms.ValidationError("Start date must be before end date.")
+        if cleaned_data.get('rolling_window_days') and not cleaned_data.get('rolling'):
+            self.add_error('rolling_window_days', "Only rolling imports are trimmed.")
         return cleaned_data
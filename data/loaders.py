@@ -0,0 +1,257 @@
+# data/loaders.py
+
+import io
+import datetime
+
+import numpy as np
+import pandas as pd
+from django.db import connection
+
+from .models import OCLPrice
+
+OCL_COLUMNS = ('date', 'open', 'high', 'low', 'close', 'volume')
+BATCH_COLUMNS = ('data_import_id',) + OCL_COLUMNS
+FETCH_CHUNK_ROWS = 50_000
+
+# PostgreSQL binary COPY framing, see https://www.postgresql.org/docs/current/sql-copy.html
+PGCOPY_SIGNATURE = b'PGCOPY\n\xff\r\n\x00'
+PG_EPOCH_US = 946_684_800_000_000  # 2000-01-01 in microseconds since the Unix epoch
+
+# Every candle row is 6 non-null 8-byte fields: a field count, then (length, value) pairs
+PGCOPY_ROW_DTYPE = np.dtype([
+    ('nfields', '>i2'),
+    ('date_len', '>i4'), ('date', '>i8'),
+    ('open_len', '>i4'), ('open', '>f8'),
+    ('high_len', '>i4'), ('high', '>f8'),
+    ('low_len', '>i4'), ('low', '>f8'),
+    ('close_len', '>i4'), ('close', '>f8'),
+    ('volume_len', '>i4'), ('volume', '>f8'),
+])
+
+# Batched loads prefix each row with its bigint data_import_id
+PGCOPY_BATCH_ROW_DTYPE = np.dtype(
+    [('nfields', '>i2'), ('data_import_id_len', '>i4'), ('data_import_id', '>i8')]
+    + PGCOPY_ROW_DTYPE.descr[1:]
+)
+
+
+def _candle_query(data_import_ids, start=None, end=None, columns=OCL_COLUMNS):
+    """
+    Build the candle SELECT for one import id or a list of them. Date bounds are applied
+    in SQL so the (data_import, date) index limits the scan to the requested window.
+    """
+    table = connection.ops.quote_name(OCLPrice._meta.db_table)
+    selected = ', '.join(connection.ops.quote_name(c) for c in columns)
+    if isinstance(data_import_ids, (list, tuple)):
+        placeholders = ', '.join(['%s'] * len(data_import_ids))
+        conditions, params = [f"data_import_id IN ({placeholders})"], list(data_import_ids)
+        order_by = "data_import_id, date"
+    else:
+        conditions, params = ["data_import_id = %s"], [data_import_ids]
+        order_by = "date"
+    if start is not None:
+        conditions.append("date >= %s")
+        params.append(connection.ops.adapt_datetimefield_value(start))
+    if end is not None:
+        conditions.append("date <= %s")
+        params.append(connection.ops.adapt_datetimefield_value(end))
+    sql = f"SELECT {selected} FROM {table} WHERE {' AND '.join(conditions)} ORDER BY {order_by}"
+    return sql, params
+
+
+def _warmup_start(data_import_id, start, warmup_bars):
+    """
+    Date of the candle warmup_bars before start, found with a single index seek.
+    Returns None when the import has fewer bars than that before start.
+    """
+    table = connection.ops.quote_name(OCLPrice._meta.db_table)
+    sql = (
+        f"SELECT date FROM {table} WHERE data_import_id = %s AND date < %s "
+        f"ORDER BY date DESC LIMIT 1 OFFSET %s"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [data_import_id, connection.ops.adapt_datetimefield_value(start), warmup_bars - 1])
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def _column_dtype(column):
+    if column == 'date':
+        return 'datetime64[us]'
+    if column == 'data_import_id':
+        return np.int64
+    return np.float64
+
+
+def parse_pgcopy_binary(buffer, row_dtype=PGCOPY_ROW_DTYPE):
+    """
+    Decode a binary COPY stream of candle rows into NumPy arrays without a Python loop.
+    Dates come back as datetime64[us] (UTC, naive); prices and volume as float64.
+    """
+    view = memoryview(buffer)
+    if bytes(view[:11]) != PGCOPY_SIGNATURE:
+        raise ValueError("Not a PostgreSQL binary COPY stream")
+
+    extension_len = int.from_bytes(view[15:19], 'big')
+    offset = 19 + extension_len
+    body_len = len(view) - offset - 2  # trailer is a single int16 -1
+    if body_len % row_dtype.itemsize:
+        raise ValueError("Unexpected row layout in COPY stream (NULL values or column types changed?)")
+
+    columns = row_dtype.names[2::2]
+    rows = np.frombuffer(view, dtype=row_dtype, count=body_len // row_dtype.itemsize, offset=offset)
+    if rows.size and (np.any(rows['nfields'] != len(columns)) or np.any(rows['date_len'] != 8)):
+        raise ValueError("Unexpected row layout in COPY stream")
+
+    arrays = {}
+    for column in columns:
+        if column == 'date':
+            arrays[column] = (rows[column] + PG_EPOCH_US).astype('datetime64[us]')
+        else:
+            arrays[column] = rows[column].astype(_column_dtype(column))
+    return arrays
+
+
+def _load_with_copy(data_import_ids, start=None, end=None, columns=OCL_COLUMNS):
+    sql, params = _candle_query(data_import_ids, start, end, columns)
+    row_dtype = PGCOPY_BATCH_ROW_DTYPE if columns == BATCH_COLUMNS else PGCOPY_ROW_DTYPE
+    buffer = io.BytesIO()
+    with connection.cursor() as cursor:
+        query = cursor.mogrify(sql, params).decode()
+        cursor.copy_expert(f"COPY ({query}) TO STDOUT WITH (FORMAT binary)", buffer)
+    return parse_pgcopy_binary(buffer.getbuffer(), row_dtype)
+
+
+def _load_with_fetchmany(data_import_ids, start=None, end=None, chunk_rows=FETCH_CHUNK_ROWS, columns=OCL_COLUMNS):
+    """
+    Portable path: stream rows through a (server-side where supported) cursor in chunks,
+    converting each chunk to arrays so only one chunk of Python tuples is alive at a time.
+    """
+    sql, params = _candle_query(data_import_ids, start, end, columns)
+    chunks = {column: [] for column in columns}
+    cursor = connection.chunked_cursor()
+    try:
+        cursor.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(chunk_rows)
+            if not rows:
+                break
+            for column, values in zip(columns, zip(*rows)):
+                if column == 'date':
+                    values = pd.to_datetime(values, utc=True).tz_localize(None).values.astype('datetime64[us]')
+                else:
+                    values = np.array(values, dtype=_column_dtype(column))
+                chunks[column].append(values)
+    finally:
+        cursor.close()
+
+    return {
+        column: np.concatenate(parts) if parts else np.empty(0, dtype=_column_dtype(column))
+        for column, parts in chunks.items()
+    }
+
+
+def load_ocl_arrays(data_import_id, start=None, end=None, warmup_bars=0):
+    """
+    Load the candles of an OCLDataImport straight into NumPy arrays, bypassing model instances.
+    Uses binary COPY on PostgreSQL and a chunked cursor elsewhere.
+
+    start/end restrict the load to a date window; warmup_bars extra candles before start
+    are included so indicators are primed when the window opens.
+    """
+    if start is not None and warmup_bars:
+        # None when there is not enough history for the full warmup: load from the first candle
+        start = _warmup_start(data_import_id, start, warmup_bars)
+    if connection.vendor == 'postgresql':
+        return _load_with_copy(data_import_id, start, end)
+    return _load_with_fetchmany(data_import_id, start, end)
+
+
+def _naive_utc64(value):
+    if value.tzinfo is not None:
+        value = value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return np.datetime64(value, 'us')
+
+
+def load_ocl_arrays_batch(data_import_ids, start=None, end=None, warmup_bars=0):
+    """
+    Load several imports with one query and split the result per import.
+    Returns {data_import_id: arrays} in the order of data_import_ids.
+    """
+    data_import_ids = list(data_import_ids)
+    lower = start
+    if start is not None and warmup_bars:
+        # Warmup starts differ per import; load from the earliest and trim each import below
+        warmups = [_warmup_start(i, start, warmup_bars) for i in data_import_ids]
+        lower = None if any(w is None for w in warmups) else min(warmups)
+
+    if connection.vendor == 'postgresql':
+        arrays = _load_with_copy(data_import_ids, lower, end, BATCH_COLUMNS)
+    else:
+        arrays = _load_with_fetchmany(data_import_ids, lower, end, columns=BATCH_COLUMNS)
+
+    # Rows are ordered by import then date, so each import is one contiguous slice
+    ids = arrays.pop('data_import_id')
+    order = np.asarray(sorted(data_import_ids), dtype=np.int64)
+    bounds = np.searchsorted(ids, order, side='left'), np.searchsorted(ids, order, side='right')
+    slices = dict(zip(order.tolist(), zip(*bounds)))
+
+    result = {}
+    for data_import_id in data_import_ids:
+        first, last = slices[data_import_id]
+        if start is not None and warmup_bars:
+            window_first = first + np.searchsorted(arrays['date'][first:last], _naive_utc64(start))
+            first = max(first, window_first - warmup_bars)
+        result[data_import_id] = {c: np.ascontiguousarray(a[first:last]) for c, a in arrays.items()}
+    return result
+
+
+def align_ocl_arrays(arrays_list):
+    """
+    Align several candle series on the union of their timestamps.
+
+    Missing bars are forward-filled from the previous close (open/high/low = close,
+    volume 0) and flagged with filled=1. Bars before a series' first candle are not
+    invented: each series starts at its own first candle and backtrader waits for it.
+    """
+    non_empty = [a['date'] for a in arrays_list if len(a['date'])]
+    if not non_empty:
+        return arrays_list
+    index = np.unique(np.concatenate(non_empty))
+
+    aligned = []
+    for arrays in arrays_list:
+        dates = arrays['date']
+        if not len(dates):
+            aligned.append(dict(arrays, filled=np.empty(0, dtype=np.float64)))
+            continue
+        index_part = index[np.searchsorted(index, dates[0]):]
+        # Position of the last real candle at or before each timestamp
+        source = np.searchsorted(dates, index_part, side='right') - 1
+        present = dates[source] == index_part
+
+        close = arrays['close'][source]
+        result = {'date': index_part, 'close': close, 'filled': (~present).astype(np.float64)}
+        for column in ('open', 'high', 'low'):
+            result[column] = np.where(present, arrays[column][source], close)
+        result['volume'] = np.where(present, arrays['volume'][source], 0.0)
+        aligned.append(result)
+    return aligned
+
+
+def ocl_arrays_to_frame(arrays):
+    """
+    Wrap candle arrays in the DataFrame layout the Cerebro feed expects.
+    """
+    df = pd.DataFrame({
+        'Date': arrays['date'].astype('datetime64[ns]'),
+        'Open': arrays['open'],
+        'High': arrays['high'],
+        'Low': arrays['low'],
+        'Close': arrays['close'],
+        'Volume': arrays['volume'],
+    })
+    df['Adj_Close'] = df['Close']
+    if 'filled' in arrays:
+        df['Filled'] = arrays['filled']
+    return df
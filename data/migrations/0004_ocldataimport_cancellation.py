@@ -0,0 +1,33 @@
+# Generated by Django 5.1.3 on 2026-10-19 00:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("data", "0003_ocldataimport_name_alter_ocldataimport_created_at_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ocldataimport",
+            name="task_id",
+            field=models.CharField(blank=True, default="", max_length=255),
+        ),
+        migrations.AlterField(
+            model_name="ocldataimport",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "Pending"),
+                    ("in_progress", "In Progress"),
+                    ("completed", "Completed"),
+                    ("failed", "Failed"),
+                    ("cancelled", "Cancelled"),
+                ],
+                default="pending",
+                max_length=20,
+            ),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.3 on 2026-10-19 01:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("data", "0004_ocldataimport_cancellation"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ocldataimport",
+            name="checkpoint",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="ocldataimport",
+            name="progress",
+            field=models.FloatField(default=0),
+        ),
+    ]
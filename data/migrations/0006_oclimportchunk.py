@@ -0,0 +1,63 @@
+# Generated by Django 5.1.3 on 2026-10-19 01:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("data", "0005_ocldataimport_checkpoint"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OCLImportChunk",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("start_date", models.DateField()),
+                ("end_date", models.DateField()),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("in_progress", "In Progress"),
+                            ("completed", "Completed"),
+                            ("failed", "Failed"),
+                            ("cancelled", "Cancelled"),
+                        ],
+                        default="pending",
+                        max_length=20,
+                    ),
+                ),
+                ("task_id", models.CharField(blank=True, default="", max_length=255)),
+                ("checkpoint", models.DateTimeField(blank=True, null=True)),
+                ("progress", models.FloatField(default=0)),
+                (
+                    "data_import",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="chunks",
+                        to="data.ocldataimport",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["start_date"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("data_import", "start_date"), name="unique_import_chunk"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.3 on 2026-10-19 01:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("data", "0006_oclimportchunk"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ocldataimport",
+            name="rolling",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name="ocldataimport",
+            name="rolling_window_days",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -20,6 +20,7 @@ class OCLDataImport(models.Model):
         ('in_progress', 'In Progress'),
         ('completed', 'Completed'),
         ('failed', 'Failed'),
+        ('cancelled', 'Cancelled'),
     ]
     name = models.CharField(max_length=255, default='', null=True, blank=True)
     created_at = models.DateField(auto_now_add=True)
@@ -32,6 +33,16 @@ class OCLDataImport(models.Model):
         choices=STATUS_CHOICES,
         default='pending'
     )
+    # Celery task fetching the candles, used to revoke it while queued
+    task_id = models.CharField(max_length=255, blank=True, default='')
+    # Open time of the last stored candle; an interrupted import resumes after it
+    checkpoint = models.DateTimeField(null=True, blank=True)
+    # Share of the requested range fetched so far, in percent
+    progress = models.FloatField(default=0)
+    # Rolling imports keep appending new candles once completed (data.views.update_rolling_imports),
+    # dropping those older than rolling_window_days when it is set
+    rolling = models.BooleanField(default=False)
+    rolling_window_days = models.PositiveIntegerField(null=True, blank=True)
 
     def __str__(self):
         return self.name or f"{self.asset} {self.interval} from {self.start_date} to {self.end_date}"
@@ -69,6 +80,33 @@ class OCLDataImport(models.Model):
         
         return FormattedPriceData(formatted_prices)
 
+class OCLImportChunk(models.Model):
+    """One calendar month of a long import, fetched by its own task (see data.views.start_import)."""
+    data_import = models.ForeignKey(OCLDataImport, on_delete=models.CASCADE, related_name='chunks')
+    start_date = models.DateField()
+    end_date = models.DateField()
+    status = models.CharField(
+        max_length=20,
+        choices=OCLDataImport.STATUS_CHOICES,
+        default='pending'
+    )
+    task_id = models.CharField(max_length=255, blank=True, default='')
+    # Open time of the chunk's last stored candle; a retried chunk resumes after it
+    checkpoint = models.DateTimeField(null=True, blank=True)
+    progress = models.FloatField(default=0)
+
+    def __str__(self):
+        return f"{self.data_import} chunk {self.start_date} to {self.end_date}"
+
+    class Meta:
+        ordering = ['start_date']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['data_import', 'start_date'],
+                name='unique_import_chunk'
+            )
+        ]
+
 class OCLPrice(models.Model):
     date = models.DateTimeField()
     open = models.FloatField()
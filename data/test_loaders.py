@@ -0,0 +1,180 @@
+import struct
+import datetime
+import numpy as np
+
+from django.test import TestCase
+from django.utils import timezone
+
+from .models import OCLDataImport, OCLPrice
+from .loaders import (
+    PGCOPY_SIGNATURE,
+    parse_pgcopy_binary,
+    load_ocl_arrays,
+    load_ocl_arrays_batch,
+    align_ocl_arrays,
+    ocl_arrays_to_frame,
+    _load_with_fetchmany
+)
+
+
+def build_pgcopy_stream(rows):
+    """Encode (datetime, o, h, l, c, v) rows the way PostgreSQL's binary COPY does."""
+    pg_epoch = datetime.datetime(2000, 1, 1, tzinfo=datetime.timezone.utc)
+    out = bytearray(PGCOPY_SIGNATURE)
+    out += struct.pack('>ii', 0, 0)
+    for date, *values in rows:
+        micros = (date - pg_epoch) // datetime.timedelta(microseconds=1)
+        out += struct.pack('>h', 6)
+        out += struct.pack('>iq', 8, micros)
+        for value in values:
+            out += struct.pack('>id', 8, value)
+    out += struct.pack('>h', -1)
+    return bytes(out)
+
+
+class ParsePgCopyBinaryTest(TestCase):
+    def test_parse_rows(self):
+        first = datetime.datetime(2023, 10, 1, 0, 0, tzinfo=datetime.timezone.utc)
+        second = first + datetime.timedelta(minutes=5)
+        stream = build_pgcopy_stream([
+            (first, 100.0, 110.0, 90.0, 105.0, 1000.0),
+            (second, 105.0, 111.0, 101.0, 106.0, 1100.5),
+        ])
+
+        arrays = parse_pgcopy_binary(stream)
+        self.assertEqual(arrays['date'].tolist(), [first.replace(tzinfo=None), second.replace(tzinfo=None)])
+        self.assertEqual(arrays['open'].tolist(), [100.0, 105.0])
+        self.assertEqual(arrays['volume'].tolist(), [1000.0, 1100.5])
+        self.assertEqual(arrays['close'].dtype, np.float64)
+
+    def test_parse_empty_stream(self):
+        arrays = parse_pgcopy_binary(build_pgcopy_stream([]))
+        self.assertEqual(len(arrays['date']), 0)
+
+    def test_rejects_foreign_stream(self):
+        with self.assertRaises(ValueError):
+            parse_pgcopy_binary(b'date,open\n')
+
+
+class LoadOclArraysTest(TestCase):
+    def setUp(self):
+        self.data_import = OCLDataImport.objects.create(
+            asset='BTC',
+            interval='5m',
+            start_date=timezone.now().date() - timezone.timedelta(days=1),
+            end_date=timezone.now().date(),
+            status='completed'
+        )
+        self.start = datetime.datetime(2023, 10, 1, tzinfo=datetime.timezone.utc)
+        # Insert out of order to check the loader sorts by date
+        for i in (2, 0, 1):
+            OCLPrice.objects.create(
+                data_import=self.data_import,
+                date=self.start + datetime.timedelta(minutes=5 * i),
+                open=100.0 + i, high=110.0 + i, low=90.0 + i, close=105.0 + i, volume=1000.0 + i
+            )
+
+    def test_load_ocl_arrays(self):
+        arrays = load_ocl_arrays(self.data_import.id)
+        self.assertEqual(arrays['open'].tolist(), [100.0, 101.0, 102.0])
+        self.assertEqual(arrays['date'][0], np.datetime64('2023-10-01T00:00:00'))
+
+    def test_fetchmany_chunks(self):
+        arrays = _load_with_fetchmany(self.data_import.id, chunk_rows=2)
+        self.assertEqual(arrays['close'].tolist(), [105.0, 106.0, 107.0])
+        self.assertEqual(arrays['date'][-1], np.datetime64('2023-10-01T00:10:00'))
+
+    def test_load_unknown_import_is_empty(self):
+        arrays = load_ocl_arrays(9999)
+        self.assertEqual(len(arrays['date']), 0)
+
+    def test_ocl_arrays_to_frame(self):
+        df = ocl_arrays_to_frame(load_ocl_arrays(self.data_import.id))
+        self.assertListEqual(list(df.columns), ['Date', 'Open', 'High', 'Low', 'Close', 'Volume', 'Adj_Close'])
+        self.assertEqual(df.iloc[1]['Date'], datetime.datetime(2023, 10, 1, 0, 5))
+        self.assertEqual(df.iloc[1]['Adj_Close'], 106.0)
+
+
+class LoadOclArraysWindowTest(TestCase):
+    def setUp(self):
+        self.data_import = OCLDataImport.objects.create(
+            asset='ETH',
+            interval='1h',
+            start_date=datetime.date(2023, 1, 1),
+            end_date=datetime.date(2023, 1, 2),
+            status='completed'
+        )
+        self.first = datetime.datetime(2023, 1, 1, tzinfo=datetime.timezone.utc)
+        OCLPrice.objects.bulk_create([
+            OCLPrice(
+                data_import=self.data_import,
+                date=self.first + datetime.timedelta(hours=i),
+                open=float(i), high=float(i), low=float(i), close=float(i), volume=1.0
+            )
+            for i in range(10)
+        ])
+
+    def hour(self, i):
+        return self.first + datetime.timedelta(hours=i)
+
+    def test_start_and_end_bounds_are_inclusive(self):
+        arrays = load_ocl_arrays(self.data_import.id, start=self.hour(3), end=self.hour(6))
+        self.assertEqual(arrays['close'].tolist(), [3.0, 4.0, 5.0, 6.0])
+
+    def test_warmup_bars_load_before_start(self):
+        arrays = load_ocl_arrays(self.data_import.id, start=self.hour(5), end=self.hour(7), warmup_bars=2)
+        self.assertEqual(arrays['close'].tolist(), [3.0, 4.0, 5.0, 6.0, 7.0])
+
+    def test_warmup_longer_than_history_starts_at_first_candle(self):
+        arrays = load_ocl_arrays(self.data_import.id, start=self.hour(2), warmup_bars=5)
+        self.assertEqual(arrays['close'][0], 0.0)
+        self.assertEqual(len(arrays['close']), 10)
+
+
+class LoadOclArraysBatchTest(TestCase):
+    def setUp(self):
+        self.first = datetime.datetime(2023, 1, 1, tzinfo=datetime.timezone.utc)
+        self.btc = OCLDataImport.objects.create(
+            asset='BTC', interval='1h', start_date=datetime.date(2023, 1, 1),
+            end_date=datetime.date(2023, 1, 2), status='completed'
+        )
+        self.eth = OCLDataImport.objects.create(
+            asset='ETH', interval='1h', start_date=datetime.date(2023, 1, 1),
+            end_date=datetime.date(2023, 1, 2), status='completed'
+        )
+        prices = []
+        for i in range(6):
+            prices.append(OCLPrice(
+                data_import=self.btc, date=self.first + datetime.timedelta(hours=i),
+                open=100.0 + i, high=100.0 + i, low=100.0 + i, close=100.0 + i, volume=1.0
+            ))
+        # ETH is missing the 02:00 and 03:00 candles
+        for i in (0, 1, 4, 5):
+            prices.append(OCLPrice(
+                data_import=self.eth, date=self.first + datetime.timedelta(hours=i),
+                open=10.0 + i, high=10.0 + i, low=10.0 + i, close=10.0 + i, volume=2.0
+            ))
+        OCLPrice.objects.bulk_create(prices)
+
+    def test_batch_splits_per_import_in_requested_order(self):
+        arrays = load_ocl_arrays_batch([self.eth.id, self.btc.id])
+        self.assertEqual(list(arrays), [self.eth.id, self.btc.id])
+        self.assertEqual(arrays[self.btc.id]['close'].tolist(), [100.0, 101.0, 102.0, 103.0, 104.0, 105.0])
+        self.assertEqual(arrays[self.eth.id]['close'].tolist(), [10.0, 11.0, 14.0, 15.0])
+
+    def test_batch_warmup_is_trimmed_per_import(self):
+        start = self.first + datetime.timedelta(hours=4)
+        arrays = load_ocl_arrays_batch([self.btc.id, self.eth.id], start=start, warmup_bars=1)
+        self.assertEqual(arrays[self.btc.id]['close'].tolist(), [103.0, 104.0, 105.0])
+        self.assertEqual(arrays[self.eth.id]['close'].tolist(), [11.0, 14.0, 15.0])
+
+    def test_align_forward_fills_gaps(self):
+        arrays = load_ocl_arrays_batch([self.btc.id, self.eth.id])
+        btc, eth = align_ocl_arrays([arrays[self.btc.id], arrays[self.eth.id]])
+        self.assertEqual(len(eth['date']), 6)
+        self.assertEqual(eth['close'].tolist(), [10.0, 11.0, 11.0, 11.0, 14.0, 15.0])
+        self.assertEqual(eth['open'].tolist()[2:4], [11.0, 11.0])
+        self.assertEqual(eth['volume'].tolist(), [2.0, 2.0, 0.0, 0.0, 2.0, 2.0])
+        self.assertEqual(eth['filled'].tolist(), [0.0, 0.0, 1.0, 1.0, 0.0, 0.0])
+        self.assertEqual(btc['filled'].sum(), 0.0)
+        self.assertIn('Filled', ocl_arrays_to_frame(eth).columns)
@@ -3,12 +3,13 @@ from unittest import mock
 from unittest.mock import patch
 import pandas as pd
 import datetime
+import requests
 
 from django.test import TestCase
 from django.utils import timezone
 
-from .utils import get_historical_data, parse_row
-from .binance_ocl import get_binance_ohlc_history
+from .utils import get_historical_data, month_chunks, parse_row
+from .binance_ocl import get_binance_ohlc_history, FetchCancelled, MAX_PAGE_ATTEMPTS, REQUEST_TIMEOUT
 
 
 class GetHistoricalDataTest(TestCase):
@@ -169,3 +170,85 @@ class GetHistoricalDataTimezoneHandlingTest(TestCase):
         self.assertIsInstance(result, pd.DataFrame)
         self.assertIsNone(result['Date'].iloc[0].tzinfo)
         self.assertIsNone(result['Date'].iloc[1].tzinfo)
+
+
+class BinanceFetchCancellationTest(TestCase):
+
+    @patch('data.binance_ocl.time.sleep')
+    @patch('data.binance_ocl.requests.get')
+    def test_should_stop_is_checked_between_pages(self, mock_get, mock_sleep):
+        page_start = [int(datetime.datetime(2023, 10, 1).timestamp() * 1000)]
+
+        def page(*args, **kwargs):
+            candle = [page_start[0], '1', '1', '1', '1', '1', 0, '1', 1, '1', '1', '0']
+            page_start[0] += 3_600_000
+            return mock.Mock(json=mock.Mock(return_value=[candle]), raise_for_status=mock.Mock())
+
+        mock_get.side_effect = page
+        pages = []
+
+        def should_stop():
+            pages.append(1)
+            return len(pages) > 2
+
+        with self.assertRaises(FetchCancelled):
+            get_binance_ohlc_history(
+                'BTC', '1h', datetime.datetime(2023, 10, 1), datetime.datetime(2023, 10, 5), should_stop=should_stop
+            )
+        self.assertEqual(mock_get.call_count, 2)
+
+
+class BinanceFetchRateLimitTest(TestCase):
+
+    @patch('data.binance_ocl.time.sleep')
+    @patch('data.binance_ocl.requests.get')
+    def test_rate_limited_page_is_retried_after_retry_after(self, mock_get, mock_sleep):
+        open_ms = int(datetime.datetime(2023, 10, 1).timestamp() * 1000)
+        candle = [open_ms, '1', '1', '1', '1', '1', 0, '1', 1, '1', '1', '0']
+        mock_get.side_effect = [
+            mock.Mock(status_code=429, headers={'Retry-After': '7'}),
+            mock.Mock(status_code=200, json=mock.Mock(return_value=[candle]), raise_for_status=mock.Mock()),
+            mock.Mock(status_code=200, json=mock.Mock(return_value=[]), raise_for_status=mock.Mock()),
+        ]
+
+        with self.settings(BINANCE_BASE_URL='http://exchange.test/', BINANCE_PAGE_DELAY=0.25):
+            df = get_binance_ohlc_history('BTC', '1h', datetime.datetime(2023, 10, 1), datetime.datetime(2023, 10, 2))
+
+        self.assertEqual(len(df), 1)
+        self.assertEqual(mock_get.call_args_list[0].args[0], 'http://exchange.test/api/v3/klines')
+        self.assertEqual(mock_get.call_args_list[0].kwargs['params'], mock_get.call_args_list[1].kwargs['params'])
+        self.assertEqual([c.args[0] for c in mock_sleep.call_args_list], [7, 0.25])
+
+
+class MonthChunksTest(unittest.TestCase):
+
+    def test_range_is_split_at_month_boundaries(self):
+        self.assertEqual(month_chunks(datetime.date(2023, 12, 15), datetime.date(2024, 3, 10)), [
+            (datetime.date(2023, 12, 15), datetime.date(2023, 12, 31)),
+            (datetime.date(2024, 1, 1), datetime.date(2024, 1, 31)),
+            (datetime.date(2024, 2, 1), datetime.date(2024, 2, 29)),
+            (datetime.date(2024, 3, 1), datetime.date(2024, 3, 10)),
+        ])
+        self.assertEqual(
+            month_chunks(datetime.date(2024, 5, 3), datetime.date(2024, 5, 3)),
+            [(datetime.date(2024, 5, 3), datetime.date(2024, 5, 3))]
+        )
+
+    @patch('data.binance_ocl.time.sleep')
+    @patch('data.binance_ocl.requests.get')
+    def test_client_error_is_raised_without_retrying(self, mock_get, mock_sleep):
+        response = mock.Mock(status_code=400)
+        response.raise_for_status.side_effect = requests.HTTPError('400 Client Error', response=response)
+        mock_get.return_value = response
+
+        with self.assertRaises(requests.HTTPError):
+            get_binance_ohlc_history('XYZ', '1h', datetime.datetime(2023, 10, 1), datetime.datetime(2023, 10, 2))
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(mock_get.call_args.kwargs['timeout'], REQUEST_TIMEOUT)
+
+    @patch('data.binance_ocl.time.sleep')
+    @patch('data.binance_ocl.requests.get', side_effect=requests.ConnectionError('connection refused'))
+    def test_network_errors_are_retried_a_bounded_number_of_times(self, mock_get, mock_sleep):
+        with self.assertRaises(requests.ConnectionError):
+            get_binance_ohlc_history('BTC', '1h', datetime.datetime(2023, 10, 1), datetime.datetime(2023, 10, 2))
+        self.assertEqual(mock_get.call_count, MAX_PAGE_ATTEMPTS)
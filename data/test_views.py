@@ -1,3 +1,4 @@
+from django.core.cache import cache
 from django.test import TestCase, Client
 from django.urls import reverse
 from accounts.models import CustomUser
@@ -6,10 +7,18 @@ from django.db import IntegrityError
 from unittest import mock
 from unittest.mock import patch, MagicMock
 
-from .models import OCLDataImport, OCLPrice
+from .models import OCLDataImport, OCLImportChunk, OCLPrice
 from .forms import OCLDownloadForm
-from .views import fetch_and_save_ocl_data
+from .views import (
+    CHUNK_MAX_RETRIES, fetch_and_save_ocl_data, fetch_import_chunk, finish_chunked_import, start_import,
+    tail_rolling_import, update_rolling_imports,
+)
+from .binance_ocl import FetchCancelled
+from arbitrex.cancellation import request_cancel, is_cancelled
+from arbitrex.celery import app
+import datetime
 import pandas as pd
+import requests
 from django.core.paginator import Page, Paginator
 
 class ViewsTestCase(TestCase):
@@ -77,7 +86,7 @@ class ViewsTestCase(TestCase):
         self.assertTemplateUsed(response, 'data/data_import.html')
         self.assertIsInstance(response.context['form'], OCLDownloadForm)
 
-    @patch('data.views.fetch_and_save_ocl_data.delay')
+    @patch('data.views.fetch_and_save_ocl_data.apply_async')
     def test_data_import_view_post_valid_form(self, mock_fetch_task):
         self.client.login(username='testuser@example.com', password='testpassword')
         form_data = {
@@ -93,7 +102,8 @@ class ViewsTestCase(TestCase):
         # Check that the data_import was created with 'ETH' (assuming ETH is valid)
         self.assertTrue(OCLDataImport.objects.filter(asset='ETH', name='Test Import').exists())
         data_import = OCLDataImport.objects.get(asset='ETH', name='Test Import')
-        mock_fetch_task.assert_called_once_with(data_import.id)
+        self.assertTrue(data_import.task_id)
+        mock_fetch_task.assert_called_once_with((data_import.id,), task_id=data_import.task_id)
 
 
     def test_data_import_view_post_invalid_form(self):
@@ -115,9 +125,8 @@ class ViewsTestCase(TestCase):
         self.assertIn('Enter a valid date.', form.errors.get('start_date', []))
         self.assertIn('Enter a valid date.', form.errors.get('end_date', []))
 
-    @patch('data.views.get_historical_data')
-    @patch('data.views.parse_row')
-    def test_fetch_and_save_ocl_data_success(self, mock_parse_row, mock_get_historical_data):
+    @patch('data.views.iter_historical_data')
+    def test_fetch_and_save_ocl_data_success(self, mock_iter_historical_data):
         mock_df = pd.DataFrame({
             'Date': [
                 timezone.now() - timezone.timedelta(minutes=5),
@@ -129,37 +138,24 @@ class ViewsTestCase(TestCase):
             'Close': [50200.0, 50400.0],
             'Volume': [1500.5, 1600.5]
         })
-        mock_get_historical_data.return_value = mock_df
-
-        mock_parse_row.side_effect = [
-            {
-                'date': mock_df.iloc[0]['Date'],
-                'open': mock_df.iloc[0]['Open'],
-                'high': mock_df.iloc[0]['High'],
-                'low': mock_df.iloc[0]['Low'],
-                'close': mock_df.iloc[0]['Close'],
-                'volume': mock_df.iloc[0]['Volume']
-            },
-            {
-                'date': mock_df.iloc[1]['Date'],
-                'open': mock_df.iloc[1]['Open'],
-                'high': mock_df.iloc[1]['High'],
-                'low': mock_df.iloc[1]['Low'],
-                'close': mock_df.iloc[1]['Close'],
-                'volume': mock_df.iloc[1]['Volume']
-            }
-        ]
+        mock_iter_historical_data.return_value = [mock_df]
 
         fetch_and_save_ocl_data(self.data_import.id)
         self.data_import.refresh_from_db()
         self.assertEqual(self.data_import.status, 'completed')
         self.assertEqual(self.data_import.start_date, mock_df.iloc[0]['Date'].date())
         self.assertEqual(self.data_import.end_date, mock_df.iloc[-1]['Date'].date())
-        self.assertEqual(OCLPrice.objects.filter(data_import=self.data_import).count(), 2)
+        self.assertEqual(self.data_import.checkpoint, mock_df.iloc[-1]['Date'])
+        self.assertEqual(self.data_import.progress, 100)
+        prices = OCLPrice.objects.filter(data_import=self.data_import).order_by('date')
+        self.assertEqual(prices.count(), 2)
+        self.assertEqual(
+            [(p.open, p.high, p.low, p.close, p.volume) for p in prices],
+            [(50000.0, 50500.0, 49500.0, 50200.0, 1500.5), (50200.0, 50700.0, 49700.0, 50400.0, 1600.5)]
+        )
 
-    @patch('data.views.get_historical_data')
-    @patch('data.views.parse_row')
-    def test_fetch_and_save_ocl_data_integrity_error(self, mock_parse_row, mock_get_historical_data):
+    @patch('data.views.iter_historical_data')
+    def test_fetch_and_save_ocl_data_integrity_error(self, mock_iter_historical_data):
         mock_df = pd.DataFrame({
             'Date': [
                 timezone.now() - timezone.timedelta(minutes=5),
@@ -171,75 +167,80 @@ class ViewsTestCase(TestCase):
             'Close': [50200.0, 50400.0],
             'Volume': [1500.5, 1600.5]
         })
-        mock_get_historical_data.return_value = mock_df
-
-        # Return valid rows for parse_row
-        first_row_data = {
-            'date': mock_df.iloc[0]['Date'],
-            'open': mock_df.iloc[0]['Open'],
-            'high': mock_df.iloc[0]['High'],
-            'low': mock_df.iloc[0]['Low'],
-            'close': mock_df.iloc[0]['Close'],
-            'volume': mock_df.iloc[0]['Volume']
-        }
-        second_row_data = {
-            'date': mock_df.iloc[1]['Date'],
-            'open': mock_df.iloc[1]['Open'],
-            'high': mock_df.iloc[1]['High'],
-            'low': mock_df.iloc[1]['Low'],
-            'close': mock_df.iloc[1]['Close'],
-            'volume': mock_df.iloc[1]['Volume']
-        }
+        mock_iter_historical_data.return_value = [mock_df.iloc[:1], mock_df.iloc[1:]]
 
-        mock_parse_row.side_effect = [first_row_data, second_row_data]
-
-        # On the first create, return a valid OCLPrice instance; on the second, raise IntegrityError
-        first_price = OCLPrice(
-            date=first_row_data['date'],
-            open=first_row_data['open'],
-            high=first_row_data['high'],
-            low=first_row_data['low'],
-            close=first_row_data['close'],
-            volume=first_row_data['volume'],
-            data_import=self.data_import
-        )
-        first_price.save() 
+        real_bulk_create = OCLPrice.objects.bulk_create
+
+        def bulk_create(prices, **kwargs):
+            # The first page is stored, the second collides
+            if mock_bulk.call_count > 1:
+                raise IntegrityError()
+            return real_bulk_create(prices, **kwargs)
 
-        with patch('data.models.OCLPrice.objects.create', side_effect=[IntegrityError()]):
+        with patch('data.models.OCLPrice.objects.bulk_create', side_effect=bulk_create) as mock_bulk:
             fetch_and_save_ocl_data(self.data_import.id)
             self.data_import.refresh_from_db()
             self.assertEqual(self.data_import.status, 'failed')
             self.assertEqual(OCLPrice.objects.filter(data_import=self.data_import).count(), 1)
+            # The failed page was rolled back with its checkpoint
+            self.assertEqual(self.data_import.checkpoint, mock_df.iloc[0]['Date'])
+
+    @patch('data.views.iter_historical_data')
+    def test_fetch_and_save_ocl_data_resumes_after_checkpoint(self, mock_iter_historical_data):
+        first_page_end = datetime.datetime(2024, 1, 1, 12, tzinfo=datetime.timezone.utc)
+        self.data_import.start_date = datetime.date(2024, 1, 1)
+        self.data_import.end_date = datetime.date(2024, 1, 1)
+        self.data_import.checkpoint = first_page_end
+        self.data_import.status = 'failed'
+        self.data_import.save()
+        OCLPrice.objects.create(
+            data_import=self.data_import, date=first_page_end, open=1.0, high=1.0, low=1.0, close=1.0, volume=1.0
+        )
+        mock_iter_historical_data.return_value = [pd.DataFrame({
+            'Date': [datetime.datetime(2024, 1, 1, 13), datetime.datetime(2024, 1, 1, 14)],
+            'Open': [2.0, 3.0], 'High': [2.0, 3.0], 'Low': [2.0, 3.0], 'Close': [2.0, 3.0], 'Volume': [1.0, 1.0],
+        })]
 
-    def test_parse_row_called_correctly_in_task(self):
-        with patch('data.views.parse_row') as mock_parse_row, \
-             patch('data.views.get_historical_data') as mock_get_historical_data:
-            mock_df = pd.DataFrame({
-                'Date': [timezone.now()],
-                'Open': [50000.0],
-                'High': [50500.0],
-                'Low': [49500.0],
-                'Close': [50200.0],
-                'Volume': [1500.5]
-            })
-            mock_get_historical_data.return_value = mock_df
-
-            # Provide a valid parse_row return value
-            mock_parse_row.return_value = {
-                'date': mock_df.iloc[0]['Date'],
-                'open': mock_df.iloc[0]['Open'],
-                'high': mock_df.iloc[0]['High'],
-                'low': mock_df.iloc[0]['Low'],
-                'close': mock_df.iloc[0]['Close'],
-                'volume': mock_df.iloc[0]['Volume']
-            }
+        fetch_and_save_ocl_data(self.data_import.id)
 
-            fetch_and_save_ocl_data(self.data_import.id)
+        kwargs = mock_iter_historical_data.call_args.kwargs
+        self.assertEqual(kwargs['start_date'], first_page_end + datetime.timedelta(milliseconds=1))
+        self.data_import.refresh_from_db()
+        self.assertEqual(self.data_import.status, 'completed')
+        self.assertEqual(self.data_import.checkpoint, datetime.datetime(2024, 1, 1, 14, tzinfo=datetime.timezone.utc))
+        self.assertEqual(OCLPrice.objects.filter(data_import=self.data_import).count(), 3)
+
+    @patch('data.views.iter_historical_data')
+    def test_progress_is_saved_with_every_page(self, mock_iter_historical_data):
+        self.data_import.start_date = datetime.date(2024, 1, 1)
+        self.data_import.end_date = datetime.date(2024, 1, 2)
+        self.data_import.save()
+        progress = []
+
+        def pages(**kwargs):
+            for hour in (12, 36):
+                yield pd.DataFrame({
+                    'Date': [datetime.datetime(2024, 1, 1) + datetime.timedelta(hours=hour)],
+                    'Open': [1.0], 'High': [1.0], 'Low': [1.0], 'Close': [1.0], 'Volume': [1.0],
+                })
+                progress.append(OCLDataImport.objects.get(id=self.data_import.id).progress)
+
+        mock_iter_historical_data.side_effect = pages
+        fetch_and_save_ocl_data(self.data_import.id)
+        self.assertEqual(progress, [25.0, 75.0])
 
-            # Check that parse_row was called once
-            mock_parse_row.assert_called_once()
-            called_arg = mock_parse_row.call_args[0][0]
-            pd.testing.assert_series_equal(called_arg, mock_df.iloc[0])
+    @patch('data.views.iter_historical_data', return_value=[])
+    def test_fetch_and_save_ocl_data_without_candles_fails(self, mock_iter_historical_data):
+        fetch_and_save_ocl_data(self.data_import.id)
+        self.data_import.refresh_from_db()
+        self.assertEqual(self.data_import.status, 'failed')
+
+    @patch('data.views.iter_historical_data', side_effect=ConnectionError('database went away'))
+    def test_unexpected_error_marks_import_failed(self, mock_iter_historical_data):
+        with self.assertRaises(ConnectionError):
+            fetch_and_save_ocl_data(self.data_import.id)
+        self.data_import.refresh_from_db()
+        self.assertEqual(self.data_import.status, 'failed')
 
     def test_fetch_and_save_ocl_data_invalid_data_import(self):
         with self.assertRaises(OCLDataImport.DoesNotExist):
@@ -247,9 +248,8 @@ class ViewsTestCase(TestCase):
 
 
 class CeleryTaskTestCase(TestCase):
-    @patch('data.views.get_historical_data')
-    @patch('data.views.parse_row')
-    def test_celery_task_fetch_and_save(self, mock_parse_row, mock_get_historical_data):
+    @patch('data.views.iter_historical_data')
+    def test_celery_task_fetch_and_save(self, mock_iter_historical_data):
         mock_df = pd.DataFrame({
             'Date': [
                 timezone.now() - timezone.timedelta(minutes=5),
@@ -261,25 +261,7 @@ class CeleryTaskTestCase(TestCase):
             'Close': [50200.0, 50400.0],
             'Volume': [1500.5, 1600.5]
         })
-        mock_get_historical_data.return_value = mock_df
-        mock_parse_row.side_effect = [
-            {
-                'date': mock_df.iloc[0]['Date'],
-                'open': mock_df.iloc[0]['Open'],
-                'high': mock_df.iloc[0]['High'],
-                'low': mock_df.iloc[0]['Low'],
-                'close': mock_df.iloc[0]['Close'],
-                'volume': mock_df.iloc[0]['Volume']
-            },
-            {
-                'date': mock_df.iloc[1]['Date'],
-                'open': mock_df.iloc[1]['Open'],
-                'high': mock_df.iloc[1]['High'],
-                'low': mock_df.iloc[1]['Low'],
-                'close': mock_df.iloc[1]['Close'],
-                'volume': mock_df.iloc[1]['Volume']
-            }
-        ]
+        mock_iter_historical_data.return_value = [mock_df.iloc[:1], mock_df.iloc[1:]]
 
         # Create a DataImport to test the celery task
         data_import = OCLDataImport.objects.create(
@@ -290,21 +272,342 @@ class CeleryTaskTestCase(TestCase):
             status='pending'
         )
 
-        with patch('data.models.OCLPrice.objects.create') as mock_create:
-            # Return valid OCLPrice objects
-            first_price = OCLPrice(
-                date=mock_df.iloc[0]['Date'],
-                open=50000.0, high=50500.0, low=49500.0, close=50200.0, volume=1500.5,
-                data_import=data_import
-            )
-            second_price = OCLPrice(
-                date=mock_df.iloc[1]['Date'],
-                open=50200.0, high=50700.0, low=49700.0, close=50400.0, volume=1600.5,
-                data_import=data_import
-            )
-            mock_create.side_effect = [first_price, second_price]
-
+        with patch('data.models.OCLPrice.objects.bulk_create') as mock_bulk_create:
             fetch_and_save_ocl_data(data_import.id)
-            self.assertEqual(mock_create.call_count, 2)
+            # One insert per fetched page
+            self.assertEqual(mock_bulk_create.call_count, 2)
+            self.assertEqual([len(c.args[0]) for c in mock_bulk_create.call_args_list], [1, 1])
             data_import.refresh_from_db()
             self.assertEqual(data_import.status, 'completed')
+
+    def test_task_is_redelivered_when_the_worker_dies(self):
+        self.assertTrue(fetch_and_save_ocl_data.acks_late)
+        self.assertTrue(fetch_and_save_ocl_data.reject_on_worker_lost)
+        # ...but not while it is still running: Redis redelivers unacked messages after this
+        self.assertGreaterEqual(app.conf.broker_transport_options['visibility_timeout'], 12 * 60 * 60)
+
+
+class CancellationTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(email='testuser@example.com', password='testpassword')
+        self.data_import = OCLDataImport.objects.create(
+            asset='BTC',
+            interval='5m',
+            start_date=timezone.now().date() - timezone.timedelta(days=10),
+            end_date=timezone.now().date(),
+            status='pending'
+        )
+
+    @patch('data.views.iter_historical_data')
+    def test_fetch_and_save_ocl_data_cancelled_while_fetching(self, mock_get_historical_data):
+        mock_get_historical_data.side_effect = FetchCancelled('Fetch cancelled after 1000 candles')
+
+        fetch_and_save_ocl_data(self.data_import.id)
+        self.data_import.refresh_from_db()
+        self.assertEqual(self.data_import.status, 'cancelled')
+        self.assertIn('should_stop', mock_get_historical_data.call_args.kwargs)
+
+    @patch('data.views.iter_historical_data')
+    def test_fetch_and_save_ocl_data_cancelled_before_start(self, mock_get_historical_data):
+        request_cancel('import', self.data_import.id)
+
+        fetch_and_save_ocl_data(self.data_import.id)
+        self.data_import.refresh_from_db()
+        self.assertEqual(self.data_import.status, 'cancelled')
+        mock_get_historical_data.assert_not_called()
+        self.assertFalse(is_cancelled('import', self.data_import.id))
+
+    @patch('data.views.celery_app')
+    def test_data_import_cancel_view(self, mock_app):
+        self.data_import.task_id = 'task-1'
+        self.data_import.save()
+        self.client.login(username='testuser@example.com', password='testpassword')
+
+        response = self.client.post(reverse('data_import_cancel', args=[self.data_import.id]))
+        self.assertRedirects(response, reverse('data_view'))
+        self.data_import.refresh_from_db()
+        self.assertEqual(self.data_import.status, 'cancelled')
+        mock_app.control.revoke.assert_called_once_with('task-1')
+
+    @patch('data.views.fetch_and_save_ocl_data.apply_async')
+    def test_data_import_resume_view(self, mock_apply_async):
+        self.data_import.status = 'failed'
+        self.data_import.save()
+        request_cancel('import', self.data_import.id)
+        self.client.login(username='testuser@example.com', password='testpassword')
+
+        response = self.client.post(reverse('data_import_resume', args=[self.data_import.id]))
+        self.assertRedirects(response, reverse('data_view'))
+        self.data_import.refresh_from_db()
+        self.assertEqual(self.data_import.status, 'pending')
+        self.assertFalse(is_cancelled('import', self.data_import.id))
+        mock_apply_async.assert_called_once_with((self.data_import.id,), task_id=self.data_import.task_id)
+
+
+def hourly_candles(start, hours):
+    return pd.DataFrame({
+        'Date': [start + datetime.timedelta(hours=hour) for hour in range(hours)],
+        'Open': [1.0] * hours, 'High': [1.0] * hours, 'Low': [1.0] * hours, 'Close': [1.0] * hours,
+        'Volume': [1.0] * hours,
+    })
+
+
+def utc(*args):
+    return datetime.datetime(*args, tzinfo=datetime.timezone.utc)
+
+
+def run_chunk(chunk):
+    """Run a chunk's task as its current run would, with the task id start_import gave it."""
+    return fetch_import_chunk.apply(args=(chunk.id,), task_id=chunk.task_id)
+
+
+class ChunkedImportTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(email='testuser@example.com', password='testpassword')
+        self.data_import = OCLDataImport.objects.create(
+            asset='BTC', interval='1h', start_date=datetime.date(2024, 1, 15), end_date=datetime.date(2024, 4, 10)
+        )
+        with patch('data.views.chord'):
+            start_import(self.data_import)
+        self.chunks = list(self.data_import.chunks.all())
+
+    def settle_chunks(self, checkpoints):
+        for chunk, checkpoint in zip(self.chunks, checkpoints):
+            chunk.checkpoint = checkpoint
+            chunk.status = 'completed'
+            chunk.save()
+
+    @patch('data.views.chord')
+    @patch('data.views.fetch_and_save_ocl_data.apply_async')
+    def test_long_range_is_queued_as_monthly_chunks(self, mock_apply_async, mock_chord):
+        self.client.login(username='testuser@example.com', password='testpassword')
+        response = self.client.post(reverse('data_import_view'), data={
+            'name': 'Long import', 'asset': 'ETH', 'interval': '5m', 'start_date': '2023-01-01', 'end_date': '2023-12-31',
+        })
+        self.assertRedirects(response, reverse('data_view'))
+
+        data_import = OCLDataImport.objects.get(name='Long import')
+        chunks = list(data_import.chunks.all())
+        self.assertEqual(len(chunks), 12)
+        self.assertEqual((chunks[1].start_date, chunks[1].end_date), (datetime.date(2023, 2, 1), datetime.date(2023, 2, 28)))
+        mock_apply_async.assert_not_called()
+        header = list(mock_chord.call_args.args[0])
+        self.assertEqual([signature.args for signature in header], [(chunk.id,) for chunk in chunks])
+        self.assertEqual([signature.options['task_id'] for signature in header], [chunk.task_id for chunk in chunks])
+        self.assertEqual(mock_chord.return_value.call_args.args[0].args, (data_import.id,))
+        self.assertEqual(data_import.task_id, '')
+
+    @patch('data.views.iter_historical_data')
+    def test_chunk_stores_its_month_and_updates_import_progress(self, mock_iter_historical_data):
+        february = self.chunks[1]
+        mock_iter_historical_data.return_value = [hourly_candles(datetime.datetime(2024, 2, 1), 29 * 24)]
+
+        run_chunk(february)
+
+        kwargs = mock_iter_historical_data.call_args.kwargs
+        self.assertEqual((kwargs['start_date'], kwargs['end_date']), import_range(february))
+        february.refresh_from_db()
+        self.assertEqual(february.status, 'completed')
+        self.assertEqual(february.checkpoint, utc(2024, 2, 29, 23))
+        self.data_import.refresh_from_db()
+        self.assertEqual(self.data_import.status, 'in_progress')
+        self.assertEqual(self.data_import.progress, round(29 / 87 * 100, 1))
+        self.assertEqual(OCLPrice.objects.filter(data_import=self.data_import).count(), 29 * 24)
+
+    @patch('data.views.iter_historical_data')
+    def test_failed_chunk_is_retried_on_its_own(self, mock_iter_historical_data):
+        march = self.chunks[2]
+        mock_iter_historical_data.side_effect = [
+            ConnectionError('exchange unreachable'), [hourly_candles(datetime.datetime(2024, 3, 1), 31 * 24)]
+        ]
+
+        run_chunk(march)
+
+        self.assertEqual(mock_iter_historical_data.call_count, 2)
+        march.refresh_from_db()
+        self.assertEqual(march.status, 'completed')
+        self.assertEqual(OCLImportChunk.objects.filter(data_import=self.data_import, status='pending').count(), 3)
+
+    @patch('data.views.iter_historical_data', side_effect=ConnectionError('exchange unreachable'))
+    def test_chunk_fails_once_retries_run_out(self, mock_iter_historical_data):
+        march = self.chunks[2]
+        run_chunk(march)
+        self.assertEqual(mock_iter_historical_data.call_count, CHUNK_MAX_RETRIES + 1)
+        march.refresh_from_db()
+        self.assertEqual(march.status, 'failed')
+
+    @patch('data.binance_ocl.time.sleep')
+    @patch('data.binance_ocl.requests.get')
+    def test_exchange_errors_reach_the_chunk_retries(self, mock_get, mock_sleep):
+        response = mock.Mock(status_code=400)
+        response.raise_for_status.side_effect = requests.HTTPError('400 Client Error', response=response)
+        mock_get.return_value = response
+        march = self.chunks[2]
+
+        run_chunk(march)
+
+        self.assertEqual(mock_get.call_count, CHUNK_MAX_RETRIES + 1)
+        march.refresh_from_db()
+        self.assertEqual(march.status, 'failed')
+
+    @patch('data.views.iter_historical_data')
+    def test_chunk_task_of_an_earlier_run_is_dropped(self, mock_iter_historical_data):
+        fetch_import_chunk.apply(args=(self.chunks[0].id,), task_id='an-earlier-run')
+        mock_iter_historical_data.assert_not_called()
+        self.chunks[0].refresh_from_db()
+        self.assertEqual(self.chunks[0].status, 'pending')
+
+    @patch('data.views.chord')
+    def test_cancelled_chunked_import_cannot_be_resumed_until_settled(self, mock_chord):
+        self.client.login(username='testuser@example.com', password='testpassword')
+        self.client.post(reverse('data_import_cancel', args=[self.data_import.id]))
+        self.data_import.refresh_from_db()
+        self.assertEqual(self.data_import.status, 'pending')
+        self.assertTrue(is_cancelled('import', self.data_import.id))
+
+        self.client.post(reverse('data_import_resume', args=[self.data_import.id]))
+        mock_chord.assert_not_called()
+        self.assertTrue(is_cancelled('import', self.data_import.id))
+
+        # The queued chunks see the flag and the callback settles the import
+        for chunk in self.chunks:
+            run_chunk(chunk)
+        finish_chunked_import(self.data_import.id)
+        self.data_import.refresh_from_db()
+        self.assertEqual(self.data_import.status, 'cancelled')
+
+    def test_callback_completes_a_continuous_import(self):
+        # BTC listed on Jan 20: the first chunk starts late, the last one ends early
+        OCLPrice.objects.create(
+            data_import=self.data_import, date=utc(2024, 1, 20), open=1.0, high=1.0, low=1.0, close=1.0, volume=1.0
+        )
+        self.settle_chunks([utc(2024, 1, 31, 23), utc(2024, 2, 29, 23), utc(2024, 3, 31, 23), utc(2024, 4, 10, 5)])
+
+        finish_chunked_import(self.data_import.id)
+
+        self.data_import.refresh_from_db()
+        self.assertEqual(self.data_import.status, 'completed')
+        self.assertEqual(self.data_import.start_date, datetime.date(2024, 1, 20))
+        self.assertEqual(self.data_import.end_date, datetime.date(2024, 4, 10))
+        self.assertEqual(self.data_import.checkpoint, utc(2024, 4, 10, 5))
+
+    @patch('data.views.chord')
+    def test_chunk_that_stopped_short_fails_the_import_and_is_refetched_on_resume(self, mock_chord):
+        self.settle_chunks([None, utc(2024, 2, 20), utc(2024, 3, 31, 23), utc(2024, 4, 10, 5)])
+
+        finish_chunked_import(self.data_import.id)
+
+        self.data_import.refresh_from_db()
+        self.assertEqual(self.data_import.status, 'failed')
+        statuses = list(self.data_import.chunks.values_list('status', flat=True))
+        self.assertEqual(statuses, ['completed', 'failed', 'completed', 'completed'])
+
+        self.client.login(username='testuser@example.com', password='testpassword')
+        self.client.post(reverse('data_import_resume', args=[self.data_import.id]))
+        header = list(mock_chord.call_args.args[0])
+        self.assertEqual([signature.args for signature in header], [(self.chunks[1].id,)])
+
+    def test_callback_marks_import_cancelled(self):
+        self.settle_chunks([utc(2024, 1, 31, 23), None, None, None])
+        OCLImportChunk.objects.filter(id=self.chunks[1].id).update(status='cancelled')
+        request_cancel('import', self.data_import.id)
+
+        finish_chunked_import(self.data_import.id)
+
+        self.data_import.refresh_from_db()
+        self.assertEqual(self.data_import.status, 'cancelled')
+        self.assertFalse(is_cancelled('import', self.data_import.id))
+
+    @patch('data.views.iter_historical_data')
+    def test_cancelled_import_stops_queued_chunks(self, mock_iter_historical_data):
+        request_cancel('import', self.data_import.id)
+        run_chunk(self.chunks[0])
+        mock_iter_historical_data.assert_not_called()
+        self.chunks[0].refresh_from_db()
+        self.assertEqual(self.chunks[0].status, 'cancelled')
+
+
+def import_range(chunk):
+    return (
+        utc(chunk.start_date.year, chunk.start_date.month, chunk.start_date.day),
+        datetime.datetime.combine(chunk.end_date, datetime.time.max, tzinfo=datetime.timezone.utc),
+    )
+
+
+class RollingImportTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.data_import = OCLDataImport.objects.create(
+            asset='BTC', interval='1h', start_date=datetime.date(2024, 1, 1), end_date=datetime.date(2024, 1, 3),
+            status='completed', rolling=True, checkpoint=utc(2024, 1, 3, 23)
+        )
+        OCLPrice.objects.bulk_create(
+            OCLPrice(data_import=self.data_import, date=utc(2024, 1, 1) + datetime.timedelta(hours=hour),
+                     open=1.0, high=1.0, low=1.0, close=1.0, volume=1.0)
+            for hour in range(72)
+        )
+
+    @patch('data.views.timezone.now', return_value=utc(2024, 1, 4, 5, 30))
+    @patch('data.views.iter_historical_data')
+    def test_tail_appends_closed_candles_after_the_checkpoint(self, mock_iter_historical_data, mock_now):
+        # The exchange returns the checkpoint candle again, five closed ones and the open one at 05:00
+        tail = hourly_candles(datetime.datetime(2024, 1, 3, 23), 7)
+        tail['Close'] = 2.0
+        mock_iter_historical_data.return_value = [tail]
+
+        tail_rolling_import(self.data_import.id)
+
+        kwargs = mock_iter_historical_data.call_args.kwargs
+        self.assertEqual((kwargs['start_date'], kwargs['end_date']), (utc(2024, 1, 3, 23), utc(2024, 1, 4, 5, 30)))
+        self.data_import.refresh_from_db()
+        self.assertEqual(self.data_import.checkpoint, utc(2024, 1, 4, 4))
+        self.assertEqual(self.data_import.end_date, datetime.date(2024, 1, 4))
+        prices = OCLPrice.objects.filter(data_import=self.data_import)
+        self.assertEqual(prices.count(), 72 + 5)
+        self.assertEqual(prices.get(date=utc(2024, 1, 3, 23)).close, 2.0)
+        self.assertEqual(prices.get(date=utc(2024, 1, 3, 22)).close, 1.0)
+
+    @patch('data.views.timezone.now', return_value=utc(2024, 1, 4, 1, 30))
+    @patch('data.views.iter_historical_data')
+    def test_tail_trims_candles_outside_the_window(self, mock_iter_historical_data, mock_now):
+        self.data_import.rolling_window_days = 2
+        self.data_import.save()
+        mock_iter_historical_data.return_value = [hourly_candles(datetime.datetime(2024, 1, 3, 23), 3)]
+
+        tail_rolling_import(self.data_import.id)
+
+        self.data_import.refresh_from_db()
+        prices = OCLPrice.objects.filter(data_import=self.data_import)
+        self.assertEqual(prices.first().date, utc(2024, 1, 2))
+        # Jan 4 00:00 is appended (01:00 is still open) and the window keeps two days before it
+        self.assertEqual(prices.count(), 48 + 1)
+        self.assertEqual((self.data_import.start_date, self.data_import.end_date), (datetime.date(2024, 1, 2), datetime.date(2024, 1, 4)))
+
+    @patch('data.views.iter_historical_data')
+    def test_overlapping_tail_update_is_skipped(self, mock_iter_historical_data):
+        cache.add(f'rolling-tail:{self.data_import.id}', True)
+        tail_rolling_import(self.data_import.id)
+        mock_iter_historical_data.assert_not_called()
+
+    @patch('data.views.tail_rolling_import.apply_async')
+    def test_beat_job_queues_completed_rolling_imports(self, mock_apply_async):
+        OCLDataImport.objects.create(
+            asset='BTC', interval='1h', start_date=datetime.date(2024, 2, 1), end_date=datetime.date(2024, 2, 3),
+            status='completed'
+        )
+        OCLDataImport.objects.create(
+            asset='ETH', interval='1h', start_date=datetime.date(2024, 2, 1), end_date=datetime.date(2024, 2, 3),
+            status='in_progress', rolling=True
+        )
+        update_rolling_imports()
+        self.assertEqual([c.args[0] for c in mock_apply_async.call_args_list], [(self.data_import.id,)])
+
+    def test_window_requires_a_rolling_import(self):
+        form = OCLDownloadForm(data={
+            'name': 'Window', 'asset': 'BTC', 'interval': '1h', 'start_date': '2024-01-01', 'end_date': '2024-01-10',
+            'rolling_window_days': 30,
+        })
+        self.assertFalse(form.is_valid())
+        self.assertIn('rolling_window_days', form.errors)
@@ -6,4 +6,6 @@ from . import views
 urlpatterns = [
     path('', views.data_view, name='data_view'),
     path('import/', views.data_import_view, name='data_import_view'),
+    path('import/<int:import_id>/cancel/', views.data_import_cancel, name='data_import_cancel'),
+    path('import/<int:import_id>/resume/', views.data_import_resume, name='data_import_resume'),
 ]
\ No newline at end of file
@@ -1,20 +1,78 @@
 import pandas as pd
 import datetime
 
-from .binance_ocl import get_binance_ohlc_history
+from .binance_ocl import get_binance_ohlc_history, iter_binance_ohlc_pages, klines_to_frame
 
-def get_historical_data(timeframe, asset='BTC', start_date=None, end_date=None):
-    # Map backtesting timeframes to Binance intervals
-    timeframe_mapping = {
-        '5m': '5m',
-        '15m': '15m',
-        '30m': '30m',
-        '1h': '1h',
-        '4h': '4h',
-        '1d': '1d'
-    }
+TIMEFRAME_MAPPING = {
+    '5m': '5m',
+    '15m': '15m',
+    '30m': '30m',
+    '1h': '1h',
+    '4h': '4h',
+    '1d': '1d'
+}
+
+# Length of one candle of each timeframe, also used by the backtest feeds (backtesting/feeds.py)
+TIMEFRAME_SECONDS = {
+    '5m': 5 * 60,
+    '15m': 15 * 60,
+    '30m': 30 * 60,
+    '1h': 60 * 60,
+    '4h': 4 * 60 * 60,
+    '1d': 24 * 60 * 60,
+}
+
+
+def get_historical_data(timeframe, asset='BTC', start_date=None, end_date=None, should_stop=None):
+    start_date, end_date = _fetch_range(timeframe, start_date, end_date)
+
+    # Get data from Binance
+    data = get_binance_ohlc_history(
+        asset=asset,
+        interval=TIMEFRAME_MAPPING[timeframe],
+        start_date=start_date,
+        end_date=end_date,
+        should_stop=should_stop
+    )
     
-    if timeframe not in timeframe_mapping:
+    if data is None:
+        raise ValueError("No data returned from Binance")
+    
+    return _format_ohlc_frame(data)
+
+
+def iter_historical_data(timeframe, asset='BTC', start_date=None, end_date=None, should_stop=None):
+    """
+    Like get_historical_data, but yields one DataFrame per fetched Binance page so
+    imports can store candles as they arrive. Yields nothing when there is no data.
+    """
+    start_date, end_date = _fetch_range(timeframe, start_date, end_date)
+    pages = iter_binance_ohlc_pages(
+        asset=asset,
+        interval=TIMEFRAME_MAPPING[timeframe],
+        start_date=start_date,
+        end_date=end_date,
+        should_stop=should_stop
+    )
+    for page in pages:
+        yield _format_ohlc_frame(klines_to_frame(page))
+
+
+def month_chunks(start_date, end_date):
+    """Split the dates start_date..end_date (inclusive) into (first, last) day pairs, one per calendar month."""
+    chunks = []
+    first = start_date
+    while first <= end_date:
+        next_month = (first.replace(day=1) + datetime.timedelta(days=32)).replace(day=1)
+        last = min(next_month - datetime.timedelta(days=1), end_date)
+        chunks.append((first, last))
+        first = next_month
+    return chunks
+
+
+def _fetch_range(timeframe, start_date, end_date):
+    """Validate the timeframe and turn the requested bounds into naive datetimes."""
+    if timeframe not in TIMEFRAME_MAPPING:
         raise ValueError(f"Invalid timeframe: {timeframe}")
         
     # Convert dates to datetime objects if they're date objects
@@ -44,18 +102,11 @@ def get_historical_data(timeframe, asset='BTC', start_date=None, end_date=None):
         start_date = start_date.replace(tzinfo=None)
     if hasattr(end_date, 'tzinfo') and end_date.tzinfo is not None:
         end_date = end_date.replace(tzinfo=None)
+    return start_date, end_date
 
-    # Get data from Binance
-    data = get_binance_ohlc_history(
-        asset=asset,
-        interval=timeframe_mapping[timeframe],
-        start_date=start_date,
-        end_date=end_date
-    )
-    
-    if data is None:
-        raise ValueError("No data returned from Binance")
-    
+
+def _format_ohlc_frame(data):
+    """Binance columns renamed and ordered as Date, Open, High, Low, Close, Volume, Adj_Close."""
     # Rename columns to match expected format
     data = data.rename(columns={
         'time': 'Date',
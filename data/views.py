@@ -1,39 +1,356 @@
 # data/views.py
 
-from django.shortcuts import render, redirect
+from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
-from celery import shared_task
+from celery import chord, shared_task
+from celery.utils import uuid
 from django.core.paginator import Paginator
-from django.db import IntegrityError
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+import datetime
+import pandas as pd
 
-from .utils import get_historical_data, parse_row
-from .models import OCLPrice, OCLDataImport
+from .utils import TIMEFRAME_SECONDS, iter_historical_data, month_chunks
+from .binance_ocl import FetchCancelled
+from arbitrex.celery import app as celery_app
+from arbitrex.cancellation import request_cancel, is_cancelled, clear_cancel, cancel_checker
+from arbitrex import metrics
+from .models import OCLPrice, OCLDataImport, OCLImportChunk
 from .forms import OCLDownloadForm
 
-@shared_task
+# Rows per INSERT when storing a fetched page (at most 1000 candles)
+PAGE_INSERT_BATCH = 1000
+# Imports spanning more days than this are fetched as monthly chunks in parallel
+CHUNKED_IMPORT_MIN_DAYS = 62
+# Retries of a chunk whose fetch failed, and the delay before each
+CHUNK_MAX_RETRIES = 3
+CHUNK_RETRY_SECONDS = 30
+# A rolling import's tail update holds this lock so overlapping beats don't append twice
+TAIL_LOCK_SECONDS = 10 * 60
+
+@shared_task(acks_late=True, reject_on_worker_lost=True)
 def fetch_and_save_ocl_data(data_import_id):
+    """
+    Fetch the import's candles page by page. Each page is stored in one transaction
+    with the checkpoint (open time of its last candle), so when a worker dies the
+    redelivered task, or a resumed import, continues after the checkpoint.
+    """
     data_import = OCLDataImport.objects.get(id=data_import_id)
+    if is_cancelled('import', data_import_id):
+        _mark_cancelled(data_import)
+        return
     data_import.status = 'in_progress'
-    data_import.save()
-    df = get_historical_data(
-        timeframe=data_import.interval,
-        asset=data_import.asset,
-        start_date=data_import.start_date,
-        end_date=data_import.end_date
-    )
+    data_import.save(update_fields=['status'])
+    range_start, range_end = import_bounds(data_import)
+    resuming = data_import.checkpoint is not None
     try:
-        for _, row in df.iterrows():
-            row_data = parse_row(row)
-            OCLPrice.objects.create(**row_data, data_import=data_import)
-        
-        data_import.start_date = df.iloc[0]['Date']
-        data_import.end_date = df.iloc[-1]['Date']
-        data_import.status = 'completed'
-        data_import.save()
+        first_candle = _fetch_pages(
+            data_import, data_import, range_start, range_end, cancel_checker('import', data_import_id)
+        )
+    except FetchCancelled:
+        _mark_cancelled(data_import)
+        return
     except IntegrityError:
         data_import.status = 'failed'
-        data_import.save()
-    
+    except Exception:
+        # Keep the checkpoint; the import can be resumed once the cause is fixed
+        _finish(data_import, 'failed')
+        raise
+    else:
+        if data_import.checkpoint is None:
+            # Binance had no candles for the range
+            data_import.status = 'failed'
+        else:
+            if not resuming:
+                data_import.start_date = first_candle.date()
+            data_import.end_date = data_import.checkpoint.date()
+            data_import.progress = 100
+            data_import.status = 'completed'
+    _finish(data_import, data_import.status)
+
+
+@shared_task(bind=True, acks_late=True, reject_on_worker_lost=True, max_retries=CHUNK_MAX_RETRIES)
+def fetch_import_chunk(self, chunk_id):
+    """
+    Fetch one month of a chunked import, after the chunk's checkpoint. A failing fetch
+    is retried on its own; once its retries run out the chunk is marked failed rather
+    than raising, so the chord callback still settles the import.
+    """
+    chunk = OCLImportChunk.objects.select_related('data_import').get(id=chunk_id)
+    if self.request.id != chunk.task_id:
+        # Queued by an earlier run of the import (e.g. redelivered after a resume);
+        # the chunk now belongs to the current run's task
+        return
+    data_import = chunk.data_import
+    if is_cancelled('import', data_import.id):
+        _finish_chunk(chunk, 'cancelled')
+        return
+    _finish_chunk(chunk, 'in_progress')
+    OCLDataImport.objects.filter(id=data_import.id, status='pending').update(status='in_progress')
+    range_start, range_end = import_bounds(chunk)
+    try:
+        _fetch_pages(chunk, data_import, range_start, range_end, cancel_checker('import', data_import.id))
+    except FetchCancelled:
+        _finish_chunk(chunk, 'cancelled')
+    except Exception as exc:
+        if self.request.retries < self.max_retries:
+            _finish_chunk(chunk, 'pending')
+            raise self.retry(exc=exc, countdown=CHUNK_RETRY_SECONDS)
+        _finish_chunk(chunk, 'failed')
+    else:
+        chunk.progress = 100
+        _finish_chunk(chunk, 'completed')
+    _update_import_progress(data_import)
+
+
+@shared_task
+def finish_chunked_import(data_import_id):
+    """
+    Chord callback once every chunk has run: checks the chunks join up into one
+    continuous series and settles the import. Chunks that stopped short of their
+    month are marked failed, so resuming the import refetches only those.
+    """
+    data_import = OCLDataImport.objects.get(id=data_import_id)
+    chunks = list(data_import.chunks.all())
+    gaps = [chunk for chunk in discontinuous_chunks(data_import, chunks) if chunk.status == 'completed']
+    for chunk in gaps:
+        _finish_chunk(chunk, 'failed')
+
+    statuses = {chunk.status for chunk in chunks}
+    if 'cancelled' in statuses:
+        _mark_cancelled(data_import)
+        return
+    stored = [chunk for chunk in chunks if chunk.checkpoint is not None]
+    if statuses != {'completed'} or not stored:
+        _finish(data_import, 'failed')
+        return
+    data_import.start_date = OCLPrice.objects.filter(data_import=data_import).values_list('date', flat=True).first().date()
+    data_import.checkpoint = stored[-1].checkpoint
+    data_import.end_date = data_import.checkpoint.date()
+    data_import.progress = 100
+    _finish(data_import, 'completed')
+
+
+def discontinuous_chunks(data_import, chunks):
+    """
+    Chunks that leave a hole in the series: a chunk without candles between chunks
+    that have some, or one whose last candle is not the last of its month while a
+    later chunk has candles. Chunks before the asset's first candle or after the
+    last one are expected to be empty.
+    """
+    step = datetime.timedelta(seconds=TIMEFRAME_SECONDS[data_import.interval])
+    stored = [index for index, chunk in enumerate(chunks) if chunk.checkpoint is not None]
+    if not stored:
+        return []
+    gaps = []
+    for chunk in chunks[stored[0]:stored[-1]]:
+        if chunk.checkpoint is None or chunk.checkpoint + step <= import_bounds(chunk)[1]:
+            gaps.append(chunk)
+    return gaps
+
+
+@shared_task
+def update_rolling_imports():
+    """Beat job (settings.CELERY_BEAT_SCHEDULE): queue a tail update of every completed rolling import."""
+    for data_import_id in OCLDataImport.objects.filter(rolling=True, status='completed').values_list('id', flat=True):
+        tail_rolling_import.apply_async((data_import_id,), expires=settings.ROLLING_UPDATE_SECONDS)
+
+
+@shared_task
+def tail_rolling_import(data_import_id):
+    """
+    Append the candles closed since a rolling import's last stored one. Only the tail
+    after the checkpoint is fetched and bulk inserted, the candle at the checkpoint is
+    rewritten (it may have been stored while still open), and the import's range and
+    checkpoint move forward in the same transaction, so the cost follows the new bars
+    rather than the import's size. With rolling_window_days set, older candles are
+    deleted through the (data_import, date) index.
+    """
+    lock = f'rolling-tail:{data_import_id}'
+    if not cache.add(lock, True, timeout=TAIL_LOCK_SECONDS):
+        # The previous update of this import is still running
+        return
+    try:
+        data_import = OCLDataImport.objects.get(id=data_import_id)
+        if not data_import.rolling or data_import.status != 'completed':
+            return
+        if data_import.checkpoint is None:
+            # Imported before checkpoints were recorded
+            data_import.checkpoint = (
+                OCLPrice.objects.filter(data_import=data_import).order_by('-date').values_list('date', flat=True).first()
+            )
+            if data_import.checkpoint is None:
+                return
+        now = timezone.now()
+        pages = iter_historical_data(
+            timeframe=data_import.interval,
+            asset=data_import.asset,
+            start_date=data_import.checkpoint,
+            end_date=now,
+        )
+        for page in pages:
+            _append_page(data_import, page, now)
+        if data_import.rolling_window_days:
+            _trim_rolling_import(data_import)
+    finally:
+        cache.delete(lock)
+
+
+def _append_page(data_import, page, now):
+    """Store a page's closed candles after the checkpoint and advance the checkpoint and end date."""
+    step = datetime.timedelta(seconds=TIMEFRAME_SECONDS[data_import.interval])
+    prices = [price for price in _page_prices(data_import, page) if price.date + step <= now]
+    new = [price for price in prices if price.date > data_import.checkpoint]
+    with transaction.atomic():
+        if prices and prices[0].date == data_import.checkpoint:
+            last = prices[0]
+            OCLPrice.objects.filter(data_import=data_import, date=last.date).update(
+                open=last.open, high=last.high, low=last.low, close=last.close, volume=last.volume
+            )
+        if new:
+            OCLPrice.objects.bulk_create(new, batch_size=PAGE_INSERT_BATCH)
+            data_import.checkpoint = new[-1].date
+            data_import.end_date = data_import.checkpoint.date()
+            data_import.save(update_fields=['checkpoint', 'end_date'])
+    if new:
+        metrics.increment('arbitrex_candles_ingested_total', len(new), asset=data_import.asset, interval=data_import.interval)
+
+
+def _trim_rolling_import(data_import):
+    """Delete candles older than the import's window and move its start date up to the first one kept."""
+    cutoff = data_import.checkpoint - datetime.timedelta(days=data_import.rolling_window_days)
+    deleted, _ = OCLPrice.objects.filter(data_import=data_import, date__lt=cutoff).delete()
+    if deleted:
+        first = OCLPrice.objects.filter(data_import=data_import).values_list('date', flat=True).first()
+        data_import.start_date = first.date()
+        data_import.save(update_fields=['start_date'])
+
+
+def start_import(data_import):
+    """
+    Queue the fetch of an import. Ranges longer than CHUNKED_IMPORT_MIN_DAYS are split
+    into monthly chunks fetched in parallel under a chord; shorter ones run as one task.
+    A resumed chunked import requeues only its unfinished chunks.
+    """
+    chunks = list(data_import.chunks.all())
+    days = (data_import.end_date - data_import.start_date).days + 1
+    if not chunks and data_import.checkpoint is None and days > CHUNKED_IMPORT_MIN_DAYS:
+        chunks = OCLImportChunk.objects.bulk_create([
+            OCLImportChunk(data_import=data_import, start_date=first, end_date=last)
+            for first, last in month_chunks(data_import.start_date, data_import.end_date)
+        ])
+    if not chunks:
+        # The task id is known up front so the import can be cancelled while queued
+        data_import.task_id = uuid()
+        data_import.save(update_fields=['task_id'])
+        fetch_and_save_ocl_data.apply_async((data_import.id,), task_id=data_import.task_id)
+        return
+    chunks = [chunk for chunk in chunks if chunk.status != 'completed']
+    for chunk in chunks:
+        chunk.status = 'pending'
+        chunk.task_id = uuid()
+    OCLImportChunk.objects.bulk_update(chunks, ['status', 'task_id'])
+    # Chunk tasks aren't revoked on cancel (that would break the chord); they see the
+    # cancel flag and stop, and the callback marks the import cancelled
+    data_import.task_id = ''
+    data_import.save(update_fields=['task_id'])
+    chord(
+        fetch_import_chunk.signature((chunk.id,), task_id=chunk.task_id) for chunk in chunks
+    )(finish_chunked_import.si(data_import.id))
+
+
+def import_bounds(data_import):
+    """First and last instant of the requested range (of an import or chunk), in UTC."""
+    return (
+        datetime.datetime.combine(data_import.start_date, datetime.time.min, tzinfo=datetime.timezone.utc),
+        datetime.datetime.combine(data_import.end_date, datetime.time.max, tzinfo=datetime.timezone.utc),
+    )
+
+
+def _fetch_pages(target, data_import, range_start, range_end, should_stop):
+    """
+    Fetch and store the candles of [range_start, range_end] after target's checkpoint.
+    target is the import itself or one of its chunks. Returns the first stored candle's
+    open time, or None when nothing was fetched.
+    """
+    if target.checkpoint is not None:
+        resume_from = target.checkpoint + datetime.timedelta(milliseconds=1)
+    else:
+        resume_from = range_start
+    first_candle = None
+    pages = iter_historical_data(
+        timeframe=data_import.interval,
+        asset=data_import.asset,
+        start_date=resume_from,
+        end_date=range_end,
+        should_stop=should_stop
+    )
+    for page in pages:
+        stored_from = _save_page(target, data_import, page, range_start, range_end)
+        first_candle = first_candle or stored_from
+    return first_candle
+
+
+def _save_page(target, data_import, page, range_start, range_end):
+    """
+    Bulk insert one page of candles and advance target's checkpoint in the same
+    transaction. Returns the open time of the page's first candle.
+    """
+    prices = _page_prices(data_import, page)
+    with transaction.atomic():
+        OCLPrice.objects.bulk_create(prices, batch_size=PAGE_INSERT_BATCH)
+        target.checkpoint = prices[-1].date
+        fetched = (target.checkpoint - range_start) / (range_end - range_start)
+        target.progress = round(min(max(fetched * 100, 0), 100), 1)
+        target.save(update_fields=['checkpoint', 'progress'])
+    if target is not data_import:
+        _update_import_progress(data_import)
+    metrics.increment('arbitrex_candles_ingested_total', len(prices), asset=data_import.asset, interval=data_import.interval)
+    return prices[0].date
+
+
+def _page_prices(data_import, page):
+    """Unsaved OCLPrice rows for a page of candles, with UTC dates."""
+    dates = [date.to_pydatetime() for date in pd.to_datetime(page['Date'], utc=True)]
+    return [
+        OCLPrice(data_import=data_import, date=date, open=o, high=h, low=l, close=c, volume=v)
+        for date, o, h, l, c, v in zip(
+            dates, page['Open'].tolist(), page['High'].tolist(), page['Low'].tolist(),
+            page['Close'].tolist(), page['Volume'].tolist()
+        )
+    ]
+
+
+def _finish_chunk(chunk, status):
+    chunk.status = status
+    chunk.save(update_fields=['status', 'checkpoint', 'progress'])
+
+
+def _update_import_progress(data_import):
+    """Progress of a chunked import: its chunks' progress weighted by their length."""
+    done = total = 0
+    for first, last, progress in data_import.chunks.values_list('start_date', 'end_date', 'progress'):
+        days = (last - first).days + 1
+        done += days * progress
+        total += days
+    if total:
+        OCLDataImport.objects.filter(id=data_import.id).update(progress=round(done / total, 1))
+
+
+def _finish(data_import, status):
+    data_import.status = status
+    data_import.save()
+    metrics.increment('arbitrex_imports_total', status=status)
+
+
+def _mark_cancelled(data_import):
+    data_import.status = 'cancelled'
+    data_import.save()
+    clear_cancel('import', data_import.id)
+    metrics.increment('arbitrex_imports_total', status='cancelled')
+
 @login_required
 def data_view(request):
     # Get all imports
@@ -58,8 +375,38 @@ def data_import_view(request):
         if form.is_valid():
             # print(f"Form is valid: {form.cleaned_data}")
             data_import = form.save()
-            fetch_and_save_ocl_data.delay(data_import.id)
+            start_import(data_import)
             return redirect('data_view')
     else:
         form = OCLDownloadForm()
-    return render(request, 'data/data_import.html', {'form': form})
\ No newline at end of file
+    return render(request, 'data/data_import.html', {'form': form})
+
+@login_required
+def data_import_cancel(request, import_id):
+    """
+    Cancel a queued or running import. Queued tasks are revoked; a running fetch
+    stops before its next Binance page and marks the import cancelled itself.
+    Chunked imports have no task id and are stopped through the cancel flag alone;
+    they keep their status until finish_chunked_import marks them cancelled, so they
+    can't be resumed while chunk tasks of this run are still queued.
+    """
+    data_import = get_object_or_404(OCLDataImport, id=import_id)
+    if request.method == 'POST' and data_import.status in ('pending', 'in_progress'):
+        request_cancel('import', data_import.id)
+        if data_import.task_id:
+            celery_app.control.revoke(data_import.task_id)
+        if data_import.status == 'pending' and not data_import.chunks.exists():
+            data_import.status = 'cancelled'
+            data_import.save(update_fields=['status'])
+    return redirect('data_view')
+
+@login_required
+def data_import_resume(request, import_id):
+    """Requeue a failed or cancelled import; it continues after its checkpoint."""
+    data_import = get_object_or_404(OCLDataImport, id=import_id)
+    if request.method == 'POST' and data_import.status in ('failed', 'cancelled'):
+        clear_cancel('import', data_import.id)
+        data_import.status = 'pending'
+        data_import.save(update_fields=['status'])
+        start_import(data_import)
+    return redirect('data_view')
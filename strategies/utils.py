@@ -77,6 +77,8 @@ def chat_with_anthropic(messages, model="claude-3-5-sonnet-20241022"):
     except Exception as e:
         raise Exception(f"Anthropic API error: {str(e)}")
 
+STRATEGY_FILENAME = '<strategy>'
+
 def load_strategies_and_inject_log(strategy_code, capture_log_func):
     """
     Execute user strategy code, find the strategy class, and inject a custom log method.
@@ -89,7 +91,8 @@ def load_strategies_and_inject_log(strategy_code, capture_log_func):
         'RandomForestClassifier': RandomForestClassifier,
     }
 
-    exec(strategy_code, exec_globals)
+    # A named code object lets tracebacks and profiles attribute frames to user code
+    exec(compile(strategy_code, STRATEGY_FILENAME, 'exec'), exec_globals)
     UserStrategy = None
     for obj in exec_globals.values():
         if isinstance(obj, type) and issubclass(obj, bt.Strategy):